@@ -20,6 +20,11 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# --- Defaults ---
+DEFAULT_DEBOUNCE_SECONDS = 0.2   # Quiet period after the last event before a batch is applied
+DEFAULT_MAX_BATCH_DELAY = 2.0    # Upper bound on how long a continuous stream of events can defer a batch
+INDEX_FILE_NAME = "000-framework-index.mdc"
+
 @dataclass
 class RuleMetadata:
     """Metadata for a framework rule."""
@@ -39,16 +44,16 @@ class RuleChangeHandler(FileSystemEventHandler):
         self.agent = watcher_agent
         
     def on_created(self, event):
-        if event.src_path.endswith('.mdc'):
-            asyncio.create_task(self.agent.handle_rule_created(event.src_path))
+        self.agent.on_created(event)
             
     def on_modified(self, event):
-        if event.src_path.endswith('.mdc'):
-            asyncio.create_task(self.agent.handle_rule_modified(event.src_path))
+        self.agent.on_modified(event)
             
     def on_deleted(self, event):
-        if event.src_path.endswith('.mdc'):
-            asyncio.create_task(self.agent.handle_rule_deleted(event.src_path))
+        self.agent.on_deleted(event)
+        
+    def on_moved(self, event):
+        self.agent.on_moved(event)
 
 class RuleIndexWatcherAgent(FileSystemEventHandler):
     """
@@ -60,25 +65,49 @@ class RuleIndexWatcherAgent(FileSystemEventHandler):
     - Validates rule format and structure
     - Maintains rule dependencies
     - Logs all changes for audit
+    
+    Watchdog events are coalesced: each event (re)starts a debounce timer,
+    and once events stop for `debounce_seconds` (or `max_batch_delay` has
+    passed since the first one) the whole batch is applied, with dependency
+    graph edits limited to the changed rules' edges and a single atomic
+    index write.
     """
     
-    def __init__(self, rules_dir: str = ".cursor/rules"):
+    def __init__(
+        self,
+        rules_dir: str = ".cursor/rules",
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        max_batch_delay: float = DEFAULT_MAX_BATCH_DELAY
+    ):
         self.rules_dir = Path(rules_dir)
-        self.index_file = self.rules_dir / "000-framework-index.mdc"
+        self.index_file = self.rules_dir / INDEX_FILE_NAME
         self.observer = Observer()
         self.handler = RuleChangeHandler(self)
         self.rules: Dict[str, RuleMetadata] = {}
         self.dependency_graph: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}  # Reverse edges of dependency_graph
         self._rule_cache: Dict[str, str] = {}  # Cache of rule file contents
+        self._path_ids: Dict[str, str] = {}  # Rule file path -> rule id
         self.validation_lock = asyncio.Lock()
         self.is_running = False
         
+        # Event coalescing
+        self.debounce_seconds = debounce_seconds
+        self.max_batch_delay = max_batch_delay
+        self._pending_events: Dict[str, bool] = {}  # Path -> deleted; the latest event per path wins
+        self._first_event_at = 0.0
+        self._last_event_at = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.index_writes = 0
+        
     async def start(self):
         """Start monitoring the rules directory."""
         if self.is_running:
             return
             
         # Initial load of current rules
+        self._loop = asyncio.get_running_loop()
         await self.load_all_rules()
         
         # Start watching for changes
@@ -97,20 +126,111 @@ class RuleIndexWatcherAgent(FileSystemEventHandler):
         self.observer.join()
         self.is_running = False
         
+        # Apply whatever is still waiting for its debounce window
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush_events()
+        
     async def load_all_rules(self):
-        """Load all rules from the rules directory."""
+        """Load all rules from the rules directory (one index write for the whole set)."""
         async with self.validation_lock:
+            changed: Set[str] = set()
             for root, _, files in os.walk(str(self.rules_dir)):
                 for file in files:
                     if file.endswith('.mdc'):
                         # Explicitly skip the index file itself
-                        if file == "000-framework-index.mdc":
+                        if file == INDEX_FILE_NAME:
                             continue 
                         path = os.path.join(root, file)
-                        await self.handle_rule_change(path)
-                    
+                        changed |= await self._apply_rule_change(path)
+            if changed:
+                await self._revalidate(changed)
+                await self.update_index()
+                
+    # --- Watchdog events (called on the observer thread) ---
+    def on_created(self, event):
+        self._dispatch_event(event, event.src_path, deleted=False)
+        
+    def on_modified(self, event):
+        self._dispatch_event(event, event.src_path, deleted=False)
+        
+    def on_deleted(self, event):
+        self._dispatch_event(event, event.src_path, deleted=True)
+        
+    def on_moved(self, event):
+        self._dispatch_event(event, event.src_path, deleted=True)
+        self._dispatch_event(event, event.dest_path, deleted=False)
+        
+    def _dispatch_event(self, event, path: str, deleted: bool) -> None:
+        if getattr(event, 'is_directory', False) or not path.endswith('.mdc'):
+            return
+        if os.path.basename(path) == INDEX_FILE_NAME:
+            return # Our own index writes
+        if self._loop is None or self._loop.is_closed():
+            logger.warning(f"Dropping rule event for {path}: watcher loop is not running")
+            return
+        self._loop.call_soon_threadsafe(self.queue_rule_event, path, deleted)
+        
+    # --- Event coalescing ---
+    def queue_rule_event(self, path: str, deleted: bool = False) -> None:
+        """Record a rule file event and (re)start the debounce timer. Must be called on the event loop."""
+        loop = asyncio.get_running_loop() if self._loop is None else self._loop
+        now = loop.time()
+        if not self._pending_events:
+            self._first_event_at = now
+        self._pending_events[path] = deleted
+        self._last_event_at = now
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._debounced_flush())
+            
+    async def _debounced_flush(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            flush_at = min(self._last_event_at + self.debounce_seconds, self._first_event_at + self.max_batch_delay)
+            delay = flush_at - loop.time()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        self._flush_task = None # Events from here on start a new batch
+        await self.flush_events()
+        
+    async def wait_for_pending(self) -> None:
+        """Wait until every queued event has been applied."""
+        while self._flush_task is not None or self._pending_events:
+            if self._flush_task is not None:
+                await asyncio.shield(self._flush_task)
+            else:
+                await self.flush_events()
+                
+    async def flush_events(self) -> int:
+        """Apply all queued events as one batch; returns the number of files processed."""
+        async with self.validation_lock:
+            batch, self._pending_events = self._pending_events, {}
+            if not batch:
+                return 0
+            changed: Set[str] = set()
+            for path, deleted in batch.items():
+                if deleted or not os.path.exists(path):
+                    changed |= self._remove_rule_file(path)
+                else:
+                    changed |= await self._apply_rule_change(path)
+            if changed:
+                await self._revalidate(changed)
+                await self.update_index()
+            logger.info(f"Applied {len(batch)} rule file event(s), {len(changed)} rule(s) changed")
+            return len(batch)
+            
     async def handle_rule_change(self, path: str):
         """Handle a rule file being created or modified."""
+        changed = await self._apply_rule_change(path)
+        if changed:
+            await self._revalidate(changed)
+            await self.update_index()
+            logger.debug(f"handle_rule_change finished for: {path}")
+            
+    async def _apply_rule_change(self, path: str) -> Set[str]:
+        """Parse one rule file into self.rules and its graph edges; returns the ids of rules that changed."""
         logger.debug(f"handle_rule_change called for: {path}")
         try:
             rule_content = await self.read_rule_file(path)
@@ -123,7 +243,7 @@ class RuleIndexWatcherAgent(FileSystemEventHandler):
             # --- Restore Cache Check --- 
             if path in self._rule_cache and self._rule_cache[path] == rule_hash:
                 logger.debug(f"  Skipping unchanged rule (hash match): {path}")
-                return
+                return set()
             # ---------------------------
             
             logger.debug(f"  Updating cache for {path} with hash {rule_hash}")
@@ -133,12 +253,11 @@ class RuleIndexWatcherAgent(FileSystemEventHandler):
             if not rule_data:
                 logger.warning(f"Could not parse rule file {path}, skipping update.")
                 # Optionally remove from self.rules if it existed before but is now invalid
-                rule_id_from_path = self.get_rule_id(path)
+                rule_id_from_path = self._path_ids.get(path, self.get_rule_id(path))
                 if rule_id_from_path in self.rules:
                     logger.info(f"Removing previously valid rule {rule_id_from_path} due to parsing failure.")
-                    del self.rules[rule_id_from_path]
-                    # Consider calling update_dependency_graph and update_index here too
-                return
+                    return self._remove_rule(rule_id_from_path)
+                return set()
 
             rule_id = rule_data.get('id') # Use get to avoid KeyError if id missing
             if not rule_id:
@@ -169,45 +288,65 @@ class RuleIndexWatcherAgent(FileSystemEventHandler):
 
             logger.debug(f"  Created metadata object: {metadata}")
 
-            validation_errors = await self.validate_rule(metadata)
-            metadata.validation_errors = validation_errors
-            logger.debug(f"  Validation errors: {validation_errors}")
+            changed = {rule_id}
+            previous_id = self._path_ids.get(path)
+            if previous_id is not None and previous_id != rule_id:
+                changed |= self._remove_rule(previous_id) # The file now declares a different id
+            self._path_ids[path] = rule_id
 
+            # Validation happens once per batch, in _revalidate, when all dependencies are known
             self.rules[rule_id] = metadata
+            self._set_dependencies(rule_id, metadata.dependencies)
             logger.debug(f"  Updated self.rules[{rule_id}]: {self.rules[rule_id]}")
-            
-            # Check dependencies and update index AFTER updating self.rules
-            await self.update_dependency_graph()
-            await self.update_index() 
-            logger.debug(f"handle_rule_change finished for: {path}")
+            return changed
 
         except Exception as e:
             logger.exception(f"Error handling rule change for {path}: {e}")
+            return set()
+            
+    def _remove_rule_file(self, path: str) -> Set[str]:
+        """Forget a deleted rule file; returns the ids of rules that changed."""
+        self._rule_cache.pop(path, None)
+        rule_id = self._path_ids.pop(path, None) or self.get_rule_id(path)
+        return self._remove_rule(rule_id)
+        
+    def _remove_rule(self, rule_id: str) -> Set[str]:
+        if rule_id not in self.rules:
+            return set()
+        rule = self.rules.pop(rule_id)
+        if self._path_ids.get(rule.path) == rule_id:
+            del self._path_ids[rule.path]
+        self._set_dependencies(rule_id, None)
+        return {rule_id}
+        
+    async def _revalidate(self, changed: Set[str]) -> None:
+        """Validate the changed rules and the rules that depend on them."""
+        affected = set(changed)
+        for rule_id in changed:
+            affected |= self._dependents.get(rule_id, set())
+        for rule_id in affected:
+            rule = self.rules.get(rule_id)
+            if rule is not None:
+                rule.validation_errors = await self.validate_rule(rule)
+                logger.debug(f"  Validation errors for {rule_id}: {rule.validation_errors}")
 
     async def handle_rule_created(self, file_path: str):
         """Handle creation of a new rule file."""
-        path = Path(file_path)
-        if rule_data := await self.parse_rule_file(path):
-            self.rules[rule_data['name']] = rule_data
-            await self.update_index()
-            print(f"Added new rule: {path.name}")
+        await self.handle_rule_change(str(file_path))
+        print(f"Added new rule: {Path(file_path).name}")
             
     async def handle_rule_modified(self, file_path: str):
         """Handle modification of an existing rule file."""
-        path = Path(file_path)
-        if rule_data := await self.parse_rule_file(path):
-            self.rules[rule_data['name']] = rule_data
-            await self.update_index()
-            print(f"Updated rule: {path.name}")
+        await self.handle_rule_change(str(file_path))
+        print(f"Updated rule: {Path(file_path).name}")
             
     async def handle_rule_deleted(self, file_path: str):
         """Handle deletion of a rule file."""
-        path = Path(file_path)
-        rule_id = path.stem
-        if rule_id in self.rules:
-            del self.rules[rule_id]
+        changed = self._remove_rule_file(str(file_path))
+        if changed:
+            await self._revalidate(changed)
             await self.update_index()
-            print(f"Removed rule: {path.name}")
+            print(f"Removed rule: {Path(file_path).name}")
             
     async def validate_rules(self) -> List[str]:
         """Validate all rules for proper format and dependencies."""
@@ -276,7 +415,7 @@ class RuleIndexWatcherAgent(FileSystemEventHandler):
         return False
 
     async def update_dependency_graph(self):
-        """Update the dependency graph for all rules."""
+        """Rebuild the dependency graph for all rules (events use _set_dependencies instead)."""
         new_graph: Dict[str, Set[str]] = {}
         
         for rule_id, rule in self.rules.items():
@@ -290,6 +429,42 @@ class RuleIndexWatcherAgent(FileSystemEventHandler):
                 continue
                 
         self.dependency_graph = new_graph
+        self._dependents = {}
+        for rule_id, deps in new_graph.items():
+            for dep in deps:
+                self._dependents.setdefault(dep, set()).add(rule_id)
+                
+    def _set_dependencies(self, rule_id: str, dependencies: Optional[List[str]]) -> None:
+        """Replace one rule's outgoing edges (None removes the rule), touching no other rule's edges."""
+        old = self.dependency_graph.get(rule_id, set())
+        new = set(dependencies) if dependencies is not None else set()
+        for dep in old - new:
+            dependents = self._dependents.get(dep)
+            if dependents is not None:
+                dependents.discard(rule_id)
+                if not dependents:
+                    del self._dependents[dep]
+        for dep in new - old:
+            self._dependents.setdefault(dep, set()).add(rule_id)
+        if dependencies is None:
+            self.dependency_graph.pop(rule_id, None)
+            return
+        self.dependency_graph[rule_id] = new
+        # A cycle created by this edit has to pass through this rule
+        if self._depends_on(new, rule_id):
+            print(f"Warning: Circular dependency detected for rule {rule_id}")
+            
+    def _depends_on(self, start: Set[str], target: str) -> bool:
+        seen: Set[str] = set()
+        stack = list(start)
+        while stack:
+            rule_id = stack.pop()
+            if rule_id == target:
+                return True
+            if rule_id not in seen:
+                seen.add(rule_id)
+                stack.extend(self.dependency_graph.get(rule_id, ()))
+        return False
 
     async def reindex_rules(self):
         """Reindex all rules based on the framework index."""
@@ -432,8 +607,12 @@ class RuleIndexWatcherAgent(FileSystemEventHandler):
             new_index_content = f"{pre_yaml.strip()}\n---\n{yaml_string.strip()}\n---\n{post_yaml.strip()}".strip() + "\n"
 
             # Only write if content has changed
-            if not self.index_file.exists() or self.index_file.read_text() != new_index_content:
-                self.index_file.write_text(new_index_content)
+            if existing_content != new_index_content:
+                # Write a sibling temp file and rename it over the index, so readers never see a partial index
+                tmp_file = self.index_file.with_name(f".{self.index_file.name}.{os.getpid()}.tmp")
+                tmp_file.write_text(new_index_content)
+                os.replace(tmp_file, self.index_file)
+                self.index_writes += 1
                 print("Framework index updated.")
                 
         except Exception as e:
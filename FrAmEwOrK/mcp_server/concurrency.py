@@ -0,0 +1,136 @@
+"""
+MCP Server Concurrency
+
+This module provides in-flight request coalescing (single-flight) and
+per-tool concurrency limits with queue-depth metrics for the MCP server.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# --- Defaults ---
+DEFAULT_MAX_CONCURRENCY = 16  # Concurrent executions per tool unless the tool sets max_concurrency
+
+
+def canonical_params(params: Dict[str, Any]) -> str:
+    """Order-independent string form of tool parameters (nested dicts included)."""
+    return json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=repr)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and get the same result (or exception).
+    Waiters are shielded, so one caller being cancelled doesn't cancel the
+    work for the rest. Nothing is kept once the task finishes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = self.joined = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.joined += 1
+            return await asyncio.shield(inflight)
+        self.leaders += 1
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, done: asyncio.Future) -> None:
+        if self._inflight.get(key) is done:
+            del self._inflight[key]
+
+    def is_inflight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "leaders": self.leaders, "joined": self.joined}
+
+
+class ConcurrencyLimit:
+    """Semaphore for one tool (`async with limit:`) that also tracks running/queued calls and time spent queued."""
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError(f"Concurrency limit must be at least 1, got {limit}")
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self.running = self.waiting = 0
+        self.max_running = self.max_waiting = 0
+        self.completed = 0
+        self.queued_calls = 0         # Calls that had to wait for a slot
+        self.total_wait_time = 0.0
+
+    async def __aenter__(self) -> "ConcurrencyLimit":
+        if self._semaphore.locked():
+            # Slow path: queue for a slot and record how long it took
+            self.queued_calls += 1
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            start = time.perf_counter()
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            self.total_wait_time += time.perf_counter() - start
+        else:
+            await self._semaphore.acquire()
+        self.running += 1
+        if self.running > self.max_running:
+            self.max_running = self.running
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.running -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit, "running": self.running, "queue_depth": self.waiting,
+            "max_running": self.max_running, "max_queue_depth": self.max_waiting,
+            "completed": self.completed, "queued_calls": self.queued_calls,
+            "avg_wait_time": self.total_wait_time / self.completed if self.completed else 0.0
+        }
+
+
+class ConcurrencyLimiter:
+    """Per-tool ConcurrencyLimits, created on first use with the tool's limit or the default."""
+
+    def __init__(self, default_limit: Optional[int] = DEFAULT_MAX_CONCURRENCY):
+        self.default_limit = default_limit
+        self._limits: Dict[str, ConcurrencyLimit] = {}
+        self._unlimited = set()
+
+    def set_limit(self, tool_name: str, limit: Optional[int]) -> None:
+        """Sets a tool's limit (None: unlimited). Calls already queued keep the old semaphore."""
+        if limit is None:
+            self._limits.pop(tool_name, None)
+            self._unlimited.add(tool_name)
+        else:
+            self._limits[tool_name] = ConcurrencyLimit(limit)
+            self._unlimited.discard(tool_name)
+
+    def get(self, tool_name: str, limit: Optional[int] = None) -> Optional[ConcurrencyLimit]:
+        existing = self._limits.get(tool_name)
+        if existing is not None or tool_name in self._unlimited:
+            return existing
+        limit = limit or self.default_limit
+        if limit is None:
+            return None
+        existing = self._limits[tool_name] = ConcurrencyLimit(limit)
+        return existing
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {tool_name: limit.stats() for tool_name, limit in self._limits.items()}
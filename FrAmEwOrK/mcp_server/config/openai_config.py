@@ -14,6 +14,11 @@ class OpenAIConfig:
     max_retries: int = 3
     timeout: int = 30
     organization: Optional[str] = None
+    embedding_cache_size: int = 10000 # Max cached embeddings (LRU)
+    embedding_cache_path: Optional[str] = None # .npz file; None keeps the cache in memory only
+    embedding_cache_save_every: int = 256 # New embeddings that trigger a background cache write
+    embedding_cache_save_interval: float = 60.0 # Max seconds unsaved embeddings wait for a write
+    corpus_index_cache_size: int = 8 # Embedded corpora kept for repeated semantic_search calls
 
 def get_openai_config() -> OpenAIConfig:
     """Get OpenAI configuration from environment variables"""
@@ -27,5 +32,10 @@ def get_openai_config() -> OpenAIConfig:
         embedding_model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002"),
         max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "3")),
         timeout=int(os.getenv("OPENAI_TIMEOUT", "30")),
-        organization=os.getenv("OPENAI_ORGANIZATION")
+        organization=os.getenv("OPENAI_ORGANIZATION"),
+        embedding_cache_size=int(os.getenv("OPENAI_EMBEDDING_CACHE_SIZE", "10000")),
+        embedding_cache_path=os.getenv("OPENAI_EMBEDDING_CACHE_PATH"),
+        embedding_cache_save_every=int(os.getenv("OPENAI_EMBEDDING_CACHE_SAVE_EVERY", "256")),
+        embedding_cache_save_interval=float(os.getenv("OPENAI_EMBEDDING_CACHE_SAVE_INTERVAL", "60")),
+        corpus_index_cache_size=int(os.getenv("OPENAI_CORPUS_INDEX_CACHE_SIZE", "8"))
     ) 
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Embedding Cache and Corpus Index
+
+Bounded, content-addressed embedding cache and a reusable, pre-normalised
+corpus matrix for vectorised semantic search.
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(text: str, model: str = "") -> str:
+    """Cache key for an embedding: SHA-256 of the model name and the text."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Size-bounded LRU cache of embeddings keyed by content hash.
+
+    When a persist path is given the cache is loaded from it on start-up and
+    written back atomically, as an .npz of keys and a float32 matrix. Writes
+    are batched: save_if_due() starts a background write once save_every new
+    embeddings have accumulated or save_interval seconds have passed since the
+    last one, and close() (also run at exit) writes whatever is left.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        persist_path: Optional[str] = None,
+        save_every: int = 256,
+        save_interval: float = 60.0
+    ):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.save_every = max(1, save_every)
+        self.save_interval = save_interval
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._dirty_count = 0
+        self._last_save = time.monotonic()
+        self._write_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            self.load()
+            atexit.register(self.close)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._entries.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, key: str, vector: Sequence[float]) -> None:
+        self._entries[key] = np.asarray(vector, dtype=np.float32)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty_count += 1
+
+    def load(self) -> None:
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                keys, vectors = data["keys"], data["vectors"]
+            # Keep the most recently used tail if the file holds more than fits
+            for key, vector in list(zip(keys.tolist(), vectors))[-self.max_entries:]:
+                self._entries[key] = vector
+            logger.info(f"Loaded {len(self._entries)} cached embeddings from {self.persist_path}")
+        except Exception as e:
+            logger.warning(f"Could not load embedding cache {self.persist_path}: {e}")
+
+    # --- Persistence ---
+    def save_due(self) -> bool:
+        if not self.persist_path or not self._dirty_count:
+            return False
+        return self._dirty_count >= self.save_every or time.monotonic() - self._last_save >= self.save_interval
+
+    def _snapshot(self) -> Tuple[List[str], List[np.ndarray]]:
+        """Keys and vector references in LRU order; cheap, and safe to hand to another thread."""
+        self._dirty_count = 0
+        self._last_save = time.monotonic()
+        return list(self._entries.keys()), list(self._entries.values())
+
+    def _write(self, keys: List[str], vectors: List[np.ndarray]) -> None:
+        if not keys:
+            return
+        with self._write_lock:
+            directory = os.path.dirname(self.persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.persist_path + ".tmp.npz"
+            np.savez(tmp_path, keys=np.array(keys), vectors=np.stack(vectors))
+            os.replace(tmp_path, self.persist_path)
+
+    def _write_in_background(self, keys: List[str], vectors: List[np.ndarray]) -> None:
+        try:
+            self._write(keys, vectors)
+        except Exception as e:
+            logger.warning(f"Could not save embedding cache {self.persist_path}: {e}")
+            self._dirty_count += len(keys) # Retry on the next save_if_due()
+
+    def save_if_due(self) -> Optional[threading.Thread]:
+        """Starts a background write if save_due(); returns the writer thread, if one was started."""
+        if not self.save_due() or (self._writer is not None and self._writer.is_alive()):
+            return None
+        self._writer = threading.Thread(
+            target=self._write_in_background, args=self._snapshot(), name="embedding-cache-save", daemon=True
+        )
+        self._writer.start()
+        return self._writer
+
+    def save(self) -> None:
+        """Writes the cache to its persist path now if anything changed."""
+        if not self.persist_path or not self._dirty_count:
+            return
+        self._write(*self._snapshot())
+
+    def close(self) -> None:
+        """Waits for an in-flight background write, then saves any remaining changes."""
+        if self._writer is not None:
+            self._writer.join()
+        self.save()
+
+
+class CorpusIndex:
+    """
+    A corpus embedded once and stored as an L2-normalised float32 matrix, so a
+    query is one matrix-vector product plus an argpartition for the top-k.
+    """
+
+    def __init__(self, texts: List[str], embeddings: Iterable[Sequence[float]]):
+        self.texts = list(texts)
+        matrix = np.asarray(list(embeddings), dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(self.texts):
+            raise ValueError("CorpusIndex needs one embedding per text")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def search(self, query_embedding: Sequence[float], top_k: int = 5) -> List[Tuple[float, str]]:
+        """Returns up to top_k (cosine similarity, text) pairs, best first."""
+        if not self.texts or top_k <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        scores = self.matrix @ query
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.texts[i]) for i in top]
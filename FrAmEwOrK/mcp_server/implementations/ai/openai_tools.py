@@ -7,7 +7,7 @@ This module implements AI tools using OpenAI's APIs with Layer of Thought proces
 import os
 import json
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 import openai
 from openai import AsyncOpenAI
 from datetime import datetime
@@ -16,6 +16,8 @@ from ...config import get_openai_config
 import numpy as np
 from framework.mcp_server.config.openai_config import OpenAIConfig
 import hashlib
+from collections import OrderedDict
+from .embedding_index import CorpusIndex, EmbeddingCache, content_key
 
 # Initialize OpenAI client
 client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -46,7 +48,13 @@ class LayerOfThought:
         """Initialize with OpenAI configuration."""
         self.config = config or get_openai_config()
         self.client = openai.AsyncClient(api_key=self.config.api_key)
-        self._embedding_cache = {}
+        self._embedding_cache = EmbeddingCache(
+            max_entries=self.config.embedding_cache_size,
+            persist_path=self.config.embedding_cache_path,
+            save_every=self.config.embedding_cache_save_every,
+            save_interval=self.config.embedding_cache_save_interval
+        )
+        self._corpus_indexes: "OrderedDict[str, CorpusIndex]" = OrderedDict()  # LRU of embedded corpora
         self._layer_result_cache = {}  # In-memory cache for layer results
 
     def _cache_key(self, input_data: str, layer_config: LayerConfig, context: Dict[str, Any]) -> str:
@@ -154,47 +162,83 @@ class LayerOfThought:
         result = await self.process_layer(code, config, context)
         return json.loads(result)
 
-    async def batch_get_embeddings(self, texts: List[str]) -> Dict[str, List[float]]:
+    async def batch_get_embeddings(self, texts: List[str]) -> Dict[str, np.ndarray]:
         """
         Batch get embeddings for a list of texts, using cache where possible.
         """
-        uncached = [t for t in texts if t not in self._embedding_cache]
+        model = self.config.embedding_model
+        found = {}
+        uncached = {}  # text -> cache key, in first-seen order
+        for text in texts:
+            if text in found or text in uncached:
+                continue
+            key = content_key(text, model)
+            vector = self._embedding_cache.get(key)
+            if vector is None:
+                uncached[text] = key
+            else:
+                found[text] = vector
         if uncached:
             response = await self.client.embeddings.create(
-                model=self.config.embedding_model,
-                input=uncached
+                model=model,
+                input=list(uncached)
             )
-            for text, emb in zip(uncached, [d.embedding for d in response.data]):
-                self._embedding_cache[text] = emb
-        return {t: self._embedding_cache[t] for t in texts}
+            for (text, key), emb in zip(uncached.items(), [d.embedding for d in response.data]):
+                self._embedding_cache.put(key, emb)
+                found[text] = np.asarray(emb, dtype=np.float32)
+            self._embedding_cache.save_if_due()  # Batched, off the event loop
+        return {t: found[t] for t in texts}
 
-    async def _get_embedding(self, text: str) -> List[float]:
+    async def _get_embedding(self, text: str) -> np.ndarray:
         """Get embedding for text, using cache if available."""
-        if text in self._embedding_cache:
-            return self._embedding_cache[text]
         # Use batch_get_embeddings for single text for consistency
         return (await self.batch_get_embeddings([text]))[text]
 
+    async def build_corpus_index(self, corpus: List[str]) -> CorpusIndex:
+        """Embeds a corpus once into a normalised matrix that can be searched repeatedly."""
+        embeddings = await self.batch_get_embeddings(corpus)
+        return CorpusIndex(corpus, [embeddings[doc] for doc in corpus])
+
+    def _corpus_key(self, corpus: List[str]) -> str:
+        return content_key("\x1f".join(corpus), self.config.embedding_model)
+
+    def _remember_corpus_index(self, key: str, index: CorpusIndex) -> None:
+        self._corpus_indexes[key] = index
+        self._corpus_indexes.move_to_end(key)
+        while len(self._corpus_indexes) > self.config.corpus_index_cache_size:
+            self._corpus_indexes.popitem(last=False)
+
     async def semantic_search(
         self,
         query: str,
-        corpus: List[str],
+        corpus: Union[List[str], CorpusIndex],
         top_k: int = 5
     ) -> List[Tuple[float, str]]:
         """
         Perform semantic search using embeddings, batching embedding calls for efficiency.
+        Pass a CorpusIndex from build_corpus_index() to reuse an embedded corpus; a plain
+        list is matched against the most recently used corpora, so repeating one reuses
+        its matrix and only the query is embedded.
         """
+        if isinstance(corpus, CorpusIndex):
+            query_embedding = await self._get_embedding(query)
+            return corpus.search(query_embedding, top_k)
+        key = self._corpus_key(corpus)
+        index = self._corpus_indexes.get(key)
+        if index is not None:
+            self._corpus_indexes.move_to_end(key)
+            query_embedding = await self._get_embedding(query)
+            return index.search(query_embedding, top_k)
         # Batch get all embeddings (query + corpus)
         all_texts = [query] + corpus
         embeddings = await self.batch_get_embeddings(all_texts)
-        query_embedding = embeddings[query]
-        results = []
-        for doc in corpus:
-            doc_embedding = embeddings[doc]
-            similarity = np.dot(query_embedding, doc_embedding)
-            results.append((similarity, doc))
-        results.sort(reverse=True)
-        return results[:top_k]
+        index = CorpusIndex(corpus, [embeddings[doc] for doc in corpus])
+        self._remember_corpus_index(key, index)
+        return index.search(embeddings[query], top_k)
+
+    def close(self) -> None:
+        """Flushes the embedding cache to disk."""
+        self._embedding_cache.close()
 
     async def process_with_triggers(
         self,
@@ -265,30 +309,10 @@ async def semantic_search(
     top_k: int = 5
 ) -> List[Dict[str, Any]]:
     """Perform semantic search using embeddings"""
-    client = openai.AsyncClient(api_key=get_openai_config().api_key)
-    
-    # Get query embedding
-    query_response = await client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=query
-    )
-    query_embedding = query_response.data[0].embedding
-    
-    # Get corpus embeddings
-    corpus_response = await client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=corpus
-    )
-    corpus_embeddings = [item.embedding for item in corpus_response.data]
-    
-    # Calculate similarities and return top_k results
-    similarities = []
-    for i, emb in enumerate(corpus_embeddings):
-        similarity = sum(a * b for a, b in zip(query_embedding, emb))
-        similarities.append((similarity, corpus[i]))
-    
-    similarities.sort(reverse=True)
-    return [{"text": text, "score": score} for score, text in similarities[:top_k]]
+    # lot_processor keeps recently used corpora as CorpusIndex matrices, so repeating one
+    # only embeds the query
+    results = await lot_processor.semantic_search(query, corpus, top_k)
+    return [{"text": text, "score": score} for score, text in results]
 
 async def layer_thought_process(
     input_data: Any,
@@ -55,9 +55,9 @@ class FrameworkMCPIntegration:
             logger.error(f"Failed to load implementation for tool {tool.name}: {e}")
             return None
             
-    async def execute_tool(self, tool_name: str, params: Dict[str, Any]) -> Any:
+    async def execute_tool(self, tool_name: str, params: Dict[str, Any], client_id: Optional[str] = None) -> Any:
         """Execute an MCP tool."""
-        result = await self.server.execute_tool(tool_name, params)
+        result = await self.server.execute_tool(tool_name, params, client_id=client_id)
         return result.result
         
 class AgentMCPInterface:
@@ -84,7 +84,7 @@ class AgentMCPInterface:
         self.tool_usage[tool_name] = self.tool_usage.get(tool_name, 0) + 1
         
         try:
-            return await self.framework_mcp.execute_tool(tool_name, params)
+            return await self.framework_mcp.execute_tool(tool_name, params, client_id=self.agent_id)
         except Exception as e:
             logger.error(f"Tool execution failed for agent {self.agent_id}: {e}")
             raise
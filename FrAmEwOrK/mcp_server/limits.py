@@ -0,0 +1,189 @@
+"""
+MCP Server Limits
+
+This module provides the token-bucket rate limiter and the bounded TTL result
+cache used by the MCP server. Both do O(1) work per call and expire state
+lazily, so the server needs no background sweeps.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# --- Defaults ---
+RATE_LIMIT_WINDOW = 60.0         # Seconds; ToolDefinition.rate_limit is calls per minute
+DEFAULT_MAX_BUCKETS = 10_000     # (client, tool) buckets kept before the least recently used is dropped
+DEFAULT_SHARD_SIZE = 1024        # Cached results kept per tool
+
+Clock = Callable[[], float]
+
+
+class TokenBucket:
+    """Token bucket holding up to `capacity` tokens, refilled continuously at `refill_rate` per second."""
+
+    __slots__ = ("capacity", "refill_rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, refill_rate: float, now: float):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def try_acquire(self, now: float, tokens: float = 1.0) -> bool:
+        """Takes `tokens` if available; refill is computed from the elapsed time, not by a timer."""
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def retry_after(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` are available (as of the last update)."""
+        missing = tokens - self.tokens
+        return max(0.0, missing / self.refill_rate) if self.refill_rate else float("inf")
+
+
+class RateLimiter:
+    """
+    Per-key token buckets, where a key is typically (client_id, tool_name).
+
+    A limit of N calls per window becomes a bucket of N tokens refilled at
+    N/window per second, so a burst of N is allowed and the sustained rate
+    matches the old sliding window. Buckets live in an LRU bounded by
+    `max_buckets`; a dropped bucket was idle longest and would be (nearly)
+    full anyway.
+    """
+
+    def __init__(self, window: float = RATE_LIMIT_WINDOW, max_buckets: int = DEFAULT_MAX_BUCKETS, clock: Clock = time.monotonic):
+        self.window = float(window)
+        self.max_buckets = max(1, int(max_buckets))
+        self.clock = clock
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self.allowed = self.rejected = 0
+
+    def try_acquire(self, key: Hashable, limit: int) -> bool:
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(limit, limit / self.window, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            if bucket.capacity != limit: # Tool re-registered with a different limit
+                bucket.capacity, bucket.refill_rate = float(limit), limit / self.window
+        if bucket.try_acquire(now):
+            self.allowed += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_after(self, key: Hashable) -> float:
+        bucket = self._buckets.get(key)
+        return bucket.retry_after() if bucket is not None else 0.0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> Dict[str, int]:
+        return {"buckets": len(self._buckets), "max_buckets": self.max_buckets, "allowed": self.allowed, "rejected": self.rejected}
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire `ttl` seconds after being stored.
+
+    Expiry is lazy: a stale entry is dropped when it is read, and each insert
+    pops stale entries from the cold end of the LRU until it reaches a live
+    one. Nothing ever scans the whole cache.
+    """
+
+    def __init__(self, ttl: float, max_size: int = DEFAULT_SHARD_SIZE, clock: Clock = time.monotonic):
+        self.ttl = float(ttl)
+        self.max_size = max(1, int(max_size))
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = self.misses = self.expired = self.evicted = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        now = self.clock()
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while self._entries:
+            oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[oldest_key]
+            self.expired += 1
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries), "max_size": self.max_size, "hits": self.hits,
+            "misses": self.misses, "expired": self.expired, "evicted": self.evicted
+        }
+
+
+class ResultCache:
+    """
+    Tool results sharded by tool name: one TTLCache per tool, sized
+    `shard_size` and using that tool's `cache_ttl`, so one busy tool cannot
+    evict another's results and dropping a tool's results is a single delete.
+    """
+
+    def __init__(self, shard_size: int = DEFAULT_SHARD_SIZE, clock: Clock = time.monotonic):
+        self.shard_size = shard_size
+        self.clock = clock
+        self._shards: Dict[str, TTLCache] = {}
+
+    def shard(self, tool_name: str, ttl: float) -> TTLCache:
+        shard = self._shards.get(tool_name)
+        if shard is None or shard.ttl != ttl:
+            shard = self._shards[tool_name] = TTLCache(ttl, self.shard_size, self.clock)
+        return shard
+
+    def get(self, tool_name: str, ttl: float, key: Hashable) -> Optional[Any]:
+        return self.shard(tool_name, ttl).get(key)
+
+    def put(self, tool_name: str, ttl: float, key: Hashable, value: Any) -> None:
+        self.shard(tool_name, ttl).put(key, value)
+
+    def invalidate(self, tool_name: str) -> None:
+        self._shards.pop(tool_name, None)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards.values())
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {tool_name: shard.stats() for tool_name, shard in self._shards.items()}
@@ -6,20 +6,30 @@ This module implements the core MCP server functionality.
 
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable
 from datetime import datetime
 from .tools import ToolCategory, ToolDefinition, ToolResult
+from .limits import DEFAULT_MAX_BUCKETS, DEFAULT_SHARD_SIZE, RateLimiter, ResultCache
+from .concurrency import DEFAULT_MAX_CONCURRENCY, ConcurrencyLimiter, SingleFlight, canonical_params
 
 logger = logging.getLogger(__name__)
 
 class MCPServer:
     """MCP Server implementation."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache_shard_size: int = DEFAULT_SHARD_SIZE,
+        max_rate_limit_buckets: int = DEFAULT_MAX_BUCKETS,
+        max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY
+    ):
         self.tools: Dict[str, ToolDefinition] = {}
         self.tool_implementations: Dict[str, Callable] = {}
-        self.results_cache: Dict[str, ToolResult] = {}
-        self.rate_limits: Dict[str, List[datetime]] = {}
+        # Both expire lazily on access, so no background cleanup tasks are needed
+        self.results_cache = ResultCache(shard_size=cache_shard_size)
+        self.rate_limits = RateLimiter(max_buckets=max_rate_limit_buckets)
+        self.single_flight = SingleFlight()
+        self.concurrency = ConcurrencyLimiter(default_limit=max_concurrency)
         self._running = False
         self._tasks = []
         
@@ -32,10 +42,6 @@ class MCPServer:
         logger.info("Starting MCP server")
         self._tasks = []
         
-        # Start background tasks
-        self._tasks.append(asyncio.create_task(self._cache_cleanup()))
-        self._tasks.append(asyncio.create_task(self._rate_limit_cleanup()))
-        
     async def stop(self):
         """Stop the MCP server."""
         if not self._running:
@@ -58,10 +64,17 @@ class MCPServer:
             
         self.tools[tool_def.name] = tool_def
         self.tool_implementations[tool_def.name] = implementation
+        self.results_cache.invalidate(tool_def.name)
+        if tool_def.max_concurrency is not None:
+            self.concurrency.set_limit(tool_def.name, tool_def.max_concurrency)
         logger.info(f"Registered tool: {tool_def.name}")
         
-    async def execute_tool(self, tool_name: str, params: Dict[str, Any]) -> ToolResult:
-        """Execute a tool with given parameters."""
+    def set_concurrency_limit(self, tool_name: str, limit: Optional[int]) -> None:
+        """Set how many calls of a tool may run at once (None: unlimited)."""
+        self.concurrency.set_limit(tool_name, limit)
+        
+    async def execute_tool(self, tool_name: str, params: Dict[str, Any], client_id: Optional[str] = None) -> ToolResult:
+        """Execute a tool with given parameters, rate limited per (client_id, tool)."""
         if not self._running:
             raise RuntimeError("MCP server is not running")
             
@@ -76,17 +89,38 @@ class MCPServer:
             if required not in params:
                 raise ValueError(f"Missing required parameter: {required}")
                 
-        # Check rate limit
-        if tool.rate_limit:
-            await self._check_rate_limit(tool_name, tool.rate_limit)
-            
-        # Check cache
+        # Check cache (cache hits don't spend rate limit tokens)
+        cache_key = self._get_cache_key(tool_name, params)
         if tool.cache_ttl:
-            cache_key = self._get_cache_key(tool_name, params)
-            cached = self.results_cache.get(cache_key)
-            if cached and (datetime.now() - cached.timestamp).total_seconds() < tool.cache_ttl:
+            cached = self.results_cache.get(tool_name, tool.cache_ttl, cache_key)
+            if cached is not None:
                 return cached
                 
+        # Identical calls already running are joined instead of executed again
+        joining = tool.coalesce and self.single_flight.is_inflight(cache_key)
+        
+        # Check rate limit (joining an in-flight call is free, like a cache hit)
+        if tool.rate_limit and not joining:
+            await self._check_rate_limit(tool_name, tool.rate_limit, client_id)
+            
+        if tool.coalesce:
+            return await self.single_flight.run(
+                cache_key, lambda: self._run_tool(tool, implementation, params, cache_key)
+            )
+        return await self._run_tool(tool, implementation, params, cache_key)
+        
+    async def _run_tool(self, tool: ToolDefinition, implementation: Callable, params: Dict[str, Any], cache_key: str) -> ToolResult:
+        """Execute a tool within its concurrency limit and cache a successful result."""
+        limit = self.concurrency.get(tool.name, tool.max_concurrency)
+        if limit is None:
+            return await self._execute(tool, implementation, params, cache_key)
+        async with limit:
+            return await self._execute(tool, implementation, params, cache_key)
+            
+    async def _execute(self, tool: ToolDefinition, implementation: Callable, params: Dict[str, Any], cache_key: str) -> ToolResult:
+        """Run the implementation and wrap its outcome in a ToolResult."""
+        tool_name = tool.name
+        
         # Execute tool
         start_time = datetime.now()
         try:
@@ -111,58 +145,25 @@ class MCPServer:
         
         # Cache result if applicable
         if tool.cache_ttl and status == "success":
-            cache_key = self._get_cache_key(tool_name, params)
-            self.results_cache[cache_key] = tool_result
-            
-        # Update rate limit tracking
-        if tool.rate_limit:
-            self.rate_limits.setdefault(tool_name, []).append(datetime.now())
+            self.results_cache.put(tool_name, tool.cache_ttl, cache_key, tool_result)
             
         return tool_result
         
     def _get_cache_key(self, tool_name: str, params: Dict[str, Any]) -> str:
         """Generate a cache key for tool results."""
-        sorted_params = sorted(params.items())
-        return f"{tool_name}:{str(sorted_params)}"
+        return f"{tool_name}:{canonical_params(params)}"
         
-    async def _check_rate_limit(self, tool_name: str, rate_limit: int) -> None:
-        """Check if tool execution is allowed by rate limit."""
-        if tool_name not in self.rate_limits:
-            return
+    async def _check_rate_limit(self, tool_name: str, rate_limit: int, client_id: Optional[str] = None) -> None:
+        """Take a token from the (client_id, tool) bucket or reject the call."""
+        if not self.rate_limits.try_acquire((client_id, tool_name), rate_limit):
+            retry_after = self.rate_limits.retry_after((client_id, tool_name))
+            raise RuntimeError(f"Rate limit exceeded for tool: {tool_name} (retry in {retry_after:.1f}s)")
             
-        now = datetime.now()
-        recent_calls = [t for t in self.rate_limits[tool_name]
-                       if (now - t).total_seconds() < 60]
-                       
-        if len(recent_calls) >= rate_limit:
-            raise RuntimeError(f"Rate limit exceeded for tool: {tool_name}")
-            
-    async def _cache_cleanup(self):
-        """Periodically clean up expired cache entries."""
-        while self._running:
-            now = datetime.now()
-            for tool_name, tool in self.tools.items():
-                if not tool.cache_ttl:
-                    continue
-                    
-                cache_keys = [k for k in self.results_cache.keys()
-                            if k.startswith(f"{tool_name}:")]
-                            
-                for key in cache_keys:
-                    result = self.results_cache[key]
-                    if (now - result.timestamp).total_seconds() >= tool.cache_ttl:
-                        del self.results_cache[key]
-                        
-            await asyncio.sleep(60)  # Clean up every minute
-            
-    async def _rate_limit_cleanup(self):
-        """Periodically clean up old rate limit entries."""
-        while self._running:
-            now = datetime.now()
-            for tool_name in list(self.rate_limits.keys()):
-                self.rate_limits[tool_name] = [
-                    t for t in self.rate_limits[tool_name]
-                    if (now - t).total_seconds() < 60
-                ]
-                
-            await asyncio.sleep(60)  # Clean up every minute 
\ No newline at end of file
+    def get_stats(self) -> Dict[str, Any]:
+        """Rate limiter, result cache, coalescing and per-tool concurrency statistics."""
+        return {
+            "rate_limits": self.rate_limits.stats(),
+            "results_cache": self.results_cache.stats(),
+            "single_flight": self.single_flight.stats(),
+            "concurrency": self.concurrency.stats()
+        }
@@ -31,6 +31,8 @@ class ToolDefinition:
     is_async: bool = True
     cache_ttl: Optional[int] = None
     rate_limit: Optional[int] = None
+    max_concurrency: Optional[int] = None  # Concurrent executions; None uses the server default
+    coalesce: bool = False  # Share one execution between identical concurrent calls (read-only tools only)
     version: str = "1.0.0"
     metadata: Dict[str, Any] = field(default_factory=dict)
 
@@ -57,7 +59,8 @@ FILE_TOOLS = [
             "end_line": "Optional[int]"
         },
         required_params=["path"],
-        cache_ttl=60
+        cache_ttl=60,
+        coalesce=True
     ),
     ToolDefinition(
         name="write_file",
@@ -79,7 +82,8 @@ FILE_TOOLS = [
             "recursive": "bool"
         },
         required_params=["path"],
-        cache_ttl=30
+        cache_ttl=30,
+        coalesce=True
     )
 ]
 
@@ -94,7 +98,8 @@ AI_TOOLS = [
         },
         required_params=["text"],
         cache_ttl=3600,
-        rate_limit=100
+        rate_limit=100,
+        coalesce=True
     ),
     ToolDefinition(
         name="code_analysis",
@@ -107,7 +112,8 @@ AI_TOOLS = [
         },
         required_params=["code"],
         cache_ttl=1800,
-        rate_limit=50
+        rate_limit=50,
+        coalesce=True
     ),
     ToolDefinition(
         name="semantic_search",
@@ -119,7 +125,8 @@ AI_TOOLS = [
             "top_k": "int"
         },
         required_params=["query", "corpus"],
-        cache_ttl=300
+        cache_ttl=300,
+        coalesce=True
     ),
     ToolDefinition(
         name="layer_thought_process",
@@ -158,7 +165,8 @@ VECTOR_TOOLS = [
             "top_k": "int"
         },
         required_params=["collection", "query_vector"],
-        cache_ttl=60
+        cache_ttl=60,
+        coalesce=True
     ),
     ToolDefinition(
         name="vector_store_update",
@@ -181,7 +189,8 @@ VECTOR_TOOLS = [
             "metric": "str"
         },
         required_params=["query", "candidates"],
-        cache_ttl=300
+        cache_ttl=300,
+        coalesce=True
     )
 ]
 
@@ -194,7 +203,8 @@ AGENT_TOOLS = [
             "agent_type": "str",
             "config": "Dict[str, Any]"
         },
-        required_params=["agent_type"]
+        required_params=["agent_type"],
+        coalesce=False  # Each call has its own side effects
     ),
     ToolDefinition(
         name="agent_execute",
@@ -204,7 +214,8 @@ AGENT_TOOLS = [
             "agent_id": "str",
             "task": "Dict[str, Any]"
         },
-        required_params=["agent_id", "task"]
+        required_params=["agent_id", "task"],
+        coalesce=False  # Each call has its own side effects
     ),
     ToolDefinition(
         name="agent_status",
@@ -214,7 +225,8 @@ AGENT_TOOLS = [
             "agent_id": "str"
         },
         required_params=["agent_id"],
-        cache_ttl=5
+        cache_ttl=5,
+        coalesce=True
     )
 ]
 
@@ -225,7 +237,8 @@ SYSTEM_TOOLS = [
         description="Get system information",
         parameters={},
         required_params=[],
-        cache_ttl=300
+        cache_ttl=300,
+        coalesce=True
     ),
     ToolDefinition(
         name="system_metrics",
@@ -235,7 +248,8 @@ SYSTEM_TOOLS = [
             "metrics": "List[str]"
         },
         required_params=["metrics"],
-        cache_ttl=10
+        cache_ttl=10,
+        coalesce=True
     )
 ]
 
@@ -6,26 +6,31 @@ for the framework rules as defined in .cursor/rules/000-framework-index.mdc
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Set, Pattern, Optional, Any, Tuple, Callable, Awaitable
+from typing import Dict, List, Set, Pattern, Optional, Any, Tuple, Callable, Awaitable, Hashable
 from pathlib import Path
 import yaml
 import asyncio
 import re
-from datetime import datetime, timedelta
-from functools import lru_cache
+from datetime import datetime
+from collections import OrderedDict
 import logging
 from contextlib import asynccontextmanager
 from fnmatch import fnmatch
 from framework.mcp_server.implementations.mock_mcp_api import MockMCPAPI
 from framework.mcp_server.server import MCPServer
 from framework.mcp_server.server import MCPServer
+from framework.trigger_index import TriggerIndex
 import os
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
 # Define a type hint for the tool runner function
 ToolRunnerType = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+# Called with (rule_id, rule) when a rule is added or changed, (rule_id, None) when removed
+# and (None, None) when the whole rule set was reloaded
+RuleListenerType = Callable[[Optional[str], Optional['Rule']], None]
 
 class MCPToolIntegration:
     """MCP tool integration handler."""
@@ -176,22 +181,72 @@ class RuleImpact:
     execution_context: Dict[str, Any]
     
 class RuleCache:
-    def __init__(self, ttl_seconds: int = 300):
-        self.cache: Dict[str, Any] = {}
+    """
+    Bounded LRU cache for the parsed-rule layer, with optional TTL and
+    hit/miss stats. `get_or_load` shares one in-flight load between
+    concurrent callers of the same key.
+    """
+    
+    def __init__(self, ttl_seconds: Optional[int] = 300, max_size: int = 256):
+        self.cache: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
         self.ttl = ttl_seconds
-        
-    def get(self, key: str) -> Optional[Any]:
-        if key in self.cache:
-            entry = self.cache[key]
-            if datetime.now() - entry['timestamp'] < timedelta(seconds=self.ttl):
-                return entry['value']
+        self.max_size = max(1, max_size)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = self.misses = self.evictions = 0
+        
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.cache.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return value
             del self.cache[key]
+        self.misses += 1
         return None
         
-    def set(self, key: str, value: Any) -> None:
-        self.cache[key] = {
-            'value': value,
-            'timestamp': datetime.now()
+    def set(self, key: Hashable, value: Any) -> None:
+        self.cache[key] = (time.monotonic(), value)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+            
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one entry; returns whether it was cached."""
+        return self.cache.pop(key, None) is not None
+        
+    def clear(self) -> None:
+        self.cache.clear()
+        
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for `key`, loading it once even if several callers ask concurrently."""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight) # A cancelled caller must not cancel the shared load
+        value = self.get(key)
+        if value is not None:
+            return value
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            self._inflight.pop(key, None)
+        if value is not None:
+            self.set(key, value)
+        return value
+        
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self.cache),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'inflight': len(self._inflight)
         }
         
 class RuleLoader:
@@ -201,11 +256,39 @@ class RuleLoader:
         self.rules: Dict[str, Rule] = {}
         self.dependencies: Dict[str, List[str]] = {}
         # self.triggers is handled by Rule.triggers now
-        self.cache = RuleCache()
+        # Parsed .mdc files keyed on (path, mtime, size); freshness comes from the key, not a TTL
+        self.cache = RuleCache(ttl_seconds=None)
+        self._file_keys: Dict[str, Tuple[str, str, int, int]] = {}
+        self._rule_configs: Dict[str, Dict[str, Any]] = {}
+        self._loaded_config: Optional[Any] = None
         self.metrics: Dict[str, RuleMetrics] = {}
+        self._rule_listeners: List[RuleListenerType] = []
         # MCPIntegration is now created within Rule instances
         # self.mcp_integration = MCPToolIntegration(tool_runner=self.tool_runner)
 
+    def add_rule_listener(self, listener: RuleListenerType) -> None:
+        """Register a callback notified when rules are added, changed, removed or reloaded."""
+        self._rule_listeners.append(listener)
+
+    def _notify_rule_listeners(self, rule_id: Optional[str], rule: Optional[Rule]) -> None:
+        for listener in self._rule_listeners:
+            try:
+                listener(rule_id, rule)
+            except Exception as e:
+                logger.error(f"Rule listener failed for rule {rule_id}: {e}")
+
+    def update_rule(self, rule: Rule) -> None:
+        """Add or replace a single rule (e.g. after its .mdc file changed)."""
+        self.rules[rule.id] = rule
+        self.dependencies[rule.id] = rule.dependencies
+        self._notify_rule_listeners(rule.id, rule)
+
+    def remove_rule(self, rule_id: str) -> None:
+        """Remove a single rule."""
+        self.rules.pop(rule_id, None)
+        self.dependencies.pop(rule_id, None)
+        self._notify_rule_listeners(rule_id, None)
+
     @asynccontextmanager
     async def rule_execution(self, rule_id: str):
         """Context manager for rule execution with metrics tracking."""
@@ -231,43 +314,74 @@ class RuleLoader:
             )
             raise
 
-    @lru_cache(maxsize=100)
     async def load_rules(self) -> None:
-        """Load all framework rules and their relationships with caching."""
-        cached_rules = self.cache.get('rules')
-        if cached_rules:
-            self.rules = cached_rules
-            return
-
+        """Load all framework rules and their relationships; an unchanged index is not re-parsed."""
         try:
             index_path = self.rules_dir / '000-framework-index.mdc'
             if not index_path.exists():
                 raise FileNotFoundError(f"Framework index not found at {index_path}")
                 
-            yaml_content = self._extract_yaml_from_mdc(index_path)
-            rules_config = yaml.safe_load(yaml_content)
+            rules_config = await self.load_mdc_yaml(index_path)
+            if rules_config is self._loaded_config:
+                return # Rules are already built from this exact parse
+            self._apply_rules_config(rules_config)
+            self._loaded_config = rules_config
+        except Exception as e:
+            logger.error(f"Error loading rules: {str(e)}")
+            raise
             
-            for rule_config in rules_config['rules']:
-                # Pass the tool_runner when creating MCPToolIntegration for the Rule
-                mcp_integration_instance = MCPToolIntegration(tool_runner=self.tool_runner)
-                rule = Rule(
-                    id=rule_config['id'],
-                    path=rule_config['path'],
-                    triggers=[t['pattern'] for t in rule_config['triggers']], 
-                    dependencies=rule_config.get('dependencies', []),
-                    auto_apply=rule_config.get('autoApply', False),
-                    version=rule_config.get('version', '1.0.0'),
-                    cache_ttl=rule_config.get('cacheTTL', 300),
-                    mcp_integration=mcp_integration_instance # Inject here
-                )
+    async def load_mdc_yaml(self, mdc_path: Path) -> Any:
+        """Parsed YAML section of an .mdc file, cached until the file's mtime or size changes."""
+        stat = mdc_path.stat()
+        key = ('mdc', str(mdc_path), stat.st_mtime_ns, stat.st_size)
+        previous = self._file_keys.get(str(mdc_path))
+        if previous is not None and previous != key:
+            self.cache.invalidate(previous) # Only this file's stale parse is dropped
+        self._file_keys[str(mdc_path)] = key
+        return await self.cache.get_or_load(
+            key, lambda: asyncio.to_thread(lambda: yaml.safe_load(self._extract_yaml_from_mdc(mdc_path)))
+        )
+        
+    def invalidate_file(self, mdc_path: Path) -> None:
+        """Forget the cached parse of one .mdc file (e.g. on a watcher event)."""
+        key = self._file_keys.pop(str(mdc_path), None)
+        if key is not None:
+            self.cache.invalidate(key)
+            
+    def _apply_rules_config(self, rules_config: Dict[str, Any]) -> None:
+        """Build rules from a parsed index, replacing only the rules whose config changed."""
+        first_load = not self.rules
+        seen = set()
+        for rule_config in rules_config['rules']:
+            rule_id = rule_config['id']
+            seen.add(rule_id)
+            if rule_id in self.rules and self._rule_configs.get(rule_id) == rule_config:
+                continue # Unchanged: keep the Rule and its state (last_applied, metrics)
+            # Pass the tool_runner when creating MCPToolIntegration for the Rule
+            mcp_integration_instance = MCPToolIntegration(tool_runner=self.tool_runner)
+            rule = Rule(
+                id=rule_id,
+                path=rule_config['path'],
+                triggers=[t['pattern'] for t in rule_config['triggers']], 
+                dependencies=rule_config.get('dependencies', []),
+                auto_apply=rule_config.get('autoApply', False),
+                version=rule_config.get('version', '1.0.0'),
+                cache_ttl=rule_config.get('cacheTTL', 300),
+                mcp_integration=mcp_integration_instance # Inject here
+            )
+            self._rule_configs[rule_id] = rule_config
+            if first_load:
                 self.rules[rule.id] = rule
                 self.dependencies[rule.id] = rule.dependencies
+            else:
+                self.update_rule(rule)
                 
-            self.cache.set('rules', self.rules)
-        except Exception as e:
-            logger.error(f"Error loading rules: {str(e)}")
-            raise
-
+        for rule_id in [rule_id for rule_id in self.rules if rule_id not in seen]:
+            self._rule_configs.pop(rule_id, None)
+            self.remove_rule(rule_id)
+        if first_load:
+            self._notify_rule_listeners(None, None)
+            
     async def validate_rules(self) -> None:
         """Validate rule dependencies and triggers."""
         # Check for circular dependencies
@@ -361,44 +475,45 @@ class TriggerSystem:
     def __init__(self, rule_loader: RuleLoader):
         self.rule_loader = rule_loader
         self.active_rules: Set[str] = set()
-        
+        # Compiled matcher for every rule's trigger patterns, kept in step with the loader
+        self.trigger_index = TriggerIndex()
+        self._indexed_rules: Optional[Dict[str, Rule]] = None
+        rule_loader.add_rule_listener(self._on_rule_changed)
+        
+    def _on_rule_changed(self, rule_id: Optional[str], rule: Optional[Rule]) -> None:
+        """Update the trigger index for one rule, or mark it stale after a full reload."""
+        if rule_id is None or self._indexed_rules is not self.rule_loader.rules:
+            self._indexed_rules = None # Rebuilt on the next check
+        elif rule is None:
+            self.trigger_index.remove_rule(rule_id)
+        else:
+            self.trigger_index.set_rule(rule_id, rule.triggers)
+            
+    def _ensure_index(self) -> None:
+        rules = self.rule_loader.rules
+        # Rules dict replaced or edited without notification: rebuild from scratch
+        if self._indexed_rules is not rules or len(self.trigger_index) != len(rules):
+            self.trigger_index.rebuild({rule_id: rule.triggers for rule_id, rule in rules.items()})
+            self._indexed_rules = rules
+            
     async def check_triggers(
         self,
         file_path: str,
         context: Context
     ) -> List[str]:
-        """Check which rules should be triggered using Path.match."""
+        """Check which rules should be triggered (Path.match semantics, via the trigger index)."""
         logger.debug(f"Checking triggers for file: {file_path}")
-        triggered = []
         if not self.rule_loader.rules:
              logger.warning("TriggerSystem: RuleLoader has no rules loaded!")
              return []
              
         try:
-            # Convert the file_path string to a Path object once
-            file_path_obj = Path(file_path)
+            self._ensure_index()
+            triggered = self.trigger_index.match(file_path)
         except Exception as e:
-            logger.error(f"Could not create Path object from file_path '{file_path}': {e}")
-            return [] # Cannot proceed if path is invalid
-
-        for rule_id, rule in self.rule_loader.rules.items():
-            logger.debug(f"  Checking rule '{rule_id}' with triggers: {rule.triggers}")
-            rule_triggered = False # Flag for this rule
-            try:
-                for pattern in rule.triggers:
-                    # Use Path.match instead of fnmatch
-                    match_result = file_path_obj.match(pattern)
-                    logger.debug(f"    - Matching '{file_path}' against pattern '{pattern}' using Path.match: {match_result}") 
-                    if match_result:
-                        rule_triggered = True
-                        break 
-                        
-                if rule_triggered:
-                    logger.debug(f"    -> Matched trigger for rule '{rule_id}'")
-                    triggered.append(rule_id)
-            except Exception as e:
-                 logger.error(f"Error during Path.match for rule {rule_id}, file {file_path}: {e}") 
-                 
+            logger.error(f"Error matching triggers for file {file_path}: {e}")
+            return []
+            
         logger.debug(f"Trigger check complete for {file_path}. Triggered: {triggered}")
         return triggered
         
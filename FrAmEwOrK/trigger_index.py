@@ -0,0 +1,259 @@
+"""
+Trigger Pattern Index
+
+This module compiles rule trigger patterns into a single matcher for the
+TriggerSystem, so finding the rules triggered by a file no longer costs one
+Path.match per rule per pattern.
+"""
+
+import logging
+import os
+import re
+from functools import lru_cache
+from pathlib import PurePath
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Paths are matched as their components joined by a separator no component
+# can contain, which keeps Path.match semantics (globs never cross a
+# component, the root is a component of its own) in a plain regex.
+SEP = "\x00"
+GLOB_CHARS = frozenset("*?[")
+
+# Index kinds, in the order a pattern is assigned to them
+NAME = "name"         # Last component is a literal file name: "Makefile", "docs/index.md"
+SUFFIX = "suffix"     # Last component is "*" + literal starting with ".": "*.py", "src/*.test.ts"
+PREFIX = "prefix"     # Absolute with a literal first component: "/srv/*/config.*"
+FALLBACK = "fallback" # Everything else, tested through one combined regex
+
+CompiledPattern = Tuple[str, Optional[str], Optional[Pattern]]  # (kind, key, verifier or None if the key decides)
+
+
+def _translate_component(component: str) -> str:
+    """Regex for one glob component: fnmatch.translate's rules, but no wildcard can match SEP."""
+    i, n, out = 0, len(component), []
+    while i < n:
+        c = component[i]
+        i += 1
+        if c == "*":
+            if not out or out[-1] != f"[^{SEP}]*": # Collapse runs of *
+                out.append(f"[^{SEP}]*")
+        elif c == "?":
+            out.append(f"[^{SEP}]")
+        elif c == "[":
+            j = i
+            if j < n and component[j] == "!":
+                j += 1
+            if j < n and component[j] == "]":
+                j += 1
+            while j < n and component[j] != "]":
+                j += 1
+            if j >= n:
+                out.append("\\[") # Unclosed bracket is a literal
+                continue
+            stuff = component[i:j]
+            if "-" not in stuff:
+                stuff = stuff.replace("\\", r"\\")
+            else:
+                chunks = []
+                k = i + 2 if component[i] == "!" else i + 1
+                while True:
+                    k = component.find("-", k, j)
+                    if k < 0:
+                        break
+                    chunks.append(component[i:k])
+                    i = k + 1
+                    k = k + 3
+                chunk = component[i:j]
+                if chunk:
+                    chunks.append(chunk)
+                else:
+                    chunks[-1] += "-"
+                for k in range(len(chunks) - 1, 0, -1): # Drop empty ranges, which are invalid in re
+                    if chunks[k - 1][-1] > chunks[k][0]:
+                        chunks[k - 1] = chunks[k - 1][:-1] + chunks[k][1:]
+                        del chunks[k]
+                stuff = "-".join(chunk.replace("\\", r"\\").replace("-", r"\-") for chunk in chunks)
+            stuff = re.sub(r"([&~|])", r"\\\1", stuff) # Escape set operations
+            i = j + 1
+            if not stuff:
+                out.append("(?!)")
+            elif stuff == "!":
+                out.append(f"[^{SEP}]")
+            elif stuff[0] == "!":
+                out.append(f"[^{SEP}{stuff[1:]}]")
+            else:
+                if stuff[0] in ("^", "["):
+                    stuff = "\\" + stuff
+                out.append(f"[{stuff}]")
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def _is_literal(component: str) -> bool:
+    return not GLOB_CHARS.intersection(component)
+
+
+def path_parts(file_path: str) -> Tuple[str, ...]:
+    """Components of `file_path` as Path.match sees them (case-folded like os.path.normcase)."""
+    return PurePath(os.path.normcase(file_path)).parts
+
+
+@lru_cache(maxsize=4096)
+def compile_pattern(pattern: str) -> CompiledPattern:
+    """Classifies a trigger pattern for the index and builds its full-path verifier regex."""
+    if not pattern:
+        raise ValueError("empty pattern")
+    parts = PurePath(os.path.normcase(pattern)).parts
+    if not parts:
+        raise ValueError(f"empty pattern: {pattern!r}")
+    anchor = PurePath(os.path.normcase(pattern)).anchor
+    components = parts[1:] if anchor else parts
+    body = SEP.join(_translate_component(component) for component in components)
+    if anchor:
+        source = "^" + re.escape(parts[0]) + (SEP + body if components else "") + r"\Z"
+    else:
+        source = f"(?:^|{SEP})" + body + r"\Z"
+    verifier = re.compile(source, re.DOTALL)
+
+    last = parts[-1]
+    single = not anchor and len(parts) == 1
+    if _is_literal(last) and components:
+        return NAME, last, None if single else verifier
+    if last.startswith("*") and last[1:].startswith(".") and _is_literal(last[1:]):
+        return SUFFIX, last[1:], None if single else verifier
+    if anchor and components and _is_literal(components[0]):
+        return PREFIX, parts[0] + SEP + components[0], verifier
+    return FALLBACK, None, verifier
+
+
+class TriggerIndex:
+    """
+    Rule trigger patterns compiled into one matcher, equivalent to testing
+    `Path(file_path).match(pattern)` for every pattern of every rule.
+
+    Patterns are indexed by their file name ("Makefile"), extension-like
+    suffix ("*.py", "*.test.ts") or, for absolute patterns, their first path
+    component; a path only looks up its own name, its dot-suffixes and its
+    first component, so the cost of `match` does not grow with the number of
+    rules. Patterns with extra components keep a verifier regex that runs on
+    the few candidates. The remaining globs ("test_*", "*/build/*") share a
+    single combined regex, so a path that matches none of them costs one
+    search.
+
+    `set_rule`/`remove_rule` update one rule's entries in place; only the
+    combined fallback regex is recompiled, lazily, when its patterns change.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Iterable[str]]] = None):
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        self._keys: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        self._buckets: Dict[str, Dict[str, Dict[str, List[Optional[Pattern]]]]] = {NAME: {}, SUFFIX: {}, PREFIX: {}}
+        self._fallback: Dict[str, List[Pattern]] = {}
+        self._combined: Optional[Pattern] = None
+        self._combined_rules: List[str] = []
+        self._combined_dirty = False
+        if rules:
+            self.rebuild(rules)
+
+    # --- Maintenance ---
+    def rebuild(self, rules: Dict[str, Iterable[str]]) -> None:
+        """Replaces every rule with `rules` (rule id -> trigger patterns)."""
+        self.clear()
+        for rule_id, patterns in rules.items():
+            self.set_rule(rule_id, patterns)
+
+    def clear(self) -> None:
+        self._order.clear()
+        self._next_order = 0
+        self._keys.clear()
+        for bucket in self._buckets.values():
+            bucket.clear()
+        self._fallback.clear()
+        self._combined, self._combined_rules, self._combined_dirty = None, [], False
+
+    def set_rule(self, rule_id: str, patterns: Iterable[str]) -> None:
+        """Adds a rule or replaces its patterns; the rule keeps its place in the result order."""
+        self._discard(rule_id)
+        if rule_id not in self._order:
+            self._order[rule_id] = self._next_order
+            self._next_order += 1
+        keys: List[Tuple[str, Optional[str]]] = []
+        for pattern in patterns:
+            try:
+                kind, key, verifier = compile_pattern(pattern)
+            except (ValueError, re.error) as e:
+                logger.error(f"Skipping invalid trigger pattern {pattern!r} for rule {rule_id}: {e}")
+                continue
+            if kind == FALLBACK:
+                self._fallback.setdefault(rule_id, []).append(verifier)
+                self._combined_dirty = True
+                continue
+            self._buckets[kind].setdefault(key, {}).setdefault(rule_id, []).append(verifier)
+            keys.append((kind, key))
+        self._keys[rule_id] = keys
+
+    def remove_rule(self, rule_id: str) -> None:
+        self._discard(rule_id)
+        self._keys.pop(rule_id, None)
+        self._order.pop(rule_id, None)
+
+    def _discard(self, rule_id: str) -> None:
+        for kind, key in self._keys.get(rule_id, ()):
+            bucket = self._buckets[kind].get(key)
+            if bucket is not None:
+                bucket.pop(rule_id, None)
+                if not bucket:
+                    del self._buckets[kind][key]
+        self._keys[rule_id] = []
+        if self._fallback.pop(rule_id, None) is not None:
+            self._combined_dirty = True
+
+    def _combined_fallback(self) -> Optional[Pattern]:
+        if self._combined_dirty:
+            self._combined_rules = list(self._fallback)
+            sources = [verifier.pattern for rule_id in self._combined_rules for verifier in self._fallback[rule_id]]
+            self._combined = re.compile("|".join(f"(?:{source})" for source in sources), re.DOTALL) if sources else None
+            self._combined_dirty = False
+        return self._combined
+
+    # --- Matching ---
+    def match(self, file_path: str) -> List[str]:
+        """Ids of the rules with a pattern matching `file_path`, in the order the rules were added."""
+        parts = path_parts(file_path)
+        if not parts:
+            return []
+        subject = SEP.join(parts)
+        name = parts[-1]
+        matched = set()
+
+        candidates = [self._buckets[NAME].get(name)]
+        start = name.find(".")
+        while start != -1:
+            candidates.append(self._buckets[SUFFIX].get(name[start:]))
+            start = name.find(".", start + 1)
+        if len(parts) > 1:
+            candidates.append(self._buckets[PREFIX].get(parts[0] + SEP + parts[1]))
+        for bucket in candidates:
+            if not bucket:
+                continue
+            for rule_id, verifiers in bucket.items():
+                if rule_id not in matched and any(verifier is None or verifier.search(subject) for verifier in verifiers):
+                    matched.add(rule_id)
+
+        combined = self._combined_fallback()
+        if combined is not None and combined.search(subject):
+            for rule_id in self._combined_rules:
+                if rule_id not in matched and any(verifier.search(subject) for verifier in self._fallback[rule_id]):
+                    matched.add(rule_id)
+
+        return sorted(matched, key=self._order.__getitem__)
+
+    def __contains__(self, rule_id: str) -> bool:
+        return rule_id in self._order
+
+    def __len__(self) -> int:
+        return len(self._order)
@@ -87,24 +87,14 @@ class ReflectorAgent:
         reflection_days = self.config.get('reflection_depth_days', 7)
         since_timestamp = (datetime.datetime.utcnow() - datetime.timedelta(days=reflection_days)).isoformat() + 'Z'
         
-        # --- Ideal CrossModalMemory Query --- 
-        # Ideally, search would support structured filters like:
-        # relevant_entries = self.memory.search(
-        #     filters=[
-        #         {"field": "timestamp", "op": ">=", "value": since_timestamp},
-        #         {"field": "type", "op": "in", "value": ["outcome", "agent_action", "user_feedback"]}
-        #     ]
-        # )
-        # --- Current Placeholder --- 
-        all_recent_entries = self.memory.search(q='', since=since_timestamp) # Fetches broadly
-        
-        # Manual filtering (less efficient)
-        entries_to_analyze = [ 
-            e for e in all_recent_entries 
-            if e.get('timestamp', '0') >= since_timestamp and 
-               e.get('type') in ['outcome', 'text', 'agent_action'] # Example types
-        ]
-        print(f"  Retrieved {len(all_recent_entries)} total entries since {since_timestamp}.")
+        # --- Structured CrossModalMemory Query (served from the metadata index) ---
+        entries_to_analyze = self.memory.search(
+            filters=[
+                {"field": "timestamp", "op": ">=", "value": since_timestamp},
+                {"field": "type", "op": "in", "value": ['outcome', 'text', 'agent_action']} # Example types
+            ]
+        )
+        print(f"  Retrieved {len(entries_to_analyze)} relevant entries since {since_timestamp}.")
         if not entries_to_analyze:
              print("  No relevant entries found for reflection.")
              return {"status": "no_entries", "suggestions": []}
@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to sys.path to allow importing FrAmEwOrK
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from FrAmEwOrK.mcp_server.server import MCPServer
+from FrAmEwOrK.mcp_server.tools import ToolCategory, ToolDefinition
+
+
+class ListRateLimiter:
+    """Baseline: the previous per-tool list of call datetimes, filtered on every check."""
+
+    def __init__(self):
+        self.calls = {}
+
+    def check(self, key, limit):
+        now = datetime.now()
+        recent = [t for t in self.calls.get(key, []) if (now - t).total_seconds() < 60]
+        if len(recent) >= limit:
+            raise RuntimeError(f"Rate limit exceeded for tool: {key}")
+        self.calls.setdefault(key, []).append(now)
+
+
+async def noop(value):
+    return value
+
+
+async def drive(server, clients: int, calls: int) -> tuple:
+    """`clients` concurrent clients each issuing `calls` uncached calls; returns (seconds, rejected)."""
+    rejected = 0
+
+    async def client(client_id):
+        nonlocal rejected
+        for i in range(calls):
+            try:
+                await server.execute_tool("noop", {"value": i}, client_id=client_id)
+            except RuntimeError:
+                rejected += 1
+            if i % 50 == 0:
+                await asyncio.sleep(0) # Interleave clients
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(f"client-{n}") for n in range(clients)))
+    return time.perf_counter() - start, rejected
+
+
+async def main_async(args):
+    tool = ToolDefinition("noop", ToolCategory.SYSTEM, "No-op", {"value": "int"}, ["value"], rate_limit=args.rate_limit)
+    unlimited = ToolDefinition("noop", ToolCategory.SYSTEM, "No-op", {"value": "int"}, ["value"])
+    total = args.clients * args.calls
+
+    timings = {}
+    for name, definition in (("no limiter", unlimited), ("token bucket", tool)):
+        server = MCPServer()
+        await server.start()
+        await server.register_tool(definition, noop)
+        timings[name], rejected = await drive(server, args.clients, args.calls)
+        print(f"{name:<14} {total / timings[name]:12,.0f} calls/s  (rejected {rejected:,})")
+        await server.stop()
+
+    overhead = (timings["token bucket"] - timings["no limiter"]) / total * 1e6
+    print(f"token-bucket overhead: {overhead:.2f} us/call")
+
+    # Baseline check cost for one hot key, as the old per-tool list grew to the limit
+    baseline = ListRateLimiter()
+    start = time.perf_counter()
+    for _ in range(min(total, args.rate_limit)):
+        baseline.check("noop", args.rate_limit)
+    per_check = (time.perf_counter() - start) / min(total, args.rate_limit) * 1e6
+    print(f"list-of-datetimes limiter: {per_check:.2f} us/check on average up to {args.rate_limit:,} recent calls")
+
+    # CPU used by a started, idle server (the old cleanup loops ran in the background)
+    server = MCPServer()
+    await server.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.sleep(args.idle)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    await server.stop()
+    print(f"idle: {cpu * 1000:.1f} ms CPU over {wall:.1f} s wall ({cpu / wall:.2%} of a core)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCPServer.execute_tool throughput under many concurrent clients, limiter overhead and idle CPU.")
+    parser.add_argument("--clients", type=int, default=200, help="Concurrent clients (default: 200)")
+    parser.add_argument("--calls", type=int, default=500, help="Calls per client (default: 500)")
+    parser.add_argument("--rate-limit", type=int, default=10_000, help="Tool rate limit in calls/minute per client (default: 10000)")
+    parser.add_argument("--idle", type=float, default=2.0, help="Seconds to measure an idle server (default: 2)")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
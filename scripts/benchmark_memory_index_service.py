@@ -0,0 +1,86 @@
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow importing vanta_seed
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from vanta_seed.memory.memory_index_service import FTS_SCHEMA, INSERT_SQL, MemoryIndexService, keyed_rows
+
+
+def make_rows(n: int):
+    for i in range(n):
+        details = {"ritual": f"breath_{i % 50}", "symbol": f"spiral_{i % 7}", "note": f"memory number {i}"}
+        yield (f"bench_memory.jsonl:{i + 1}", "2025-04-26T00:00:00", "simulation_interaction", json.dumps(details, sort_keys=True))
+
+
+def legacy_per_call(db_path: Path, rows) -> int:
+    """The previous save_memory behaviour: connect, insert one row, commit, close."""
+    count = 0
+    for row in rows:
+        conn = sqlite3.connect(db_path)
+        conn.execute(INSERT_SQL, keyed_rows([row])[0])
+        conn.commit()
+        conn.close()
+        count += 1
+    return count
+
+
+def pooled_batched(db_path: Path, rows, writers: int, flush_interval: float, batch_size: int) -> int:
+    service = MemoryIndexService(db_path, flush_interval=flush_interval, batch_size=batch_size)
+    rows = list(rows)
+    chunks = [rows[i::writers] for i in range(writers)]
+
+    def worker(chunk):
+        for row in chunk:
+            service.add(*row)
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    service.close() # Final group commit
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory_fts write throughput before/after MemoryIndexService.")
+    parser.add_argument("--memories", type=int, default=2000, help="Memories to index (default: 2000)")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer threads for the pooled run (default: 4)")
+    parser.add_argument("--flush-interval", type=float, default=0.05, help="Group commit interval in seconds (default: 0.05)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Rows per early commit (default: 256)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = Path(tmp) / "legacy.db"
+        conn = sqlite3.connect(legacy_db)
+        conn.execute(FTS_SCHEMA)
+        conn.close()
+
+        start = time.perf_counter()
+        n = legacy_per_call(legacy_db, make_rows(args.memories))
+        legacy_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        m = pooled_batched(Path(tmp) / "pooled.db", make_rows(args.memories), args.writers, args.flush_interval, args.batch_size)
+        pooled_elapsed = time.perf_counter() - start
+
+        verify = sqlite3.connect(Path(tmp) / "pooled.db")
+        stored = verify.execute("SELECT count(*) FROM memory_fts").fetchone()[0]
+        verify.close()
+
+    print(f"memory_fts write throughput ({args.memories} memories)")
+    print(f"  per-call connect/commit : {n / legacy_elapsed:10.0f} memories/s")
+    print(f"  pooled WAL group commit : {m / pooled_elapsed:10.0f} memories/s  ({args.writers} writers, {stored} rows stored)")
+    print(f"  speedup                 : {legacy_elapsed / pooled_elapsed:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow importing vanta_seed
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from vanta_seed.core.memory_store import MemoryStore
+
+AGENTS = [f"agent_{i}" for i in range(20)]
+TYPES = ["narrative", "ritual_log", "mutation", "agent_state", "symbolic_trace"]
+TAGS = [f"tag_{i}" for i in range(40)]
+WORDS = [f"word{i}" for i in range(2000)]
+
+
+def build_store(n_items: int, persist_dir: str) -> MemoryStore:
+    store = MemoryStore(max_items=n_items, persist_path=str(Path(persist_dir) / "bench_memory.yaml"))
+    rng = random.Random(42)
+    for i in range(n_items):
+        store.add_item(
+            rng.choice(AGENTS),
+            rng.choice(TYPES),
+            {"text": " ".join(rng.choices(WORDS, k=12)), "step": i},
+            tags=rng.sample(TAGS, 2),
+        )
+    return store
+
+
+def time_queries(label: str, fn, queries) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {elapsed / len(queries) * 1000:8.3f} ms/query")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare MemoryStore reverse-scan and indexed lookups.")
+    parser.add_argument("--items", type=int, default=10000, help="Number of items in the store (default: 10000)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per scenario (default: 200)")
+    parser.add_argument("--limit", type=int, default=10, help="Result limit per query (default: 10)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = build_store(args.items, tmp)
+        rng = random.Random(7)
+        now = store._memory_log[-1]["timestamp"]
+        oldest = store._memory_log[0]["timestamp"]
+        span = now - oldest
+
+        scenarios = {
+            "filtered agent+tag": (
+                [(rng.choice(AGENTS), rng.choice(TAGS)) for _ in range(args.queries)],
+                lambda q: store.get_items_filtered(agent_id=q[0], tags=[q[1]], limit=args.limit),
+                lambda q: store._scan_items_filtered(q[0], None, [q[1]], None, None, args.limit),
+            ),
+            "filtered type+time": (
+                [(rng.choice(TYPES), oldest + rng.random() * span * 0.1) for _ in range(args.queries)],
+                lambda q: store.get_items_filtered(type=q[0], end_time=q[1], limit=args.limit),
+                lambda q: store._scan_items_filtered(None, q[0], None, None, q[1], args.limit),
+            ),
+            "search keyword": (
+                [rng.choice(WORDS) + " " for _ in range(args.queries)],
+                lambda q: store.search_items(q.strip(), limit=args.limit),
+                lambda q: store._scan_search_items(q.strip(), limit=args.limit),
+            ),
+            "search rare": (
+                ["no-such-word-" + str(i) for i in range(args.queries)],
+                lambda q: store.search_items(q, limit=args.limit),
+                lambda q: store._scan_search_items(q, limit=args.limit),
+            ),
+        }
+
+        print(f"MemoryStore benchmark: {args.items} items, {args.queries} queries/scenario, limit={args.limit}")
+        for name, (queries, indexed, scanned) in scenarios.items():
+            print(f"{name}:")
+            t_scan = time_queries("scan", scanned, queries)
+            t_index = time_queries("indexed", indexed, queries)
+            print(f"  speedup    {t_scan / t_index if t_index else float('inf'):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow importing vanta_seed
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from vanta_seed.core.routing_engine import CODE_PAT, DEFAULT_IMAGE_KEYWORDS, MATH_PAT, MYTH_PAT, VISION_PAT, RoutingEngine
+
+LORAS = {"python_expert": "deepseek-coder:python-lora", "myth_weaver": "deepseek-llm:myth-lora"}
+WORDS = (
+    "the agent should summarise memory drift across recent sessions and explain which archetypes "
+    "changed most while keeping the answer short clear and grounded in the logged outcomes"
+).split()
+TAILS = ["", " tell me a myth about it", " def handler(event): return event", " in python please (briefly)",
+         " see https://example.com/diagram.png", " generate image of the result", " ∑ of the weights"]
+
+
+def sequential_route(prompt, requested_model=None, default="deepseek-llm:latest", code="deepseek-coder:latest", vision=None, openai_default="gpt-4o"):
+    """Baseline: the previous pick_model rules, one regex and one lower() after another."""
+    if requested_model and requested_model.startswith(("gpt-", "dall-e-")):
+        return ("openai", requested_model, None)
+    if any(keyword in prompt.lower() for keyword in DEFAULT_IMAGE_KEYWORDS):
+        return ("openai", openai_default, None)
+    if vision and VISION_PAT.search(prompt):
+        return ("ollama", vision, None)
+    if code and (CODE_PAT.search(prompt) or MATH_PAT.search(prompt)):
+        if "python" in prompt.lower() and LORAS.get("python_expert"):
+            return ("ollama", LORAS["python_expert"], code)
+        return ("ollama", code, None)
+    if MYTH_PAT.search(prompt) and LORAS.get("myth_weaver"):
+        return ("ollama", LORAS["myth_weaver"], default)
+    return ("ollama", requested_model or default, None)
+
+
+def make_prompts(count: int, words: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) + rng.choice(TAILS) for _ in range(count)]
+
+
+def rate(route, prompts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for prompt in prompts:
+            route(prompt)
+    return len(prompts) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing decisions per second: sequential regexes vs the single-pass RoutingEngine.")
+    parser.add_argument("--prompts", type=int, default=500, help="Distinct prompts per length (default: 500)")
+    parser.add_argument("--repeat", type=int, default=4, help="Passes over the prompt set (default: 4)")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[30, 300, 2000], help="Prompt lengths in words (default: 30 300 2000)")
+    args = parser.parse_args()
+
+    for words in args.lengths:
+        prompts = make_prompts(args.prompts, words)
+        uncached = RoutingEngine("deepseek-llm:latest", "deepseek-coder:latest", lora_models=LORAS, cache_size=0)
+        cached = RoutingEngine("deepseek-llm:latest", "deepseek-coder:latest", lora_models=LORAS, cache_size=args.prompts)
+        for prompt in prompts:
+            assert uncached.route(prompt).as_tuple() == sequential_route(prompt), prompt
+        results = {
+            "sequential": rate(sequential_route, prompts, args.repeat),
+            "single-pass": rate(uncached.route, prompts, args.repeat),
+            "cached": rate(cached.route, prompts, args.repeat), # First pass misses, later passes hit
+        }
+        print(f"{words} words/prompt (~{sum(map(len, prompts)) // len(prompts)} chars):")
+        for name, per_second in results.items():
+            print(f"  {name:<12} {per_second:12,.0f} decisions/s  ({per_second / results['sequential']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow importing vanta_seed
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from vanta_seed.core.memory_weave import MemoryWeave
+from vanta_seed.core.sleep_mutator import SleepMutator
+from vanta_seed.core.symbolic_compression import SymbolicCompressor
+
+
+def make_weave(history: int, agents: int, seed: int = 42) -> MemoryWeave:
+    rng = random.Random(seed)
+    # Room for the seeded history plus one cycle's mutations, so both modes see the same candidates
+    weave = MemoryWeave(config={"drift_history_capacity": history * 3})
+    for i in range(history):
+        agent = f"agent_{rng.randrange(agents)}"
+        weave.snapshot_drift({
+            "archetype_token": f"ARCH::AGENT_INIT::{agent}::{i}",
+            "source_agent": agent,
+            "decision": rng.choice(["continue", "fork", "merge_branches"]),
+            "drift_vector": rng.random(),
+            "reason": "seeded history",
+            "payload": {"context": {"depth": rng.randrange(10), "notes": ["x"] * 20}},
+        })
+    return weave
+
+
+def run_cycle(mode: str, history: int, agents: int, mutations: int) -> float:
+    weave = make_weave(history, agents)
+    mutator = SleepMutator(weave, SymbolicCompressor(weave), config={"dream_cycle_mode": mode, "seed": 1})
+    age_map = {f"agent_{i}": i % 5 for i in range(agents)}
+    start = time.perf_counter()
+    applied = mutator.mutate_drift_passively(agent_age_map=age_map, limit=mutations)
+    elapsed = time.perf_counter() - start
+    assert applied == mutations, f"{mode}: applied {applied} of {mutations}"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the sequential and batched SleepMutator dream cycles.")
+    parser.add_argument("--history", type=int, default=20000, help="Seeded drift snapshots (default: 20000)")
+    parser.add_argument("--agents", type=int, default=50, help="Distinct source agents (default: 50)")
+    parser.add_argument("--mutations", type=int, default=10000, help="Mutations per cycle (default: 10000)")
+    args = parser.parse_args()
+
+    results = {mode: run_cycle(mode, args.history, args.agents, args.mutations) for mode in ("sequential", "batched")}
+    for mode, elapsed in results.items():
+        per_10k = elapsed * 10000 / args.mutations
+        print(f"  {mode:<10} {elapsed * 1000:9.1f} ms per cycle  ({per_10k * 1000:9.1f} ms per 10k mutations)")
+    print(f"  speedup    {results['sequential'] / results['batched']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
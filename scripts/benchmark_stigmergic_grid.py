@@ -0,0 +1,70 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow importing vanta_seed
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from vanta_seed.core.stigmergic_grid import StigmergicGrid
+
+
+def brute_force_radius(trails, center, radius):
+    radius_sq = radius * radius
+    return [item for coords, item in trails
+            if sum((a - b) * (a - b) for a, b in zip(coords, center)) <= radius_sq]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stigmergic hash grid against a linear scan.")
+    parser.add_argument("--pilgrims", type=int, default=5000, help="Pilgrims issuing one query each (default: 5000)")
+    parser.add_argument("--trails", type=int, default=300000, help="Trail signatures deposited (default: 300000)")
+    parser.add_argument("--extent", type=float, default=200.0, help="Half-width of the cubic field (default: 200)")
+    parser.add_argument("--radius", type=float, default=5.0, help="Sensor radius (default: 5.0)")
+    parser.add_argument("--cell-size", type=float, default=5.0, help="Grid cell size (default: 5.0)")
+    parser.add_argument("--resolution", type=int, default=1, help="Decimal places of pheromone buckets (default: 1)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours for k-nearest queries (default: 10)")
+    parser.add_argument("--brute-queries", type=int, default=50, help="Queries timed with the linear scan (default: 50)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    grid = StigmergicGrid(cell_size=args.cell_size, resolution=args.resolution, max_trails_per_bucket=args.trails)
+    trails = []
+    start = time.perf_counter()
+    for i in range(args.trails):
+        coords = tuple(rng.uniform(-args.extent, args.extent) for _ in range(3))
+        grid.deposit(coords, i)
+        trails.append((coords, i))
+    elapsed = time.perf_counter() - start
+    print(f"Deposited {args.trails} trails into {grid.bucket_count} buckets / {grid.cell_count} cells: {args.trails / elapsed:,.0f} trails/s")
+
+    pilgrims = [tuple(rng.uniform(-args.extent, args.extent) for _ in range(3)) for _ in range(args.pilgrims)]
+
+    start = time.perf_counter()
+    found = sum(len(grid.query_radius(p, args.radius)) for p in pilgrims)
+    grid_radius = (time.perf_counter() - start) / len(pilgrims)
+    print(f"  grid radius  {grid_radius * 1000:8.3f} ms/query ({found / len(pilgrims):.1f} trails/query)")
+
+    start = time.perf_counter()
+    for p in pilgrims:
+        grid.query_knn(p, args.k)
+    grid_knn = (time.perf_counter() - start) / len(pilgrims)
+    print(f"  grid knn     {grid_knn * 1000:8.3f} ms/query (k={args.k})")
+
+    sample = pilgrims[:args.brute_queries]
+    start = time.perf_counter()
+    for p in sample:
+        brute_force_radius(trails, p, args.radius)
+    brute = (time.perf_counter() - start) / len(sample)
+    print(f"  linear scan  {brute * 1000:8.3f} ms/query")
+    print(f"Radius query speedup: {brute / grid_radius:,.0f}x")
+
+    for p in sample[:10]:
+        assert sorted(grid.query_radius(p, args.radius)) == sorted(brute_force_radius(trails, p, args.radius))
+    print("Grid results match the linear scan.")
+
+
+if __name__ == "__main__":
+    main()
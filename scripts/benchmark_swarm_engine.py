@@ -0,0 +1,104 @@
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow importing vanta_seed
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from vanta_seed.agents.base_agent import BaseAgent
+from vanta_seed.core.stigmergic_grid import StigmergicGrid
+from vanta_seed.core.swarm_engine import SwarmEngine
+from vanta_seed.core.vanta_master_core import VantaMasterCore
+
+
+class BenchPilgrim(BaseAgent):
+    """Bare pilgrim used to time BaseAgent's per-pilgrim update without loading a blueprint."""
+
+    async def perform_task(self, task_data, current_state):
+        return {}
+
+    async def execute(self, task_data):
+        return {}
+
+    async def receive_message(self, message):
+        return None
+
+
+def make_pilgrim(name: str, state: dict) -> BenchPilgrim:
+    pilgrim = BenchPilgrim.__new__(BenchPilgrim)
+    pilgrim._name = name
+    pilgrim.state = state
+    pilgrim.logger = logging.getLogger("bench")
+    pilgrim.orchestrator = None
+    return pilgrim
+
+
+def make_crown(field: StigmergicGrid, engine: SwarmEngine, states: dict, pilgrims: dict) -> VantaMasterCore:
+    """Bare Crown carrying only what swarm_tick reads, so no config or blueprint is loaded."""
+    crown = VantaMasterCore.__new__(VantaMasterCore)
+    crown.logger = logging.getLogger("bench")
+    crown.swarm_engine = engine
+    crown._stigmergic_field = field
+    crown._pilgrim_states = states
+    crown.pilgrims = pilgrims
+    crown._global_trinity_best_node = {"position": [0.0, 0.0, 0.0]}
+    crown._current_purpose_vector = None
+    return crown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-pilgrim PSO updates with one vectorised Crown swarm tick.")
+    parser.add_argument("--pilgrims", type=int, default=5000, help="Number of pilgrims (default: 5000)")
+    parser.add_argument("--trails", type=int, default=20, help="Trails deposited around each pilgrim (default: 20)")
+    parser.add_argument("--ticks", type=int, default=5, help="Swarm ticks to time (default: 5)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    field = StigmergicGrid(cell_size=5.0, max_trails_per_bucket=args.trails)
+    states = {}
+    for i in range(args.pilgrims):
+        pos = [rng.uniform(-50, 50) for _ in range(3)]
+        states[f"p{i}"] = {
+            "position": pos,
+            "velocity": [rng.uniform(-1, 1) for _ in range(3)],
+            "personal_best_position": [p + rng.uniform(-5, 5) for p in pos],
+            "energy_level": 1.0,
+            "swarm_params": {"inertia_weight": 0.7, "cognitive_weight": 1.5, "social_weight": 1.5, "stigmergic_weight": 1.0, "max_speed": 1.0, "sensor_radius": 2.0},
+        }
+        for _ in range(args.trails):
+            emitted = [p + rng.uniform(-2, 2) for p in pos]
+            field.deposit(emitted, {"position_at_emission": emitted, "relevance_score": rng.random(), "value_proposition": rng.random()})
+    gbest = {"position": [0.0, 0.0, 0.0]}
+
+    # Per-pilgrim path: radius query, BaseAgent state update (velocity, position, role, energy), write-back
+    pilgrims = [make_pilgrim(name, dict(state)) for name, state in states.items()]
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        for pilgrim in pilgrims:
+            trails = field.query_radius(pilgrim.state["position"], pilgrim.state["swarm_params"]["sensor_radius"])
+            pilgrim._update_internal_state(pilgrim._calculate_state_updates(None, trails, gbest, None))
+    per_pilgrim = (time.perf_counter() - start) / args.ticks
+    print(f"  per-pilgrim loop        {per_pilgrim * 1000:9.2f} ms/tick")
+
+    # Crown path: the same work through one swarm_tick (radius queries, trail batching, step, write-back)
+    engine = SwarmEngine(seed=0)
+    crown_states = {name: dict(state) for name, state in states.items()}
+    crown_pilgrims = {name: make_pilgrim(name, dict(state)) for name, state in states.items()}
+    for name, state in crown_states.items():
+        engine.register(name, state)
+    crown = make_crown(field, engine, crown_states, crown_pilgrims)
+
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        crown.swarm_tick()
+    vectorised = (time.perf_counter() - start) / args.ticks
+    print(f"  VantaMasterCore.swarm_tick {vectorised * 1000:6.2f} ms/tick")
+    print(f"Speedup for {args.pilgrims} pilgrims x {args.trails} trails: {per_pilgrim / vectorised:,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
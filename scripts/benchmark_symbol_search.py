@@ -0,0 +1,73 @@
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to sys.path to allow importing vanta_seed
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from vanta_seed.core.symbol_search_index import SymbolSearchIndex
+
+SYLLABLES = ["ash", "bel", "cor", "dra", "eld", "fen", "gal", "hyr", "ist", "jor", "kal", "lum", "mor", "nyx", "orb", "pyr"]
+
+
+def make_entries(n: int, vocab_size: int, seed: int = 42):
+    rng = random.Random(seed)
+    vocab = sorted({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(vocab_size)})
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "entry_id": f"entry-{i}",
+            "symbols": rng.sample(vocab, 5),
+            "timestamp": (start + timedelta(seconds=rng.randint(0, 10_000_000))).isoformat(),
+        }
+        for i in range(n)
+    ], vocab
+
+
+def linear_search(entries, query, max_results):
+    """The original endpoint loop: scan every entry and symbol, sort all matches, truncate."""
+    q = query.lower()
+    matches = [e for e in entries if any(q in s.lower() for s in e["symbols"])]
+    matches.sort(key=lambda e: datetime.fromisoformat(e["timestamp"]), reverse=True)
+    return [e["entry_id"] for e in matches[:max_results]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare linear symbol search with the inverted/trigram index.")
+    parser.add_argument("--entries", type=int, default=100000, help="Synthetic myth entries (default: 100000)")
+    parser.add_argument("--vocab", type=int, default=5000, help="Distinct symbols (default: 5000)")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per scenario (default: 50)")
+    parser.add_argument("--max-results", type=int, default=10, help="Results per query (default: 10)")
+    args = parser.parse_args()
+
+    entries, vocab = make_entries(args.entries, args.vocab)
+    start = time.perf_counter()
+    index = SymbolSearchIndex(entries)
+    print(f"Indexed {len(index)} entries in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(7)
+    scenarios = {
+        "rare (full symbol)": [rng.choice(vocab) for _ in range(args.queries)],
+        "substring (4 chars)": [(lambda s: s[1:5])(rng.choice(vocab)) for _ in range(args.queries)],
+        "common (2 chars)": [rng.choice(SYLLABLES)[:2] for _ in range(args.queries)],
+    }
+    for label, queries in scenarios.items():
+        start = time.perf_counter()
+        for q in queries[:10]:
+            expected = linear_search(entries, q, args.max_results)
+        linear = (time.perf_counter() - start) / min(10, len(queries))
+        start = time.perf_counter()
+        for q in queries:
+            ids, _ = index.search(q, args.max_results)
+        indexed = (time.perf_counter() - start) / len(queries)
+        q = queries[0]
+        assert index.search(q, args.max_results)[0] == linear_search(entries, q, args.max_results)
+        print(f"  {label:<20} linear {linear * 1000:9.2f} ms  indexed {indexed * 1000:8.3f} ms  ({linear / indexed:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow importing FrAmEwOrK
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from FrAmEwOrK.trigger_index import TriggerIndex
+
+EXTENSIONS = [".py", ".ts", ".tsx", ".js", ".json", ".md", ".mdc", ".yaml", ".toml", ".css", ".html", ".rs", ".go", ".sql"]
+DIRS = ["src", "tests", "docs", "scripts", "agents", "core", "memory", "utils", "config", "api", "web", "build"]
+NAMES = ["Makefile", "Dockerfile", "README.md", "setup.py", "pyproject.toml", "package.json"]
+
+
+def make_rules(count: int, seed: int = 11):
+    """Trigger patterns in the shapes rule files use: extensions, file names, directory globs and free globs."""
+    rng = random.Random(seed)
+    rules = {}
+    for i in range(count):
+        shape = rng.random()
+        if shape < 0.5:
+            patterns = [f"*{rng.choice(EXTENSIONS)}"]
+        elif shape < 0.65:
+            patterns = [rng.choice(NAMES)]
+        elif shape < 0.85:
+            patterns = [f"{rng.choice(DIRS)}/*{rng.choice(EXTENSIONS)}", f"{rng.choice(DIRS)}/**/*{rng.choice(EXTENSIONS)}"]
+        elif shape < 0.95:
+            patterns = [f"/{rng.choice(DIRS)}/*/{rng.choice(['*', 'index.*', 'config*'])}"]
+        else:
+            patterns = [f"{rng.choice(['test_', 'bench_', 'rule_'])}{i}_*", f"*_{i}.bak"]
+        rules[f"rule_{i:04d}"] = patterns
+    return rules
+
+
+def make_paths(count: int, seed: int = 12):
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        dirs = "/".join(rng.choice(DIRS) for _ in range(rng.randint(0, 4)))
+        name = rng.choice(NAMES) if rng.random() < 0.05 else f"file{rng.randint(0, 999)}{rng.choice(EXTENSIONS)}"
+        path = f"{dirs}/{name}" if dirs else name
+        paths.append(("/" + path) if rng.random() < 0.2 else path)
+    return paths
+
+
+def path_match(rules, file_path):
+    """Baseline: the previous TriggerSystem.check_triggers loop."""
+    file_path_obj = Path(file_path)
+    return [rule_id for rule_id, patterns in rules.items() if any(file_path_obj.match(pattern) for pattern in patterns)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trigger matching: Path.match over every rule vs the compiled TriggerIndex.")
+    parser.add_argument("--rules", type=int, default=500, help="Number of rules (default: 500)")
+    parser.add_argument("--paths", type=int, default=10_000, help="Number of file paths (default: 10000)")
+    args = parser.parse_args()
+
+    rules = make_rules(args.rules)
+    paths = make_paths(args.paths)
+
+    start = time.perf_counter()
+    index = TriggerIndex(rules)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [path_match(rules, path) for path in paths]
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [index.match(path) for path in paths]
+    indexed = time.perf_counter() - start
+    assert results == expected
+
+    start = time.perf_counter()
+    for i in range(100):
+        index.set_rule(f"rule_{i:04d}", rules[f"rule_{i:04d}"])
+    index.match("src/app.py") # Includes recompiling the fallback regex
+    update = (time.perf_counter() - start) / 100
+
+    matched = sum(map(len, results))
+    print(f"{args.paths:,} paths x {args.rules} rules ({matched:,} matches), index built in {build * 1000:.1f} ms")
+    print(f"  Path.match loop  {baseline:8.3f} s  ({baseline / len(paths) * 1e6:8.1f} us/path)")
+    print(f"  TriggerIndex     {indexed:8.3f} s  ({indexed / len(paths) * 1e6:8.1f} us/path, {baseline / indexed:.0f}x)")
+    print(f"  single-rule update: {update * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
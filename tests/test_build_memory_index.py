@@ -0,0 +1,139 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from vanta_seed.memory.memory_index_service import MemoryIndexService
+from vanta_seed.runtime import build_memory_index as bmi
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(bmi, "MEMORY_STORAGE_DIR", tmp_path)
+    monkeypatch.setattr(bmi, "DB_PATH", tmp_path / "memory_index.db")
+    return tmp_path
+
+
+def _line(n, word="spiral"):
+    return json.dumps({"timestamp": f"2025-01-01T00:00:{n:02d}", "event_type": "note", "details": {"n": n, "w": word}})
+
+
+def _write(path, lines, mode="w", trailing="\n"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.write("\n".join(lines) + trailing)
+
+
+def _docids(storage):
+    with sqlite3.connect(storage / "memory_index.db") as conn:
+        return sorted(row[0] for row in conn.execute("SELECT docid FROM memory_fts"))
+
+
+def _manifest(storage, filename):
+    with sqlite3.connect(storage / "memory_index.db") as conn:
+        return conn.execute(
+            "SELECT byte_offset, line_no FROM memory_index_manifest WHERE filename = ?", (filename,)
+        ).fetchone()
+
+
+def test_incremental_indexes_only_appended_lines(storage):
+    path = storage / "a.jsonl"
+    _write(path, [_line(1), _line(2)])
+    bmi.build_index()
+    assert _docids(storage) == ["a.jsonl:1", "a.jsonl:2"]
+    assert _manifest(storage, "a.jsonl") == (path.stat().st_size, 3)
+
+    _write(path, [_line(3)], mode="a")
+    bmi.build_index(incremental=True)
+    assert _docids(storage) == ["a.jsonl:1", "a.jsonl:2", "a.jsonl:3"]
+
+    bmi.build_index(incremental=True)  # Nothing new: no duplicates
+    assert len(_docids(storage)) == 3
+
+
+def test_partial_trailing_line_waits_for_the_next_run(storage):
+    path = storage / "a.jsonl"
+    partial = _line(2)
+    _write(path, [_line(1), partial[:10]], trailing="")
+    bmi.build_index()
+    assert _docids(storage) == ["a.jsonl:1"]
+    assert _manifest(storage, "a.jsonl") == (len(_line(1)) + 1, 2)
+
+    _write(path, [partial[10:]], mode="a")
+    bmi.build_index(incremental=True)
+    assert _docids(storage) == ["a.jsonl:1", "a.jsonl:2"]
+
+
+def test_rewrite_to_a_larger_file_is_reindexed(storage):
+    path = storage / "a.jsonl"
+    _write(path, [_line(1, "old"), _line(2, "old")])
+    bmi.build_index()
+
+    # Same inode, larger size, different bytes in the already-indexed prefix
+    with open(path, "r+", encoding="utf-8") as f:
+        f.write("\n".join([_line(1, "new"), _line(2, "new"), _line(3, "new")]) + "\n")
+    os.utime(path, (0, 12345))
+    bmi.build_index(incremental=True)
+
+    with sqlite3.connect(storage / "memory_index.db") as conn:
+        contents = [row[0] for row in conn.execute("SELECT content FROM memory_fts ORDER BY docid")]
+    assert len(contents) == 3 and all('"new"' in c for c in contents)
+
+
+def test_incremental_skips_rows_indexed_live(storage):
+    path = storage / "a.jsonl"
+    _write(path, [_line(1)])
+    bmi.build_index()
+
+    _write(path, [_line(2)], mode="a")
+    service = MemoryIndexService(storage / "memory_index.db", flush_interval=60)
+    service.add("a.jsonl:2", "2025-01-01T00:00:02", "note", "live")
+    service.close()
+
+    bmi.build_index(incremental=True)
+    assert _docids(storage) == ["a.jsonl:1", "a.jsonl:2"]
+
+
+def test_full_build_swaps_shadow_table_and_resets_manifest(storage):
+    _write(storage / "a.jsonl", [_line(1)])
+    _write(storage / "b.jsonl", [_line(1), _line(2)])
+    bmi.build_index()
+    (storage / "b.jsonl").unlink()
+    bmi.build_index()
+
+    assert _docids(storage) == ["a.jsonl:1"]
+    assert _manifest(storage, "b.jsonl") is None
+    with sqlite3.connect(storage / "memory_index.db") as conn:
+        assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'memory_fts_shadow'").fetchone()
+
+
+def test_legacy_rowids_force_a_full_build(storage):
+    _write(storage / "a.jsonl", [_line(1)])
+    with sqlite3.connect(storage / "memory_index.db") as conn:
+        bmi._create_fts_table(conn.cursor(), "memory_fts")
+        conn.execute("INSERT INTO memory_fts (docid, timestamp, event_type, content) VALUES ('a.jsonl:1', 't', 'e', 'x')")
+    bmi.build_index(incremental=True)
+    assert _docids(storage) == ["a.jsonl:1"]
+
+
+def test_full_build_catches_up_on_memories_saved_during_the_build(storage, monkeypatch):
+    path = storage / "a.jsonl"
+    _write(path, [_line(1)])
+    bmi.build_index()
+    real_parse_all = bmi._parse_all
+    saved = []
+
+    def parse_then_save_live(work, workers):
+        parsed = real_parse_all(work, workers)
+        if not saved:  # A save_memory lands in the old table between the full build's read and its swap
+            saved.append(True)
+            _write(path, [_line(2)], mode="a")
+            service = MemoryIndexService(storage / "memory_index.db", flush_interval=60)
+            service.add("a.jsonl:2", "2025-01-01T00:00:02", "note", "live")
+            service.close()
+        return parsed
+
+    monkeypatch.setattr(bmi, "_parse_all", parse_then_save_live)
+    _write(storage / "b.jsonl", [_line(1)])
+    bmi.build_index()
+    assert _docids(storage) == ["a.jsonl:1", "a.jsonl:2", "b.jsonl:1"]
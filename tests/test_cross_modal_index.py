@@ -0,0 +1,167 @@
+import datetime
+import json
+import random
+
+import pytest
+
+from vanta_seed.memory.cross_modal_index import CrossModalIndex, normalize_timestamp
+
+TYPES = ["text", "image", "audio", "outcome", "agent_action"]
+AGENTS = ["alpha", "beta", None]
+TAGS = ["dream", "echo", "100%", "under_score"]
+
+
+def _entry(rng, i):
+    ts = datetime.datetime(2025, 1, 1) + datetime.timedelta(hours=i)
+    entry_type = rng.choice(TYPES)
+    entry = {
+        "id": f"e{i}",
+        "type": entry_type,
+        "timestamp": ts.isoformat() + ("Z" if i % 2 else ""),
+        "agent": rng.choice(AGENTS),
+        "tags": rng.sample(TAGS, rng.randint(0, 2)),
+    }
+    if entry_type in ("image", "audio"):
+        entry["filename"] = f"file_{i}.bin"
+    else:
+        entry["data"] = f"Spiral note {i} " + rng.choice(["Echo", "mirror", "50%_off"])
+    return entry
+
+
+def _naive_search(entries, q=None, entry_type=None, tags=None, since=None):
+    since_ts = normalize_timestamp(since) if since else None
+    results = []
+    for e in entries:
+        if entry_type and e["type"] != entry_type:
+            continue
+        if tags and not set(tags).issubset(e.get("tags", [])):
+            continue
+        if since_ts and normalize_timestamp(e["timestamp"]) < since_ts:
+            continue
+        if q:
+            fields = [e["data"]] if e["type"] == "text" else [e["filename"]] if e["type"] in ("image", "audio") else []
+            if not any(q.lower() in f.lower() for f in fields + e["tags"]):
+                continue
+        results.append(e)
+    return results
+
+
+@pytest.fixture
+def journal(tmp_path):
+    rng = random.Random(7)
+    entries = [_entry(rng, i) for i in range(200)]
+    path = tmp_path / "memory_metadata.jsonl"
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries) + "not json\n", encoding="utf-8")
+    return path, entries
+
+
+def test_get_and_search_match_a_full_scan(journal, tmp_path):
+    path, entries = journal
+    index = CrossModalIndex(tmp_path / "memory_metadata.db", path)
+    assert len(index) == len(entries)
+    assert index.get("e17") == entries[17]
+    assert index.get("missing") is None
+
+    queries = [
+        dict(q="echo"), dict(q="50%"), dict(q="under_"), dict(q="FILE_1"), dict(entry_type="text", q="spiral"),
+        dict(tags=["dream"]), dict(tags=["dream", "echo"]), dict(since="2025-01-05T00:00:00+00:00"),
+        dict(since="2025-01-03T12:00:00Z", entry_type="outcome", tags=["100%"]),
+    ]
+    for query in queries:
+        assert index.search(**query) == _naive_search(entries, **query), query
+    index.close()
+
+
+def test_structured_filters(journal, tmp_path):
+    path, entries = journal
+    index = CrossModalIndex(tmp_path / "memory_metadata.db", path)
+    since = "2025-01-04T00:00:00Z"
+    results = index.search(filters=[
+        {"field": "timestamp", "op": ">=", "value": since},
+        {"field": "type", "op": "in", "value": ["outcome", "text", "agent_action"]},
+        {"field": "tags", "op": "in", "value": ["dream", "echo"]},
+        {"field": "agent", "op": "!=", "value": "beta"},
+    ], limit=5)
+    expected = [
+        e for e in entries
+        if normalize_timestamp(e["timestamp"]) >= normalize_timestamp(since)
+        and e["type"] in ("outcome", "text", "agent_action")
+        and {"dream", "echo"} & set(e["tags"])
+        and e["agent"] == "alpha" # SQL != excludes NULL agents
+    ][:5]
+    assert results == expected
+
+    with pytest.raises(ValueError):
+        index.search(filters=[{"field": "data", "op": "==", "value": "x"}])
+    with pytest.raises(ValueError):
+        index.search(filters=[{"field": "timestamp", "op": ">", "value": "yesterday"}])
+    index.close()
+
+
+def test_journal_records_and_catch_up(journal, tmp_path):
+    path, entries = journal
+    index = CrossModalIndex(tmp_path / "memory_metadata.db", path)
+    with open(path, "a", encoding="utf-8") as f: # Another writer appends behind this index's back
+        f.write(json.dumps({"op": "tag", "id": "e3", "tags": ["fresh"]}) + "\n")
+        f.write(json.dumps({"op": "delete", "id": "e4"}) + "\n")
+        f.write(json.dumps({"id": "e900", "type": "text", "timestamp": "2026-01-01T00:00:00", "data": "late", "tags": []}) + "\n")
+        f.write('{"id": "partial"') # Half-written line is left for a later sync
+
+    assert index.get("e3")["tags"] == ["fresh"]
+    assert index.get("e4") is None
+    assert [e["id"] for e in index.search(q="late")] == ["e900"]
+    assert index.get("partial") is None
+    assert [e["id"] for e in index.search(tags=["fresh"])] == ["e3"]
+    index.close()
+
+    path.write_text(path.read_text(encoding="utf-8").rsplit("\n", 1)[0] + "\n", encoding="utf-8")
+    reopened = CrossModalIndex(tmp_path / "memory_metadata.db", path)
+    live = len(entries) # e4 deleted, e900 added
+    assert len(reopened) == live
+    reopened.compact()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == live and all("op" not in json.loads(line) for line in lines)
+    assert reopened.get("e3")["tags"] == ["fresh"]
+    reopened.close()
+
+    rebuilt = CrossModalIndex(tmp_path / "rebuilt.db", path)
+    assert rebuilt.search() == [json.loads(line) for line in lines]
+    rebuilt.close()
+
+
+def test_maybe_compact_waits_for_enough_dead_records(journal, tmp_path):
+    path, entries = journal
+    index = CrossModalIndex(tmp_path / "memory_metadata.db", path)
+    assert index.dead_records() == (1, 201)  # The malformed line
+    with open(path, "a", encoding="utf-8") as f:
+        for entry in entries[:50]:
+            f.write(json.dumps({"op": "tag", "id": entry["id"], "tags": ["again"]}) + "\n")
+    assert index.dead_records() == (51, 251)
+    assert not index.maybe_compact(ratio=0.5, min_records=100)
+    assert not index.maybe_compact(ratio=0.1, min_records=1000)
+
+    assert index.maybe_compact(ratio=0.1, min_records=100)
+    assert index.dead_records() == (0, 200)
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 200
+    assert index.get("e0")["tags"] == ["again"]
+    index.close()
+
+
+def test_cross_modal_memory_compacts_its_journal(tmp_path):
+    from vanta_nextgen import CrossModalMemory
+
+    memory = CrossModalMemory(tmp_path / "memory_store" / "text")
+    memory.compact_min_records = 4
+    ids = [memory.add_text(f"note {i}") for i in range(4)]
+    memory.tag_entry(ids[0], ["a"])
+    assert len(memory.metadata_file.read_text(encoding="utf-8").splitlines()) == 5
+
+    memory.delete_entry(ids[1])  # 2 of 6 records now dead: below the ratio
+    memory.delete_entry(ids[2])  # 4 of 7 records dead: compacted
+    lines = [json.loads(line) for line in memory.metadata_file.read_text(encoding="utf-8").splitlines()]
+    assert [e["id"] for e in lines] == [ids[0], ids[3]] and lines[0]["tags"] == ["a"]
+
+    memory.tag_entry(ids[3], ["b"])
+    memory.close()  # Folds the remaining tag record away
+    lines = [json.loads(line) for line in memory.metadata_file.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 2 and all("op" not in e for e in lines)
@@ -0,0 +1,75 @@
+import json
+import random
+
+from vanta_seed.core.drift_history import DriftHistory
+from vanta_seed.core.memory_weave import MemoryWeave
+
+AGENTS = ["alpha", "beta", "gamma"]
+DECISIONS = ["continue", "fork", "sleep_mutation"]
+WORDS = ["spiral", "echo", "mirror", "seed", "drift", "ember"]
+
+
+def _snapshot(rng, i):
+    return {
+        "archetype_token": f"ARCH::{rng.choice(WORDS).upper()}::{i % 40}",
+        "source_agent": rng.choice(AGENTS),
+        "decision": rng.choice(DECISIONS),
+        "drift_vector": rng.random(),
+        "reason": " ".join(rng.sample(WORDS, 2)),
+        "payload": {"note": rng.choice(WORDS) + str(i)},
+        "n": i,
+    }
+
+
+def _naive_lookup(snapshots, query):
+    q = query.lower()
+    fields = lambda s: [s["reason"], s["archetype_token"], *s["payload"].values()]
+    return [s for s in reversed(snapshots) if any(q in f.lower() for f in fields(s))]
+
+
+def test_eviction_keeps_indexes_and_spills(tmp_path):
+    rng = random.Random(3)
+    spill = tmp_path / "drift_spill.jsonl"
+    history = DriftHistory(capacity=100, spill_path=str(spill))
+    snapshots = [_snapshot(rng, i) for i in range(1000)]
+    for s in snapshots:
+        history.append(s)
+    retained = snapshots[-100:]
+    assert len(history) == 100 and history.total_recorded == 1000
+    assert history.recent() == retained
+    assert history.recent(5) == retained[-5:]
+    assert history.by_agent("beta") == [s for s in retained if s["source_agent"] == "beta"]
+    assert history.by_decision("fork") == [s for s in retained if s["decision"] == "fork"]
+    assert history.drift_values() == [s["drift_vector"] for s in retained]
+    assert [s["n"] for s in history.iter_spilled()] == list(range(900))
+    assert json.loads(spill.read_text().splitlines()[0])["n"] == 0
+
+
+def test_lookup_matches_linear_scan():
+    rng = random.Random(5)
+    history = DriftHistory(capacity=2000)
+    snapshots = [_snapshot(rng, i) for i in range(3000)]
+    for s in snapshots:
+        history.append(s)
+    retained = snapshots[-2000:]
+    for query in ["ECHO", "pir", "ember12", "seed 1", "arch::mirror::7", "nothing-here"]:
+        assert history.lookup(query) == _naive_lookup(retained, query)
+        assert history.lookup(query, search_limit=50) == _naive_lookup(retained[-50:], query)
+
+
+def test_memory_weave_history_is_bounded():
+    weave = MemoryWeave(config={"drift_history_capacity": 10})
+    for i in range(25):
+        weave.snapshot_drift({"archetype_token": f"T::{i}", "reason": "loop"})
+    assert [s["archetype_token"] for s in weave.retrieve_history()] == [f"T::{i}" for i in range(15, 25)]
+    assert weave.lookup_memory("t::2")[0]["archetype_token"] == "T::24"
+
+
+def test_unspilled_eviction_warns_once_and_prunes_trigrams(caplog):
+    history = DriftHistory(capacity=2)
+    with caplog.at_level("WARNING", logger="Core.DriftHistory"):
+        for word in ["spiral", "echo", "mirror", "ember"]:
+            history.append({"reason": word})
+    assert sum("no spill path" in r.getMessage() for r in caplog.records) == 1
+    assert "spi" not in history._by_trigram and "mir" in history._by_trigram
+    assert history.lookup("irr") == [{"reason": "mirror"}]
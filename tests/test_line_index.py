@@ -0,0 +1,34 @@
+import json
+
+from vanta_seed.memory.line_index import JsonlLineIndex
+
+
+def test_append_assigns_physical_line_numbers(tmp_path):
+    path = tmp_path / "20250101_memory.jsonl"
+    index = JsonlLineIndex(path)
+    numbers = [index.append_line(json.dumps({"n": i})) for i in range(5)]
+    assert numbers == [1, 2, 3, 4, 5]
+    assert path.read_text().split("\n")[3] == json.dumps({"n": 3})
+    assert index.read_lines([2, 5, 6]) == {2: '{"n": 1}', 5: '{"n": 4}', 6: None}
+
+
+def test_sidecar_catches_up_with_external_appends(tmp_path):
+    path = tmp_path / "20250101_memory.jsonl"
+    JsonlLineIndex(path).append_line('{"n": 0}')
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('\n{"n": 1}\n')  # Another writer, leaving a trailing newline
+
+    reopened = JsonlLineIndex(path)
+    line_no = reopened.append_line('{"n": 2}')
+    physical = path.read_text().split("\n")
+    assert physical[line_no - 1] == '{"n": 2}'
+    assert reopened.line_count() == len(physical)
+
+
+def test_rebuilds_when_file_is_rewritten(tmp_path):
+    path = tmp_path / "20250101_memory.jsonl"
+    index = JsonlLineIndex(path)
+    for i in range(3):
+        index.append_line(json.dumps({"n": i}))
+    path.write_text('{"n": "new"}')
+    assert JsonlLineIndex(path).read_lines([1, 2]) == {1: '{"n": "new"}', 2: None}
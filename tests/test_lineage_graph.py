@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from vanta_seed.core.lineage_graph import LineageCycleError, LineageGraph
+
+
+def _naive_lca(graph, a, b):
+    seen = set(graph.ancestors(a))
+    for node in reversed(graph.ancestors(b)):
+        if node in seen:
+            return node
+    return None
+
+
+def test_ancestors_children_and_roots():
+    graph = LineageGraph()
+    graph.add_edge("root", "a")
+    graph.add_edge("a", "b")
+    graph.add_edge("root", "c")
+    assert "b" in graph and "missing" not in graph
+    assert graph.ancestors("b") == ["root", "a", "b"]
+    assert graph.children_of("root") == ["a", "c"]
+    assert graph.descendants("root") == ["root", "a", "b", "c"]
+    assert graph.roots == ["root"]
+    assert graph.add_edge("a", "b") is False
+
+
+def test_rejects_second_parent_and_cycles():
+    graph = LineageGraph()
+    graph.add_edge("a", "b")
+    graph.add_edge("b", "c")
+    with pytest.raises(ValueError):
+        graph.add_edge("x", "b")
+    with pytest.raises(LineageCycleError):
+        graph.add_edge("c", "a")
+
+
+def test_child_before_parent_reindexes_subtree():
+    graph = LineageGraph()
+    graph.add_edge("mid", "leaf")
+    graph.add_edge("top", "mid")
+    assert graph.depth_of("leaf") == 2
+    assert graph.kth_ancestor("leaf", 2) == "top"
+    assert graph.roots == ["top"]
+
+
+def test_lifting_queries_match_naive_walk():
+    rng = random.Random(7)
+    graph = LineageGraph()
+    nodes = [0]
+    graph.add_node(0)
+    for node in range(1, 500):
+        graph.add_edge(rng.choice(nodes[-20:] if rng.random() < 0.8 else nodes), node)
+        nodes.append(node)
+    graph.add_edge("other_root", "other_child")
+    for _ in range(300):
+        a, b = rng.choice(nodes), rng.choice(nodes)
+        assert graph.lowest_common_ancestor(a, b) == _naive_lca(graph, a, b)
+        assert graph.is_ancestor(a, b) == (a in graph.ancestors(b))
+    assert graph.lowest_common_ancestor(nodes[-1], "other_child") is None
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from vanta_seed.core.lot_sh_pipeline import EMPTY_SHORTHAND, LotShPipeline
+
+LATENCY = 0.05 # Seconds per stub Ollama call
+
+
+class StubOllama:
+    """Local stand-in for ollama.AsyncClient: fixed latency, canned replies, call counting."""
+
+    def __init__(self, latency=LATENCY):
+        self.latency = latency
+        self.calls = 0
+
+    async def chat(self, model, messages, stream=False, options=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        return {"message": {"content": f"{model}:{len(prompt)}"}}
+
+
+def _extractors(client):
+    async def extract_symbols(narrative, model):
+        response = await client.chat(model=model, messages=[{"role": "user", "content": narrative}])
+        return [response["message"]["content"], "ember", "tide"]
+
+    async def extract_shorthand(narrative):
+        # CUE -> MAP -> EVAL -> PLAN: each step needs the previous answer
+        shorthand, context = dict(EMPTY_SHORTHAND), narrative
+        for step in shorthand:
+            response = await client.chat(model="extractor", messages=[{"role": "system", "content": context}])
+            shorthand[step] = context = response["message"]["content"]
+        return shorthand
+
+    return extract_symbols, extract_shorthand
+
+
+def test_extraction_runs_concurrently_and_is_cached():
+    client = StubOllama()
+    pipeline = LotShPipeline(*_extractors(client), shorthand_model="extractor")
+
+    async def run():
+        start = time.perf_counter()
+        first = await pipeline.extract("a tide of embers", "myth-model")
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # Drift/collapse of the same narrative with a different symbol model reuses the LoT-Sh chain
+        second, other_model = await asyncio.gather(
+            pipeline.extract("a tide of embers", "myth-model"),
+            pipeline.extract("a tide of embers", "base-model"),
+        )
+        warm = time.perf_counter() - start
+        return first, second, other_model, cold, warm
+
+    first, second, other_model, cold, warm = asyncio.run(run())
+    # 1 symbol call alongside the 4-call chain: ~4 latencies instead of 5
+    assert 4 * LATENCY <= cold < 4.8 * LATENCY
+    assert warm < 1.8 * LATENCY # Only the new model's symbol call
+    assert client.calls == 6
+    assert second == first and second is not first
+    assert other_model.thought_shorthand == first.thought_shorthand
+    assert other_model.symbols[0].startswith("base-model")
+    assert pipeline.peek("a tide of embers", "myth-model") == first
+
+
+def test_concurrent_identical_requests_share_one_extraction():
+    client = StubOllama()
+    pipeline = LotShPipeline(*_extractors(client), shorthand_model="extractor")
+
+    async def run():
+        return await asyncio.gather(*(pipeline.extract("same narrative", "m") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert client.calls == 5 # One symbol call + one 4-step chain for all five requests
+    assert all(result == results[0] for result in results)
+
+
+def test_background_submission_returns_before_extraction():
+    client = StubOllama()
+    pipeline = LotShPipeline(*_extractors(client), shorthand_model="extractor")
+    index = {"e1": {"entry_id": "e1", "symbols": [], "extraction_status": "pending"}}
+
+    def complete(result):
+        index["e1"].update(symbols=result.symbols, thought_shorthand=result.thought_shorthand, extraction_status="complete")
+
+    async def run():
+        start = time.perf_counter()
+        pipeline.submit("e1", "late symbols", "m", complete)
+        submitted = time.perf_counter() - start
+        assert pipeline.is_pending("e1") and index["e1"]["extraction_status"] == "pending"
+        await pipeline.drain()
+        return submitted
+
+    submitted = asyncio.run(run())
+    assert submitted < LATENCY
+    assert index["e1"]["extraction_status"] == "complete" and len(index["e1"]["symbols"]) == 3
+    assert not pipeline.is_pending("e1")
@@ -0,0 +1,159 @@
+import asyncio
+
+from FrAmEwOrK.mcp_server.limits import RateLimiter, ResultCache, TTLCache
+from FrAmEwOrK.mcp_server.server import MCPServer
+from FrAmEwOrK.mcp_server.tools import ToolCategory, ToolDefinition
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    limiter = RateLimiter(window=60, clock=clock)
+    assert all(limiter.try_acquire(("a", "tool"), 3) for _ in range(3))
+    assert not limiter.try_acquire(("a", "tool"), 3)
+    assert limiter.try_acquire(("b", "tool"), 3) # Other clients have their own bucket
+    clock.now = 20.0 # 3 calls/minute -> one token every 20 s
+    assert limiter.try_acquire(("a", "tool"), 3)
+    assert not limiter.try_acquire(("a", "tool"), 3)
+    assert limiter.stats()["rejected"] == 2
+
+
+def test_ttl_cache_expires_lazily_and_stays_bounded():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, max_size=2, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3) # Evicts "b", the least recently used
+    assert cache.get("b") is None and len(cache) == 2
+    clock.now = 10.0
+    assert cache.get("a") is None # Expired on read
+    cache.put("d", 4) # Pops the stale "c" from the cold end
+    assert len(cache) == 1 and cache.stats()["expired"] == 2
+
+    results = ResultCache(shard_size=1, clock=clock)
+    results.put("x", 5, "k", "x-result")
+    results.put("y", 5, "k", "y-result") # Separate shards: "y" cannot evict "x"
+    assert results.get("x", 5, "k") == "x-result" and len(results) == 2
+
+
+def test_server_rate_limits_per_client_and_caches_results():
+    calls = []
+
+    async def echo(text):
+        calls.append(text)
+        return text.upper()
+
+    async def run():
+        server = MCPServer()
+        await server.start()
+        tool = ToolDefinition("echo", ToolCategory.SYSTEM, "Echo", {"text": "str"}, ["text"], cache_ttl=60, rate_limit=2)
+        await server.register_tool(tool, echo)
+        first = await server.execute_tool("echo", {"text": "a"}, client_id="c1")
+        cached = await server.execute_tool("echo", {"text": "a"}, client_id="c1")
+        await server.execute_tool("echo", {"text": "b"}, client_id="c1")
+        try:
+            await server.execute_tool("echo", {"text": "c"}, client_id="c1")
+            raise AssertionError("expected the rate limit to trip")
+        except RuntimeError as e:
+            assert "Rate limit exceeded" in str(e)
+        other = await server.execute_tool("echo", {"text": "c"}, client_id="c2")
+        assert server._tasks == [] # No background sweeps
+        await server.stop()
+        return first, cached, other
+
+    first, cached, other = asyncio.run(run())
+    assert cached is first and first.result == "A"
+    assert other.result == "C"
+    assert calls == ["a", "b", "c"] # The cache hit spent no token and ran nothing
+
+
+class SleepyTool:
+    """Local fake tool: sleeps, counts invocations and tracks how many run at once."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = self.running = self.max_running = 0
+
+    async def __call__(self, **params):
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            return params
+        finally:
+            self.running -= 1
+
+
+def test_identical_concurrent_calls_share_one_execution():
+    tool = SleepyTool(0.05)
+
+    async def run():
+        server = MCPServer()
+        await server.start()
+        await server.register_tool(ToolDefinition("slow", ToolCategory.AI, "Slow", {"a": "int", "b": "dict"}, ["a"], rate_limit=2, coalesce=True), tool)
+        # Same arguments in a different key order are the same call
+        calls = [server.execute_tool("slow", {"a": 1, "b": {"x": 1, "y": 2}}, client_id=f"c{i}") for i in range(5)]
+        calls += [server.execute_tool("slow", {"b": {"y": 2, "x": 1}, "a": 1}, client_id="c0") for _ in range(5)]
+        results = await asyncio.gather(*calls)
+        stats = server.get_stats()["single_flight"]
+        await server.stop()
+        return results, stats
+
+    results, stats = asyncio.run(run())
+    assert tool.calls == 1
+    assert all(result is results[0] for result in results)
+    assert stats == {"inflight": 0, "leaders": 1, "joined": 9} # Joiners spent no rate limit tokens
+
+
+def test_tools_do_not_coalesce_unless_marked_read_only():
+    from FrAmEwOrK.mcp_server.tools import AI_TOOLS, FILE_TOOLS, VECTOR_TOOLS
+
+    tool = SleepyTool(0.05)
+
+    async def run():
+        server = MCPServer()
+        await server.start()
+        await server.register_tool(ToolDefinition("write", ToolCategory.FILE, "Write", {"a": "int"}, ["a"]), tool)
+        await asyncio.gather(*(server.execute_tool("write", {"a": 1}) for _ in range(3)))
+        await server.stop()
+
+    asyncio.run(run())
+    assert tool.calls == 3
+    coalesced = {t.name for t in FILE_TOOLS + AI_TOOLS + VECTOR_TOOLS if t.coalesce}
+    assert {"read_file", "text_embedding", "semantic_search", "similarity_search"} <= coalesced
+    assert not coalesced & {"write_file", "vector_store_update", "layer_thought_process"}
+
+
+def test_per_tool_limits_keep_a_slow_tool_from_starving_others():
+    slow, fast = SleepyTool(0.05), SleepyTool(0.0)
+
+    async def run():
+        server = MCPServer(max_concurrency=None)
+        await server.start()
+        await server.register_tool(ToolDefinition("slow", ToolCategory.AI, "Slow", {"n": "int"}, ["n"], max_concurrency=2), slow)
+        await server.register_tool(ToolDefinition("fast", ToolCategory.AI, "Fast", {"n": "int"}, ["n"]), fast)
+        slow_calls = asyncio.gather(*(server.execute_tool("slow", {"n": n}) for n in range(6)))
+        await asyncio.sleep(0.01)
+        queued = server.get_stats()["concurrency"]["slow"]
+        await asyncio.gather(*(server.execute_tool("fast", {"n": n}) for n in range(6)))
+        fast_done_while_slow_queued = not slow_calls.done()
+        await slow_calls
+        stats = server.get_stats()["concurrency"]
+        await server.stop()
+        return queued, fast_done_while_slow_queued, stats
+
+    queued, fast_first, stats = asyncio.run(run())
+    assert queued["running"] == 2 and queued["queue_depth"] == 4
+    assert fast_first and fast.calls == 6 and "fast" not in stats # Unlimited tools take no semaphore
+    assert slow.calls == 6 and slow.max_running == 2
+    assert stats["slow"]["max_queue_depth"] == 4 and stats["slow"]["queued_calls"] == 4
+    assert stats["slow"]["completed"] == 6 and stats["slow"]["queue_depth"] == 0
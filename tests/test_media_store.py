@@ -0,0 +1,78 @@
+import asyncio
+import hashlib
+import io
+import os
+
+from vanta_seed.memory.media_store import MediaStore, iter_media_chunks, send_media
+
+PAYLOAD = os.urandom(10_000)
+DIGEST = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+async def _async_chunks(data, size):
+    for start in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[start:start + size]
+
+
+def test_sources_are_chunked_hashed_and_stored_once(tmp_path):
+    store = MediaStore(tmp_path / "audio", chunk_size=1024)
+    first = store.write("clip.WAV", PAYLOAD)
+    assert first.path == tmp_path / "audio" / f"{DIGEST}.wav"
+    assert (first.sha256, first.size, first.deduplicated) == (DIGEST, len(PAYLOAD), False)
+    assert first.path.read_bytes() == PAYLOAD
+
+    source_file = tmp_path / "source.wav"
+    source_file.write_bytes(PAYLOAD)
+    for source in (io.BytesIO(PAYLOAD), source_file, (PAYLOAD[i:i + 333] for i in range(0, len(PAYLOAD), 333))):
+        again = store.write("other.wav", source)
+        assert again.path == first.path and again.deduplicated
+
+    streamed = asyncio.run(store.awrite("streamed.wav", _async_chunks(PAYLOAD, 700)))
+    assert streamed.path == first.path and streamed.deduplicated
+
+    # A caller-known copy (e.g. under another suffix) is reused instead of writing a new file
+    reused = store.write("clip.mp3", PAYLOAD, existing=lambda digest: first.path if digest == DIGEST else None)
+    assert reused.path == first.path and reused.deduplicated
+    assert sorted(p.name for p in (tmp_path / "audio").iterdir()) == [f"{DIGEST}.wav"] # No leftover temp files
+
+
+def test_failed_stream_leaves_no_temp_file(tmp_path):
+    store = MediaStore(tmp_path, chunk_size=64)
+
+    async def broken():
+        yield b"x" * 100
+        raise RuntimeError("producer died")
+
+    try:
+        asyncio.run(store.awrite("bad.png", broken()))
+    except RuntimeError:
+        pass
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_zero_copy_reads(tmp_path):
+    stored = MediaStore(tmp_path).write("img.png", PAYLOAD)
+    chunks = list(iter_media_chunks(stored.path, chunk_size=4096))
+    assert [len(c) for c in chunks] == [4096, 4096, 1808]
+    assert b"".join(chunks) == PAYLOAD
+    assert b"".join(iter_media_chunks(stored.path, 1000, offset=9500, count=1000)) == PAYLOAD[9500:]
+
+    out_path = tmp_path / "copy.bin"
+    with open(out_path, "wb") as out:
+        assert send_media(stored.path, out.fileno(), offset=10, count=5000) == 5000
+    assert out_path.read_bytes() == PAYLOAD[10:5010]
+
+
+def test_delete_racing_a_deduplicating_add_keeps_the_new_entry_valid(tmp_path):
+    from vanta_nextgen import CrossModalMemory
+
+    memory = CrossModalMemory(tmp_path / "memory_store" / "images")
+    first = memory.add_image("a.png", image_bytes=PAYLOAD)
+    staged = memory.media.stage("b.png", PAYLOAD)  # Same content, streamed before the delete runs
+    assert memory.delete_entry(first)
+    assert not any((tmp_path / "memory_store" / "images").glob("*.png"))
+
+    second = memory._store_media("image", "b.png", staged, None, [])
+    assert memory.media_path(second).read_bytes() == PAYLOAD  # Dedup is decided under the lock, after the delete
+    assert memory.delete_entry(second) and not any((tmp_path / "memory_store" / "images").iterdir())
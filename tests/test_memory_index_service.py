@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+
+import pytest
+
+from vanta_seed.memory import memory_index_service
+from vanta_seed.memory.memory_index_service import MemoryIndexService
+
+
+@pytest.fixture
+def service(tmp_path):
+    # A long interval keeps the background flusher out of the way unless a test wakes it.
+    svc = MemoryIndexService(tmp_path / "memory_index.db", flush_interval=60, batch_size=1000, busy_timeout=0.05)
+    yield svc
+    svc.close()
+
+
+def _count_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT count(*) FROM memory_fts").fetchone()[0]
+
+
+def _add(service, start, count):
+    for i in range(start, start + count):
+        service.add(f"20250101_memory.jsonl:{i}", "2025-01-01T00:00:00", "note", f"entry number{i} spiral")
+
+
+def test_group_commit_writes_pending_rows_in_one_flush(service):
+    _add(service, 1, 50)
+    assert service.pending_count() == 50
+    assert service.flush() == 50
+    assert service.pending_count() == 0
+    assert _count_rows(service.db_path) == 50
+    assert service.flush() == 0
+
+
+def test_batch_size_wakes_the_flusher(tmp_path):
+    svc = MemoryIndexService(tmp_path / "memory_index.db", flush_interval=60, batch_size=10)
+    try:
+        _add(svc, 1, 10)
+        for _ in range(200):
+            if svc.pending_count() == 0:
+                break
+            threading.Event().wait(0.01)
+        assert svc.pending_count() == 0
+        assert _count_rows(svc.db_path) == 10
+    finally:
+        svc.close()
+
+
+def test_query_sees_pending_rows_and_reuses_pooled_readers(service):
+    _add(service, 1, 5)
+    assert service.query_docids("number3") == ["20250101_memory.jsonl:3"]
+    assert len(service.query_docids("spiral", limit=10)) == 5
+    assert service._readers_created == 1
+    assert service._readers.qsize() == 1
+
+
+def test_failed_commit_requeues_rows_ahead_of_new_ones(service, monkeypatch):
+    monkeypatch.setattr(memory_index_service, "FAILURE_ALERT_THRESHOLD", 2)
+    service.flush()  # Create the schema before another connection takes the lock
+    blocker = sqlite3.connect(service.db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE;")
+    try:
+        _add(service, 1, 3)
+        assert service.flush() == 0
+        assert service.pending_count() == 3
+        assert isinstance(service.last_error, sqlite3.OperationalError)
+        assert service.healthy
+
+        _add(service, 4, 2)
+        assert service.flush() == 0
+        assert not service.healthy
+        assert [row[0] for row in service._pending] == [f"20250101_memory.jsonl:{i}" for i in range(1, 6)]
+    finally:
+        blocker.execute("ROLLBACK;")
+        blocker.close()
+
+    assert service.flush() == 5
+    assert service.healthy and service.last_error is None
+    assert _count_rows(service.db_path) == 5
+
+
+def test_flusher_backs_off_after_failure(service, monkeypatch):
+    calls = []
+    monkeypatch.setattr(service, "flush", lambda: calls.append(1) or 0)
+    service._retry_at = float("inf")
+    service._wake.set()
+    threading.Event().wait(0.1)
+    assert calls == []
@@ -0,0 +1,29 @@
+import os
+import sys
+from urllib.parse import unquote
+
+from fastapi.testclient import TestClient
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import vanta_router_and_lora as router
+from vanta_nextgen import CrossModalMemory
+
+client = TestClient(router.app)
+
+
+def test_media_route_serves_non_ascii_and_quoted_filenames(tmp_path, monkeypatch):
+    memory = CrossModalMemory(tmp_path / "images")
+    monkeypatch.setattr(router, "MEMORY_ROOT", tmp_path)
+    monkeypatch.setattr(router, "_MEMORY_INDEX", memory.index)
+
+    for filename in ["画像.png", 'say "hi".png']:
+        entry_id = memory.add_image(filename, image_bytes=b"\x89PNG payload")
+        response = client.get(f"/v1/memory/media/{entry_id}")
+        assert response.status_code == 200 and response.content == b"\x89PNG payload"
+        disposition = response.headers["content-disposition"]
+        assert disposition.isascii()
+        assert unquote(disposition.split("filename*=UTF-8''")[1]) == filename
+    assert 'filename="say _hi_.png"' in disposition
@@ -0,0 +1,129 @@
+import random
+
+import pytest
+
+from vanta_seed.core.memory_store import MemoryStore
+
+
+AGENTS = ["agent1", "agent2", "agent3"]
+TYPES = ["narrative", "ritual_log", "mutation"]
+TAGS = ["alpha", "beta", "gamma", "delta"]
+WORDS = ["event", "ritual", "drift", "spiral", "echo", "mirror", "seed"]
+
+
+def _fill(store, count, monkeypatch, seed=7):
+    rng = random.Random(seed)
+    for i in range(count):
+        # Deterministic, strictly increasing timestamps for range queries
+        monkeypatch.setattr("vanta_seed.core.memory_store.time.time", lambda i=i: float(i))
+        store.add_item(
+            rng.choice(AGENTS),
+            rng.choice(TYPES),
+            {"text": " ".join(rng.sample(WORDS, 3)), "n": i},
+            tags=rng.sample(TAGS, rng.randint(0, 2)),
+        )
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = MemoryStore(max_items=200, persist_path=str(tmp_path / "memory_items.yaml"))
+    _fill(s, 500, monkeypatch)
+    return s
+
+
+def test_index_tracks_deque_eviction(store):
+    assert store.get_store_size() == 200
+    assert len(store._index) == 200
+    # Oldest surviving item is number 300
+    assert store.get_items_filtered(end_time=300.0, limit=5)[0]["content"]["n"] == 300
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"agent_id": "agent2"},
+    {"type": "mutation"},
+    {"agent_id": "agent1", "type": "narrative"},
+    {"tags": ["alpha"]},
+    {"tags": ["alpha", "beta"]},
+    {"start_time": 350.0, "end_time": 420.0},
+    {"agent_id": "agent3", "tags": ["gamma"], "start_time": 400.0},
+])
+def test_filtered_matches_scan(store, filters):
+    indexed = store.get_items_filtered(limit=50, **filters)
+    scanned = store._scan_items_filtered(
+        filters.get("agent_id"), filters.get("type"), filters.get("tags"),
+        filters.get("start_time"), filters.get("end_time"), 50
+    )
+    assert indexed == scanned
+
+
+@pytest.mark.parametrize("query,agent_id", [
+    ("event", None),
+    ("vent", None),       # fragment of a token
+    ("drift spiral", None),
+    ("Mirror", "agent1"),
+    ("", "agent2"),
+    ("nothing-here", None),
+])
+def test_search_matches_scan(store, query, agent_id):
+    assert store.search_items(query, agent_id=agent_id, limit=25) == \
+        store._scan_search_items(query, agent_id=agent_id, limit=25)
+
+
+def test_simple_matches_scan(store):
+    assert store.get_items_simple(agent_id="agent1", limit=20) == \
+        store._scan_items_simple(agent_id="agent1", limit=20)
+
+
+def test_segment_log_replays_only_new_appends(tmp_path):
+    path = str(tmp_path / "memory_items.yaml")
+    store = MemoryStore(max_items=10, persist_path=path, fsync=False)
+    for i in range(25):
+        store.add_item("agent1", "narrative", {"n": i})
+        assert store.save()
+    store.close()
+
+    reloaded = MemoryStore(max_items=10, persist_path=path, fsync=False)
+    assert [item["content"]["n"] for item in reloaded.get_items_simple(limit=10)] == list(range(24, 14, -1))
+
+
+def test_segment_log_discards_torn_tail(tmp_path):
+    path = str(tmp_path / "memory_items.yaml")
+    store = MemoryStore(max_items=10, persist_path=path, fsync=False)
+    store.add_item("agent1", "narrative", {"n": 1})
+    store.save()
+    store.close()
+    log_dir = tmp_path / "memory_items_log"
+    segment = next(log_dir.glob("segment-*.log"))
+    with open(segment, "ab") as f:
+        f.write(b"\x00\x00\x01\x00partial")
+
+    reloaded = MemoryStore(max_items=10, persist_path=path, fsync=False)
+    assert reloaded.get_store_size() == 1
+    reloaded.add_item("agent1", "narrative", {"n": 2})
+    reloaded.save()
+    assert MemoryStore(max_items=10, persist_path=path, fsync=False).get_store_size() == 2
+
+
+def test_yaml_import_export_round_trip(store, tmp_path):
+    export_path = str(tmp_path / "export.yaml")
+    assert store.export_yaml(export_path)
+    other = MemoryStore(max_items=200, persist_path=str(tmp_path / "other.yaml"), fsync=False)
+    assert other.import_yaml(export_path) == 200
+    other.save()
+    reloaded = MemoryStore(max_items=200, persist_path=str(tmp_path / "other.yaml"), fsync=False)
+    assert reloaded.get_items_simple(limit=200) == store.get_items_simple(limit=200)
+
+
+def test_gram_index_drops_evicted_vocabulary(tmp_path):
+    store = MemoryStore(max_items=2, persist_path=str(tmp_path / "memory_items.yaml"), fsync=False)
+    store.add_item("agent1", "narrative", {"text": "kaleidoscope"})
+    store.add_item("agent1", "narrative", {"text": "echo"})
+    assert "kaleidoscope" in store._index._by_gram["ido"]
+    assert [i["content"]["text"] for i in store.search_items("leido")] == ["kaleidoscope"]
+
+    store.add_item("agent1", "narrative", {"text": "mirror"})
+    store.add_item("agent1", "narrative", {"text": "seed"})
+    assert "ido" not in store._index._by_gram
+    assert store.search_items("leido") == []
+    assert [i["content"]["text"] for i in store.search_items("ee")] == ["seed"]
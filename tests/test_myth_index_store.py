@@ -0,0 +1,68 @@
+import json
+
+from vanta_seed.core.myth_index_store import MythIndexStore
+
+
+def _entry(i):
+    return {"entry_id": f"e{i}", "symbols": [f"sym{i}"], "type": "branch"}
+
+
+def test_appends_are_journaled_and_replayed(tmp_path):
+    snapshot = tmp_path / "myth_symbol_index.json"
+    snapshot.write_text(json.dumps([_entry(0)]))
+    store = MythIndexStore(str(snapshot), compact_every=100, fsync_policy="never")
+    store.load()
+    for i in range(1, 4):
+        store.append(_entry(i))
+
+    assert json.loads(snapshot.read_text()) == [_entry(0)]  # Snapshot untouched until compaction
+    assert len((tmp_path / "myth_symbol_index.journal.jsonl").read_text().splitlines()) == 3
+
+    reloaded = MythIndexStore(str(snapshot))
+    assert list(reloaded.load()) == ["e0", "e1", "e2", "e3"]
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    snapshot = tmp_path / "myth_symbol_index.json"
+    store = MythIndexStore(str(snapshot), compact_every=3, fsync_policy="always")
+    store.load()
+    entries = store.entries
+    for i in range(4):
+        store.append(_entry(i))
+
+    assert [e["entry_id"] for e in json.loads(snapshot.read_text())] == ["e0", "e1", "e2"]
+    assert len(open(store.journal_path).read().splitlines()) == 1
+    store.close()
+    assert len(json.loads(snapshot.read_text())) == 4
+    assert open(store.journal_path).read() == ""
+    assert store.entries is entries  # Callers may hold a reference to the live dict
+
+
+def test_torn_journal_tail_is_dropped(tmp_path):
+    snapshot = tmp_path / "myth_symbol_index.json"
+    store = MythIndexStore(str(snapshot), fsync_policy="never")
+    store.load()
+    store.append(_entry(1))
+    with open(store.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"entry_id": "e2", "sym')
+
+    reloaded = MythIndexStore(str(snapshot))
+    assert list(reloaded.load()) == ["e1"]
+    reloaded.append(_entry(3))
+    assert list(MythIndexStore(str(snapshot)).load()) == ["e1", "e3"]
+
+
+def test_interval_policy_fsyncs_the_tail_of_a_burst(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr("vanta_seed.core.myth_index_store.os.fsync", lambda fd: synced.append(fd))
+    store = MythIndexStore(str(tmp_path / "myth_symbol_index.json"), fsync_policy="interval", fsync_interval=0.05)
+    store.load()
+    for i in range(3):
+        store.append(_entry(i))
+    assert len(synced) == 1  # First append syncs, the rest fall inside the interval
+
+    timer = store._fsync_timer
+    assert timer is not None
+    timer.join(1)
+    assert len(synced) == 2 and not store._unsynced
+    assert store._fsync_timer is None
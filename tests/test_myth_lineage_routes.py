@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import vanta_router_and_lora as router
+
+client = TestClient(router.app)
+
+
+def _entry(entry_id, parent_id=None, origin_id=None, entry_type="drift"):
+    return {
+        "entry_id": entry_id,
+        "symbols": [f"sym-{entry_id}"],
+        "type": entry_type,
+        "timestamp": "2025-01-01T00:00:00",
+        "lineage": {"origin_id": origin_id, "parent_id": parent_id},
+    }
+
+
+@pytest.fixture(autouse=True)
+def myth_index():
+    saved = dict(router.SYMBOL_INDEX)
+    router.SYMBOL_INDEX.clear()
+    router.MYTH_ORIGINS.clear()
+    router.MYTH_LINEAGE.clear()
+    entries = [
+        _entry("root", entry_type="branch"),
+        _entry("a", "root", "root"),
+        _entry("b", "a", "root"),
+        _entry("c", "root", "root"),
+        _entry("other", entry_type="branch"),
+    ]
+    for entry in entries:
+        router.SYMBOL_INDEX[entry["entry_id"]] = entry
+        router.index_myth_lineage(entry)
+    yield
+    router.SYMBOL_INDEX.clear()
+    router.SYMBOL_INDEX.update(saved)
+    router.MYTH_ORIGINS.clear()
+    router.MYTH_LINEAGE.clear()
+
+
+def test_index_entries_summarises_every_entry():
+    response = client.get("/v1/myth/index/entries")
+    assert response.status_code == 200
+    summaries = {s["entry_id"]: s for s in response.json()}
+    assert set(summaries) == {"root", "a", "b", "c", "other"}
+    assert summaries["b"]["symbols"] == ["sym-b"] and summaries["b"]["type"] == "drift"
+
+
+def test_lineage_map_is_not_shadowed_by_entry_route():
+    response = client.get("/v1/myth/lineage/map")
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["flowchart LR", "  root", "  root --> a", "  a --> b", "  root --> c", "  other"]
+
+    response = client.get("/v1/myth/lineage/map", params={"origin_id": "root"})
+    assert response.text.splitlines() == ["flowchart LR", "  root --> a", "  a --> b", "  root --> c"]
+
+
+def test_lineage_of_entry_with_common_ancestor():
+    response = client.get("/v1/myth/lineage/b", params={"compare_to": "c"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ancestors"] == ["root", "a", "b"] and body["depth"] == 2
+    assert body["common_ancestor"] == "root"
+    assert client.get("/v1/myth/lineage/root").json()["children"] == ["a", "c"]
+    assert client.get("/v1/myth/lineage/missing").status_code == 404
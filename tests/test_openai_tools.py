@@ -240,4 +240,66 @@ async def test_system_message_generation(layer_of_thought):
     ]
     assert kwargs.get('messages') == expected_messages
     assert kwargs.get('model') == layer_of_thought.config.model
-    assert kwargs.get('temperature') == test_config.temperature 
\ No newline at end of file
+    assert kwargs.get('temperature') == test_config.temperature 
+@pytest.mark.asyncio
+async def test_batch_get_embeddings_cache_hit_and_miss(layer_of_thought):
+    mock_client = AsyncMock(spec=openai.AsyncClient)
+    layer_of_thought.client = mock_client
+    mock_client.embeddings = AsyncMock()
+    mock_client.embeddings.create.return_value = create_mock_embedding_response([[1.0, 0.0], [0.0, 1.0]])
+
+    # Duplicates are embedded once; order of the returned mapping follows the input
+    first = await layer_of_thought.batch_get_embeddings(["a", "b", "a"])
+    assert list(first) == ["a", "b"]
+    _, kwargs = mock_client.embeddings.create.call_args
+    assert kwargs["input"] == ["a", "b"]
+    assert layer_of_thought._embedding_cache.misses == 2
+
+    # Everything cached: no API call
+    second = await layer_of_thought.batch_get_embeddings(["b", "a"])
+    assert mock_client.embeddings.create.call_count == 1
+    assert second["a"].tolist() == [1.0, 0.0]
+    assert layer_of_thought._embedding_cache.hits == 2
+
+    # Partial miss: only the new text is sent
+    mock_client.embeddings.create.return_value = create_mock_embedding_response([[0.5, 0.5]])
+    await layer_of_thought.batch_get_embeddings(["a", "c"])
+    _, kwargs = mock_client.embeddings.create.call_args
+    assert kwargs["input"] == ["c"]
+
+@pytest.mark.asyncio
+async def test_semantic_search_reuses_corpus_index(layer_of_thought):
+    mock_client = AsyncMock(spec=openai.AsyncClient)
+    layer_of_thought.client = mock_client
+    mock_client.embeddings = AsyncMock()
+    mock_client.embeddings.create.return_value = create_mock_embedding_response([[1.0, 0.0], [1.0, 0.1], [0.0, 1.0]])
+
+    corpus = ["doc one", "doc two"]
+    await layer_of_thought.semantic_search("query one", corpus, top_k=1)
+    index = next(iter(layer_of_thought._corpus_indexes.values()))
+
+    # Same corpus, new query: only the query is embedded and the matrix is reused
+    mock_client.embeddings.create.return_value = create_mock_embedding_response([[0.0, 1.0]])
+    results = await layer_of_thought.semantic_search("query two", list(corpus), top_k=1)
+    _, kwargs = mock_client.embeddings.create.call_args
+    assert kwargs["input"] == ["query two"]
+    assert results[0][1] == "doc two"
+    assert list(layer_of_thought._corpus_indexes.values()) == [index]
+
+def test_embedding_cache_saves_in_batches(tmp_path):
+    from framework.mcp_server.implementations.ai.embedding_index import EmbeddingCache
+
+    path = str(tmp_path / "embeddings.npz")
+    cache = EmbeddingCache(persist_path=path, save_every=3, save_interval=3600)
+    cache.put("k1", [1.0])
+    cache.put("k2", [2.0])
+    assert cache.save_if_due() is None
+    cache.put("k3", [3.0])
+    writer = cache.save_if_due()
+    assert writer is not None
+    writer.join()
+    assert len(EmbeddingCache(persist_path=path)) == 3
+
+    cache.put("k4", [4.0])
+    cache.close()  # Flushes below the threshold
+    assert len(EmbeddingCache(persist_path=path)) == 4
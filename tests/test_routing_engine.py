@@ -0,0 +1,54 @@
+import itertools
+import random
+
+from vanta_seed.core.routing_engine import CODE_PAT, MATH_PAT, MYTH_PAT, VISION_PAT, RoutingEngine
+
+KEYWORDS = ["generate image", "create an image", "make a picture"]
+FRAGMENTS = [
+    "tell me", "a", "the", "about", "Python", "def ", "(x)", "return", "MYTH", "epictures", "legendary",
+    "Generate Image", "make a picture", "see https://example.com/cat.PNG", "<IMG src=x>", "∑", "\\frac", "import ",
+    "story", "data", "\n", "https://x.io/a b.gif", "{", "loremaster",
+]
+
+
+def _sequential(prompt, requested_model, default, code, vision, openai_default, loras, keywords):
+    """The original TaskRouter.pick_model rules, one regex after another."""
+    if requested_model and requested_model.startswith(("gpt-", "dall-e-")):
+        return ("openai", requested_model, None)
+    if any(keyword in prompt.lower() for keyword in keywords):
+        return ("openai", openai_default, None)
+    if vision and VISION_PAT.search(prompt):
+        return ("ollama", vision, None)
+    if code and (CODE_PAT.search(prompt) or MATH_PAT.search(prompt)):
+        if "python" in prompt.lower() and loras.get("python_expert"):
+            return ("ollama", loras["python_expert"], code)
+        return ("ollama", code, None)
+    if MYTH_PAT.search(prompt) and loras.get("myth_weaver"):
+        return ("ollama", loras["myth_weaver"], default)
+    if requested_model:
+        if requested_model in loras.values():
+            return ("ollama", requested_model, default)
+        return ("ollama", requested_model, None)
+    return ("ollama", default, None)
+
+
+def test_single_pass_routing_matches_sequential_rules():
+    rng = random.Random(3)
+    prompts = [" ".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 8))) for _ in range(400)]
+    lora_sets = [{}, {"python_expert": "py-lora", "myth_weaver": "myth-lora"}]
+    for keywords, code, vision, loras in itertools.product([KEYWORDS, []], ["coder", None], ["llava", None], lora_sets):
+        engine = RoutingEngine("base", code, vision, "gpt-4o", keywords, loras, cache_size=64)
+        for prompt in prompts:
+            for requested in (None, "gpt-4o-mini", "myth-lora", "llama3"):
+                expected = _sequential(prompt, requested, "base", code, vision, "gpt-4o", loras, keywords)
+                assert engine.route(prompt, requested).as_tuple() == expected, (prompt, requested, keywords, code, vision, loras)
+
+
+def test_decisions_are_cached_by_fingerprint():
+    engine = RoutingEngine("base", "coder", cache_size=2)
+    first = engine.route("def f(): pass")
+    assert engine.route("def f(): pass") is first
+    assert engine.route("def f(): pass", "llama3").model == "coder" # Requested model is part of the key
+    engine.route("tell me a story")
+    assert engine.cache_info() == {"hits": 1, "misses": 3, "size": 2, "max_size": 2}
+    assert engine.route("def f(): pass") is not first # Evicted as least recently used
@@ -8,6 +8,7 @@ including rule loading, validation, dependency management, and index maintenance
 import os
 import pytest
 import asyncio
+import time
 import yaml
 from pathlib import Path
 from datetime import datetime
@@ -322,4 +323,48 @@ Concurrent rule {i}
     # Verify all rules were loaded
     assert len(rule_watcher_agent.rules) == 7
     for i in range(5):
-        assert f'concurrent_rule_{i}' in rule_watcher_agent.rules 
\ No newline at end of file
+        assert f'concurrent_rule_{i}' in rule_watcher_agent.rules 
+
+
+@pytest.mark.asyncio
+async def test_event_burst_is_coalesced(rules_dir):
+    """Test that a burst of file events (e.g. a git checkout) is applied as one batch with one index write."""
+    rule_watcher_agent = RuleIndexWatcherAgent(str(rules_dir), debounce_seconds=0.05)
+    await rule_watcher_agent.load_all_rules()
+    writes_before = rule_watcher_agent.index_writes
+
+    burst_paths = []
+    for i in range(200):
+        # Chains of ten rules, each depending on a rule that only appears later in the burst
+        dependencies = f'["burst_rule_{i + 1}"]' if i % 10 != 9 else '["test_rule_1"]'
+        rule_path = rules_dir / f'burst_rule_{i}.mdc'
+        rule_path.write_text(f"""
+---
+id: burst_rule_{i}
+type: test
+description: Burst rule {i}
+triggers:
+  - pattern: "*.py"
+dependencies: {dependencies}
+autoApply: true
+---
+Burst rule {i}
+""")
+        burst_paths.append(str(rule_path))
+
+    start = time.perf_counter()
+    for path in burst_paths + burst_paths: # Watchdog reports created + modified for each file
+        rule_watcher_agent.queue_rule_event(path)
+    (rules_dir / 'test_rule_2.mdc').unlink()
+    rule_watcher_agent.queue_rule_event(str(rules_dir / 'test_rule_2.mdc'), deleted=True)
+    await rule_watcher_agent.wait_for_pending()
+    elapsed = time.perf_counter() - start
+
+    assert rule_watcher_agent.index_writes == writes_before + 1
+    assert elapsed < 5.0
+    assert len(rule_watcher_agent.rules) == 201
+    assert 'test_rule_2' not in rule_watcher_agent.rules
+    # Dependencies declared before their rule existed are resolved once the batch is applied
+    assert not any(rule.validation_errors for rule in rule_watcher_agent.rules.values())
+    assert sorted(rule_watcher_agent.get_rule_dependencies('burst_rule_17')) == ['burst_rule_18', 'burst_rule_19', 'test_rule_1']
+    assert 'burst_rule_199' in (rules_dir / '000-framework-index.mdc').read_text()
@@ -5,6 +5,7 @@ Tests for the framework rule system implementation.
 import pytest
 from pathlib import Path
 import asyncio
+import os
 from datetime import datetime, timedelta
 from framework.rule_system import (
     Rule,
@@ -240,6 +241,26 @@ async def test_rule_cache():
     await asyncio.sleep(1.1)
     assert cache.get('test_key') is None
 
+@pytest.mark.asyncio
+async def test_rule_loader_caches_parsed_index(rules_dir):
+    """Test that load_rules shares concurrent loads and re-parses only a changed index."""
+    loader = RuleLoader(rules_dir)
+    await asyncio.gather(*(loader.load_rules() for _ in range(5)))
+    assert loader.cache.stats()['misses'] == 1
+    rule_1 = loader.rules['test_rule_1']
+
+    await loader.load_rules()
+    assert loader.cache.stats()['misses'] == 1
+
+    index_path = rules_dir / '000-framework-index.mdc'
+    index_path.write_text(index_path.read_text().replace('"*.json"', '"*.yaml"'))
+    os.utime(index_path, ns=(0, 0)) # Guarantee a new mtime even on coarse clocks
+    await loader.load_rules()
+    stats = loader.cache.stats()
+    assert stats['misses'] == 2 and stats['size'] == 1 # Stale parse of the file was dropped
+    assert loader.rules['test_rule_1'] is rule_1 # Unchanged rules keep their state
+    assert loader.rules['test_rule_2'].triggers == ['*.yaml']
+
 @pytest.mark.asyncio
 async def test_rule_metrics(rules_dir):
     """Test rule metrics tracking."""
@@ -0,0 +1,41 @@
+from vanta_seed.core.memory_weave import MemoryWeave
+from vanta_seed.core.sleep_mutator import SleepMutator
+from vanta_seed.core.symbolic_compression import SymbolicCompressor
+
+
+def _weave(n=200):
+    weave = MemoryWeave(config={"drift_history_capacity": 10000})
+    for i in range(n):
+        weave.snapshot_drift({
+            "archetype_token": f"ARCH::AGENT_INIT::{'young' if i % 2 else 'old'}::{i}",
+            "source_agent": "young" if i % 2 else "old",
+            "drift_vector": 1.0,
+            "payload": {"nested": {"i": i}},
+        })
+    return weave
+
+
+def test_batched_cycle_shares_untouched_fields():
+    weave = _weave()
+    originals = {s["archetype_token"]: s for s in weave.retrieve_history()}
+    mutator = SleepMutator(weave, SymbolicCompressor(weave), config={"seed": 3, "drift_perturbation_scale": 0.05})
+    assert mutator.mutate_drift_passively(limit=50) == 50
+
+    dreams = weave.drift_history.by_decision("sleep_mutation")
+    assert len(dreams) == 50 and len(weave.retrieve_history()) == 250
+    for dream in dreams:
+        source = originals[dream["parent_archetype_token"]]
+        assert dream["archetype_token"].startswith("DREAM::Mutated::" + source["archetype_token"])
+        assert dream["payload"] is source["payload"]
+        assert 0.95 <= dream["drift_vector"] <= 1.05
+        assert weave.get_archetype_metadata(dream["archetype_token"]) is not None
+    assert all(s["drift_vector"] == 1.0 and "decision" not in s for s in originals.values())
+
+
+def test_batched_cycle_favours_younger_agents():
+    weave = _weave()
+    mutator = SleepMutator(weave, SymbolicCompressor(weave), config={"seed": 5})
+    mutator.mutate_drift_passively(agent_age_map={"young": 0, "old": 9}, limit=1000)
+    dreams = weave.drift_history.by_decision("sleep_mutation")
+    young = sum(d["source_agent"] == "young" for d in dreams)
+    assert young > 0.8 * len(dreams)
@@ -0,0 +1,83 @@
+import math
+import random
+
+from vanta_seed.core.stigmergic_grid import StigmergicGrid
+
+
+def _brute_radius(points, center, radius):
+    return sorted((math.dist(p, center), i) for i, p in enumerate(points) if math.dist(p, center) <= radius)
+
+
+def test_radius_and_knn_match_brute_force():
+    rng = random.Random(7)
+    grid = StigmergicGrid(cell_size=2.0, max_trails_per_bucket=10_000)
+    points = [tuple(rng.uniform(-20, 20) for _ in range(3)) for _ in range(2000)]
+    for i, p in enumerate(points):
+        grid.deposit(p, i)
+
+    for _ in range(25):
+        center = tuple(rng.uniform(-25, 25) for _ in range(3))
+        radius = rng.uniform(0.5, 9.0)
+        assert grid.query_radius(center, radius) == [i for _, i in _brute_radius(points, center, radius)]
+
+        k = rng.randint(1, 30)
+        expected = sorted((math.dist(p, center), i) for i, p in enumerate(points))[:k]
+        result = grid.query_knn(center, k)
+        assert [i for _, i in result] == [i for _, i in expected]
+        assert all(math.isclose(d, e) for (d, _), (e, _) in zip(result, expected))
+
+
+def test_radius_query_spans_neighbouring_cells():
+    grid = StigmergicGrid(cell_size=1.0)
+    grid.deposit([0.95, 0.0, 0.0], "left")
+    grid.deposit([1.05, 0.0, 0.0], "right")
+    grid.deposit([3.0, 0.0, 0.0], "far")
+    assert sorted(grid.query_radius([1.0, 0.0, 0.0], 0.2)) == ["left", "right"]
+    assert grid.query_knn([2.9, 0.0, 0.0], 1)[0][1] == "far"
+
+
+def test_cell_buffer_is_bounded_and_pheromone_capped():
+    grid = StigmergicGrid(cell_size=10.0, max_trails_per_bucket=5)
+    for i in range(20):
+        level = grid.deposit([1.0, 1.0, 1.0], i)
+    assert level == 1.0
+    assert [item for _, item in grid.get_bucket([1.0, 1.0, 1.0]).trails] == list(range(15, 20))
+
+
+def test_resolution_buckets_keep_their_own_cap_and_pheromone():
+    grid = StigmergicGrid(cell_size=5.0, resolution=1, max_trails_per_bucket=3)
+    for i in range(5):
+        grid.deposit([1.02, 0.0, 0.0], ("a", i))
+        grid.deposit([1.98, 0.0, 0.0], ("b", i))
+    assert grid.cell_count == 1 and grid.bucket_count == 2
+    bucket = grid.get_bucket([1.04, 0.0, 0.0])
+    assert bucket.key == (1.0, 0.0, 0.0)
+    assert [item for _, item in bucket.trails] == [("a", 2), ("a", 3), ("a", 4)]
+    assert math.isclose(bucket.pheromone, 0.5)
+    assert len(grid) == 6
+
+
+def test_resolution_buckets_match_brute_force_across_cell_edges():
+    rng = random.Random(3)
+    grid = StigmergicGrid(cell_size=1.0, resolution=0, max_trails_per_bucket=10_000)
+    points = [tuple(rng.uniform(-6, 6) for _ in range(2)) for _ in range(800)]
+    for i, p in enumerate(points):
+        grid.deposit(p, i)
+    for _ in range(25):
+        center = tuple(rng.uniform(-7, 7) for _ in range(2))
+        radius = rng.uniform(0.2, 3.0)
+        assert grid.query_radius(center, radius) == [i for _, i in _brute_radius(points, center, radius)]
+        expected = sorted((math.dist(p, center), i) for i, p in enumerate(points))[:5]
+        assert [i for _, i in grid.query_knn(center, 5)] == [i for _, i in expected]
+
+
+def test_evaporation_decays_and_drops_faded_cells():
+    now = [0.0]
+    grid = StigmergicGrid(cell_size=1.0, evaporation_rate=math.log(2), min_pheromone=0.01, clock=lambda: now[0])
+    grid.deposit([0.0, 0.0, 0.0], "a", amount=0.8)
+    now[0] = 1.0
+    assert math.isclose(grid.pheromone_at([0.0, 0.0, 0.0]), 0.4)
+    now[0] = 10.0
+    assert grid.evaporate() == 1
+    assert grid.cell_count == 0
+    assert grid.query_radius([0.0, 0.0, 0.0], 5.0) == []
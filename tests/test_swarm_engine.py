@@ -0,0 +1,102 @@
+import logging
+
+import numpy as np
+
+from vanta_seed.core.swarm_engine import SwarmEngine, trail_arrays
+
+
+def _state(position, velocity=(0.0, 0.0, 0.0), pbest=None, **params):
+    return {
+        "position": list(position),
+        "velocity": list(velocity),
+        "personal_best_position": list(pbest if pbest is not None else position),
+        "swarm_params": params,
+    }
+
+
+def test_batched_step_matches_per_pilgrim_formula():
+    engine = SwarmEngine(seed=3)
+    rng = np.random.default_rng(0)
+    for i in range(50):
+        engine.register(f"p{i}", _state(rng.uniform(-10, 10, 3), rng.uniform(-1, 1, 3), rng.uniform(-10, 10, 3), max_speed=2.0))
+    x, v, pbest = engine.positions.copy(), engine.velocities.copy(), engine.personal_best.copy()
+    gbest = np.array([1.0, 2.0, 3.0])
+
+    new_v, new_x = engine.step(global_best=gbest)
+
+    r1, r2, _ = np.random.default_rng(3).random((3, 50, 1))
+    expected_v = np.clip(0.7 * v + 1.5 * r1 * (pbest - x) + 1.5 * r2 * (gbest - x), -2.0, 2.0)
+    np.testing.assert_allclose(new_v, expected_v)
+    np.testing.assert_allclose(new_x, x + expected_v)
+    np.testing.assert_allclose(engine.positions, new_x)
+
+
+def test_stigmergic_term_pulls_towards_weighted_trails():
+    engine = SwarmEngine(seed=0)
+    engine.register("a", _state([0.0, 0.0, 0.0], inertia_weight=0.0, cognitive_weight=0.0, social_weight=0.0, max_speed=10.0))
+    engine.register("b", _state([5.0, 5.0, 5.0], inertia_weight=0.0, cognitive_weight=0.0, social_weight=0.0, max_speed=10.0))
+    trails = [
+        {"position_at_emission": [1.0, 0.0, 0.0], "relevance_score": 1.0, "value_proposition": 1.0},
+        {"position_at_emission": [0.0, 3.0, 0.0], "relevance_score": 0.0, "value_proposition": 1.0},  # No weight
+    ]
+    positions, weights = trail_arrays(trails, 3)
+    assert len(weights) == 1
+
+    new_v, _ = engine.step(trail_owners=np.array([0]), trail_positions=positions, trail_weights=weights)
+    assert new_v[0][0] > 0 and new_v[0][1] == 0 and new_v[0][2] == 0
+    np.testing.assert_allclose(new_v[1], 0.0)  # Pilgrim b owns no trails
+
+
+def test_capacity_doubles_and_unregister_keeps_rows_consistent():
+    engine = SwarmEngine(seed=1, min_pilgrims=2)
+    engine.register("a", _state([0.0, 0.0, 0.0]))
+    assert not engine.is_active
+    for i in range(1, 40):
+        engine.register(f"p{i}", _state([float(i)] * 3))
+    assert engine.is_active and len(engine) == 40
+    assert engine._capacity == 64 and engine.positions.shape == (40, 3)
+
+    _, new_x = engine.step()
+    np.testing.assert_allclose(engine.positions, new_x)
+
+    moved = new_x[engine.row("p39")].copy()
+    engine.unregister("a")
+    assert "a" not in engine and len(engine) == 39
+    assert engine.row("p39") == 0
+    np.testing.assert_allclose(engine.positions[0], moved)
+
+
+def test_swarm_tick_moves_registered_pilgrims_and_sets_role():
+    from vanta_seed.core.stigmergic_grid import StigmergicGrid
+    from vanta_seed.core.vanta_master_core import VantaMasterCore
+
+    class Pilgrim:
+        def __init__(self):
+            self.state = {}
+
+        def _determine_next_role(self, position, trails, purpose_vector):
+            return "scout" if trails else "explorer"
+
+        def _update_internal_state(self, updates):
+            self.state.update(updates)
+
+    crown = VantaMasterCore.__new__(VantaMasterCore)
+    crown.logger = logging.getLogger("test")
+    crown.swarm_engine = SwarmEngine(seed=0, min_pilgrims=1)
+    crown._stigmergic_field = StigmergicGrid()
+    crown._stigmergic_field.deposit([0.5, 0.0, 0.0], {"position_at_emission": [0.5, 0.0, 0.0], "relevance_score": 1.0, "value_proposition": 1.0})
+    crown._pilgrim_states = {"near": _state([0.0, 0.0, 0.0]), "far": _state([50.0, 50.0, 50.0])}
+    crown.pilgrims = {name: Pilgrim() for name in crown._pilgrim_states}
+    crown._global_trinity_best_node = None
+    crown._current_purpose_vector = None
+    for name, state in crown._pilgrim_states.items():
+        crown.swarm_engine.register(name, state)
+
+    assert crown.swarm_tick() == 2
+    assert crown.pilgrims["near"].state["current_role"] == "scout"
+    assert crown.pilgrims["far"].state["current_role"] == "explorer"
+    assert crown._pilgrim_states["near"]["position"][0] > 0.0  # Pulled towards the trail
+    assert crown._pilgrim_states["near"]["energy_level"] < 1.0
+
+    crown._swarm_tick_task = None
+    assert not crown.owns_swarm_movement("near")  # Without the tick loop BaseAgent keeps moving itself
@@ -0,0 +1,38 @@
+import random
+from datetime import datetime, timedelta
+
+from vanta_seed.core.symbol_search_index import SymbolSearchIndex
+
+WORDS = ["Ember", "emberfall", "Tide", "riptide", "Crown", "crownless", "ash", "Ashen", "x"]
+
+
+def _reference(entries, query, max_results, case_sensitive=False):
+    q = query if case_sensitive else query.lower()
+    hits = [e for e in entries if any(q in (s if case_sensitive else s.lower()) for s in e["symbols"])]
+    hits.sort(key=lambda e: e["timestamp"], reverse=True)
+    return [e["entry_id"] for e in hits[:max_results]], len(hits)
+
+
+def test_search_matches_linear_scan():
+    rng = random.Random(1)
+    start = datetime(2025, 1, 1)
+    entries = [
+        {"entry_id": f"e{i}", "symbols": rng.sample(WORDS, 2), "timestamp": (start + timedelta(minutes=i * 7 % 500, seconds=i)).isoformat()}
+        for i in range(300)
+    ]
+    index = SymbolSearchIndex(entries[:200])
+    for entry in entries[200:]:
+        index.add(entry)  # Incremental adds keep the same results as a rebuild
+
+    for query in ["emb", "EMBER", "tide", "rip", "own", "as", "x", "", "zzz", "Ash"]:
+        for case_sensitive in (False, True):
+            assert index.search(query, 15, case_sensitive) == _reference(entries, query, 15, case_sensitive)
+
+
+def test_readding_an_entry_replaces_its_symbols():
+    index = SymbolSearchIndex()
+    index.add({"entry_id": "a", "symbols": ["ember"], "timestamp": "2025-01-01T00:00:00"})
+    index.add({"entry_id": "a", "symbols": ["tide"], "timestamp": "2025-01-02T00:00:00"})
+    assert index.search("ember", 5) == ([], 0)
+    assert index.search("tid", 5) == (["a"], 1)
+    assert len(index) == 1
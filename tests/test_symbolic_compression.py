@@ -0,0 +1,106 @@
+import numpy as np
+
+from vanta_seed.core.gated_breath import GatedBreath
+from vanta_seed.core.memory_weave import MemoryWeave
+from vanta_seed.core.symbolic_clustering import OnlineKMeans, hashed_vector, symbolic_features
+from vanta_seed.core.symbolic_compression import SymbolicCompressor
+
+KINDS = [("FORK", "Explore"), ("FORK", "Exploit"), ("MERGE", "Consolidate")]
+
+
+def _record(weave, start, count):
+    for i in range(start, start + count):
+        decision_type, hint = KINDS[i % len(KINDS)]
+        token = f"ARCH::{decision_type}::{i}"
+        weave.register_archetype(token, {"decision_type": decision_type, "hint": hint})
+        weave.snapshot_drift({"archetype_token": token, "drift_vector": 0.1})
+
+
+def test_incremental_key_clusters_match_a_fresh_compression():
+    weave = MemoryWeave()
+    compressor = SymbolicCompressor(weave)
+    _record(weave, 0, 30)
+    compressor.compress_drift_history()
+    _record(weave, 30, 30)
+    assert compressor.cluster_stats()["behind"] == 30
+    incremental = compressor.compress_drift_history()
+    assert incremental == SymbolicCompressor(weave).compress_drift_history()
+    assert sorted(incremental) == ["FORK::Exploit", "FORK::Explore", "MERGE::Consolidate"]
+    assert compressor.cluster_stats() == {"clusters": 3, "archetypes": 60, "pending": 0, "watermark": 60, "behind": 0}
+
+
+def test_tokens_without_metadata_are_retried():
+    weave = MemoryWeave()
+    compressor = SymbolicCompressor(weave)
+    weave.snapshot_drift({"archetype_token": "LATE::1"})
+    assert compressor.compress_drift_history() == {}
+    weave.register_archetype("LATE::1", {"decision_type": "FORK", "hint": "Late"})
+    assert compressor.compress_drift_history() == {"FORK::Late": ["LATE::1"]}
+
+
+def test_vector_mode_separates_distinct_metadata():
+    weave = MemoryWeave()
+    compressor = SymbolicCompressor(weave, config={"clustering_mode": "vector"})
+    _record(weave, 0, 90)
+    clusters = compressor.compress_drift_history()
+    groups = {frozenset(tokens) for tokens in clusters.values()}
+    for kind in range(len(KINDS)):
+        expected = frozenset(f"ARCH::{KINDS[kind][0]}::{i}" for i in range(kind, 90, len(KINDS)))
+        assert expected in groups
+
+
+def test_online_kmeans_centroids_track_running_means():
+    rng = np.random.default_rng(0)
+    kmeans = OnlineKMeans(dim=4, spawn_similarity=0.9, batch_size=7)
+    base = np.eye(4)[:2]
+    points = np.repeat(base, 50, axis=0) + rng.normal(0, 0.01, (100, 4))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    labels = kmeans.partial_fit(points)
+    assert kmeans.n_clusters == 2 and kmeans.counts.sum() == 100
+    for label in range(2):
+        assert np.allclose(kmeans.centroids[label], points[labels == label].mean(axis=0))
+    assert hashed_vector(symbolic_features("A::B", {"hint": "x"})).shape == (64,)
+
+
+def test_gated_breath_reads_density_without_recompressing():
+    weave = MemoryWeave()
+    compressor = SymbolicCompressor(weave)
+    breath = GatedBreath(weave, compressor)
+    _record(weave, 0, 30)
+    assert breath.measure_breath_density() == 10.0
+    calls = []
+    compressor.compress_drift_history = lambda: calls.append(1)
+    assert breath.measure_breath_density() == 10.0
+    assert calls == []
+
+
+def test_pending_tokens_are_bounded():
+    weave = MemoryWeave(config={"drift_history_capacity": 5})
+    compressor = SymbolicCompressor(weave, config={"max_pending_tokens": 3})
+    for i in range(4):
+        weave.snapshot_drift({"archetype_token": f"LATE::{i}"})
+    compressor.compress_drift_history()
+    assert list(compressor._pending_tokens) == ["LATE::1", "LATE::2", "LATE::3"]  # Oldest over the cap dropped
+
+    for i in range(4, 9):
+        weave.snapshot_drift({"archetype_token": f"LATE::{i}"})  # Evicts LATE::0-3 from the history
+    compressor.compress_drift_history()
+    assert list(compressor._pending_tokens) == ["LATE::6", "LATE::7", "LATE::8"]
+    assert compressor.cluster_stats()["pending"] == 3
+
+
+def test_clusters_follow_the_bounded_history():
+    weave = MemoryWeave(config={"drift_history_capacity": 6})
+    compressor = SymbolicCompressor(weave)
+    _record(weave, 0, 6)
+    compressor.compress_drift_history()
+    assert compressor.cluster_stats()["archetypes"] == 6
+
+    weave.snapshot_drift({"archetype_token": "ARCH::FORK::0"})  # Seen again: survives the next evictions
+    _record(weave, 100, 4)
+    clusters = compressor.compress_drift_history()
+    retained = {s["archetype_token"] for s in weave.drift_history.recent()}
+    assert {token for tokens in clusters.values() for token in tokens} == retained
+    assert clusters == SymbolicCompressor(weave).compress_drift_history()
+    assert compressor.cluster_stats()["archetypes"] == len(retained) == 6
+    assert len(compressor._last_seen) == 6
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from vanta_seed.core.task_dispatcher import QueueFullError, TaskDispatcher
+
+
+def test_higher_priority_tasks_run_first():
+    async def scenario():
+        order = []
+        gate = asyncio.Event()
+
+        async def execute(pilgrim, task):
+            if task["name"] == "blocker":
+                await gate.wait()
+            order.append(task["name"])
+            return task["name"]
+
+        dispatcher = TaskDispatcher(execute, workers=1, per_pilgrim_concurrency=1)
+        blocker = dispatcher.submit("p", {"name": "blocker"})
+        await asyncio.sleep(0)  # Let the single worker pick up the blocker
+        handles = [dispatcher.submit("p", {"name": f"t{i}", "priority": i}) for i in (1, 5, 3)]
+        gate.set()
+        assert await blocker == "blocker"
+        assert [await h for h in handles] == ["t1", "t5", "t3"]
+        await dispatcher.stop()
+        return order
+
+    assert asyncio.run(scenario()) == ["blocker", "t5", "t3", "t1"]
+
+
+def test_per_pilgrim_limit_does_not_block_other_pilgrims():
+    async def scenario():
+        running = {"busy": 0, "idle": 0}
+        peak = {"busy": 0, "idle": 0}
+
+        async def execute(pilgrim, task):
+            running[pilgrim] += 1
+            peak[pilgrim] = max(peak[pilgrim], running[pilgrim])
+            await asyncio.sleep(0.01)
+            running[pilgrim] -= 1
+            return pilgrim
+
+        dispatcher = TaskDispatcher(execute, workers=4, per_pilgrim_concurrency=2)
+        handles = [dispatcher.submit("busy", {}) for _ in range(8)] + [dispatcher.submit("idle", {})]
+        await asyncio.gather(*handles)
+        metrics = dispatcher.metrics()
+        await dispatcher.stop()
+        return peak, metrics
+
+    peak, metrics = asyncio.run(scenario())
+    assert peak == {"busy": 2, "idle": 1}
+    assert metrics["completed"] == 9 and metrics["queue_depth"] == 0 and metrics["running"] == 0
+    assert metrics["wait_time_max"] > 0
+
+
+def test_overloaded_pilgrim_sheds_and_failures_propagate():
+    async def scenario():
+        async def execute(pilgrim, task):
+            raise ValueError("boom")
+
+        dispatcher = TaskDispatcher(execute, workers=1, max_pilgrim_queue_depth=2)
+        handles = [dispatcher.submit("p", {}), dispatcher.submit("p", {})]
+        with pytest.raises(QueueFullError):
+            dispatcher.submit("p", {})
+        results = await asyncio.gather(*handles, return_exceptions=True)
+        metrics = dispatcher.metrics()
+        await dispatcher.stop()
+        return results, metrics
+
+    results, metrics = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert metrics["shed"] == 1 and metrics["failed"] == 2
+
+
+def test_task_raising_cancelled_error_keeps_its_worker():
+    async def scenario():
+        async def execute(pilgrim, task):
+            if task["name"] == "abandoned":
+                subtask = asyncio.ensure_future(asyncio.sleep(10))
+                subtask.cancel()
+                await subtask  # CancelledError from the task, not from stopping the worker
+            return task["name"]
+
+        dispatcher = TaskDispatcher(execute, workers=1)
+        abandoned = dispatcher.submit("p", {"name": "abandoned"})
+        after = dispatcher.submit("p", {"name": "after"})
+        assert await after == "after"
+        worker_alive = not dispatcher._worker_tasks[0].done()
+        await dispatcher.stop()
+        return abandoned, worker_alive
+
+    abandoned, worker_alive = asyncio.run(scenario())
+    assert worker_alive
+    assert abandoned.status == "cancelled" and abandoned.future.cancelled()
+
+
+def test_tasks_abandoned_by_their_caller_are_not_run():
+    async def scenario():
+        ran = []
+        gate = asyncio.Event()
+
+        async def execute(pilgrim, task):
+            if task["name"] == "blocker":
+                await gate.wait()
+            ran.append(task["name"])
+            return task["name"]
+
+        dispatcher = TaskDispatcher(execute, workers=2, per_pilgrim_concurrency=1)
+        blocker = dispatcher.submit("p", {"name": "blocker"})
+        await asyncio.sleep(0)
+        deferred = dispatcher.submit("p", {"name": "deferred"})  # Parked behind the blocker
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(deferred, timeout=0.01)  # The caller gives up, cancelling the future
+        queued = dispatcher.submit("q", {"name": "queued"})
+        queued.future.cancel()  # As when a submit_task caller is itself cancelled
+        gate.set()
+        await blocker
+        await asyncio.sleep(0.01)
+        metrics = dispatcher.metrics()
+        await dispatcher.stop()
+        return ran, deferred, queued, metrics
+
+    ran, deferred, queued, metrics = asyncio.run(scenario())
+    assert ran == ["blocker"]
+    assert deferred.status == queued.status == "cancelled"
+    assert metrics["completed"] == 1 and metrics["cancelled"] == 2 and metrics["queue_depth"] == 0
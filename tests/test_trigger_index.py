@@ -0,0 +1,41 @@
+import random
+from pathlib import Path
+
+from FrAmEwOrK.trigger_index import TriggerIndex
+
+PATTERN_PARTS = ["*", "*.py", "?.py", "test_*", "[ab]", "[!a]", "[a-c]*", "src", "**", "*.test.ts", "Makefile",
+                 "b.py", "[]", "[z-a]", "*.*", "[-a]", "x[", "a|b"]
+PATH_PARTS = ["a", "b.py", "src", "test_x.py", "x.test.ts", "Makefile", ".py", "c.PY", "d-e", "[x]", "a.b.c"]
+
+
+def _path_match(rules, file_path):
+    """The previous TriggerSystem loop: Path.match for every rule and pattern."""
+    return [rule_id for rule_id, patterns in rules.items() if any(Path(file_path).match(pattern) for pattern in patterns)]
+
+
+def test_index_matches_path_match():
+    rng = random.Random(5)
+    for _ in range(200):
+        rules = {
+            f"rule_{i}": [("/" if rng.random() < 0.2 else "") + "/".join(rng.choice(PATTERN_PARTS) for _ in range(rng.randint(1, 3)))
+                          for _ in range(rng.randint(1, 2))]
+            for i in range(8)
+        }
+        index = TriggerIndex(rules)
+        for _ in range(30):
+            file_path = ("/" if rng.random() < 0.3 else "") + "/".join(rng.choice(PATH_PARTS) for _ in range(rng.randint(0, 4)))
+            assert index.match(file_path) == _path_match(rules, file_path), (file_path, rules)
+
+
+def test_rules_update_incrementally():
+    index = TriggerIndex({"python": ["*.py"], "json": ["*.json"], "tests": ["test_*"]})
+    assert index.match("src/test_app.py") == ["python", "tests"]
+    index.set_rule("python", ["src/*.pyi"]) # Keeps its position in the result order
+    assert index.match("src/test_app.py") == ["tests"]
+    assert index.match("src/app.pyi") == ["python"]
+    index.remove_rule("tests")
+    index.set_rule("docs", ["/docs/*/index.md", ""]) # Invalid patterns are skipped
+    assert index.match("src/test_app.py") == []
+    assert index.match("/docs/guide/index.md") == ["docs"]
+    assert index.match("docs/guide/index.md") == [] # Absolute patterns need absolute paths
+    assert len(index) == 3 and "tests" not in index
@@ -0,0 +1,121 @@
+import threading
+
+import numpy as np
+import pytest
+
+from vanta_seed.memory import rag_engine, vector_index
+from vanta_seed.memory.rag_engine import RagEngine, reciprocal_rank_fusion
+from vanta_seed.memory.vector_index import IVFFlatIndex
+
+DIM = 32
+
+
+def _clustered(n, seed=0, clusters=20):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, DIM))
+    points = centres[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, DIM))
+    return (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _fill(index, vectors, start=0):
+    for i, v in enumerate(vectors, start=start):
+        index.add_vector(f"doc:{i}", v)
+
+
+def test_ivf_recall_against_exact_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "TRAIN_MIN_VECTORS", 10 ** 9)  # Train explicitly below
+    data = _clustered(2000)
+    index = IVFFlatIndex(tmp_path, dim=DIM, nprobe=8)
+    _fill(index, data)
+    index.train()
+    assert index.centroids is not None
+
+    queries = _clustered(50, seed=1)
+    hits = 0
+    for q in queries:
+        exact = np.argsort(-(data @ (q / np.linalg.norm(q))))[:10]
+        approx = {docid for docid, _ in index.search_vector(q, k=10)}
+        hits += len({f"doc:{i}" for i in exact} & approx)
+    assert hits / (10 * len(queries)) >= 0.9
+
+
+def test_reload_keeps_trained_lists(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "TRAIN_MIN_VECTORS", 10 ** 9)
+    data = _clustered(300)
+    index = IVFFlatIndex(tmp_path, dim=DIM)
+    _fill(index, data)
+    index.train()
+    reloaded = IVFFlatIndex(tmp_path, dim=DIM)
+    assert len(reloaded) == 300
+    assert reloaded.search_vector(data[7], k=1)[0][0] == "doc:7"
+
+
+def test_threshold_trains_in_background_and_serves_exact_meanwhile(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "TRAIN_MIN_VECTORS", 100)
+    release = threading.Event()
+    real_fit = IVFFlatIndex._fit
+
+    def slow_fit(mapped, tail, seed):
+        release.wait(5)
+        return real_fit(mapped, tail, seed)
+
+    monkeypatch.setattr(IVFFlatIndex, "_fit", staticmethod(slow_fit))
+    data = _clustered(150)
+    index = IVFFlatIndex(tmp_path, dim=DIM)
+    _fill(index, data[:100])  # Crossing the threshold must not block on training
+    assert index._training is not None and index._training.is_alive()
+    _fill(index, data[100:], start=100)
+
+    assert index.centroids is None
+    assert index.search_vector(data[120], k=1)[0][0] == "doc:120"
+
+    release.set()
+    assert index.wait_for_training(timeout=5)
+    assert index.centroids is not None
+    assert index.trained_count == 100
+    assert len(index.assignments) == 150  # Rows added during training were assigned on install
+    assert sum(len(rows) for rows in index.lists) == 150
+
+
+def test_reciprocal_rank_fusion_orders_by_summed_reciprocal_rank():
+    fts = ["a", "b", "c"]
+    ann = ["c", "a", "d"]
+    # a: 1/61 + 1/62, c: 1/63 + 1/61, b: 1/62, d: 1/63
+    assert reciprocal_rank_fusion([fts, ann], k=4) == ["a", "c", "b", "d"]
+    assert reciprocal_rank_fusion([fts, ann], k=2) == ["a", "c"]
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+def test_hybrid_mode_fuses_fts_and_ann(monkeypatch):
+    monkeypatch.setattr(rag_engine, "get_memories_by_docids", lambda docids: [{"docid": d} for d in docids])
+    calls = []
+
+    def fts(query, limit):
+        calls.append(("fts", limit))
+        return ["x", "y"]
+
+    def ann(query, limit):
+        calls.append(("ann", limit))
+        raise RuntimeError("index offline")
+
+    engine = RagEngine(fts_index=fts, ann_index=ann, mode="hybrid")
+    assert engine.retrieve("breath", k=3) == [{"docid": "x"}, {"docid": "y"}]
+    assert calls == [("fts", 6), ("ann", 6)]
+
+    engine.ann_docid_query = lambda query, limit: ["y", "z"]
+    assert [r["docid"] for r in engine.retrieve("breath", k=3)] == ["y", "x", "z"]
+
+
+def test_reopening_untrained_index_with_another_dim_is_refused(tmp_path):
+    index = IVFFlatIndex(tmp_path, dim=DIM)
+    _fill(index, _clustered(10))
+    vectors = (tmp_path / "vectors.f32").read_bytes()
+
+    with pytest.raises(ValueError, match="dim"):
+        IVFFlatIndex(tmp_path, dim=24)
+    (tmp_path / "meta.json").unlink()  # Index written before the dim was recorded at creation
+    with pytest.raises(ValueError, match="dim"):
+        IVFFlatIndex(tmp_path, dim=24)
+
+    assert (tmp_path / "vectors.f32").read_bytes() == vectors
+    assert len(IVFFlatIndex(tmp_path, dim=DIM)) == 10
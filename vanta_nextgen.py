@@ -1,8 +1,8 @@
 import re
 import json
 import os
+import asyncio
 import datetime
-from shutil import copy2
 import filelock
 import uuid
 import subprocess
@@ -13,6 +13,8 @@ import importlib
 from pathlib import Path
 from jsonschema import validate, ValidationError
 import logging
+from vanta_seed.memory.cross_modal_index import CrossModalIndex, DEFAULT_COMPACT_RATIO, DEFAULT_COMPACT_MIN_RECORDS
+from vanta_seed.memory.media_store import MediaStore, DEFAULT_CHUNK_SIZE, iter_media_chunks, send_media
 
 # --- Add a module-level logger FOR THIS FILE if needed by other classes --- 
 logger = logging.getLogger(__name__)
@@ -140,6 +142,12 @@ class CrossModalMemory:
     Manages multimodal memory storage: text/metadata appended to a JSONL file,
     and media (images, audio) stored in subdirectories.
     Provides concurrency-safe writes with file locking, entry IDs, and metadata.
+    Reads are served by a SQLite index kept in step with the JSONL journal
+    (see CrossModalIndex); tags and deletes are appended as journal records,
+    and the journal is compacted once they make up a large share of it (and
+    on close).
+    Media is streamed to disk in chunks and stored once per content hash
+    (see MediaStore); entries with identical content share one file.
     """
     def __init__(self, base_path, logger_instance=None):
         # 'base_path' here represents the specific path passed by the agent,
@@ -160,8 +168,38 @@ class CrossModalMemory:
 
         # Ensure base path for the specific data type exists
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.index = CrossModalIndex(self.memory_root / 'memory_metadata.db', self.metadata_file, self.lock, self.logger)
+        self.compact_ratio = DEFAULT_COMPACT_RATIO # Share of dead journal records that triggers compaction
+        self.compact_min_records = DEFAULT_COMPACT_MIN_RECORDS
+        self.media = MediaStore(self.base_path, logger_instance=self.logger)
         self.logger.info(f"CrossModalMemory initialized for path: {self.base_path}, Metadata: {self.metadata_file}") # Use self.logger
-        # Future: support sqlite or vector DB backends
+
+    def _append_record(self, record: dict):
+        """Appends one journal record under the file lock and applies it to the index."""
+        with self.lock:
+            with open(self.metadata_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+            self.index.sync()
+        if 'op' in record: # Only tag/delete records leave dead lines behind
+            self._maybe_compact(self.compact_ratio, self.compact_min_records)
+
+    def _maybe_compact(self, ratio: float, min_records: int) -> bool:
+        try:
+            return self.index.maybe_compact(ratio, min_records)
+        except Exception as e:
+            self.logger.error(f"Error compacting metadata journal {self.metadata_file}: {e}", exc_info=True)
+            return False
+
+    def close(self) -> None:
+        """Folds any tag/delete records into the journal and releases the index."""
+        self._maybe_compact(0.0, 0)
+        self.index.close()
+
+    def _with_absolute_path(self, entry: dict) -> dict:
+        # Add absolute path for convenience if needed by caller
+        if 'path' in entry:
+            entry['absolute_path'] = str(self.memory_root / entry['path'])
+        return entry
 
     def add_text(self, txt: str, agent: str = None, tags: list = None) -> str | None:
         """Add a text entry with unique ID, timestamp, agent, and tags."""
@@ -175,9 +213,7 @@ class CrossModalMemory:
             'tags': tags or []
         }
         try:
-            with self.lock:
-                with open(self.metadata_file, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps(entry) + "\n")
+            self._append_record(entry)
             self.logger.debug(f"Added text entry {entry_id}") # Use self.logger
             return entry_id
         except Exception as e:
@@ -189,314 +225,191 @@ class CrossModalMemory:
         if not image_bytes and not image_path:
             self.logger.error("add_image requires either image_bytes or image_path.") # Use self.logger
             return None
-            
-        entry_id = str(uuid.uuid4())
-        # Use the provided filename directly, assuming it's unique enough or context-specific
-        # Alternatively, prepend entry_id: filename = f"{entry_id}_{filename}" 
-        save_path = self.base_path / filename
-        
+        return self._ingest_media('image', filename, image_bytes if image_bytes else image_path, agent, tags)
+
+    def add_audio(self, filename: str, audio_bytes: bytes, agent: str = None, tags: list = None) -> str | None:
+        """Saves audio bytes (or a file-like object) within the agent's memory path and logs metadata."""
+        return self._ingest_media('audio', filename, audio_bytes, agent, tags)
+
+    async def add_image_stream(self, filename: str, source, agent: str = None, tags: list = None) -> str | None:
+        """Adds an image from an async iterator of bytes, a file-like object, a path or bytes, writing off the event loop."""
+        return await self._ingest_media_async('image', filename, source, agent, tags)
+
+    async def add_audio_stream(self, filename: str, source, agent: str = None, tags: list = None) -> str | None:
+        """Adds audio from an async iterator of bytes, a file-like object, a path or bytes, writing off the event loop."""
+        return await self._ingest_media_async('audio', filename, source, agent, tags)
+
+    # --- Media ingestion ---
+    def _existing_media(self, sha256: str) -> Path | None:
+        """A stored file already holding this content (from any entry), so it is reused rather than written again."""
+        for entry in self.index.find_by_hash(sha256):
+            if 'path' in entry and (self.memory_root / entry['path']).exists():
+                return self.memory_root / entry['path']
+        return None
+
+    def _media_entry(self, media_type: str, filename: str, stored, agent: str, tags: list) -> dict:
+        entry = {
+            'id': str(uuid.uuid4()),
+            'type': media_type,
+            'filename': filename,
+            'path': str(stored.path.relative_to(self.memory_root)), # Store path relative to memory root
+            'sha256': stored.sha256,
+            'size': stored.size,
+        }
+        if media_type == 'image':
+            entry.update({'mime': None, 'dimensions': None}) # future: detect mime / dimensions with PIL
+        else:
+            entry.update({'format': Path(filename).suffix.lstrip('.'), 'duration': None}) # future: detect duration with soundfile/librosa
+        entry.update({'timestamp': datetime.datetime.utcnow().isoformat() + 'Z', 'agent': agent, 'tags': tags or []})
+        return entry
+
+    def _discard_media(self, stored) -> None:
+        # Metadata failed: remove the file unless it was an existing (shared) copy
+        if stored is not None and not stored.deduplicated and stored.path.exists():
+            try: stored.path.unlink()
+            except OSError: pass
+
+    def _store_media(self, media_type: str, filename: str, writer, agent: str, tags: list) -> str:
+        """
+        Picks the stored copy for staged content and journals the entry under the
+        metadata lock, so a concurrent delete_entry cannot unlink a file between
+        this entry reusing it and the entry being recorded.
+        """
+        stored = None
         try:
-            # Ensure directory exists (redundant if __init__ worked, but safe)
-            self.base_path.mkdir(parents=True, exist_ok=True)
-            
-            if image_bytes:
-                # Save bytes directly
-                with open(save_path, 'wb') as f:
-                    f.write(image_bytes)
-                self.logger.debug(f"Saved image bytes to {save_path}") # Use self.logger
-            elif image_path:
-                # Copy from existing path
-                copy2(image_path, save_path)
-                self.logger.debug(f"Copied image from {image_path} to {save_path}") # Use self.logger
-
-            # Log metadata
-            entry = {
-                'id': entry_id,
-                'type': 'image',
-                'filename': filename,
-                'path': str(save_path.relative_to(self.memory_root)), # Store path relative to memory root
-                'mime': None,  # future: detect mime 
-                'dimensions': None,  # future: detect with PIL
-                'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
-                'agent': agent,
-                'tags': tags or []
-            }
             with self.lock:
-                with open(self.metadata_file, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps(entry) + "\n")
-            self.logger.debug(f"Added image entry {entry_id}") # Use self.logger
-            return entry_id
-            
+                try:
+                    stored = writer.finish(self._existing_media)
+                    entry = self._media_entry(media_type, filename, stored, agent, tags)
+                    self._append_record(entry)
+                except BaseException:
+                    self._discard_media(stored)
+                    raise
+        finally:
+            if stored is None:
+                writer.abort() # Never finished (e.g. the lock timed out): drop the temp file
+        self.logger.debug(f"Added {media_type} entry {entry['id']} -> {stored.path}{' (deduplicated)' if stored.deduplicated else ''}")
+        return entry['id']
+
+    def _ingest_media(self, media_type: str, filename: str, source, agent: str = None, tags: list = None) -> str | None:
+        try:
+            writer = self.media.stage(filename, source)
+            return self._store_media(media_type, filename, writer, agent, tags)
         except IOError as e:
-             self.logger.error(f"IOError saving image file {save_path}: {e}") # Use self.logger
+            self.logger.error(f"IOError saving {media_type} file {filename}: {e}") # Use self.logger
         except Exception as e:
-            self.logger.error(f"Error saving image or writing metadata for {filename}: {e}") # Use self.logger
-            # Attempt cleanup if file was created but metadata failed
-            if save_path.exists():
-                try: save_path.unlink()
-                except OSError: pass
+            self.logger.error(f"Error saving {media_type} or writing metadata for {filename}: {e}") # Use self.logger
         return None # Indicate failure
-        
-    def add_audio(self, filename: str, audio_bytes: bytes, agent: str = None, tags: list = None) -> str | None:
-        """Saves audio bytes to a file within the agent's memory path and logs metadata."""
-        entry_id = str(uuid.uuid4())
-        # Use the provided filename directly
-        save_path = self.base_path / filename 
-        
+
+    async def _ingest_media_async(self, media_type: str, filename: str, source, agent: str = None, tags: list = None) -> str | None:
         try:
-            # Ensure directory exists
-            self.base_path.mkdir(parents=True, exist_ok=True)
-            
-            # Save audio bytes
-            with open(save_path, 'wb') as f:
-                f.write(audio_bytes)
-            self.logger.debug(f"Saved audio bytes to {save_path}") # Use self.logger
-
-            # Log metadata
-            entry = {
-                'id': entry_id,
-                'type': 'audio',
-                'filename': filename,
-                'path': str(save_path.relative_to(self.memory_root)), # Store path relative to memory root
-                'format': Path(filename).suffix.lstrip('.'), # Infer format from extension
-                'duration': None, # future: detect with soundfile/librosa
-                'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
-                'agent': agent,
-                'tags': tags or []
-            }
-            with self.lock:
-                with open(self.metadata_file, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps(entry) + "\n")
-            self.logger.debug(f"Added audio entry {entry_id}") # Use self.logger
-            return entry_id
-            
+            writer = await self.media.astage(filename, source)
+            # File lock, dedup choice and index sync stay off the event loop too
+            return await asyncio.to_thread(self._store_media, media_type, filename, writer, agent, tags)
         except IOError as e:
-             self.logger.error(f"IOError saving audio file {save_path}: {e}") # Use self.logger
+            self.logger.error(f"IOError streaming {media_type} file {filename}: {e}")
         except Exception as e:
-            self.logger.error(f"Error saving audio or writing metadata for {filename}: {e}") # Use self.logger
-            # Attempt cleanup if file was created but metadata failed
-            if save_path.exists():
-                try: save_path.unlink()
-                except OSError: pass
+            self.logger.error(f"Error streaming {media_type} or writing metadata for {filename}: {e}")
         return None # Indicate failure
 
-    def get_entry(self, entry_id: str) -> dict | None:
-        """Retrieve metadata entry by its ID from the central metadata file."""
-        if not self.metadata_file.exists():
+    def media_path(self, entry_id: str) -> Path | None:
+        """Absolute path of an image/audio entry's stored file, if it exists."""
+        entry = self.get_entry(entry_id)
+        if not entry or entry.get('type') not in ('image', 'audio') or 'path' not in entry:
             return None
+        path = self.memory_root / entry['path']
+        return path if path.exists() else None
+
+    def iter_media(self, entry_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE, offset: int = 0, count: int = None):
+        """Zero-copy memoryview chunks of an entry's media (mmap-backed), or None if it has none."""
+        path = self.media_path(entry_id)
+        return iter_media_chunks(path, chunk_size, offset, count) if path else None
+
+    def send_media(self, entry_id: str, out_fd: int, offset: int = 0, count: int = None) -> int:
+        """Writes an entry's media to a file descriptor or socket with os.sendfile. Returns bytes sent (0 if none)."""
+        path = self.media_path(entry_id)
+        return send_media(path, out_fd, offset, count) if path else 0
+
+    def get_entry(self, entry_id: str) -> dict | None:
+        """Retrieve metadata entry by its ID (primary key lookup in the index)."""
         try:
-            # No lock needed for read usually, but safer if deletes happen often
-            # with self.lock: 
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        entry = json.loads(line)
-                        if entry.get('id') == entry_id:
-                            # Add absolute path for convenience if needed by caller
-                            if 'path' in entry:
-                                entry['absolute_path'] = str(self.memory_root / entry['path'])
-                            return entry
-                    except json.JSONDecodeError:
-                        self.logger.warning(f"Skipping malformed line in metadata file: {line.strip()}")
-                        continue
+            entry = self.index.get(entry_id)
         except Exception as e:
-            self.logger.error(f"Error reading metadata file {self.metadata_file}: {e}")
-        return None
+            self.logger.error(f"Error reading metadata index for {self.metadata_file}: {e}")
+            return None
+        return self._with_absolute_path(entry) if entry else None
 
     def delete_entry(self, entry_id: str) -> bool:
         """Deletes an entry's metadata and associated media file (if applicable)."""
-        if not self.metadata_file.exists():
-            self.logger.warning(f"Metadata file not found, cannot delete entry {entry_id}.")
-            return False
-
-        temp_metadata_path = self.metadata_file.with_suffix('.jsonl.tmp')
-        deleted = False
-        entry_to_delete = None
-
-        try:
-            with self.lock: # Ensure exclusive access for read-modify-write
-                # First pass: Find the entry and check if a file needs deletion
-                with open(self.metadata_file, 'r', encoding='utf-8') as src:
-                    for line in src:
-                        try:
-                            entry = json.loads(line)
-                            if entry.get('id') == entry_id:
-                                entry_to_delete = entry
-                                break # Found it
-                        except json.JSONDecodeError:
-                            continue
-                
+        # The journal lock covers the reference check and the unlink, so a concurrent add of the
+        # same content (see _store_media) either is already recorded or will store its own copy
+        with self.lock:
+            try:
+                entry_to_delete = self.index.get(entry_id)
                 if not entry_to_delete:
                     self.logger.warning(f"Entry ID {entry_id} not found for deletion.")
                     return False # Entry not found
-
-                # Second pass: Rewrite the metadata file excluding the deleted entry
-                with open(self.metadata_file, 'r', encoding='utf-8') as src, \
-                     open(temp_metadata_path, 'w', encoding='utf-8') as dst:
-                    for line in src:
-                        try:
-                            entry = json.loads(line)
-                            if entry.get('id') != entry_id:
-                                dst.write(line)
-                            else:
-                                deleted = True # Mark as successfully found for deletion
-                        except json.JSONDecodeError:
-                            dst.write(line) # Preserve malformed lines
-                
-                # Replace the original file with the temp file
-                os.replace(temp_metadata_path, self.metadata_file)
-
-            # If metadata rewrite was successful, delete the associated file (outside the lock)
-            if deleted and 'path' in entry_to_delete and entry_to_delete.get('type') in ['image', 'audio']:
-                file_path_relative = entry_to_delete['path']
-                file_path_absolute = self.memory_root / file_path_relative
-                if file_path_absolute.exists():
+                self._append_record({'op': 'delete', 'id': entry_id})
+            except Exception as e:
+                self.logger.error(f"Error during delete_entry operation for {entry_id}: {e}", exc_info=True)
+                return False
+
+            # Metadata is deleted; now remove the associated file unless another entry shares the content
+            if 'path' in entry_to_delete and entry_to_delete.get('type') in ['image', 'audio']:
+                file_path_absolute = self.memory_root / entry_to_delete['path']
+                sha256 = entry_to_delete.get('sha256')
+                if sha256 and any(e.get('path') == entry_to_delete['path'] for e in self.index.find_by_hash(sha256)):
+                    self.logger.info(f"Kept file {file_path_absolute} for entry {entry_id}: still referenced by other entries.")
+                elif file_path_absolute.exists():
                     try:
                         file_path_absolute.unlink()
                         self.logger.info(f"Deleted associated file for entry {entry_id}: {file_path_absolute}")
                     except OSError as e:
                         self.logger.error(f"Error deleting file {file_path_absolute} for entry {entry_id}: {e}")
                         # Metadata was deleted, but file deletion failed. Logged error.
-            
-            if deleted:
-                self.logger.info(f"Successfully deleted entry {entry_id} from metadata.")
-            
-            return deleted
-
-        except Exception as e:
-            self.logger.error(f"Error during delete_entry operation for {entry_id}: {e}", exc_info=True)
-            # Clean up temp file if it exists after an error
-            if temp_metadata_path.exists():
-                try: temp_metadata_path.unlink()
-                except OSError: pass
-            return False
+        self.logger.info(f"Successfully deleted entry {entry_id} from metadata.")
+        return True
 
     def tag_entry(self, entry_id: str, tags: list) -> bool:
-        """Adds tags to an existing entry by rewriting the metadata file."""
-        if not self.metadata_file.exists():
-            self.logger.warning(f"Metadata file not found, cannot tag entry {entry_id}.")
-            return False
+        """Adds tags to an existing entry by appending a tag record to the metadata journal."""
         if not isinstance(tags, list):
              self.logger.warning(f"Tags must be a list for entry {entry_id}.")
              return False
-
-        temp_metadata_path = self.metadata_file.with_suffix('.jsonl.tmp')
-        updated = False
-
         try:
-            with self.lock: # Ensure exclusive access
-                with open(self.metadata_file, 'r', encoding='utf-8') as src, \
-                     open(temp_metadata_path, 'w', encoding='utf-8') as dst:
-                    for line in src:
-                        try:
-                            entry = json.loads(line)
-                            if entry.get('id') == entry_id:
-                                current_tags = set(entry.get('tags', []))
-                                new_tags = current_tags.union(set(tags)) # Add new tags, ensuring uniqueness
-                                if new_tags != current_tags:
-                                    entry['tags'] = sorted(list(new_tags)) # Store as sorted list
-                                    dst.write(json.dumps(entry) + "\n")
-                                    updated = True
-                                    self.logger.info(f"Updated tags for entry {entry_id}")
-                                else:
-                                     dst.write(line) # No change, write original line
-                            else:
-                                dst.write(line) # Write other lines as is
-                        except json.JSONDecodeError:
-                            dst.write(line) # Preserve malformed lines
-                
-                # Replace the original file if updates were made
-                if updated:
-                    os.replace(temp_metadata_path, self.metadata_file)
-                else:
-                    # No updates needed, remove temp file
-                    if temp_metadata_path.exists():
-                        temp_metadata_path.unlink()
-            
-            return updated
-
+            entry = self.index.get(entry_id)
+            if not entry:
+                self.logger.warning(f"Entry ID {entry_id} not found, cannot tag it.")
+                return False
+            current_tags = set(entry.get('tags', []))
+            new_tags = current_tags.union(set(tags)) # Add new tags, ensuring uniqueness
+            if new_tags == current_tags:
+                return False
+            self._append_record({'op': 'tag', 'id': entry_id, 'tags': sorted(new_tags)}) # Store as sorted list
+            self.logger.info(f"Updated tags for entry {entry_id}")
+            return True
         except Exception as e:
             self.logger.error(f"Error during tag_entry operation for {entry_id}: {e}", exc_info=True)
-            # Clean up temp file if it exists after an error
-            if temp_metadata_path.exists():
-                try: temp_metadata_path.unlink()
-                except OSError: pass
             return False
 
-    def search(self, q: str = None, entry_type: str = None, tags: list = None, since: str = None) -> list:
-        """Search stored metadata entries with optional filters."""
-        results = []
-        if not self.metadata_file.exists():
-            return results
-            
-        since_dt = None
-        if since:
-            try:
-                since_dt = datetime.datetime.fromisoformat(since.replace('Z', '+00:00'))
-            except ValueError:
-                self.logger.warning(f"Invalid ISO timestamp format for 'since': {since}. Ignoring time filter.")
-                since_dt = None
-        
-        search_tags = set(tags) if tags else None
+    def search(self, q: str = None, entry_type: str = None, tags: list = None, since: str = None,
+               agent: str = None, filters: list = None, limit: int = None) -> list:
+        """Search stored metadata entries with optional filters (all conditions must match).
 
+        q matches text data, media filenames and tags (case-insensitive substring);
+        tags requires every listed tag; since is an ISO timestamp lower bound.
+        filters takes structured conditions such as
+        {"field": "type", "op": "in", "value": ["outcome", "text"]} over
+        id/type/agent/timestamp/tags/text (see CrossModalIndex.search).
+        """
         try:
-            # Use lock for read consistency if concurrent writes/deletes are frequent
-            # with self.lock:
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        entry = json.loads(line)
-                        
-                        # --- Filtering Logic --- 
-                        # Type filter
-                        if entry_type and entry.get('type') != entry_type:
-                            continue
-                        # Timestamp filter
-                        if since_dt:
-                            entry_ts_str = entry.get('timestamp')
-                            if entry_ts_str:
-                                try:
-                                    entry_dt = datetime.datetime.fromisoformat(entry_ts_str.replace('Z', '+00:00'))
-                                    if entry_dt < since_dt:
-                                        continue
-                                except ValueError:
-                                    pass # Ignore entries with bad timestamps if filtering
-                            else:
-                                continue # Skip entries without timestamp if filtering by time
-                        # Tag filter (match all provided tags)
-                        if search_tags and not search_tags.issubset(set(entry.get('tags', []))):
-                            continue
-                        # Query string filter (case-insensitive)
-                        if q:
-                            query_lower = q.lower()
-                            match = False
-                            if entry.get('type') == 'text' and query_lower in entry.get('data', '').lower():
-                                match = True
-                            elif entry.get('type') in ['image', 'audio'] and query_lower in entry.get('filename', '').lower():
-                                match = True
-                            # Optionally search tags too
-                            elif any(query_lower in tag.lower() for tag in entry.get('tags', [])):
-                                 match = True
-                                 
-                            if not match:
-                                continue
-                        # --- End Filtering --- 
-                        
-                        # Add absolute path if it's a media entry
-                        if 'path' in entry:
-                            entry['absolute_path'] = str(self.memory_root / entry['path'])
-                            
-                        results.append(entry)
-                        
-                    except json.JSONDecodeError:
-                        self.logger.warning(f"Skipping malformed line during search: {line.strip()}")
-                        continue
+            results = self.index.search(q=q, entry_type=entry_type, tags=tags, since=since,
+                                        agent=agent, filters=filters, limit=limit)
+        except ValueError:
+            raise # Malformed structured filter
         except Exception as e:
-            self.logger.error(f"Error searching memory metadata file {self.metadata_file}: {e}")
-            
-        # Optional: Sort results by timestamp descending?
-        # results.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        return results
+            self.logger.error(f"Error searching memory metadata index for {self.metadata_file}: {e}")
+            return []
+        return [self._with_absolute_path(entry) for entry in results]
 
     def summarize_recent(self, n: int = 10) -> str:
         """Return a summary of the most recent n entries (stub)"""
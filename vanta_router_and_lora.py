@@ -10,7 +10,7 @@ import json # Added for stream error handling
 from fastapi import FastAPI, APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Literal, Union
-import re, asyncio, os, time, uuid
+import re, asyncio, os, time, uuid, mimetypes
 import ollama # Import ollama
 from openai import AsyncOpenAI, OpenAIError # Import OpenAI client and error
 from fastapi.responses import StreamingResponse, PlainTextResponse
@@ -20,6 +20,16 @@ import random  # For random drift bonus
 import logging # <-- Uncomment
 # Add import for the moved helper function
 from vanta_seed.core.lot_sh_helper import extract_thought_hierarchy_shorthand
+from vanta_seed.core.lot_sh_pipeline import LotShPipeline, ExtractionResult, EMPTY_SHORTHAND, DEFAULT_CACHE_SIZE as LOTSH_DEFAULT_CACHE_SIZE
+from vanta_seed.core.myth_index_store import MythIndexStore
+from vanta_seed.core.symbol_search_index import SymbolSearchIndex
+from vanta_seed.core.lineage_graph import LineageGraph
+from vanta_seed.core.routing_engine import RoutingEngine, VISION_PAT, CODE_PAT, MATH_PAT, MYTH_PAT, DEFAULT_IMAGE_KEYWORDS, DEFAULT_DECISION_CACHE_SIZE
+from vanta_seed.memory.cross_modal_index import CrossModalIndex
+from vanta_seed.memory.media_store import iter_media_chunks
+from pathlib import Path
+from urllib.parse import quote
+import filelock
 
 # --- Basic Logging Config --- 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s') # <-- Uncomment
@@ -78,17 +88,29 @@ def get_logger():
     return logging.getLogger(__name__)
 # -----------------------------------
 
-VISION_PAT = re.compile(r"<img|https?://.*\.(?:png|jpg|jpeg|webp|bmp|gif)", re.I)
-CODE_PAT = re.compile(r"(def |class |import |```|#include|<script>|function |return|\{|\}|\(|\))", re.IGNORECASE)
-MATH_PAT = re.compile(r"[∑∫√π]|\\frac|\\begin{aligned}")
-# New Pattern for Mythogenesis/Storytelling prompts
-MYTH_PAT = re.compile(r"(myth|legend|story|narrative|epic|tale|lore|imagine)", re.IGNORECASE)
+# Routing patterns (VISION_PAT, CODE_PAT, MATH_PAT, MYTH_PAT) are defined in vanta_seed.core.routing_engine
 
 # --- Configuration for Symbol Index ---
 MYTH_INDEX_FILE = "myth_symbol_index.json"
 COLLAPSE_SOURCE_LIMIT = 5  # Max number of entries allowed for collapse
 NARRATIVE_SNIPPET_LENGTH = 150 # Length of narrative snippet to store
 
+# In-memory myth symbol index (authoritative); persisted as snapshot + append-only journal
+MYTH_STORE = MythIndexStore(
+    MYTH_INDEX_FILE,
+    compact_every=int(get_config("myth_index.compact_every", 1000)),
+    fsync_policy=get_config("myth_index.fsync", "interval"),
+    fsync_interval=float(get_config("myth_index.fsync_interval", 1.0))
+)
+SYMBOL_INDEX: Dict[str, Dict[str, Any]] = MYTH_STORE.entries
+SYMBOL_SEARCH = SymbolSearchIndex() # Kept in step with SYMBOL_INDEX by append_to_myth_index
+MYTH_LINEAGE = LineageGraph() # parent_id -> entry_id edges, for ancestor / common-ancestor queries
+MYTH_ORIGINS: Dict[str, Dict[str, None]] = {} # origin_id -> ordered set of entry_ids
+
+# --- CrossModalMemory media served over HTTP ---
+MEMORY_ROOT = Path(get_config("memory.root", "memory_store")) # Parent of the agents' memory_path directories
+_MEMORY_INDEX: Optional[CrossModalIndex] = None # Opened on first media request
+
 class ChatMessage(BaseModel):
     role: Literal["system", "user", "assistant"]
     content: str
@@ -200,80 +222,34 @@ class TaskRouter:
     VISION_OPENAI_MODEL = get_config("openai.models.default_vision", "gpt-4o") # Added for potential OpenAI vision routing
 
     # Load keywords from config
-    OPENAI_IMAGE_KEYWORDS = get_config("routing.openai_image_keywords", ["generate image", "create an image", "make a picture"])
+    OPENAI_IMAGE_KEYWORDS = get_config("routing.openai_image_keywords", DEFAULT_IMAGE_KEYWORDS)
+
+    # Rules, LoRA names and fallbacks resolved once; decisions cached per prompt fingerprint
+    ENGINE = RoutingEngine(
+        default_ollama_model=DEFAULT_OLLAMA_MODEL,
+        code_ollama_model=CODE_OLLAMA_MODEL,
+        vision_ollama_model=VISION_OLLAMA_MODEL,
+        default_openai_model=DEFAULT_OPENAI_MODEL,
+        image_keywords=OPENAI_IMAGE_KEYWORDS,
+        lora_models=get_config("ollama.models.lora_models", {}) or {},
+        cache_size=int(get_config("routing.decision_cache_size", DEFAULT_DECISION_CACHE_SIZE))
+    )
 
     @staticmethod
     def pick_model(prompt: str, requested_model: Optional[str] = None) -> tuple[str, str, Optional[str]]:
         """Determines the target backend, the model to try first, and a fallback model.
 
+        Priority: explicit OpenAI model, OpenAI image keywords, vision content,
+        code/math content (Python LoRA if configured), myth content (Myth LoRA),
+        the requested Ollama model, then the default Ollama model.
+
         Returns:
             tuple[str, str, Optional[str]]: 
               (backend, model_to_try, base_model_if_lora_failed)
         """
-        # 1. Explicit OpenAI Request?
-        if requested_model and requested_model.startswith(("gpt-", "dall-e-")):
-            print(f"Routing to OpenAI model (explicit request): {requested_model}")
-            return ("openai", requested_model, None) # No fallback needed for OpenAI
-
-        # 2. OpenAI Image Keywords?
-        if any(keyword in prompt.lower() for keyword in TaskRouter.OPENAI_IMAGE_KEYWORDS):
-            print(f"Routing to OpenAI model (image keywords): {TaskRouter.DEFAULT_OPENAI_MODEL}")
-            return ("openai", TaskRouter.DEFAULT_OPENAI_MODEL, None)
-        
-        # --- Ollama Logic --- 
-        ollama_backend = "ollama"
-        base_model = None
-        lora_model_to_try = None
-        
-        # 3. Vision Content?
-        if TaskRouter.VISION_OLLAMA_MODEL and VISION_PAT.search(prompt):
-            model_to_try = TaskRouter.VISION_OLLAMA_MODEL
-            # For now, assume vision models don't use LoRA fallbacks in this way
-            print(f"Routing to Ollama vision model: {model_to_try}")
-            return (ollama_backend, model_to_try, None)
-
-        # 4. Code/Math Content?
-        if TaskRouter.CODE_OLLAMA_MODEL and (CODE_PAT.search(prompt) or MATH_PAT.search(prompt)):
-            base_model = TaskRouter.CODE_OLLAMA_MODEL # Base for code tasks
-            if "python" in prompt.lower():
-                lora_model_config_name = get_config("ollama.models.lora_models.python_expert")
-                if lora_model_config_name:
-                    print(f"Routing attempt: Ollama code model (Python LoRA): {lora_model_config_name}")
-                    # Try the LoRA model, specify the base code model as fallback
-                    return (ollama_backend, lora_model_config_name, base_model)
-            
-            # If no specific LoRA matched or configured, use the base code model
-            print(f"Routing to Ollama code/math model (standard): {base_model}")
-            return (ollama_backend, base_model, None) # No LoRA attempt, no fallback needed
-
-        # 5. Myth/Story Content?
-        if MYTH_PAT.search(prompt):
-            base_model = TaskRouter.DEFAULT_OLLAMA_MODEL # Base for myth is default
-            lora_model_config_name = get_config("ollama.models.lora_models.myth_weaver")
-            if lora_model_config_name:
-                print(f"Routing attempt: Ollama model (Myth LoRA): {lora_model_config_name}")
-                # Try the LoRA model, specify the default model as fallback
-                return (ollama_backend, lora_model_config_name, base_model)
-            # Fallthrough to default logic if no Myth LoRA configured
-
-        # 6. Fallback: Use Explicitly Requested Model if provided?
-        if requested_model:
-            # Check if the requested model is actually one of the configured LoRA models
-            lora_config_values = list(get_config("ollama.models.lora_models", {}).values())
-            if requested_model in lora_config_values:
-                # This is tricky - we don't know the intended *base* model easily here.
-                # Safest bet is to assume the default model as fallback if a LoRA fails.
-                # A better config might map LoRA names back to base models.
-                print(f"Routing to Ollama model (LoRA requested directly): {requested_model}")
-                return (ollama_backend, requested_model, TaskRouter.DEFAULT_OLLAMA_MODEL)
-            else:
-                # Assume it's a non-OpenAI, non-LoRA base model requested directly
-                 print(f"Routing to Ollama model (Base requested directly): {requested_model}")
-                 return (ollama_backend, requested_model, None)
-
-        # 7. Final Default: Use Default Ollama Model
-        print(f"Routing to default Ollama model (no match): {TaskRouter.DEFAULT_OLLAMA_MODEL}")
-        return (ollama_backend, TaskRouter.DEFAULT_OLLAMA_MODEL, None)
+        decision = TaskRouter.ENGINE.route(prompt, requested_model)
+        print(decision.reason)
+        return decision.as_tuple()
 
 # --- Initialize Clients --- #
 # Ollama Client
@@ -285,6 +261,18 @@ ollama_client = ollama.AsyncClient(host=ollama_host)
 # Ensure OPENAI_API_KEY environment variable is set
 
 router = TaskRouter()
+
+# --- Symbol + LoT-Sh extraction (concurrent, cached by narrative hash, shared by branch/drift/collapse) ---
+# "inline": endpoints wait for extraction; "background": they respond once the narrative exists and the
+# index entry is updated when extraction finishes (extraction_status "pending" -> "complete").
+LOTSH_MODE = get_config("lot_sh.mode", "inline")
+LOTSH_PIPELINE = LotShPipeline(
+    # Lambdas look the helpers up at call time (they are defined/patched later in this module)
+    symbol_extractor=lambda narrative, model: extract_symbolic_nodes(narrative, model),
+    shorthand_extractor=lambda narrative: extract_thought_hierarchy_shorthand(narrative, TaskRouter.DEFAULT_OLLAMA_MODEL, ollama_client),
+    shorthand_model=TaskRouter.DEFAULT_OLLAMA_MODEL,
+    cache_size=int(get_config("lot_sh.cache_size", LOTSH_DEFAULT_CACHE_SIZE))
+)
 app = FastAPI(title="VANTA Unified API (Ollama + OpenAI + Myth)", version="0.6.0") # Version bump
 
 # --- Streaming Generators ---
@@ -372,32 +360,52 @@ async def openai_stream_generator(openai_response_stream):
 # --- Helper Functions for JSON Symbol Index --- 
 
 def load_myth_index() -> List[Dict]:
-    """Loads the myth index from the JSON file."""
-    if not os.path.exists(MYTH_INDEX_FILE):
-        return []
-    try:
-        with open(MYTH_INDEX_FILE, 'r', encoding='utf-8') as f:
-            # Handle empty file case
-            content = f.read()
-            if not content:
-                return []
-            return json.loads(content)
-    except json.JSONDecodeError:
-        print(f"Warning: Error decoding {MYTH_INDEX_FILE}. Returning empty index.")
-        return [] # Return empty list if file is corrupt
-    except Exception as e:
-        print(f"Warning: Error loading {MYTH_INDEX_FILE}: {e}. Returning empty index.")
-        return []
+    """Returns all myth index entries from the in-memory index (loaded at startup)."""
+    return MYTH_STORE.values()
 
 def append_to_myth_index(entry_data: Dict):
-    """Appends a new entry to the myth index JSON file."""
-    index = load_myth_index()
-    index.append(entry_data)
+    """Adds an entry to the in-memory index and appends it to the on-disk journal."""
     try:
-        with open(MYTH_INDEX_FILE, 'w', encoding='utf-8') as f:
-            json.dump(index, f, indent=2, ensure_ascii=False, default=str) # Use default=str for datetime
+        MYTH_STORE.append(entry_data)
     except Exception as e:
-        print(f"Error writing to {MYTH_INDEX_FILE}: {e}")
+        print(f"Error writing to {MYTH_STORE.journal_path}: {e}")
+        SYMBOL_INDEX[entry_data["entry_id"]] = entry_data # Keep serving it from memory
+    SYMBOL_SEARCH.add(entry_data)
+    index_myth_lineage(entry_data)
+
+def index_myth_lineage(entry_data: Dict):
+    """Records an entry's lineage edge and origin bucket (incremental; call once per new entry)."""
+    entry_id = entry_data.get("entry_id")
+    lineage = entry_data.get("lineage") or {}
+    if not entry_id:
+        return
+    origin_id, parent_id = lineage.get("origin_id"), lineage.get("parent_id")
+    if origin_id:
+        MYTH_ORIGINS.setdefault(origin_id, {})[entry_id] = None
+    try:
+        if parent_id:
+            MYTH_LINEAGE.add_edge(parent_id, entry_id)
+        else:
+            MYTH_LINEAGE.add_node(entry_id)
+    except ValueError as e: # Second parent or cycle in stored lineage
+        print(f"Warning: Ignoring lineage edge {parent_id} --> {entry_id}: {e}")
+
+async def extract_for_entry(narrative: str, symbol_model: str) -> Optional[ExtractionResult]:
+    """Symbols + LoT-Sh for a new entry; None in background mode when nothing is cached (call schedule_extraction after indexing)."""
+    if LOTSH_MODE == "background":
+        return LOTSH_PIPELINE.peek(narrative, symbol_model)
+    return await LOTSH_PIPELINE.extract(narrative, symbol_model)
+
+def schedule_extraction(entry_id: str, narrative: str, symbol_model: str):
+    """Fills an already indexed entry's symbols and LoT-Sh once the background extraction finishes."""
+    def complete(result: ExtractionResult):
+        entry = dict(SYMBOL_INDEX.get(entry_id) or {})
+        if not entry:
+            return
+        entry.update(symbols=result.symbols, thought_shorthand=result.thought_shorthand, extraction_status="complete")
+        append_to_myth_index(entry) # Journal replay is keyed by entry_id, so this supersedes the pending line
+        logger.info(f"Background extraction complete for {entry_id} ({len(result.symbols)} symbols).")
+    LOTSH_PIPELINE.submit(entry_id, narrative, symbol_model, complete)
 
 # --- Symbol Search Endpoint --- 
 print("--- VANTA: Attempting to register /v1/symbol/search endpoint ---")
@@ -405,59 +413,35 @@ print("--- VANTA: Attempting to register /v1/symbol/search endpoint ---")
 @app.post("/v1/symbol/search", response_model=SymbolSearchResponse)
 async def search_symbols(req: SymbolSearchRequest):
     """Searches the myth index for narratives matching symbolic keywords."""
-    index_data = load_myth_index()
     query = req.query
-    matches = []
-
     print(f"--- Symbol Search: Query='{query}', CaseSensitive={req.case_sensitive}, MaxResults={req.max_results} ---")
 
-    for entry in index_data:
-        # Ensure symbols field exists and is a list
-        symbols = entry.get("symbols", [])
-        if not isinstance(symbols, list):
-            continue # Skip entry if symbols format is unexpected
-
-        found_match = False
-        for symbol in symbols:
-            if not isinstance(symbol, str):
-                continue # Skip non-string symbols
-            
-            # Perform comparison
-            symbol_to_compare = symbol if req.case_sensitive else symbol.lower()
-            query_to_compare = query if req.case_sensitive else query.lower()
-            
-            # Using simple substring containment for now
-            if query_to_compare in symbol_to_compare:
-                found_match = True
-                break # Found a match in this entry's symbols, no need to check further
-        
-        if found_match:
-            # Attempt to parse timestamp robustly
-            try:
-                timestamp = datetime.fromisoformat(entry.get("timestamp"))
-            except (TypeError, ValueError):
-                timestamp = datetime.now() # Fallback timestamp
-                
-            result_item = SearchResultItem(
-                entry_id=entry.get("entry_id", "unknown"),
-                narrative_snippet=entry.get("narrative_snippet", ""),
-                symbols=symbols,
-                timestamp=timestamp,
-                model_used=entry.get("model_used", "unknown"),
-                lineage=entry.get("lineage"),
-                type=entry.get("type", "unknown"),
-                original_branch_id=entry.get("original_branch_id"),
-                drift_instruction=entry.get("drift_instruction")
-            )
-            matches.append(result_item)
-
-    # Sort matches by timestamp (most recent first)
-    matches.sort(key=lambda item: item.timestamp, reverse=True)
-    
-    # Limit results
-    limited_matches = matches[:req.max_results]
-
-    print(f"--- Symbol Search: Found {len(limited_matches)} matches (out of {len(matches)} total) ---")
+    # Inverted/trigram index returns the newest matching ids; only those become response objects
+    top_ids, total_matches = SYMBOL_SEARCH.search(query, req.max_results, case_sensitive=req.case_sensitive)
+    limited_matches = []
+    for entry_id in top_ids:
+        entry = SYMBOL_INDEX.get(entry_id)
+        if entry is None:
+            continue
+        # Attempt to parse timestamp robustly
+        try:
+            timestamp = datetime.fromisoformat(entry.get("timestamp"))
+        except (TypeError, ValueError):
+            timestamp = datetime.now() # Fallback timestamp
+
+        limited_matches.append(SearchResultItem(
+            entry_id=entry.get("entry_id", "unknown"),
+            narrative_snippet=entry.get("narrative_snippet", ""),
+            symbols=entry.get("symbols", []),
+            timestamp=timestamp,
+            model_used=entry.get("model_used", "unknown"),
+            lineage=entry.get("lineage"),
+            type=entry.get("type", "unknown"),
+            original_branch_id=entry.get("original_branch_id"),
+            drift_instruction=entry.get("drift_instruction")
+        ))
+
+    print(f"--- Symbol Search: Found {len(limited_matches)} matches (out of {total_matches} total) ---")
     
     return SymbolSearchResponse(query=req.query, results=limited_matches)
 
@@ -654,6 +638,7 @@ class MythBranchResponse(BaseModel):
     model_used: str
     symbolic_nodes: List[str] = [] # Placeholder for future symbol extraction
     thought_shorthand: Dict[str, Optional[str]] = {}  # Changed type
+    extraction_status: Literal["complete", "pending"] = "complete" # "pending": symbols/LoT-Sh are filled into the index later
     # Add usage stats later if needed
 
 # --- Symbolic Node Extraction Helper ---
@@ -810,18 +795,19 @@ async def branch_myth(req: MythBranchRequest):
 
     narrative_content = response['message']['content']
     
-    # 6. Extract Symbolic Nodes & LoT-Sh Dictionary
-    extracted_symbols = await extract_symbolic_nodes(narrative_content, current_model_to_use)
-    # Call the imported helper, passing the client and extraction model
-    extraction_model_for_lotsh = TaskRouter.DEFAULT_OLLAMA_MODEL
-    shorthand_dict = await extract_thought_hierarchy_shorthand(narrative_content, extraction_model_for_lotsh, ollama_client)
+    # 6. Extract Symbolic Nodes & LoT-Sh Dictionary (concurrently; deferred in background mode)
+    extraction = await extract_for_entry(narrative_content, current_model_to_use)
+    extracted_symbols = extraction.symbols if extraction else []
+    shorthand_dict = extraction.thought_shorthand if extraction else dict(EMPTY_SHORTHAND)
+    extraction_status = "complete" if extraction else "pending"
 
     # --- Append to Symbol Index ---
     branch_response_obj = MythBranchResponse(
         narrative=narrative_content,
         model_used=current_model_to_use,
         symbolic_nodes=extracted_symbols,
-        thought_shorthand=shorthand_dict # Assign dict
+        thought_shorthand=shorthand_dict, # Assign dict
+        extraction_status=extraction_status
     )
     entry_data = {
         "entry_id": branch_response_obj.branch_id,
@@ -836,11 +822,13 @@ async def branch_myth(req: MythBranchRequest):
             "parent_id": None,
             "drift_step": 0
         },
-        "thought_shorthand": shorthand_dict # Store dict in index
+        "thought_shorthand": shorthand_dict, # Store dict in index
+        "extraction_status": extraction_status
     }
     append_to_myth_index(entry_data)
-    logger.info(f"Saved branch {branch_response_obj.branch_id} to index with LoT-Sh.") # Uncomment this call
-    SYMBOL_INDEX[branch_response_obj.branch_id] = entry_data
+    if extraction is None:
+        schedule_extraction(branch_response_obj.branch_id, narrative_content, current_model_to_use)
+    logger.info(f"Saved branch {branch_response_obj.branch_id} to index with LoT-Sh ({extraction_status}).") # Uncomment this call
 
     # 7. Return structured response
     return branch_response_obj # Return the Pydantic object
@@ -868,6 +856,7 @@ class MythDriftResponse(BaseModel):
     drift_instruction_used: str
     symbolic_nodes: List[str] = [] # Placeholder for future symbol extraction
     thought_shorthand: Dict[str, Optional[str]] = {}  # Changed type
+    extraction_status: Literal["complete", "pending"] = "complete" # "pending": symbols/LoT-Sh are filled into the index later
     # Add usage stats later if needed
 
 # --- Add diagnostic print before Drift Endpoint Definition ---
@@ -888,10 +877,6 @@ async def drift_myth(req: MythDriftRequest):
     print(f"--- Drift Request: Loading parent entry ID: {req.source_entry_id} ---")
     # Load parent entry from in-memory index if available
     parent_entry = SYMBOL_INDEX.get(req.source_entry_id)
-    if not parent_entry:
-        # Fallback to file in case not loaded
-        index_data = load_myth_index()
-        parent_entry = next((entry for entry in index_data if entry.get("entry_id") == req.source_entry_id), None)
 
     if not parent_entry:
         raise HTTPException(status_code=404, detail=f"Source entry ID '{req.source_entry_id}' not found in index.")
@@ -980,11 +965,11 @@ async def drift_myth(req: MythDriftRequest):
 
     drifted_content = response['message']['content']
 
-    # 6. Extract Symbolic Nodes & LoT-Sh Dictionary
-    extracted_symbols = await extract_symbolic_nodes(drifted_content, current_model_to_use)
-    # Call the imported helper, passing the client and extraction model
-    extraction_model_for_lotsh = TaskRouter.DEFAULT_OLLAMA_MODEL
-    shorthand_dict = await extract_thought_hierarchy_shorthand(drifted_content, extraction_model_for_lotsh, ollama_client)
+    # 6. Extract Symbolic Nodes & LoT-Sh Dictionary (concurrently; deferred in background mode)
+    extraction = await extract_for_entry(drifted_content, current_model_to_use)
+    extracted_symbols = extraction.symbols if extraction else []
+    shorthand_dict = extraction.thought_shorthand if extraction else dict(EMPTY_SHORTHAND)
+    extraction_status = "complete" if extraction else "pending"
 
     # --- Append to Symbol Index with Lineage ---
     drift_entry_id = f"mythdrift-{uuid.uuid4().hex[:10]}"
@@ -996,7 +981,8 @@ async def drift_myth(req: MythDriftRequest):
         original_branch_id=req.source_entry_id,
         drift_instruction_used=req.parameters.drift_instruction,
         symbolic_nodes=extracted_symbols,
-        thought_shorthand=shorthand_dict # Assign dict
+        thought_shorthand=shorthand_dict, # Assign dict
+        extraction_status=extraction_status
     )
     entry_data = {
         "entry_id": drift_entry_id,
@@ -1012,11 +998,13 @@ async def drift_myth(req: MythDriftRequest):
             "parent_id": req.source_entry_id,
             "drift_step": new_drift_step
         },
-        "thought_shorthand": shorthand_dict # Store dict in index
+        "thought_shorthand": shorthand_dict, # Store dict in index
+        "extraction_status": extraction_status
     }
     append_to_myth_index(entry_data)
-    logger.info(f"Saved drift {drift_entry_id} to index with LoT-Sh.") # Uncommented
-    SYMBOL_INDEX[drift_entry_id] = entry_data
+    if extraction is None:
+        schedule_extraction(drift_entry_id, drifted_content, current_model_to_use)
+    logger.info(f"Saved drift {drift_entry_id} to index with LoT-Sh ({extraction_status}).") # Uncommented
     # ---------------------------------------
 
     # 7. Return structured response
@@ -1044,25 +1032,86 @@ async def get_myth_index_entries():
         )
     return summaries
 
-# --- Endpoint to return mermaid.js lineage map
+# --- Endpoint to return mermaid.js lineage map (registered before /lineage/{entry_id} so "map" isn't taken as an id)
 @app.get("/v1/myth/lineage/map", response_class=PlainTextResponse)
 async def get_myth_lineage_map(origin_id: Optional[str] = None):
     """Returns a mermaid.js flowchart diagram of myth lineage."""
-    # Use in-memory symbol index
-    index_list = list(SYMBOL_INDEX.values())
-    entries = [e for e in index_list if not origin_id or e.get("lineage", {}).get("origin_id") == origin_id]
+    # Use in-memory symbol index; the origin buckets avoid filtering every entry
+    entry_ids = MYTH_ORIGINS.get(origin_id, []) if origin_id else SYMBOL_INDEX.keys()
     lines = ["flowchart LR"]
-    for e in entries:
-        eid = e.get("entry_id")
-        pid = e.get("lineage", {}).get("parent_id")
+    for eid in entry_ids:
+        e = SYMBOL_INDEX.get(eid)
+        if e is None:
+            continue
+        pid = (e.get("lineage") or {}).get("parent_id")
         if pid:
             lines.append(f"  {pid} --> {eid}")
         else:
             lines.append(f"  {eid}")
     return "\n".join(lines)
 
-# In-memory myth symbol index
-SYMBOL_INDEX: Dict[str, Dict[str, Any]] = {}
+class MythLineageResponse(BaseModel):
+    entry_id: str
+    depth: int # Number of parent links above this entry
+    ancestors: List[str] # Root first, ending with entry_id
+    children: List[str]
+    compare_to: Optional[str] = None
+    common_ancestor: Optional[str] = None # Nearest shared ancestor with compare_to, if any
+
+# --- Endpoint to return one entry's lineage (registered after /map so that path still matches first)
+@app.get("/v1/myth/lineage/{entry_id}", response_model=MythLineageResponse)
+async def get_myth_lineage(entry_id: str, compare_to: Optional[str] = None):
+    """Returns the ancestor chain and children of an entry, optionally with its common ancestor with another entry."""
+    if entry_id not in SYMBOL_INDEX:
+        raise HTTPException(status_code=404, detail=f"Entry ID {entry_id} not found")
+    common_ancestor = None
+    if compare_to:
+        if compare_to not in SYMBOL_INDEX:
+            raise HTTPException(status_code=404, detail=f"Entry ID {compare_to} not found")
+        common_ancestor = MYTH_LINEAGE.lowest_common_ancestor(entry_id, compare_to)
+    return MythLineageResponse(
+        entry_id=entry_id,
+        depth=MYTH_LINEAGE.depth_of(entry_id),
+        ancestors=MYTH_LINEAGE.ancestors(entry_id),
+        children=list(MYTH_LINEAGE.children_of(entry_id)),
+        compare_to=compare_to,
+        common_ancestor=common_ancestor,
+    )
+
+def get_memory_index() -> CrossModalIndex:
+    global _MEMORY_INDEX
+    if _MEMORY_INDEX is None:
+        metadata_file = MEMORY_ROOT / "memory_metadata.jsonl"
+        _MEMORY_INDEX = CrossModalIndex(
+            MEMORY_ROOT / "memory_metadata.db", metadata_file, filelock.FileLock(str(metadata_file) + ".lock"), logger
+        )
+    return _MEMORY_INDEX
+
+def content_disposition(filename: str, disposition: str = "inline") -> str:
+    """RFC 6266 header value: an ASCII-safe filename= fallback plus filename*=UTF-8'' for the real name."""
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace("?", "_")
+    fallback = re.sub(r'[\x00-\x1f\x7f"\\]', "_", fallback)
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+# --- Endpoint to stream a stored image/audio entry ---
+@app.get("/v1/memory/media/{entry_id}")
+async def get_memory_media(entry_id: str):
+    """Streams the media file of a CrossModalMemory entry as mmap-backed chunks (no per-chunk copies)."""
+    entry = await asyncio.to_thread(get_memory_index().get, entry_id)
+    if not entry or entry.get("type") not in ("image", "audio") or "path" not in entry:
+        raise HTTPException(status_code=404, detail=f"Media entry {entry_id} not found")
+    path = MEMORY_ROOT / entry["path"]
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Media file for entry {entry_id} is missing")
+    media_type = mimetypes.guess_type(entry.get("filename") or path.name)[0] or "application/octet-stream"
+    return StreamingResponse(
+        iter_media_chunks(path),
+        media_type=media_type,
+        headers={
+            "Content-Length": str(path.stat().st_size),
+            "Content-Disposition": content_disposition(entry.get("filename") or path.name),
+        },
+    )
 
 @app.on_event("startup")
 async def load_symbol_index_on_startup():
@@ -1074,11 +1123,23 @@ async def load_symbol_index_on_startup():
                 json.dump([], f, indent=2, ensure_ascii=False)
         except Exception as e:
             print(f"Error creating empty {MYTH_INDEX_FILE}: {e}")
-    index_list = load_myth_index()
-    global SYMBOL_INDEX
-    SYMBOL_INDEX = {entry["entry_id"]: entry for entry in index_list}
+    MYTH_STORE.load() # Refills SYMBOL_INDEX in place (snapshot + journal replay)
+    SYMBOL_SEARCH.rebuild(SYMBOL_INDEX.values())
+    MYTH_LINEAGE.clear()
+    MYTH_ORIGINS.clear()
+    for entry in SYMBOL_INDEX.values():
+        index_myth_lineage(entry)
     print(f"Loaded {len(SYMBOL_INDEX)} myth entries into memory.")
 
+@app.on_event("shutdown")
+async def compact_symbol_index_on_shutdown():
+    """Fold the journal into the snapshot so the next start replays nothing."""
+    await LOTSH_PIPELINE.drain() # Pending background extractions still write to the index
+    try:
+        MYTH_STORE.close()
+    except Exception as e:
+        print(f"Error compacting {MYTH_INDEX_FILE} on shutdown: {e}")
+
 # Pydantic models for myth collapse
 class MythCollapseRequest(BaseModel):
     entry_ids: List[str] = Field(..., description="List of entry_ids to collapse into an archetype.")
@@ -1090,6 +1151,7 @@ class MythCollapseResponse(BaseModel):
     symbols: List[str]
     lineage: LineageInfo
     thought_shorthand: Dict[str, Optional[str]] = {}  # Changed type
+    extraction_status: Literal["complete", "pending"] = "complete" # "pending": symbols/LoT-Sh are filled into the index later
 
 # Endpoint to collapse multiple myths into an archetype
 @app.post("/v1/myth/collapse", response_model=MythCollapseResponse)
@@ -1134,11 +1196,11 @@ async def collapse_myth(req: MythCollapseRequest):
         raise HTTPException(status_code=500, detail=f"Ollama Error: {response['error']}")
     collapsed_content = response["message"]["content"]
 
-    # Extract symbols & LoT-Sh Dictionary
-    extracted_symbols = await extract_symbolic_nodes(collapsed_content, TaskRouter.DEFAULT_OLLAMA_MODEL)
-    # Call the imported helper, passing the client and extraction model
-    extraction_model_for_lotsh = TaskRouter.DEFAULT_OLLAMA_MODEL
-    shorthand_dict = await extract_thought_hierarchy_shorthand(collapsed_content, extraction_model_for_lotsh, ollama_client)
+    # Extract symbols & LoT-Sh Dictionary (concurrently; deferred in background mode)
+    extraction = await extract_for_entry(collapsed_content, TaskRouter.DEFAULT_OLLAMA_MODEL)
+    extracted_symbols = extraction.symbols if extraction else []
+    shorthand_dict = extraction.thought_shorthand if extraction else dict(EMPTY_SHORTHAND)
+    extraction_status = "complete" if extraction else "pending"
 
     # Create new index entry
     collapse_id = f"mythcollapse-{uuid.uuid4().hex[:10]}"
@@ -1151,11 +1213,13 @@ async def collapse_myth(req: MythCollapseRequest):
         "model_used": TaskRouter.DEFAULT_OLLAMA_MODEL,
         "type": "collapse",
         "lineage": {"origin_id": collapse_id, "parent_id": None, "drift_step": 0},
-        "thought_shorthand": shorthand_dict # Store dict in index
+        "thought_shorthand": shorthand_dict, # Store dict in index
+        "extraction_status": extraction_status
     }
     append_to_myth_index(entry_data)
-    SYMBOL_INDEX[collapse_id] = entry_data
-    logger.info(f"Saved collapse {collapse_id} to index with LoT-Sh.") # Uncommented
+    if extraction is None:
+        schedule_extraction(collapse_id, collapsed_content, TaskRouter.DEFAULT_OLLAMA_MODEL)
+    logger.info(f"Saved collapse {collapse_id} to index with LoT-Sh ({extraction_status}).") # Uncommented
 
     # Return structured response
     return MythCollapseResponse(
@@ -1164,7 +1228,8 @@ async def collapse_myth(req: MythCollapseRequest):
         new_entry_id=collapse_id,
         symbols=extracted_symbols,
         lineage=LineageInfo(origin_id=collapse_id, parent_id=None, drift_step=0),
-        thought_shorthand=shorthand_dict # Assign dict
+        thought_shorthand=shorthand_dict, # Assign dict
+        extraction_status=extraction_status
     )
 
 # --- Updated Endpoint for Shorthand Dictionary --- 
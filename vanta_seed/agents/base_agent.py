@@ -321,6 +321,11 @@ class BaseAgent(ABC):
 
         # Get current state safely using property
         current_state_dict = self.current_state
+
+        # --- The Crown's swarm tick moves large swarms in one vectorised step; don't move twice --- 
+        owns_movement = getattr(self.orchestrator, 'owns_swarm_movement', None)
+        if callable(owns_movement) and owns_movement(self._name):
+            return current_state_dict.get('velocity', [0.0]*3), current_state_dict.get('position', [0.0]*3)
         current_pos = current_state_dict.get('position', [0.0]*3)
         current_vel = current_state_dict.get('velocity', [0.0]*3)
         personal_best_pos = current_state_dict.get('personal_best_position', current_pos[:]) # Default to current if missing
@@ -379,13 +384,16 @@ class BaseAgent(ABC):
             epsilon = 1e-6 # Avoid division by zero
 
             for trail_info in stigmergic_trails:
-                # Ensure trail_info is a dict (handles Pydantic model case)
-                trail = trail_info.model_dump(mode='json') if isinstance(trail_info, TrailSignature) else (trail_info if isinstance(trail_info, dict) else {})
-
-                trail_pos = trail.get('position_at_emission')
+                # Read fields directly from models or dicts (no per-trail serialisation)
+                if isinstance(trail_info, dict):
+                    trail_pos = trail_info.get('position_at_emission')
+                    relevance = trail_info.get('relevance_score', 0.0)
+                    value_prop = trail_info.get('value_proposition', 0.0)
+                else:
+                    trail_pos = getattr(trail_info, 'position_at_emission', None)
+                    relevance = getattr(trail_info, 'relevance_score', 0.0)
+                    value_prop = getattr(trail_info, 'value_proposition', 0.0)
                 # Example weighting: Use relevance score * value proposition, decay with distance
-                relevance = trail.get('relevance_score', 0.0)
-                value_prop = trail.get('value_proposition', 0.0)
                 trail_weight = relevance * value_prop # Combine factors
 
                 if trail_pos and isinstance(trail_pos, list) and len(trail_pos) == num_dimensions and trail_weight > epsilon:
@@ -711,7 +719,11 @@ class BaseAgent(ABC):
 
     async def _add_task_to_orchestrator(self, task_data: dict):
         if self.orchestrator and hasattr(self.orchestrator, 'add_task'):
-            await self.orchestrator.add_task(task_data)
+            # VantaMasterCore.add_task queues and returns a TaskHandle without waiting for the result
+            result = self.orchestrator.add_task(task_data)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
         else:
             self.logger.warning("Orchestrator reference not available to add task.")
 
@@ -101,12 +101,12 @@ class MemoryAgent(BaseAgent, PilgrimCommunicatorMixin):
                         task_result = {"status": "success", "message": "Memory stored."}
                         # --- ADDED: Explicitly save after adding --- 
                         # --- Add logging around save --- 
-                        self.logger.debug(f"Attempting to save MemoryStore to YAML.")
+                        self.logger.debug(f"Attempting to persist MemoryStore.")
                         save_success = self.memory_store.save()
                         self.logger.debug(f"MemoryStore.save returned: {save_success}")
                         # -------------------------------
                         if not save_success:
-                             self.logger.warning(f"Failed to save memory store to YAML after adding item for {originating_agent}")
+                             self.logger.warning(f"Failed to persist memory store after adding item for {originating_agent}")
                         # -------------------------------------------
                     else:
                         task_result = {"status": "failure", "error": "Failed to add item to memory store."}
@@ -111,7 +111,11 @@ class SchedulerAgent(BaseAgent):
                             task_to_submit["target_agent"] = task_config.get("target_agent")
                             
                         try:
-                            asyncio.create_task(self.orchestrator.submit_task(task_to_submit))
+                            if hasattr(self.orchestrator, 'submit_task_nowait'):
+                                # Queued on the Crown's dispatcher; raises if the target Pilgrim is overloaded
+                                self.orchestrator.submit_task_nowait(task_to_submit)
+                            else:
+                                asyncio.create_task(self.orchestrator.submit_task(task_to_submit))
                             self._job_states[task_name]["last_run"] = current_time # Update last run time *after* successful submission trigger
                             logger.info(f"Scheduler: Task '{task_name}' submitted to orchestrator.")
                         except Exception as e:
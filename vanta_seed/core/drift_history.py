@@ -0,0 +1,292 @@
+# vanta_seed/core/drift_history.py
+# Capacity-bounded ring buffer of drift snapshots with field and text indexes
+import json
+import logging
+import math
+import os
+import re
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set
+
+# --- Defaults ---
+DEFAULT_CAPACITY = 10000
+SPILL_BATCH_SIZE = 256 # Evicted snapshots buffered before one write to the spill file
+SCAN_WINDOW = 256      # lookup windows up to this size are scanned directly instead of via the text index
+
+_TOKEN_RE = re.compile(r"\w+")
+_FIELD_SEP = "\x00" # Separates searchable fields so a match cannot straddle two of them
+
+
+class DriftHistory:
+    """
+    The most recent `capacity` drift snapshots, oldest first.
+
+    Snapshots live in fixed-size columns indexed by `seq % capacity`, where seq
+    is the snapshot's position in the full history; the archetype_token,
+    source_agent, decision and drift_vector fields are kept in their own
+    columns so counts and drift statistics never touch the snapshot dicts.
+
+    Indexes (postings in ascending seq order, so eviction is a popleft):
+      - archetype_token / source_agent / decision -> seqs
+      - word -> seqs over the lowercased reason, archetype_token and string
+        payload values, with the lowercased text cached per slot so
+        `lookup` verifies candidates without re-lowercasing anything
+      - trigram -> indexed words, so a query fragment finds the words that
+        contain it without scanning the vocabulary
+
+    Evicted snapshots are appended to `spill_path` (JSON lines) in batches when
+    one is configured, otherwise they are dropped (with a warning on the first
+    eviction).
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, spill_path: Optional[str] = None):
+        self.capacity = max(1, int(capacity))
+        self.spill_path = spill_path
+        self.logger = logging.getLogger("Core.DriftHistory")
+
+        # --- Columns ---
+        self._snapshots: List[Optional[dict]] = [None] * self.capacity
+        self._tokens: List[Optional[str]] = [None] * self.capacity
+        self._agents: List[Optional[str]] = [None] * self.capacity
+        self._decisions: List[Optional[str]] = [None] * self.capacity
+        self._drift: List[float] = [math.nan] * self.capacity
+        self._text: List[str] = [""] * self.capacity
+        self._words: List[Set[str]] = [set() for _ in range(self.capacity)]
+        self._head = 0 # seq of the oldest retained snapshot
+        self._next_seq = 0
+
+        # --- Indexes ---
+        self._by_token: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_agent: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_decision: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_word: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_trigram: Dict[str, Set[str]] = defaultdict(set)
+
+        self._spill_buffer: List[dict] = []
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return self._next_seq - self._head
+
+    @property
+    def total_recorded(self) -> int:
+        """Snapshots ever appended, including evicted ones."""
+        return self._next_seq
+
+    # --- Writes ---
+    def append(self, snapshot: dict) -> None:
+        """Stores `snapshot`, evicting (and spilling) the oldest one when full."""
+        if len(self) == self.capacity:
+            self._evict_oldest()
+        seq = self._next_seq
+        slot = seq % self.capacity
+        token, agent, decision = snapshot.get('archetype_token'), snapshot.get('source_agent'), snapshot.get('decision')
+        drift = snapshot.get('drift_vector')
+
+        self._snapshots[slot] = snapshot
+        self._tokens[slot], self._agents[slot], self._decisions[slot] = token, agent, decision
+        self._drift[slot] = float(drift) if isinstance(drift, (int, float)) and not isinstance(drift, bool) else math.nan
+        if isinstance(token, str):
+            self._by_token[token].append(seq)
+        if isinstance(agent, str):
+            self._by_agent[agent].append(seq)
+        if isinstance(decision, str):
+            self._by_decision[decision].append(seq)
+
+        text = self._searchable_text(snapshot)
+        words = set(_TOKEN_RE.findall(text))
+        self._text[slot], self._words[slot] = text, words
+        for word in words:
+            if word not in self._by_word:
+                self._index_vocab(word)
+            self._by_word[word].append(seq)
+        self._next_seq += 1
+
+    def extend(self, snapshots: Iterable[dict]) -> None:
+        for snapshot in snapshots:
+            self.append(snapshot)
+
+    def _evict_oldest(self) -> None:
+        seq = self._head
+        slot = seq % self.capacity
+        snapshot = self._snapshots[slot]
+        self._pop_posting(self._by_token, self._tokens[slot], seq)
+        self._pop_posting(self._by_agent, self._agents[slot], seq)
+        self._pop_posting(self._by_decision, self._decisions[slot], seq)
+        for word in self._words[slot]:
+            if self._pop_posting(self._by_word, word, seq):
+                self._unindex_vocab(word)
+        self._snapshots[slot] = self._tokens[slot] = self._agents[slot] = self._decisions[slot] = None
+        self._drift[slot], self._text[slot], self._words[slot] = math.nan, "", set()
+        self._head += 1
+        if self.spill_path and snapshot is not None:
+            self._spill_buffer.append(snapshot)
+            if len(self._spill_buffer) >= SPILL_BATCH_SIZE:
+                self.flush()
+        elif seq == 0:
+            self.logger.warning(
+                f"Drift history is full ({self.capacity} snapshots) and no spill path is configured; "
+                f"evicted snapshots are discarded. Set drift_history_spill_path to keep them."
+            )
+
+    @staticmethod
+    def _pop_posting(index: Dict[str, Deque[int]], key: Any, seq: int) -> bool:
+        """Drops `seq` from the head of key's postings; True when that emptied (and removed) the key."""
+        postings = index.get(key) if isinstance(key, str) else None
+        if postings and postings[0] == seq:
+            postings.popleft()
+            if not postings:
+                del index[key]
+                return True
+        return False
+
+    @staticmethod
+    def _trigrams(word: str) -> Set[str]:
+        return {word[i:i + 3] for i in range(len(word) - 2)}
+
+    def _index_vocab(self, word: str) -> None:
+        for gram in self._trigrams(word):
+            self._by_trigram[gram].add(word)
+
+    def _unindex_vocab(self, word: str) -> None:
+        for gram in self._trigrams(word):
+            vocab = self._by_trigram.get(gram)
+            if vocab is None:
+                continue
+            vocab.discard(word)
+            if not vocab:
+                del self._by_trigram[gram]
+
+    @staticmethod
+    def _searchable_text(snapshot: dict) -> str:
+        fields = [snapshot.get('reason'), snapshot.get('archetype_token')]
+        payload = snapshot.get('payload')
+        if isinstance(payload, dict):
+            fields.extend(payload.values())
+        return _FIELD_SEP.join(f.lower() for f in fields if isinstance(f, str))
+
+    def flush(self) -> None:
+        """Writes buffered evicted snapshots to the spill file."""
+        if not self._spill_buffer or not self.spill_path:
+            return
+        try:
+            spill_dir = os.path.dirname(self.spill_path)
+            if spill_dir:
+                os.makedirs(spill_dir, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(s, default=str) + "\n" for s in self._spill_buffer)
+            self.spilled += len(self._spill_buffer)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.error(f"Error spilling {len(self._spill_buffer)} drift snapshots to {self.spill_path}: {e}")
+        self._spill_buffer.clear()
+
+    def iter_spilled(self) -> Iterator[dict]:
+        """Yields snapshots previously spilled to disk, oldest first."""
+        self.flush()
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Skipping unreadable line in {self.spill_path}.")
+
+    # --- Reads ---
+    def _seqs(self, limit: Optional[int] = None) -> range:
+        start = self._head if not limit or limit <= 0 else max(self._head, self._next_seq - limit)
+        return range(start, self._next_seq)
+
+    def recent(self, limit: Optional[int] = None) -> List[dict]:
+        """The most recent `limit` snapshots (all retained ones by default), oldest first."""
+        snapshots, cap = self._snapshots, self.capacity
+        return [snapshots[seq % cap] for seq in self._seqs(limit)]
+
+    def since(self, seq: int) -> List[dict]:
+        """Retained snapshots appended at or after position `seq` of the full history, oldest first."""
+        snapshots, cap = self._snapshots, self.capacity
+        return [snapshots[i % cap] for i in range(max(seq, self._head), self._next_seq)]
+
+    def _collect(self, postings: Iterable[int]) -> List[dict]:
+        return [self._snapshots[seq % self.capacity] for seq in postings]
+
+    def by_token(self, archetype_token: str) -> List[dict]:
+        return self._collect(self._by_token.get(archetype_token, ()))
+
+    def by_agent(self, source_agent: str) -> List[dict]:
+        return self._collect(self._by_agent.get(source_agent, ()))
+
+    def by_decision(self, decision: str) -> List[dict]:
+        return self._collect(self._by_decision.get(decision, ()))
+
+    def count_by_agent(self, source_agent: str) -> int:
+        return len(self._by_agent.get(source_agent, ()))
+
+    def agent_counts(self) -> Dict[str, int]:
+        """Retained snapshot count per source_agent."""
+        return {agent: len(postings) for agent, postings in self._by_agent.items()}
+
+    def agent_snapshots_at(self, source_agent: str, positions: Iterable[int]) -> List[dict]:
+        """The agent's snapshots at the given positions of its oldest-first posting list."""
+        postings, cap = self._by_agent[source_agent], self.capacity
+        return [self._snapshots[postings[i] % cap] for i in positions]
+
+    def distinct_tokens(self) -> List[str]:
+        """Archetype tokens present in the buffer, in order of first retained appearance."""
+        return sorted(self._by_token, key=lambda token: self._by_token[token][0])
+
+    def drift_values(self) -> List[float]:
+        """Numeric drift_vector values of the retained snapshots, oldest first."""
+        drift, cap = self._drift, self.capacity
+        return [drift[seq % cap] for seq in self._seqs() if not math.isnan(drift[seq % cap])]
+
+    def lookup(self, query: str, search_limit: Optional[int] = None) -> List[dict]:
+        """
+        Snapshots among the last `search_limit` (all if None) whose reason,
+        archetype_token or string payload values contain `query` case-insensitively,
+        newest first.
+        """
+        query_lower = query.lower()
+        window = self._seqs(search_limit)
+        if len(window) <= SCAN_WINDOW:
+            seqs: Iterable[int] = reversed(window)
+        else:
+            candidates = self._word_candidates(query_lower)
+            if candidates is None:
+                seqs = reversed(window)
+            else:
+                seqs = sorted((seq for seq in candidates if seq >= window.start), reverse=True)
+        text, cap = self._text, self.capacity
+        return [self._snapshots[seq % cap] for seq in seqs if query_lower in text[seq % cap]]
+
+    def _vocab_containing(self, word: str) -> Optional[Set[str]]:
+        """Indexed words containing `word`, via the trigram index (None: shorter than a trigram)."""
+        if len(word) < 3:
+            return None
+        vocab: Optional[Set[str]] = None
+        for gram in sorted(self._trigrams(word), key=lambda g: len(self._by_trigram.get(g, ()))):
+            bucket = self._by_trigram.get(gram)
+            if not bucket:
+                return set()
+            vocab = set(bucket) if vocab is None else vocab & bucket
+            if not vocab:
+                return vocab
+        return {vocab_word for vocab_word in vocab if word in vocab_word}
+
+    def _word_candidates(self, query_lower: str) -> Optional[Set[int]]:
+        """
+        Seqs containing every query word as a substring of some indexed word
+        (None: no word long enough to narrow the search; `lookup` then scans).
+        """
+        candidates: Optional[Set[int]] = None
+        for word in sorted(set(_TOKEN_RE.findall(query_lower)), key=len, reverse=True):
+            vocab = self._vocab_containing(word)
+            if vocab is None:
+                continue # One- and two-letter words are verified by the substring check
+            matches: Set[int] = set()
+            for vocab_word in vocab:
+                matches.update(self._by_word[vocab_word])
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return set()
+        return candidates
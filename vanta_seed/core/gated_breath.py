@@ -33,17 +33,19 @@ class GatedBreath:
         Returns None if calculation cannot be performed (e.g., no clusters).
         """
         self.logger.debug("Measuring breath density...")
-        history = self.memory_weave.retrieve_history()
-        drift_count = len(history)
+        drift_count = self.memory_weave.drift_history.total_recorded
 
         if drift_count == 0:
             self.logger.debug("No drift history, density is undefined (returning None).")
             return None # Density is undefined if no events
 
-        # Use the compressor to get the current symbolic clusters
-        # Note: This re-runs compression. Consider caching if performance is critical.
-        symbolic_map = self.symbolic_compressor.compress_drift_history()
-        cluster_count = len(symbolic_map)
+        # Cluster counts are kept by the compressor; it only has to absorb snapshots
+        # added since its last run, never recompress the whole history.
+        stats = self.symbolic_compressor.cluster_stats()
+        if stats["behind"]:
+            self.symbolic_compressor.compress_drift_history()
+            stats = self.symbolic_compressor.cluster_stats()
+        cluster_count = stats["clusters"]
 
         if cluster_count == 0:
             # If there are drift events but no clusters yet (e.g., before first compression?), density is high.
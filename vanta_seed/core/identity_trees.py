@@ -3,6 +3,7 @@ import logging
 import uuid
 from collections import defaultdict
 from .memory_weave import MemoryWeave
+from .lineage_graph import LineageGraph
 
 class IdentityTrees:
     """Manages the lineage and identity relationships between memory archetypes.
@@ -22,6 +23,10 @@ class IdentityTrees:
         
         # Stores the parent-child relationships: child_token -> parent_token
         self.lineage_map: dict[str, list[str]] = defaultdict(list)
+
+        # Parent pointers + binary lifting over the same edges, for O(1) membership
+        # and O(log depth) ancestor / common-ancestor queries
+        self.graph = LineageGraph()
         
         # Optional: Store additional context per token if needed beyond MemoryWeave
         # self.token_context: dict[str, dict] = {}
@@ -30,13 +35,14 @@ class IdentityTrees:
 
     def root_identity(self, archetype_token: str):
         """Establishes a new root identity based on an archetype token."""
-        if archetype_token in self.identity_roots or any(archetype_token in children for children in self.lineage_map.values()):
+        if archetype_token in self.graph:
             self.logger.warning(f"Attempted to root an already existing or branched token: {archetype_token}. Ignoring.")
             return
         
         # Retrieve metadata to store with the root (optional)
         metadata = self.memory_weave.get_archetype_metadata(archetype_token)
         self.identity_roots[archetype_token] = metadata or {"created_at": uuid.uuid4().hex[:8]} # Basic metadata if none found
+        self.graph.add_node(archetype_token)
         self.logger.info(f"Established new identity root: {archetype_token}")
 
     def branch_identity(self, parent_token: str, child_token: str):
@@ -46,7 +52,7 @@ class IdentityTrees:
             # Decide on handling: overwrite, ignore, raise? For now, log error and ignore.
             return
             
-        if parent_token not in self.identity_roots and not any(parent_token in children for children in self.lineage_map.values()):
+        if parent_token not in self.graph:
             self.logger.warning(f"Attempted to branch from non-existent parent token: {parent_token}. Auto-rooting parent.")
             self.root_identity(parent_token)
             if parent_token not in self.identity_roots:
@@ -58,6 +64,11 @@ class IdentityTrees:
         if child_token in self.lineage_map.get(parent_token, []):
              self.logger.debug(f"Branch from {parent_token} to {child_token} already exists. Ignoring duplicate.")
              return
+        try:
+            self.graph.add_edge(parent_token, child_token)
+        except ValueError as e: # Second parent or cycle
+            self.logger.error(f"Cannot branch {parent_token} --> {child_token}: {e}")
+            return
 
         self.lineage_map[parent_token].append(child_token)
         self.logger.info(f"Branched identity: {parent_token} --> {child_token}")
@@ -69,25 +80,9 @@ class IdentityTrees:
 
     def retrieve_lineage(self, archetype_token: str) -> list[str]:
         """Retrieves the full lineage (ancestors) leading to a specific token."""
-        lineage = [archetype_token]
-        current_token = archetype_token
-        processed = set() # Prevent infinite loops
-        while current_token not in processed:
-            processed.add(current_token)
-            parent_found = False
-            for parent, children in self.lineage_map.items():
-                if current_token in children:
-                    if parent in processed:
-                        self.logger.warning(f"Cycle detected in lineage retrieval for {archetype_token} at parent {parent}. Stopping trace.")
-                        parent_found = False # Treat as end of trace
-                        break
-                    lineage.insert(0, parent)
-                    current_token = parent
-                    parent_found = True
-                    break
-            if not parent_found:
-                break 
-        return lineage
+        if archetype_token not in self.graph:
+            return [archetype_token]
+        return self.graph.ancestors(archetype_token)
 
     def get_children(self, archetype_token: str) -> list[str]:
          """Gets the direct children of a given archetype token."""
@@ -140,7 +135,7 @@ class IdentityTrees:
             roots = list(self.identity_roots.keys())
         else:
             # Start from the specified root_id
-            roots = [root_id] if root_id in self.identity_roots or any(root_id in v for v in self.lineage_map.values()) else []
+            roots = [root_id] if root_id in self.graph else []
             if not roots:
                  return f"(Node {root_id} not found as root or child)"
                  
@@ -293,4 +288,20 @@ class IdentityTrees:
         return None
     # ------------------------------------
 
-    # TODO: Add methods to query subtrees or find common ancestors. 
\ No newline at end of file
+    # --- Lineage Queries ---
+    def get_subtree(self, archetype_token: str) -> list[str]:
+        """Returns the token and all of its descendants (pre-order), or [] if unknown."""
+        if archetype_token not in self.graph:
+            return []
+        return self.graph.descendants(archetype_token)
+
+    def find_common_ancestor(self, token_a: str, token_b: str) -> str | None:
+        """Returns the nearest shared ancestor of two tokens, or None if they are unrelated or unknown."""
+        if token_a not in self.graph or token_b not in self.graph:
+            return None
+        return self.graph.lowest_common_ancestor(token_a, token_b)
+
+    def is_descendant(self, archetype_token: str, ancestor_token: str) -> bool:
+        """True if ancestor_token lies on the lineage of archetype_token (or is the token itself)."""
+        return self.graph.is_ancestor(ancestor_token, archetype_token)
+    # ------------------------------------
@@ -0,0 +1,172 @@
+# lineage_graph.py
+# Parent-pointer forest with binary lifting, shared by IdentityTrees and the myth lineage endpoints
+
+from typing import Dict, Hashable, Iterator, List, Optional
+
+Node = Hashable
+
+
+class LineageCycleError(ValueError):
+    """Raised when an edge would make a node its own ancestor."""
+
+
+class LineageGraph:
+    """
+    A forest of lineage edges (each node has at most one parent).
+
+    Keeps parent pointers, ordered child lists, per-node depth and a
+    binary-lifting table (`_up[node][k]` is the 2^k-th ancestor), so:
+      - existence, parent and children lookups are O(1)
+      - ancestors(node) is O(depth)
+      - kth_ancestor, is_ancestor and lowest_common_ancestor are O(log depth)
+
+    Inserts are incremental. A child may arrive before its parent: the parent
+    is then created as a placeholder root and, once it gets its own parent,
+    the depths and lifting tables of its subtree are recomputed.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self._parent: Dict[Node, Optional[Node]] = {}
+        self._children: Dict[Node, List[Node]] = {}
+        self._depth: Dict[Node, int] = {}
+        self._up: Dict[Node, List[Node]] = {}
+        self._roots: Dict[Node, None] = {} # Ordered set
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self._parent
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self._parent)
+
+    # --- Inserts ---
+    def add_node(self, node: Node) -> bool:
+        """Adds `node` as a root if it is new. Returns True if it was added."""
+        if node in self._parent:
+            return False
+        self._parent[node] = None
+        self._children[node] = []
+        self._depth[node] = 0
+        self._up[node] = []
+        self._roots[node] = None
+        return True
+
+    def add_edge(self, parent: Node, child: Node) -> bool:
+        """
+        Links `child` under `parent`, creating either as needed. Returns False if
+        the edge already exists. Raises ValueError if `child` already has a
+        different parent, LineageCycleError if `child` is an ancestor of `parent`.
+        """
+        if parent == child:
+            raise LineageCycleError(f"Cannot make {child!r} its own parent")
+        self.add_node(parent)
+        self.add_node(child)
+        current = self._parent[child]
+        if current == parent:
+            return False
+        if current is not None:
+            raise ValueError(f"{child!r} already has parent {current!r}")
+        if self.is_ancestor(child, parent):
+            raise LineageCycleError(f"Linking {parent!r} -> {child!r} would create a cycle")
+        self._parent[child] = parent
+        self._children[parent].append(child)
+        del self._roots[child]
+        if self._children[child]:
+            self._reindex_subtree(child)
+        else:
+            self._index(child)
+        return True
+
+    def _index(self, node: Node) -> None:
+        parent = self._parent[node]
+        if parent is None:
+            self._depth[node], self._up[node] = 0, []
+            return
+        self._depth[node] = self._depth[parent] + 1
+        up = [parent]
+        while len(up) <= len(self._up[up[-1]]):
+            up.append(self._up[up[-1]][len(up) - 1])
+        self._up[node] = up
+
+    def _reindex_subtree(self, node: Node) -> None:
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self._index(current)
+            stack.extend(self._children[current])
+
+    # --- Lookups ---
+    def parent_of(self, node: Node) -> Optional[Node]:
+        return self._parent.get(node)
+
+    def children_of(self, node: Node) -> List[Node]:
+        return self._children.get(node, [])
+
+    def depth_of(self, node: Node) -> int:
+        return self._depth[node]
+
+    def is_root(self, node: Node) -> bool:
+        return node in self._roots
+
+    @property
+    def roots(self) -> List[Node]:
+        return list(self._roots)
+
+    def root_of(self, node: Node) -> Node:
+        return self.kth_ancestor(node, self._depth[node])
+
+    def ancestors(self, node: Node) -> List[Node]:
+        """Path from the root down to and including `node`."""
+        path = [node]
+        parent = self._parent[node]
+        while parent is not None:
+            path.append(parent)
+            parent = self._parent[parent]
+        path.reverse()
+        return path
+
+    def descendants(self, node: Node) -> List[Node]:
+        """`node` and everything below it, in pre-order."""
+        result, stack = [], [node]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            stack.extend(reversed(self._children[current]))
+        return result
+
+    # --- Binary lifting queries ---
+    def kth_ancestor(self, node: Node, k: int) -> Optional[Node]:
+        """The ancestor `k` levels above `node` (node itself for k=0), or None if too far."""
+        if k > self._depth[node]:
+            return None
+        bit = 0
+        while k:
+            if k & 1:
+                node = self._up[node][bit]
+            k >>= 1
+            bit += 1
+        return node
+
+    def is_ancestor(self, ancestor: Node, node: Node) -> bool:
+        """True if `ancestor` is `node` or lies on its path to the root."""
+        if ancestor not in self._parent or node not in self._parent:
+            return False
+        diff = self._depth[node] - self._depth[ancestor]
+        return diff >= 0 and self.kth_ancestor(node, diff) == ancestor
+
+    def lowest_common_ancestor(self, a: Node, b: Node) -> Optional[Node]:
+        """Deepest node that is an ancestor of both, or None if they are in different trees."""
+        if self._depth[a] < self._depth[b]:
+            a, b = b, a
+        a = self.kth_ancestor(a, self._depth[a] - self._depth[b])
+        if a == b:
+            return a
+        for bit in range(len(self._up[a]) - 1, -1, -1):
+            if bit < len(self._up[a]) and self._up[a][bit] != self._up[b][bit]: # a and b stay level, so their tables match in length
+                a, b = self._up[a][bit], self._up[b][bit]
+        return self._parent[a] if self._parent[a] == self._parent[b] else None
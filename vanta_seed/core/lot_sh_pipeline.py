@@ -0,0 +1,137 @@
+# lot_sh_pipeline.py
+# Concurrent, content-cached symbol + LoT-Sh extraction, optionally completed in the background
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# --- Defaults ---
+DEFAULT_CACHE_SIZE = 512
+EMPTY_SHORTHAND: Dict[str, Optional[str]] = {"T1_CUE": None, "T2_MAP": None, "T3_EVAL": None, "T4_PLAN": None}
+
+SymbolExtractor = Callable[[str, str], Awaitable[List[str]]]                # (narrative, model) -> symbols
+ShorthandExtractor = Callable[[str], Awaitable[Dict[str, Optional[str]]]]   # narrative -> LoT-Sh dict
+
+
+@dataclass
+class ExtractionResult:
+    symbols: List[str] = field(default_factory=list)
+    thought_shorthand: Dict[str, Optional[str]] = field(default_factory=lambda: dict(EMPTY_SHORTHAND))
+
+
+class LotShPipeline:
+    """
+    Runs symbol extraction and the (inherently sequential) CUE -> MAP -> EVAL ->
+    PLAN chain concurrently, so an entry costs max(symbols, chain) rather than
+    their sum.
+
+    Results are cached in an LRU keyed on (kind, model, sha256 of the narrative),
+    shared by branch, drift and collapse; identical narratives requested while
+    an extraction is still running join that extraction instead of starting
+    another. Empty results (failed calls) are not cached.
+
+    `submit` runs an extraction as a background task and hands the result to a
+    callback, so endpoints can respond as soon as the narrative exists.
+    """
+
+    def __init__(
+        self,
+        symbol_extractor: SymbolExtractor,
+        shorthand_extractor: ShorthandExtractor,
+        shorthand_model: str,
+        cache_size: int = DEFAULT_CACHE_SIZE
+    ):
+        self.symbol_extractor = symbol_extractor
+        self.shorthand_extractor = shorthand_extractor
+        self.shorthand_model = shorthand_model
+        self.cache_size = max(0, int(cache_size))
+        self.logger = logging.getLogger("Core.LotShPipeline")
+
+        self._cache: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self._background: Dict[str, asyncio.Task] = {}
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def content_key(narrative: str) -> str:
+        return hashlib.sha256(narrative.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _keys(self, narrative: str, symbol_model: str) -> Tuple[Tuple[str, str, str], Tuple[str, str, str]]:
+        digest = self.content_key(narrative)
+        return ("symbols", symbol_model, digest), ("lot_sh", self.shorthand_model, digest)
+
+    # --- Extraction ---
+    async def extract(self, narrative: str, symbol_model: str) -> ExtractionResult:
+        """Symbols (via `symbol_model`) and the LoT-Sh dict for `narrative`, extracted concurrently."""
+        symbols_key, shorthand_key = self._keys(narrative, symbol_model)
+        symbols, shorthand = await asyncio.gather(
+            self._cached(symbols_key, lambda: self.symbol_extractor(narrative, symbol_model), keep=bool),
+            self._cached(shorthand_key, lambda: self.shorthand_extractor(narrative), keep=lambda d: any(d.values()))
+        )
+        return ExtractionResult(list(symbols), {**EMPTY_SHORTHAND, **shorthand}) # Copies: callers store them in entries
+
+    def peek(self, narrative: str, symbol_model: str) -> Optional[ExtractionResult]:
+        """The cached result if both parts are cached, else None (no extraction is started)."""
+        symbols_key, shorthand_key = self._keys(narrative, symbol_model)
+        if symbols_key in self._cache and shorthand_key in self._cache:
+            self.hits += 2
+            return ExtractionResult(list(self._cache[symbols_key]), {**EMPTY_SHORTHAND, **self._cache[shorthand_key]})
+        return None
+
+    async def _cached(self, key: Tuple[str, str, str], factory: Callable[[], Awaitable[Any]], keep: Callable[[Any], bool]) -> Any:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight) # A cancelled waiter must not cancel the shared extraction
+        self.misses += 1
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            self._inflight.pop(key, None)
+        if self.cache_size and keep(value):
+            self._cache[key] = value
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    # --- Background completion ---
+    def submit(self, entry_id: str, narrative: str, symbol_model: str, on_complete: Callable[[ExtractionResult], None]) -> asyncio.Task:
+        """Extracts in a background task and passes the result to `on_complete` (must be called on the event loop)."""
+        task = asyncio.create_task(self._complete(entry_id, narrative, symbol_model, on_complete))
+        self._background[entry_id] = task # Also keeps the task referenced until it finishes
+
+        def _forget(done: asyncio.Task) -> None:
+            if self._background.get(entry_id) is done:
+                del self._background[entry_id]
+        task.add_done_callback(_forget)
+        return task
+
+    async def _complete(self, entry_id: str, narrative: str, symbol_model: str, on_complete: Callable[[ExtractionResult], None]) -> None:
+        try:
+            result = await self.extract(narrative, symbol_model)
+            on_complete(result)
+            self.logger.debug(f"Background extraction finished for {entry_id}.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Background extraction failed for {entry_id}: {e}", exc_info=True)
+
+    def is_pending(self, entry_id: str) -> bool:
+        return entry_id in self._background
+
+    async def drain(self) -> None:
+        """Waits for every background extraction (e.g. before shutdown)."""
+        while self._background:
+            await asyncio.gather(*list(self._background.values()), return_exceptions=True)
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "max_size": self.cache_size, "pending": len(self._background)}
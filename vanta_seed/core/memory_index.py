@@ -0,0 +1,237 @@
+import bisect
+import json
+import logging
+import re
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Matches the alphanumeric runs of the lowercase JSON rendering of an item's content.
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class MemoryIndex:
+    """
+    Secondary indexes over the items held by a MemoryStore.
+
+    Every item is identified by a monotonically increasing sequence number
+    assigned on insert. Because the store's deque evicts strictly oldest-first,
+    an evicted item is always the smallest sequence number in every postings
+    deque it belongs to, so eviction is a popleft per posting.
+
+    Maintained indexes:
+      - agent_id -> seqs, type -> seqs, tag -> seqs (ascending seq order)
+      - sorted (timestamp, seq) list for time range queries
+      - token -> seqs inverted index over the lowercased JSON of the content,
+        plus the cached lowercase JSON per item so keyword search never
+        re-serializes content.
+      - gram -> vocabulary tokens (bigrams and trigrams) so a query fragment
+        finds the vocabulary tokens containing it without scanning them all.
+    """
+
+    def __init__(self):
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._content_text: Dict[int, str] = {}
+        self._by_agent: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_type: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_tag: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_token: Dict[str, Deque[int]] = defaultdict(deque)
+        self._item_tokens: Dict[int, Set[str]] = {}
+        self._by_gram: Dict[str, Set[str]] = defaultdict(set)
+        self._timestamps: List[tuple] = []  # sorted (timestamp, seq)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    # --- Maintenance ---
+    def add(self, seq: int, item: Dict[str, Any]) -> None:
+        """Indexes a newly appended item under sequence number `seq`."""
+        self._items[seq] = item
+        self._by_agent[item.get("agent_id")].append(seq)
+        self._by_type[item.get("type")].append(seq)
+        for tag in set(item.get("tags") or []):
+            self._by_tag[tag].append(seq)
+        bisect.insort(self._timestamps, (item.get("timestamp", 0), seq))
+
+        text = self._serialize_content(item)
+        self._content_text[seq] = text
+        tokens = set(_TOKEN_RE.findall(text))
+        self._item_tokens[seq] = tokens
+        for token in tokens:
+            if token not in self._by_token:
+                self._index_vocab(token)
+            self._by_token[token].append(seq)
+
+    def evict(self, seq: int) -> None:
+        """Removes the oldest indexed item (`seq`) from every index."""
+        item = self._items.pop(seq, None)
+        if item is None:
+            return
+        self._pop_posting(self._by_agent, item.get("agent_id"), seq)
+        self._pop_posting(self._by_type, item.get("type"), seq)
+        for tag in set(item.get("tags") or []):
+            self._pop_posting(self._by_tag, tag, seq)
+        for token in self._item_tokens.pop(seq, ()):
+            self._pop_posting(self._by_token, token, seq)
+            if token not in self._by_token:
+                self._unindex_vocab(token)
+        self._content_text.pop(seq, None)
+
+        key = (item.get("timestamp", 0), seq)
+        pos = bisect.bisect_left(self._timestamps, key)
+        if pos < len(self._timestamps) and self._timestamps[pos] == key:
+            del self._timestamps[pos]
+
+    def clear(self) -> None:
+        self.__init__()
+
+    @staticmethod
+    def _pop_posting(index: Dict[Any, Deque[int]], key: Any, seq: int) -> None:
+        postings = index.get(key)
+        if not postings:
+            return
+        if postings[0] == seq:
+            postings.popleft()
+        else:  # Should not happen with FIFO eviction, but stay correct if it does.
+            try:
+                postings.remove(seq)
+            except ValueError:
+                pass
+        if not postings:
+            del index[key]
+
+    @staticmethod
+    def _grams(token: str) -> Set[str]:
+        """Bigrams and trigrams of `token` (tokens shorter than 2 chars have none)."""
+        grams = set()
+        for n in (2, 3):
+            grams.update(token[i:i + n] for i in range(len(token) - n + 1))
+        return grams
+
+    def _index_vocab(self, token: str) -> None:
+        for gram in self._grams(token):
+            self._by_gram[gram].add(token)
+
+    def _unindex_vocab(self, token: str) -> None:
+        for gram in self._grams(token):
+            vocab = self._by_gram.get(gram)
+            if vocab is None:
+                continue
+            vocab.discard(token)
+            if not vocab:
+                del self._by_gram[gram]
+
+    def _vocab_containing(self, token: str) -> Optional[Set[str]]:
+        """
+        Vocabulary tokens containing `token`, found through the gram index.
+        Returns None for single-character fragments, which are too unselective
+        to narrow the candidates usefully.
+        """
+        if len(token) < 2:
+            return None
+        if len(token) == 2:
+            return set(self._by_gram.get(token, ()))
+        vocab: Optional[Set[str]] = None
+        grams = sorted({token[i:i + 3] for i in range(len(token) - 2)},
+                       key=lambda g: len(self._by_gram.get(g, ())))
+        for gram in grams:
+            bucket = self._by_gram.get(gram)
+            if not bucket:
+                return set()
+            vocab = set(bucket) if vocab is None else vocab & bucket
+            if not vocab:
+                return vocab
+        return {word for word in vocab if token in word}
+
+    def _serialize_content(self, item: Dict[str, Any]) -> str:
+        try:
+            return json.dumps(item.get("content", {})).lower()
+        except Exception as e:
+            logger.warning(f"Could not serialize content for indexing in item from agent {item.get('agent_id')}: {e}")
+            return ""
+
+    # --- Queries ---
+    def iter_filtered(
+        self,
+        agent_id: Optional[str] = None,
+        type: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields matching items newest-first (insertion order), like a reverse deque scan."""
+        candidate_lists: List[Iterable[int]] = []
+        if agent_id is not None:
+            candidate_lists.append(self._by_agent.get(agent_id, ()))
+        if type is not None:
+            candidate_lists.append(self._by_type.get(type, ()))
+        required_tags = set(tags) if tags else set()
+        for tag in required_tags:
+            candidate_lists.append(self._by_tag.get(tag, ()))
+
+        time_bounded = start_time is not None or end_time is not None
+        if time_bounded:
+            lo = 0 if start_time is None else bisect.bisect_left(self._timestamps, (start_time, -1))
+            hi = len(self._timestamps) if end_time is None else bisect.bisect_right(self._timestamps, (end_time, float("inf")))
+            if not candidate_lists or hi - lo < min(len(c) for c in candidate_lists):
+                candidate_lists.append(sorted((seq for _, seq in self._timestamps[lo:hi])))
+
+        if candidate_lists:
+            driver = min(candidate_lists, key=len)
+            seqs = reversed(driver)
+        else:
+            seqs = reversed(list(self._items))
+
+        for seq in seqs:
+            item = self._items[seq]
+            if agent_id is not None and item.get("agent_id") != agent_id:
+                continue
+            if type is not None and item.get("type") != type:
+                continue
+            if time_bounded:
+                ts = item.get("timestamp", 0)
+                if (start_time is not None and ts < start_time) or (end_time is not None and ts > end_time):
+                    continue
+            if required_tags and not required_tags.issubset(item.get("tags") or ()):
+                continue
+            yield item
+
+    def search(self, query: str, agent_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields items whose lowercased JSON content contains `query` as a substring,
+        newest-first. Candidates come from the token index and are verified against
+        the cached content text, so results match the plain substring scan exactly.
+        """
+        query_lower = query.lower()
+        query_tokens = set(_TOKEN_RE.findall(query_lower))
+
+        candidates: Optional[Set[int]] = None
+        for token in sorted(query_tokens, key=len, reverse=True):
+            # A query token may be a fragment of a content token (e.g. 'vent' in 'event'):
+            # take the exact postings, then those of every vocabulary token the gram
+            # index reports as containing it.
+            vocab = self._vocab_containing(token)
+            if vocab is None:
+                continue
+            matches: Set[int] = set(self._by_token.get(token, ()))
+            for vocab_token in vocab:
+                matches.update(self._by_token[vocab_token])
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return
+
+        if agent_id is not None:
+            agent_seqs = self._by_agent.get(agent_id, ())
+            if candidates is None:
+                seqs: Iterable[int] = reversed(agent_seqs)
+            else:
+                seqs = sorted(candidates.intersection(agent_seqs), reverse=True)
+        elif candidates is None:
+            seqs = reversed(list(self._items))
+        else:
+            seqs = sorted(candidates, reverse=True)
+
+        for seq in seqs:
+            if query_lower in self._content_text.get(seq, ""):
+                yield self._items[seq]
@@ -0,0 +1,186 @@
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Record framing: 4-byte big-endian payload length, 4-byte CRC32 of the payload, JSON payload.
+_HEADER = struct.Struct(">II")
+_SNAPSHOT_RE = re.compile(r"^snapshot-(\d+)\.bin$")
+_SEGMENT_RE = re.compile(r"^segment-(\d+)\.log$")
+
+
+def encode_record(item: Dict[str, Any]) -> bytes:
+    payload = json.dumps(item, default=str, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def iter_records(buf) -> Iterator[tuple]:
+    """
+    Yields (end_offset, item) for each intact record in `buf` (bytes or mmap).
+    Stops at the first truncated or corrupt record, which is how a torn write
+    from a crash mid-append shows up.
+    """
+    offset = 0
+    size = len(buf)
+    while offset + _HEADER.size <= size:
+        length, crc = _HEADER.unpack_from(buf, offset)
+        start = offset + _HEADER.size
+        end = start + length
+        if end > size:
+            break
+        payload = buf[start:end]
+        if zlib.crc32(payload) != crc:
+            break
+        try:
+            item = json.loads(payload)
+        except ValueError:
+            break
+        yield end, item
+        offset = end
+
+
+class MemorySegmentLog:
+    """
+    Append-only persistence backend for MemoryStore.
+
+    Layout inside `log_dir`:
+      snapshot-<gen>.bin  compacted copy of the store at generation <gen>
+      segment-<gen>.log   records appended since that snapshot was written
+
+    Each generation pairs one snapshot with one segment, so a crash at any
+    point of a compaction leaves either the old or the new pair intact and
+    replay never applies a record twice. A torn tail record in the segment is
+    detected by its CRC and truncated away on open.
+    """
+
+    def __init__(self, log_dir: str, fsync: bool = True):
+        self.log_dir = log_dir
+        self.fsync = fsync
+        self.generation = 0
+        self.segment_records = 0
+        self._segment_fh = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+        os.makedirs(self.log_dir, exist_ok=True)
+
+    # --- Paths ---
+    def _snapshot_path(self, generation: int) -> str:
+        return os.path.join(self.log_dir, f"snapshot-{generation}.bin")
+
+    def _segment_path(self, generation: int) -> str:
+        return os.path.join(self.log_dir, f"segment-{generation}.log")
+
+    def exists(self) -> bool:
+        """True if the directory holds any snapshot or segment to replay."""
+        return any(_SNAPSHOT_RE.match(n) or _SEGMENT_RE.match(n) for n in os.listdir(self.log_dir))
+
+    # --- Replay ---
+    def replay(self) -> List[Dict[str, Any]]:
+        """
+        Loads the newest snapshot (memory-mapped) followed by its segment and
+        opens the segment for appending. Returns items in append order.
+        """
+        snapshots = sorted(
+            int(m.group(1)) for m in map(_SNAPSHOT_RE.match, os.listdir(self.log_dir)) if m
+        )
+        segments = sorted(
+            int(m.group(1)) for m in map(_SEGMENT_RE.match, os.listdir(self.log_dir)) if m
+        )
+        self.generation = snapshots[-1] if snapshots else (segments[0] if segments else 0)
+
+        items: List[Dict[str, Any]] = []
+        if snapshots:
+            items.extend(self._read_mapped(self._snapshot_path(self.generation), truncate_tail=False))
+        segment_path = self._segment_path(self.generation)
+        segment_items = self._read_mapped(segment_path, truncate_tail=True) if os.path.exists(segment_path) else []
+        self.segment_records = len(segment_items)
+        items.extend(segment_items)
+
+        self._remove_stale_generations()
+        self._open_segment()
+        self.logger.info(
+            f"Replayed {len(items)} memory records from {self.log_dir} "
+            f"(generation {self.generation}, {self.segment_records} in segment)."
+        )
+        return items
+
+    def _read_mapped(self, path: str, truncate_tail: bool) -> List[Dict[str, Any]]:
+        if os.path.getsize(path) == 0:
+            return []
+        items = []
+        valid_end = 0
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for valid_end, item in iter_records(mm):
+                items.append(item)
+            total = len(mm)
+        if valid_end < total:
+            self.logger.warning(f"Discarding {total - valid_end} bytes of torn/corrupt records at the end of {path}.")
+            if truncate_tail:
+                with open(path, "r+b") as f:
+                    f.truncate(valid_end)
+        return items
+
+    def _remove_stale_generations(self):
+        for name in os.listdir(self.log_dir):
+            m = _SNAPSHOT_RE.match(name) or _SEGMENT_RE.match(name)
+            if m and int(m.group(1)) != self.generation:
+                try:
+                    os.remove(os.path.join(self.log_dir, name))
+                except OSError as e:
+                    self.logger.warning(f"Could not remove stale memory log file {name}: {e}")
+            elif name.endswith(".tmp"):
+                os.remove(os.path.join(self.log_dir, name))
+
+    # --- Writing ---
+    def _open_segment(self):
+        if self._segment_fh is not None:
+            self._segment_fh.close()
+        self._segment_fh = open(self._segment_path(self.generation), "ab")
+
+    def _sync(self, fh):
+        fh.flush()
+        if self.fsync:
+            os.fsync(fh.fileno())
+
+    def append(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Appends records to the current segment. Cost is proportional to len(items)."""
+        if self._segment_fh is None:
+            self._open_segment()
+        records = [encode_record(item) for item in items]
+        if not records:
+            return 0
+        self._segment_fh.write(b"".join(records))
+        self._sync(self._segment_fh)
+        self.segment_records += len(records)
+        return len(records)
+
+    def compact(self, items: Iterable[Dict[str, Any]]) -> None:
+        """
+        Writes `items` as the snapshot of the next generation and starts an
+        empty segment for it. The previous generation is removed only after the
+        new snapshot is durable.
+        """
+        next_generation = self.generation + 1
+        snapshot_path = self._snapshot_path(next_generation)
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(encode_record(item) for item in items))
+            self._sync(f)
+        os.replace(tmp_path, snapshot_path)
+        open(self._segment_path(next_generation), "ab").close()
+
+        self.generation = next_generation
+        self.segment_records = 0
+        self._open_segment()
+        self._remove_stale_generations()
+        self.logger.debug(f"Compacted memory log into {snapshot_path}.")
+
+    def close(self):
+        if self._segment_fh is not None:
+            self._segment_fh.close()
+            self._segment_fh = None
@@ -1,10 +1,13 @@
 import logging
 from typing import List, Dict, Any, Optional
 from collections import deque
+from itertools import islice
 import time
 import json # For simple search
 import os
 import yaml # <<< ADDED: Import yaml
+from .memory_index import MemoryIndex
+from .memory_log import MemorySegmentLog
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +15,11 @@ class MemoryStore:
     """
     Simple in-memory store for agent memories and symbolic data.
     Uses a deque for efficient appending and limiting size.
-    Optionally persists to a YAML file.
+    Persists to an append-only segment log (see MemorySegmentLog) next to the
+    YAML path; the YAML file remains available as an import/export format and
+    is still the sole backend when persistence="yaml".
+    Lookups are served from secondary indexes (see MemoryIndex) that are kept in
+    sync with deque eviction; pass use_index=False to fall back to reverse scans.
     """
     # --- Define default path relative to this file --- 
     # Adjust as needed if project structure changes
@@ -20,9 +27,20 @@ class MemoryStore:
     DEFAULT_PERSIST_FILE = "memory_items.yaml"
     # -------------------------------------------------
 
-    def __init__(self, max_items: int = 10000, persist_path: Optional[str] = None):
+    def __init__(
+        self,
+        max_items: int = 10000,
+        persist_path: Optional[str] = None,
+        use_index: bool = True,
+        persistence: str = "log",
+        compact_threshold: Optional[int] = None,
+        fsync: bool = True
+    ):
         self.max_items = max_items
         self._memory_log: deque[Dict[str, Any]] = deque(maxlen=max_items)
+        self.use_index = use_index
+        self._index = MemoryIndex()
+        self._next_seq = 0 # Sequence number of the next appended item
         self.logger = logging.getLogger(self.__class__.__name__)
         
         # --- Set Persistence Path --- 
@@ -34,21 +52,55 @@ class MemoryStore:
             self.persist_path = os.path.join(self.DEFAULT_PERSIST_DIR, self.DEFAULT_PERSIST_FILE)
         self.logger.info(f"MemoryStore persistence path set to: {self.persist_path}")
         # --------------------------
+
+        # --- Segment log backend --- 
+        if persistence not in ("log", "yaml"):
+            raise ValueError(f"Unknown MemoryStore persistence backend: {persistence}")
+        self.persistence = persistence
+        # Items added since the last save(); only the newest max_items can survive replay anyway
+        self._unsaved: deque[Dict[str, Any]] = deque(maxlen=max_items)
+        # Compact once the segment holds more records than the store itself
+        self.compact_threshold = compact_threshold if compact_threshold is not None else max(max_items, 1)
+        self._segment_log: Optional[MemorySegmentLog] = None
+        if self.persistence == "log":
+            log_dir = os.path.splitext(self.persist_path)[0] + "_log"
+            self._segment_log = MemorySegmentLog(log_dir, fsync=fsync)
+        # --------------------------
         
         # --- Load existing data --- 
-        self._load_from_yaml()
+        self._load()
         # --------------------------
         
         self.logger.info(f"MemoryStore initialized. Current size: {len(self._memory_log)}, Max items: {max_items}.")
 
-    def _load_from_yaml(self):
-        """Loads memory items from the YAML file on initialization."""
-        if not self.persist_path or not os.path.exists(self.persist_path):
-            self.logger.info(f"Persistence file not found at {self.persist_path}. Starting with empty memory.")
+    def _load(self):
+        """Replays the segment log, or imports the YAML file when no log exists yet."""
+        if self._segment_log is None:
+            self._load_from_yaml()
             return
+        try:
+            if self._segment_log.exists():
+                for item in self._segment_log.replay():
+                    self._append_item(item)
+                return
+            # First start on the log backend: migrate the legacy YAML file, if any.
+            self._load_from_yaml()
+            self._segment_log.replay()
+            if self._memory_log:
+                self._segment_log.compact(self._memory_log)
+                self.logger.info(f"Migrated {len(self._memory_log)} YAML memory items into {self._segment_log.log_dir}.")
+        except Exception as e:
+            self.logger.error(f"Error replaying memory log for {self.persist_path}: {e}", exc_info=True)
+
+    def _load_from_yaml(self, path: Optional[str] = None) -> int:
+        """Loads memory items from a YAML file (the persist path by default). Returns the number loaded."""
+        path = path or self.persist_path
+        if not path or not os.path.exists(path):
+            self.logger.info(f"Persistence file not found at {path}. Starting with empty memory.")
+            return 0
             
         try:
-            with open(self.persist_path, 'r') as f:
+            with open(path, 'r') as f:
                 loaded_items = yaml.safe_load(f)
                 if isinstance(loaded_items, list):
                     # Validate basic structure if needed (optional)
@@ -60,38 +112,88 @@ class MemoryStore:
                     # Add to deque, respecting maxlen (oldest loaded first)
                     # If loaded > maxlen, only the most recent maxlen items will be kept by deque
                     for item in valid_items:
-                         self._memory_log.append(item) 
+                         self._append_item(item)
                          
-                    self.logger.info(f"Loaded {len(valid_items)} items from {self.persist_path}. Deque size: {len(self._memory_log)}")
+                    self.logger.info(f"Loaded {len(valid_items)} items from {path}. Deque size: {len(self._memory_log)}")
+                    return len(valid_items)
                 elif loaded_items is None: # Empty file
-                     self.logger.info(f"Persistence file {self.persist_path} is empty.")
+                     self.logger.info(f"Persistence file {path} is empty.")
                 else:
-                    self.logger.warning(f"Persistence file {self.persist_path} does not contain a list. Ignoring content.")
+                    self.logger.warning(f"Persistence file {path} does not contain a list. Ignoring content.")
         except yaml.YAMLError as e:
-            self.logger.error(f"Error parsing YAML from {self.persist_path}: {e}", exc_info=True)
+            self.logger.error(f"Error parsing YAML from {path}: {e}", exc_info=True)
         except Exception as e:
-            self.logger.error(f"Error loading memory from {self.persist_path}: {e}", exc_info=True)
+            self.logger.error(f"Error loading memory from {path}: {e}", exc_info=True)
+        return 0
 
-    def _save_to_yaml(self):
-        """Saves the current memory log to the YAML file."""
-        if not self.persist_path:
+    def _save_to_yaml(self, path: Optional[str] = None):
+        """Saves the current memory log to a YAML file (the persist path by default)."""
+        path = path or self.persist_path
+        if not path:
             self.logger.warning("Cannot save memory, persist_path not set.")
             return False
             
         try:
             # Convert deque to list for serialization
             items_to_save = list(self._memory_log)
-            with open(self.persist_path, 'w') as f:
+            with open(path, 'w') as f:
                 yaml.dump(items_to_save, f, default_flow_style=False, sort_keys=False)
-            self.logger.debug(f"Successfully saved {len(items_to_save)} memory items to {self.persist_path}.")
+            self.logger.debug(f"Successfully saved {len(items_to_save)} memory items to {path}.")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving memory to {path}: {e}", exc_info=True)
+            return False
+
+    def _save_to_log(self) -> bool:
+        """Appends unsaved items to the segment log, compacting when the segment grows too long."""
+        try:
+            if self._unsaved:
+                self._segment_log.append(self._unsaved)
+                self._unsaved.clear()
+            if self._segment_log.segment_records > self.compact_threshold:
+                self._segment_log.compact(self._memory_log)
             return True
         except Exception as e:
-            self.logger.error(f"Error saving memory to {self.persist_path}: {e}", exc_info=True)
+            self.logger.error(f"Error appending memory to log {self._segment_log.log_dir}: {e}", exc_info=True)
             return False
 
+    def export_yaml(self, path: Optional[str] = None) -> bool:
+        """Writes the full current memory state as a YAML list (the legacy format)."""
+        return self._save_to_yaml(path)
+
+    def import_yaml(self, path: str) -> int:
+        """Appends items from a YAML export; they are persisted on the next save()."""
+        before = self._next_seq
+        loaded = self._load_from_yaml(path)
+        if self._segment_log is not None:
+            self._unsaved.extend(islice(self._memory_log, max(len(self._memory_log) - (self._next_seq - before), 0), None))
+        return loaded
+
+    def close(self):
+        """Flushes unsaved items and releases the segment log."""
+        self.save()
+        if self._segment_log is not None:
+            self._segment_log.close()
+
+    def _append_item(self, item: Dict[str, Any]):
+        """Appends to the deque and keeps the indexes in sync with its eviction."""
+        if self._memory_log.maxlen == 0:
+            return
+        if len(self._memory_log) == self._memory_log.maxlen:
+            # Deque is full: the append below evicts the oldest item.
+            self._index.evict(self._next_seq - len(self._memory_log))
+        self._memory_log.append(item)
+        self._index.add(self._next_seq, item)
+        self._next_seq += 1
+
     # --- ADDED: Explicit save method --- 
     def save(self) -> bool:
-        """Explicitly triggers saving the current memory state to YAML."""
+        """
+        Explicitly persists the memory state. With the log backend this appends
+        only the items added since the previous save.
+        """
+        if self._segment_log is not None:
+            return self._save_to_log()
         return self._save_to_yaml()
     # ----------------------------------
 
@@ -112,7 +214,9 @@ class MemoryStore:
         
         try:
             # Deque automatically handles maxlen constraint by removing oldest items
-            self._memory_log.append(item)
+            self._append_item(item)
+            if self._segment_log is not None:
+                self._unsaved.append(item)
             # --- Defer saving to a separate method or trigger --- 
             # self._save_to_yaml() # <<< COMMENTED OUT for now - save explicitly or periodically
             self.logger.debug(f"Added memory item for agent '{agent_id}', type '{type}', tags {item['tags']}. Current size: {len(self._memory_log)}")
@@ -124,6 +228,15 @@ class MemoryStore:
     def get_items_simple(self, agent_id: Optional[str] = None, type: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
         """Retrieves the most recent items, optionally filtered by agent_id and/or type (simple version)."""
         
+        if self.use_index:
+            results = list(islice(self._index.iter_filtered(agent_id=agent_id, type=type), max(limit, 0)))
+        else:
+            results = self._scan_items_simple(agent_id=agent_id, type=type, limit=limit)
+        self.logger.debug(f"Retrieved {len(results)} items matching agent='{agent_id}', type='{type}', limit={limit}.")
+        return results
+
+    def _scan_items_simple(self, agent_id: Optional[str] = None, type: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Reverse deque scan behind get_items_simple when indexing is disabled."""
         # Since deque stores items chronologically (oldest to newest),
         # we iterate in reverse to get the most recent items first.
         
@@ -142,7 +255,6 @@ class MemoryStore:
                 results.append(item)
                 count += 1
                 
-        self.logger.debug(f"Retrieved {len(results)} items matching agent='{agent_id}', type='{type}', limit={limit}.")
         # The results are already in newest-to-oldest order due to reversed iteration
         return results
 
@@ -166,6 +278,26 @@ class MemoryStore:
             end_time: Filter items with timestamp <= end_time.
             limit: Maximum number of items to return.
         """
+        if self.use_index:
+            results = list(islice(
+                self._index.iter_filtered(agent_id=agent_id, type=type, tags=tags, start_time=start_time, end_time=end_time),
+                max(limit, 0)
+            ))
+        else:
+            results = self._scan_items_filtered(agent_id, type, tags, start_time, end_time, limit)
+        self.logger.debug(f"Retrieved {len(results)} items matching filters (agent='{agent_id}', type='{type}', tags={tags}, start={start_time}, end={end_time}, limit={limit}).")
+        return results
+
+    def _scan_items_filtered(
+        self,
+        agent_id: Optional[str],
+        type: Optional[str],
+        tags: Optional[List[str]],
+        start_time: Optional[float],
+        end_time: Optional[float],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Reverse deque scan behind get_items_filtered when indexing is disabled."""
         results = []
         count = 0
         required_tags_set = set(tags) if tags else set()
@@ -188,7 +320,6 @@ class MemoryStore:
                 results.append(item)
                 count += 1
 
-        self.logger.debug(f"Retrieved {len(results)} items matching filters (agent='{agent_id}', type='{type}', tags={tags}, start={start_time}, end={end_time}, limit={limit}).")
         return results
     # -----------------------------------------------
 
@@ -198,6 +329,15 @@ class MemoryStore:
         of memory items, optionally filtered by agent_id.
         This is NOT a sophisticated search, just a simple substring check.
         """
+        if self.use_index:
+            results = list(islice(self._index.search(query, agent_id=agent_id), max(limit, 0)))
+        else:
+            results = self._scan_search_items(query, agent_id=agent_id, limit=limit)
+        self.logger.debug(f"Found {len(results)} items via basic search for query='{query}' matching agent='{agent_id}', limit={limit}.")
+        return results
+
+    def _scan_search_items(self, query: str, agent_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Reverse deque scan behind search_items, re-serializing every item's content."""
         results = []
         count = 0
         query_lower = query.lower()
@@ -218,7 +358,6 @@ class MemoryStore:
                 except Exception as e:
                     self.logger.warning(f"Could not serialize content for search in item from agent {item.get('agent_id')}: {e}")
         
-        self.logger.debug(f"Found {len(results)} items via basic search for query='{query}' matching agent='{agent_id}', limit={limit}.")
         return results
 
     def get_store_size(self) -> int:
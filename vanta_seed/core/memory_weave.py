@@ -2,6 +2,7 @@ import logging
 import json
 from datetime import datetime
 from typing import List, Dict
+from .drift_history import DriftHistory, DEFAULT_CAPACITY
 
 class MemoryWeave:
     """Anchors archetype tokens and branch drift summaries."""
@@ -12,9 +13,20 @@ class MemoryWeave:
         # Simple in-memory stores for now
         # Registry maps archetype_token -> {metadata, creation_timestamp}
         self.archetype_registry: dict[str, dict] = {}
-        # List of drift snapshots, each a dict
-        self.drift_snapshots: list[dict] = []
-        self.logger.info("MemoryWeave initialized.")
+        # Bounded, indexed drift history; evicted snapshots spill to disk if a path is configured
+        self.drift_history = DriftHistory(
+            capacity=self.config.get('drift_history_capacity', DEFAULT_CAPACITY),
+            spill_path=self.config.get('drift_history_spill_path')
+        )
+        self.logger.info(f"MemoryWeave initialized. Drift history capacity: {self.drift_history.capacity}.")
+
+    @property
+    def drift_snapshots(self) -> list[dict]:
+        """Retained drift snapshots, oldest first (a copy; use snapshot_drift to add)."""
+        return self.drift_history.recent()
+
+    def _get_timestamp(self) -> str:
+        return datetime.utcnow().isoformat()
 
     def register_archetype(self, token: str, metadata: dict):
         """Register a new archetype token with its associated metadata."""
@@ -27,6 +39,28 @@ class MemoryWeave:
         }
         self.logger.info(f"Registered archetype: {token}")
 
+    def register_archetypes(self, entries: list[tuple[str, dict]]):
+        """Registers many (token, metadata) pairs with one timestamp and one log line."""
+        timestamp = self._get_timestamp()
+        registry = self.archetype_registry
+        overwritten = 0
+        for token, metadata in entries:
+            overwritten += token in registry
+            registry[token] = {"metadata": metadata, "registered_at": timestamp}
+        if overwritten:
+            self.logger.warning(f"Bulk registration overwrote metadata for {overwritten} existing archetype token(s).")
+        self.logger.info(f"Registered {len(entries)} archetypes in bulk.")
+
+    def snapshot_drift_batch(self, branch_states: list[dict]) -> int:
+        """Records many drift snapshots at once. States without 'archetype_token' are skipped. Returns the number recorded."""
+        timestamp = self._get_timestamp()
+        snapshots = [{"timestamp": timestamp, **state} for state in branch_states if 'archetype_token' in state]
+        if len(snapshots) != len(branch_states):
+            self.logger.error(f"Skipped {len(branch_states) - len(snapshots)} drift snapshot(s) without 'archetype_token'.")
+        self.drift_history.extend(snapshots)
+        self.logger.debug(f"Recorded {len(snapshots)} drift snapshots in bulk.")
+        return len(snapshots)
+
     def snapshot_drift(self, branch_state: dict):
         """Record a snapshot of the current branch state, including drift info."""
         if 'archetype_token' not in branch_state:
@@ -34,19 +68,21 @@ class MemoryWeave:
              # Consider adding a default/unknown token or raising an error based on strictness needs
              return
 
-        timestamp = datetime.utcnow().isoformat()
+        timestamp = self._get_timestamp()
         snapshot = {
             "timestamp": timestamp,
             **branch_state # Unpack the provided state into the snapshot
         }
-        self.drift_snapshots.append(snapshot)
+        self.drift_history.append(snapshot)
         self.logger.debug(f"Drift snapshot taken for archetype {branch_state['archetype_token']}")
 
     def retrieve_history(self, limit: int = None) -> list[dict]:
-        """Retrieve the recorded drift snapshots, optionally limited to the most recent."""
-        if limit and limit > 0:
-            return self.drift_snapshots[-limit:]
-        return self.drift_snapshots
+        """Retrieve the retained drift snapshots (oldest first), optionally limited to the most recent."""
+        return self.drift_history.recent(limit)
+
+    def close(self):
+        """Writes any evicted snapshots still buffered to the spill file."""
+        self.drift_history.flush()
 
     def get_archetype_metadata(self, token: str) -> dict | None:
          """Retrieve metadata for a specific archetype token."""
@@ -150,35 +186,8 @@ class MemoryWeave:
             A list of matching snapshot dictionaries.
         """
         self.logger.debug(f"Performing memory lookup for query: '{query}'")
-        query_lower = query.lower()
-        matches = []
-        # Search the most recent snapshots first
-        search_space = self.retrieve_history(limit=search_limit)
-
-        for snapshot in reversed(search_space): # Iterate recent -> older
-            match_found = False
-            # Check reason field
-            reason = snapshot.get('reason', '')
-            if isinstance(reason, str) and query_lower in reason.lower():
-                match_found = True
-            
-            # Check archetype token
-            token = snapshot.get('archetype_token', '')
-            if isinstance(token, str) and query_lower in token.lower():
-                 match_found = True
-                 
-            # Check payload (simple string search in values for now)
-            payload = snapshot.get('payload', {})
-            if isinstance(payload, dict):
-                for value in payload.values():
-                    if isinstance(value, str) and query_lower in value.lower():
-                         match_found = True
-                         break # Found in payload
-            
-            if match_found:
-                matches.append(snapshot)
-                self.logger.debug(f"Match found for '{query}' in snapshot for token {token}")
-
+        # Served by the drift history's text index; fields searched: reason, archetype_token, string payload values
+        matches = self.drift_history.lookup(query, search_limit)
         self.logger.info(f"Memory lookup for '{query}' found {len(matches)} match(es) in last {search_limit} snapshots.")
         return matches # Return newest matches first
 
@@ -85,6 +85,7 @@ class BlueprintConfig(BaseModel):
     dev_flags: Optional[Dict[str, bool]] = None # Added based on YAML
     moral_stance: Optional[str] = None # Added based on YAML
     router_strategy: Optional[Dict[str, str]] = None # Added based on YAML
+    task_dispatch: Optional[Dict[str, Any]] = None # workers, per_pilgrim_concurrency, max_queue_depth, max_pilgrim_queue_depth
     # ----------------------------------------------
 
 # Model for Mutation Proposals used in KernelManager
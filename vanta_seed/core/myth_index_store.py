@@ -0,0 +1,194 @@
+# myth_index_store.py
+# In-memory myth symbol index backed by a JSON snapshot and an append-only JSONL journal
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# --- Defaults ---
+DEFAULT_COMPACT_EVERY = 1000    # Journal entries before the snapshot is rewritten
+DEFAULT_FSYNC_POLICY = "interval"
+DEFAULT_FSYNC_INTERVAL = 1.0    # Seconds between fsyncs under the "interval" policy
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class MythIndexStore:
+    """
+    Authoritative in-memory myth index (entry_id -> entry dict).
+
+    On disk the index is the existing JSON snapshot (`snapshot_path`, a list of
+    entries) plus `<snapshot>.journal.jsonl`, to which every new entry is
+    appended as one line. Appends cost O(1) instead of a full rewrite; once the
+    journal holds `compact_every` entries the snapshot is rewritten atomically
+    and the journal truncated. Replay is keyed by entry_id, so a crash between
+    those two steps is harmless, and a torn final journal line is dropped.
+
+    fsync policy: "always" fsyncs every append, "interval" at most once per
+    `fsync_interval` seconds, "never" leaves it to the OS. Under "interval" an
+    append that falls inside the window arms a timer, so the last writes of a
+    burst are synced within `fsync_interval` even if no further append comes.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+        fsync_policy: str = DEFAULT_FSYNC_POLICY,
+        fsync_interval: float = DEFAULT_FSYNC_INTERVAL
+    ):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {FSYNC_POLICIES}, got {fsync_policy!r}")
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal.jsonl"
+        self.compact_every = max(1, compact_every)
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._lock = threading.RLock()
+        self._journal = None
+        self._journal_count = 0
+        self._last_fsync = 0.0
+        self._unsynced = False
+        self._fsync_timer: Optional[threading.Timer] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self.entries
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(entry_id)
+
+    def values(self) -> List[Dict[str, Any]]:
+        return list(self.entries.values())
+
+    # --- Loading ---
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Rebuilds `entries` in place from the snapshot and journal and returns it."""
+        with self._lock:
+            self.entries.clear()
+            for entry in self._read_snapshot():
+                self._index(entry)
+            self._journal_count = self._replay_journal()
+            self.logger.info(f"Loaded {len(self.entries)} myth entries ({self._journal_count} from journal).")
+            return self.entries
+
+    def _index(self, entry: Any) -> None:
+        if isinstance(entry, dict) and entry.get("entry_id"):
+            self.entries[entry["entry_id"]] = entry
+
+    def _read_snapshot(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.snapshot_path):
+            return []
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                content = f.read()
+            return json.loads(content) if content.strip() else []
+        except json.JSONDecodeError:
+            self.logger.warning(f"Error decoding {self.snapshot_path}. Starting from the journal only.")
+        except OSError as e:
+            self.logger.warning(f"Error loading {self.snapshot_path}: {e}. Starting from the journal only.")
+        return []
+
+    def _replay_journal(self) -> int:
+        if not os.path.exists(self.journal_path):
+            return 0
+        count, good_bytes = 0, 0
+        with open(self.journal_path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break # Torn final write
+                try:
+                    self._index(json.loads(raw))
+                except json.JSONDecodeError:
+                    break
+                count += 1
+                good_bytes += len(raw)
+        if good_bytes != os.path.getsize(self.journal_path):
+            self.logger.warning(f"Truncating torn tail of {self.journal_path} at byte {good_bytes}.")
+            os.truncate(self.journal_path, good_bytes)
+        return count
+
+    # --- Writes ---
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Adds `entry` to memory and journals it; compacts when the journal is long enough."""
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write(line)
+            self._journal.flush()
+            now = time.monotonic()
+            if self.fsync_policy == "always" or (self.fsync_policy == "interval" and now - self._last_fsync >= self.fsync_interval):
+                self._fsync_journal(now)
+            elif self.fsync_policy == "interval":
+                self._unsynced = True
+                self._arm_fsync_timer(self._last_fsync + self.fsync_interval - now)
+            self._index(entry)
+            self._journal_count += 1
+            if self._journal_count >= self.compact_every:
+                self.compact()
+
+    def _fsync_journal(self, now: float) -> None:
+        os.fsync(self._journal.fileno())
+        self._last_fsync = now
+        self._unsynced = False
+
+    def _arm_fsync_timer(self, delay: float) -> None:
+        if self._fsync_timer is not None:
+            return # Already pending; it covers this append too
+        self._fsync_timer = threading.Timer(max(0.0, delay), self._deferred_fsync)
+        self._fsync_timer.daemon = True
+        self._fsync_timer.start()
+
+    def _cancel_fsync_timer(self) -> None:
+        if self._fsync_timer is not None:
+            self._fsync_timer.cancel()
+            self._fsync_timer = None
+
+    def _deferred_fsync(self) -> None:
+        """Timer callback: syncs appends the interval policy skipped."""
+        with self._lock:
+            self._fsync_timer = None
+            if not self._unsynced or self._journal is None:
+                return
+            try:
+                self._fsync_journal(time.monotonic())
+            except OSError as e:
+                self.logger.warning(f"Deferred fsync of {self.journal_path} failed: {e}")
+
+    def compact(self) -> None:
+        """Atomically rewrites the snapshot from memory and empties the journal."""
+        with self._lock:
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self.entries.values()), f, indent=2, ensure_ascii=False, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._cancel_fsync_timer()
+            self._unsynced = False # Everything journaled is now in the fsynced snapshot
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            open(self.journal_path, "w").close()
+            self._journal_count = 0
+            self.logger.info(f"Compacted myth index snapshot ({len(self.entries)} entries).")
+
+    def close(self) -> None:
+        """Folds the journal into the snapshot and releases the journal file."""
+        with self._lock:
+            if self._journal_count:
+                self.compact()
+            elif self._journal is not None:
+                self._cancel_fsync_timer()
+                if self._unsynced:
+                    self._fsync_journal(time.monotonic())
+                self._journal.close()
+                self._journal = None
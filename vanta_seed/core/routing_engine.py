@@ -0,0 +1,209 @@
+# routing_engine.py
+# Single-pass prompt classifier and cached model routing decisions for TaskRouter
+
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+VISION_PAT = re.compile(r"<img|https?://.*\.(?:png|jpg|jpeg|webp|bmp|gif)", re.I)
+CODE_PAT = re.compile(r"(def |class |import |```|#include|<script>|function |return|\{|\}|\(|\))", re.IGNORECASE)
+MATH_PAT = re.compile(r"[∑∫√π]|\\frac|\\begin{aligned}")
+# New Pattern for Mythogenesis/Storytelling prompts
+MYTH_PAT = re.compile(r"(myth|legend|story|narrative|epic|tale|lore|imagine)", re.IGNORECASE)
+
+# --- Defaults ---
+DEFAULT_IMAGE_KEYWORDS = ["generate image", "create an image", "make a picture"]
+DEFAULT_DECISION_CACHE_SIZE = 1024
+
+# --- Categories (in routing priority order) ---
+IMAGE = "image"   # OpenAI image keyword
+VISION = "vision"
+CODE = "code"     # CODE_PAT or MATH_PAT
+PYTHON = "python" # Selects the Python LoRA for code prompts
+MYTH = "myth"
+
+# The patterns above as (category, literal) rules over lowercased text, plus the vision URL rule
+CODE_LITERALS = ["def ", "class ", "import ", "```", "#include", "<script>", "function ", "return", "{", "}", "(", ")",
+                 "∑", "∫", "√", "π", "\\frac", "\\begin{aligned}"]
+MYTH_LITERALS = ["myth", "legend", "story", "narrative", "epic", "tale", "lore", "imagine"]
+VISION_URL_RULE = ("h", r"h(?=ttps?://.*\.(?:png|jpg|jpeg|webp|bmp|gif))") # VISION_PAT's URL branch, one char consumed
+
+
+def _literal_rule(literal: str) -> Tuple[str, str]:
+    """(first char, pattern) consuming only the first character and looking ahead for the rest."""
+    return literal[0], re.escape(literal[0]) + (f"(?={re.escape(literal[1:])})" if len(literal) > 1 else "")
+
+
+class PromptClassifier:
+    """
+    Finds every routing category present in a prompt in one left-to-right scan.
+
+    All rules are compiled into one alternation that starts every branch with
+    a literal character, so sre can skip positions that cannot start any rule
+    with its first-character prefilter (named groups or IGNORECASE branches
+    would turn that off); the prompt is lowercased once instead. Each branch
+    consumes one character and looks ahead for the rest, so one rule's match
+    never hides another's that overlaps it.
+
+    At a match the category is read off the rules starting with that
+    character; the scan then resumes at the next position with an automaton
+    that drops the categories already found (compiled once per remaining set),
+    so a prompt full of parentheses costs one match, not one per bracket. It
+    stops as soon as the categories found settle the route.
+    """
+
+    def __init__(self, image_keywords: Iterable[str] = DEFAULT_IMAGE_KEYWORDS, include_vision: bool = True, code_decides: bool = True):
+        rules = [(IMAGE, _literal_rule(keyword.lower())) for keyword in image_keywords if keyword]
+        has_image = bool(rules)
+        if include_vision: # Without a vision model a vision match decides nothing
+            rules += [(VISION, _literal_rule("<img")), (VISION, VISION_URL_RULE)]
+        rules += [(CODE, _literal_rule(literal)) for literal in CODE_LITERALS]
+        rules += [(PYTHON, _literal_rule("python"))]
+        rules += [(MYTH, _literal_rule(literal)) for literal in MYTH_LITERALS]
+        self.rules = [(category, source) for category, (_, source) in rules]
+        self.categories = frozenset(category for category, _ in rules)
+        self._by_first_char: Dict[str, List[Tuple[str, "re.Pattern"]]] = {}
+        for category, (first, source) in rules:
+            self._by_first_char.setdefault(first, []).append((category, re.compile(source)))
+        self._automata: Dict[FrozenSet[str], "re.Pattern"] = {}
+
+        # Category sets that settle the route once seen; each only applies while every higher-priority rule is absent
+        self._stop_sets = [frozenset([IMAGE])] if has_image else []
+        if not has_image and include_vision:
+            self._stop_sets.append(frozenset([VISION]))
+        if not has_image and not include_vision and code_decides: # Without a code model, code prompts fall through to the myth rule
+            self._stop_sets.append(frozenset([CODE, PYTHON]))
+
+    def _automaton(self, remaining: FrozenSet[str]) -> "re.Pattern":
+        automaton = self._automata.get(remaining)
+        if automaton is None:
+            automaton = re.compile("|".join(source for category, source in self.rules if category in remaining))
+            self._automata[remaining] = automaton
+        return automaton
+
+    def classify(self, prompt: str) -> FrozenSet[str]:
+        text = prompt.lower()
+        found = set()
+        remaining = self.categories
+        pos = 0
+        while remaining:
+            match = self._automaton(remaining).search(text, pos)
+            if match is None:
+                break
+            pos = match.start()
+            for category, rule in self._by_first_char.get(text[pos], ()):
+                if category in remaining and rule.match(text, pos):
+                    found.add(category) # Rules sharing a start position are all recorded
+            remaining = self.categories - found
+            if any(stop <= found for stop in self._stop_sets):
+                break # Nothing later in the prompt can change the route
+            pos += 1
+        return frozenset(found)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    backend: str
+    model: str
+    fallback: Optional[str] # Base model to retry with if a LoRA model fails
+    reason: str
+
+    def as_tuple(self) -> Tuple[str, str, Optional[str]]:
+        return (self.backend, self.model, self.fallback)
+
+
+class RoutingEngine:
+    """
+    TaskRouter's model choice with configuration resolved once.
+
+    Model names, the LoRA map and the image keywords are fixed at construction;
+    `route` classifies the prompt in one pass and memoises decisions in an LRU
+    keyed on (requested_model, blake2b fingerprint of the prompt), so repeated
+    prompts skip classification and the cache never holds prompt text.
+    """
+
+    def __init__(
+        self,
+        default_ollama_model: str,
+        code_ollama_model: Optional[str] = None,
+        vision_ollama_model: Optional[str] = None,
+        default_openai_model: str = "gpt-4o",
+        image_keywords: Optional[Iterable[str]] = None,
+        lora_models: Optional[Dict[str, str]] = None,
+        cache_size: int = DEFAULT_DECISION_CACHE_SIZE
+    ):
+        self.default_ollama_model = default_ollama_model
+        self.code_ollama_model = code_ollama_model
+        self.vision_ollama_model = vision_ollama_model
+        self.default_openai_model = default_openai_model
+        self.lora_models = dict(lora_models or {})
+        self.python_lora = self.lora_models.get("python_expert")
+        self.myth_lora = self.lora_models.get("myth_weaver")
+        self._lora_names = frozenset(self.lora_models.values())
+        self.classifier = PromptClassifier(
+            DEFAULT_IMAGE_KEYWORDS if image_keywords is None else image_keywords,
+            include_vision=bool(vision_ollama_model),
+            code_decides=bool(code_ollama_model)
+        )
+        self.cache_size = max(0, int(cache_size))
+        self._cache: "OrderedDict[Tuple[Optional[str], bytes], RouteDecision]" = OrderedDict()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def fingerprint(prompt: str) -> bytes:
+        return hashlib.blake2b(prompt.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def route(self, prompt: str, requested_model: Optional[str] = None) -> RouteDecision:
+        # 1. Explicit OpenAI Request?
+        if requested_model and requested_model.startswith(("gpt-", "dall-e-")):
+            return RouteDecision("openai", requested_model, None, f"Routing to OpenAI model (explicit request): {requested_model}")
+        if not self.cache_size:
+            return self._decide(self.classifier.classify(prompt), requested_model)
+
+        key = (requested_model, self.fingerprint(prompt))
+        decision = self._cache.get(key)
+        if decision is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return decision
+        self.misses += 1
+        decision = self._decide(self.classifier.classify(prompt), requested_model)
+        self._cache[key] = decision
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return decision
+
+    def _decide(self, categories: FrozenSet[str], requested_model: Optional[str]) -> RouteDecision:
+        # 2. OpenAI Image Keywords?
+        if IMAGE in categories:
+            return RouteDecision("openai", self.default_openai_model, None, f"Routing to OpenAI model (image keywords): {self.default_openai_model}")
+
+        # 3. Vision Content? (vision models don't use LoRA fallbacks)
+        if self.vision_ollama_model and VISION in categories:
+            return RouteDecision("ollama", self.vision_ollama_model, None, f"Routing to Ollama vision model: {self.vision_ollama_model}")
+
+        # 4. Code/Math Content?
+        if self.code_ollama_model and CODE in categories:
+            if PYTHON in categories and self.python_lora:
+                # Try the LoRA model, specify the base code model as fallback
+                return RouteDecision("ollama", self.python_lora, self.code_ollama_model, f"Routing attempt: Ollama code model (Python LoRA): {self.python_lora}")
+            return RouteDecision("ollama", self.code_ollama_model, None, f"Routing to Ollama code/math model (standard): {self.code_ollama_model}")
+
+        # 5. Myth/Story Content? (falls through if no Myth LoRA is configured)
+        if MYTH in categories and self.myth_lora:
+            return RouteDecision("ollama", self.myth_lora, self.default_ollama_model, f"Routing attempt: Ollama model (Myth LoRA): {self.myth_lora}")
+
+        # 6. Fallback: Use Explicitly Requested Model if provided?
+        if requested_model:
+            if requested_model in self._lora_names:
+                # No LoRA -> base mapping in config, so the default model is the fallback
+                return RouteDecision("ollama", requested_model, self.default_ollama_model, f"Routing to Ollama model (LoRA requested directly): {requested_model}")
+            return RouteDecision("ollama", requested_model, None, f"Routing to Ollama model (Base requested directly): {requested_model}")
+
+        # 7. Final Default: Use Default Ollama Model
+        return RouteDecision("ollama", self.default_ollama_model, None, f"Routing to default Ollama model (no match): {self.default_ollama_model}")
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "max_size": self.cache_size}
@@ -3,6 +3,7 @@ import logging
 import random
 import copy
 import uuid
+import numpy as np
 from .memory_weave import MemoryWeave
 from .symbolic_compression import SymbolicCompressor
 from collections import defaultdict
@@ -22,7 +23,10 @@ class SleepMutator:
         # Configurable parameters for mutation
         self.mutation_probability = self.config.get('mutation_probability', 0.1) # Chance to mutate any given snapshot
         self.drift_perturbation_scale = self.config.get('drift_perturbation_scale', 0.05) # Max % change to drift vector
-        self.logger.info("SleepMutator initialized.")
+        # "batched" samples and records a whole dream cycle at once; "sequential" is the original per-snapshot loop
+        self.dream_cycle_mode = self.config.get('dream_cycle_mode', 'batched')
+        self.rng = np.random.default_rng(self.config.get('seed'))
+        self.logger.info(f"SleepMutator initialized (dream cycle mode: {self.dream_cycle_mode}).")
 
     # --- UPDATED Signature and Logic --- 
     def mutate_drift_passively(self, agent_age_map: dict[str, int] = None, limit: int = 100) -> int:
@@ -39,6 +43,8 @@ class SleepMutator:
             The total number of successful mutations applied.
         """
         self.logger.info(f"Initiating passive drift mutation cycle (Limit: {limit}).")
+        if self.dream_cycle_mode == 'batched':
+            return self.mutate_drift_batched(agent_age_map, limit)
         
         # 1. Retrieve candidate snapshots from MemoryWeave
         # Consider retrieving only recent history or based on other criteria?
@@ -145,6 +151,67 @@ class SleepMutator:
         return mutations_applied
     # ----------------------------------
 
+    def mutate_drift_batched(self, agent_age_map: dict[str, int] = None, limit: int = 100) -> int:
+        """Batched dream cycle with the same sampling distribution as the sequential loop.
+
+        A snapshot's weight depends only on its agent's age, so sampling picks
+        agents in proportion to weight * retained snapshot count and then
+        snapshots uniformly within each agent's index postings; the history is
+        never copied. Mutated snapshots share every untouched field (payload
+        included) with their source instead of deep-copying it, and the cycle
+        ends in one bulk register and one bulk append into MemoryWeave.
+        """
+        history = self.memory_weave.drift_history
+        agent_counts = history.agent_counts()
+        if not agent_counts:
+            self.logger.info("No snapshots with source_agent found. Skipping weighted mutation.")
+            return 0
+
+        agents = list(agent_counts)
+        counts = np.fromiter(agent_counts.values(), dtype=np.float64, count=len(agents))
+        if agent_age_map is not None:
+            ages = np.fromiter((agent_age_map.get(a, 0) for a in agents), dtype=np.float64, count=len(agents))
+            weights = counts / (1.0 + np.maximum(ages, 0.0))
+        else:
+            weights = counts
+        k = min(limit, int(counts.sum()))
+        if k <= 0:
+            return 0
+
+        picks = np.bincount(self.rng.choice(len(agents), size=k, p=weights / weights.sum()), minlength=len(agents))
+        perturbations = self.rng.uniform(-self.drift_perturbation_scale, self.drift_perturbation_scale, size=k)
+        suffixes = self.rng.integers(0, 1 << 24, size=k)
+        timestamp = self.memory_weave._get_timestamp()
+
+        mutated, registrations = [], []
+        mutation_counts_by_agent = {}
+        for agent_index in np.flatnonzero(picks):
+            agent_id, n = agents[agent_index], int(picks[agent_index])
+            positions = self.rng.integers(0, agent_counts[agent_id], size=n)
+            for original in history.agent_snapshots_at(agent_id, positions.tolist()):
+                i = len(mutated)
+                original_token = original.get('archetype_token', 'UNKNOWN_ORIGINAL')
+                new_token = f"DREAM::Mutated::{original_token}::{int(suffixes[i]):06x}"
+                snapshot = dict(original) # Shallow: untouched fields are shared with the source snapshot
+                drift = original.get('drift_vector')
+                if isinstance(drift, (int, float)):
+                    snapshot['drift_vector'] = float(drift * (1 + perturbations[i]))
+                snapshot['archetype_token'] = new_token
+                snapshot['decision'] = 'sleep_mutation'
+                snapshot['reason'] = f"Passive mutation during sleep from {original_token}"
+                snapshot['parent_archetype_token'] = original_token
+                snapshot['timestamp'] = timestamp
+                mutated.append(snapshot)
+                registrations.append((new_token, snapshot))
+            mutation_counts_by_agent[agent_id] = n
+
+        self.memory_weave.register_archetypes(registrations)
+        mutations_applied = self.memory_weave.snapshot_drift_batch(mutated)
+
+        self.logger.info(f"Sleep mutation cycle complete. Applied {mutations_applied} mutations (Limit: {limit}).")
+        self.logger.debug(f"Mutations per agent: {mutation_counts_by_agent}")
+        return mutations_applied
+
     # TODO: Implement more sophisticated mutation strategies:
     # - Biased drift based on archetype clusters from SymbolicCompressor.
     # - Mutation based on snapshot age or relevance.
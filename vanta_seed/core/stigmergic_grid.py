@@ -0,0 +1,263 @@
+# stigmergic_grid.py
+# Uniform spatial hash grid backing the Crown's stigmergic field
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# --- Defaults ---
+DEFAULT_CELL_SIZE = 5.0          # Roughly the default pilgrim sensor radius, so a radius query touches ~3^d cells
+DEFAULT_MAX_TRAILS_PER_BUCKET = 50
+DEFAULT_DEPOSIT_AMOUNT = 0.1
+DEFAULT_MAX_PHEROMONE = 1.0
+DEFAULT_EVAPORATION_RATE = 0.0   # Exponential decay per second; 0 disables evaporation
+DEFAULT_MIN_PHEROMONE = 1e-3     # Buckets that fade below this are dropped with their trails
+
+CellKey = Tuple[int, ...]
+Coords = Tuple[float, ...]
+BucketKey = Tuple[Any, ...]
+
+
+class PheromoneBucket:
+    """One field point: a bounded buffer of (coords, item) trails and its pheromone level."""
+    __slots__ = ("key", "trails", "pheromone", "updated_at")
+
+    def __init__(self, key: BucketKey, max_trails: int, now: float):
+        self.key = key
+        self.trails: Deque[Tuple[Coords, Any]] = deque(maxlen=max_trails)
+        self.pheromone = 0.0
+        self.updated_at = now
+
+
+class StigmergicGrid:
+    """
+    Uniform hash grid over an n-dimensional field.
+
+    Trails and pheromone live in buckets: with `resolution` set, a bucket is
+    every position that rounds to the same coordinates at that many decimal
+    places (the Crown's original field points), otherwise it is the whole
+    grid cell. The trail cap and pheromone reinforcement apply per bucket;
+    grid cells only index buckets spatially. Each trail keeps its exact
+    coordinates, so radius and k-nearest queries visit only the neighbouring
+    cells and then filter by true Euclidean distance.
+
+    Pheromone decays exponentially with `evaporation_rate`; decay is applied
+    lazily whenever a bucket is read or written, and evaporate() (or the
+    run_evaporation() timer) sweeps the whole grid and drops buckets that have
+    faded below `min_pheromone`.
+    """
+
+    def __init__(
+        self,
+        cell_size: float = DEFAULT_CELL_SIZE,
+        resolution: Optional[int] = None,
+        max_trails_per_bucket: int = DEFAULT_MAX_TRAILS_PER_BUCKET,
+        deposit_amount: float = DEFAULT_DEPOSIT_AMOUNT,
+        max_pheromone: float = DEFAULT_MAX_PHEROMONE,
+        evaporation_rate: float = DEFAULT_EVAPORATION_RATE,
+        min_pheromone: float = DEFAULT_MIN_PHEROMONE,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.cell_size = float(cell_size)
+        self.resolution = resolution
+        # Largest per-axis gap between a trail and its rounded bucket coordinates
+        self._slack = 0.5 * 10.0 ** -resolution if resolution is not None else 0.0
+        self.max_trails_per_bucket = max(1, int(max_trails_per_bucket))
+        self.deposit_amount = deposit_amount
+        self.max_pheromone = max_pheromone
+        self.evaporation_rate = max(0.0, evaporation_rate)
+        self.min_pheromone = min_pheromone
+        self._clock = clock
+        self._buckets: Dict[BucketKey, PheromoneBucket] = {}
+        self._cells: Dict[CellKey, Dict[BucketKey, PheromoneBucket]] = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __len__(self) -> int:
+        """Number of trails currently held in the grid."""
+        return sum(len(bucket.trails) for bucket in self._buckets.values())
+
+    @property
+    def cell_count(self) -> int:
+        return len(self._cells)
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self._buckets)
+
+    # --- Key helpers ---
+    def cell_key(self, position: Sequence[float]) -> CellKey:
+        size = self.cell_size
+        return tuple(math.floor(c / size) for c in position)
+
+    def bucket_key(self, position: Sequence[float]) -> BucketKey:
+        if self.resolution is None:
+            return self.cell_key(position)
+        return tuple(round(float(c), self.resolution) for c in position)
+
+    def _bucket_cell(self, key: BucketKey) -> CellKey:
+        return key if self.resolution is None else self.cell_key(key)
+
+    def _decay(self, bucket: PheromoneBucket, now: float) -> None:
+        if self.evaporation_rate and now > bucket.updated_at:
+            bucket.pheromone *= math.exp(-self.evaporation_rate * (now - bucket.updated_at))
+        bucket.updated_at = now
+
+    # --- Writes ---
+    def deposit(self, position: Sequence[float], item: Any, amount: Optional[float] = None) -> float:
+        """Stores `item` at `position`, reinforces its bucket's pheromone and returns the new level."""
+        coords = tuple(float(c) for c in position)
+        key = self.bucket_key(coords)
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = PheromoneBucket(key, self.max_trails_per_bucket, now)
+            self._cells.setdefault(self._bucket_cell(key), {})[key] = bucket
+        else:
+            self._decay(bucket, now)
+        bucket.trails.append((coords, item))
+        bucket.pheromone = min(self.max_pheromone, bucket.pheromone + (self.deposit_amount if amount is None else amount))
+        return bucket.pheromone
+
+    def evaporate(self, now: Optional[float] = None) -> int:
+        """Applies decay to every bucket and drops faded ones. Returns the number of buckets removed."""
+        if not self.evaporation_rate:
+            return 0
+        now = self._clock() if now is None else now
+        faded = []
+        for key, bucket in self._buckets.items():
+            self._decay(bucket, now)
+            if bucket.pheromone < self.min_pheromone:
+                faded.append(key)
+        for key in faded:
+            del self._buckets[key]
+            cell_key = self._bucket_cell(key)
+            cell = self._cells[cell_key]
+            del cell[key]
+            if not cell:
+                del self._cells[cell_key]
+        if faded:
+            self.logger.debug(f"Evaporated {len(faded)} stigmergic buckets; {len(self._buckets)} remain.")
+        return len(faded)
+
+    async def run_evaporation(self, interval: float) -> None:
+        """Sweeps the grid every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.evaporate()
+            except Exception as e:
+                self.logger.error(f"Error during stigmergic evaporation sweep: {e}", exc_info=True)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._cells.clear()
+
+    # --- Reads ---
+    def get_bucket(self, position: Sequence[float]) -> Optional[PheromoneBucket]:
+        """Returns the (decayed) bucket containing `position`, or None if it is empty."""
+        bucket = self._buckets.get(self.bucket_key(position))
+        if bucket is not None:
+            self._decay(bucket, self._clock())
+        return bucket
+
+    def pheromone_at(self, position: Sequence[float]) -> float:
+        bucket = self.get_bucket(position)
+        return bucket.pheromone if bucket is not None else 0.0
+
+    def _cells_within(self, center: CellKey, span: int) -> Iterator[Dict[BucketKey, PheromoneBucket]]:
+        """Occupied cells whose key lies within `span` of `center` on every axis."""
+        if (2 * span + 1) ** len(center) > len(self._cells):
+            # The neighbourhood is larger than the occupied set: filter the occupied cells instead
+            for key, cell in self._cells.items():
+                if all(abs(k - c) <= span for k, c in zip(key, center)):
+                    yield cell
+            return
+        cells = self._cells
+        for offset in itertools.product(range(-span, span + 1), repeat=len(center)):
+            cell = cells.get(tuple(c + o for c, o in zip(center, offset)))
+            if cell is not None:
+                yield cell
+
+    def _cells_on_ring(self, center: CellKey, ring: int) -> Iterator[Dict[BucketKey, PheromoneBucket]]:
+        """Occupied cells at Chebyshev distance exactly `ring` from `center`."""
+        if ring == 0:
+            cell = self._cells.get(center)
+            if cell is not None:
+                yield cell
+            return
+        cells = self._cells
+        for offset in itertools.product(range(-ring, ring + 1), repeat=len(center)):
+            if max(abs(o) for o in offset) != ring:
+                continue
+            cell = cells.get(tuple(c + o for c, o in zip(center, offset)))
+            if cell is not None:
+                yield cell
+
+    @staticmethod
+    def _trails(cell: Dict[BucketKey, PheromoneBucket]) -> Iterator[Tuple[Coords, Any]]:
+        for bucket in cell.values():
+            yield from bucket.trails
+
+    def query_radius(self, position: Sequence[float], radius: float) -> List[Any]:
+        """Returns every stored item within `radius` of `position`, nearest first."""
+        if radius < 0 or not self._cells:
+            return []
+        center = tuple(float(c) for c in position)
+        radius_sq = radius * radius
+        # A bucket sits in the cell of its rounded coordinates, up to _slack from its trails
+        span = math.ceil((radius + self._slack) / self.cell_size)
+        hits = []
+        for cell in self._cells_within(self.cell_key(center), span):
+            for coords, item in self._trails(cell):
+                dist_sq = sum((a - b) * (a - b) for a, b in zip(coords, center))
+                if dist_sq <= radius_sq:
+                    hits.append((dist_sq, len(hits), item))
+        hits.sort()
+        return [item for _, _, item in hits]
+
+    def query_knn(self, position: Sequence[float], k: int) -> List[Tuple[float, Any]]:
+        """
+        Returns the k nearest (distance, item) pairs, nearest first.
+
+        Rings of cells are visited outwards from the query cell; after ring r
+        every unvisited trail is at least r * cell_size (less the rounding
+        slack) away, so the search stops once the k-th best candidate is
+        closer than that.
+        """
+        if k <= 0 or not self._cells:
+            return []
+        center = tuple(float(c) for c in position)
+        center_key = self.cell_key(center)
+        best: List[Tuple[float, int, Any]] = [] # Max-heap of the k best via negated distances
+        counter = itertools.count()
+        visited = 0
+        ring = 0
+        while visited < len(self._cells):
+            if (2 * ring + 1) ** len(center_key) > 2 * len(self._cells):
+                # Rings now cost more than a full scan; finish with one pass over the rest
+                cells = (cell for key, cell in self._cells.items()
+                         if max(abs(a - b) for a, b in zip(key, center_key)) >= ring)
+            else:
+                cells = self._cells_on_ring(center_key, ring)
+            for cell in cells:
+                visited += 1
+                for coords, item in self._trails(cell):
+                    dist_sq = sum((a - b) * (a - b) for a, b in zip(coords, center))
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist_sq, next(counter), item))
+                    elif dist_sq < -best[0][0]:
+                        heapq.heapreplace(best, (-dist_sq, next(counter), item))
+            if (2 * ring + 1) ** len(center_key) > 2 * len(self._cells):
+                break
+            bound = max(0.0, ring * self.cell_size - self._slack)
+            if len(best) == k and -best[0][0] <= bound * bound:
+                break
+            ring += 1
+        return [(math.sqrt(-neg), item) for neg, _, item in sorted(best, key=lambda e: (-e[0], e[1]))]
@@ -0,0 +1,245 @@
+# swarm_engine.py
+# Vectorised StigmergicPSO step over every pilgrim in the swarm
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vanta_seed.core.swarm_types import GlobalBestNodeInfo
+
+# --- Defaults (mirror BaseAgent) ---
+DEFAULT_MIN_PILGRIMS = 32 # Below this BaseAgent keeps its per-pilgrim Python update
+TRAIL_EPSILON = 1e-6
+INITIAL_CAPACITY = 16
+
+PARAM_DEFAULTS = {
+    'inertia_weight': 0.7,
+    'cognitive_weight': 1.5,
+    'social_weight': 1.5,
+    'stigmergic_weight': 1.0,
+    'max_speed': 1.0,
+}
+PARAM_KEYS = tuple(PARAM_DEFAULTS)
+
+
+def trail_arrays(trails: Iterable[Any], dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extracts (positions (M, dim), weights (M,)) from TrailSignature models or dicts
+    without serialising them. A trail's weight is relevance_score * value_proposition,
+    as in BaseAgent; trails with a malformed position or no weight are dropped.
+    """
+    positions, weights = [], []
+    for trail in trails:
+        if isinstance(trail, dict):
+            pos = trail.get('position_at_emission')
+            weight = (trail.get('relevance_score') or 0.0) * (trail.get('value_proposition') or 0.0)
+        else:
+            pos = getattr(trail, 'position_at_emission', None)
+            weight = (getattr(trail, 'relevance_score', None) or 0.0) * (getattr(trail, 'value_proposition', None) or 0.0)
+        if pos is not None and len(pos) == dim and weight > TRAIL_EPSILON:
+            positions.append(pos)
+            weights.append(weight)
+    if not positions:
+        return np.zeros((0, dim)), np.zeros(0)
+    return np.asarray(positions, dtype=np.float64), np.asarray(weights, dtype=np.float64)
+
+
+def global_best_position(global_best_node: Optional[Any], dim: int) -> Optional[np.ndarray]:
+    """Position of a GlobalBestNodeInfo (model or dict), or None if missing or malformed."""
+    if isinstance(global_best_node, GlobalBestNodeInfo):
+        pos = global_best_node.position
+    elif isinstance(global_best_node, dict):
+        pos = global_best_node.get('position')
+    else:
+        pos = global_best_node
+    if pos is None or len(pos) != dim:
+        return None
+    return np.asarray(pos, dtype=np.float64)
+
+
+class SwarmEngine:
+    """
+    Holds every pilgrim's position, velocity, personal best and PSO weights in
+    NumPy arrays (one row per pilgrim) and advances any subset of rows with a
+    single batched update:
+
+        v' = clip(w*v + c1*r1*(pbest - x) + c2*r2*(gbest - x) + c3*r3*s, +-max_speed)
+        x' = x + v'
+
+    where s is the inverse-square distance weighted mean direction towards the
+    pilgrim's nearby trails. Trails are passed in CSR form (an owner row index per
+    trail), so pilgrims with different neighbourhoods share one vectorised pass.
+
+    Rows live in preallocated arrays that double in capacity when full; the
+    public arrays (positions, velocities, ...) are views of the occupied rows.
+    """
+
+    def __init__(self, dim: int = 3, min_pilgrims: int = DEFAULT_MIN_PILGRIMS, seed: Optional[int] = None):
+        self.dim = dim
+        self.min_pilgrims = min_pilgrims
+        self.rng = np.random.default_rng(seed)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._capacity = 0
+        self._positions = np.zeros((0, dim))
+        self._velocities = np.zeros((0, dim))
+        self._personal_best = np.zeros((0, dim))
+        self._personal_best_value = np.zeros(0)
+        self._params = np.zeros((0, len(PARAM_KEYS)))
+
+    # --- Row storage (views of the occupied rows) ---
+    @property
+    def positions(self) -> np.ndarray:
+        return self._positions[:len(self.names)]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        return self._velocities[:len(self.names)]
+
+    @property
+    def personal_best(self) -> np.ndarray:
+        return self._personal_best[:len(self.names)]
+
+    @property
+    def personal_best_value(self) -> np.ndarray:
+        return self._personal_best_value[:len(self.names)]
+
+    @property
+    def params(self) -> np.ndarray:
+        return self._params[:len(self.names)]
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, self._capacity * 2, rows)
+        n = len(self.names)
+        for attr in ('_positions', '_velocities', '_personal_best', '_personal_best_value', '_params'):
+            old = getattr(self, attr)
+            grown = np.zeros((capacity,) + old.shape[1:])
+            grown[:n] = old[:n]
+            setattr(self, attr, grown)
+        self._capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    @property
+    def is_active(self) -> bool:
+        """True once enough pilgrims are registered for batching to pay off."""
+        return len(self.names) >= self.min_pilgrims
+
+    def row(self, name: str) -> int:
+        return self._rows[name]
+
+    # --- Registration ---
+    def _vector(self, value: Optional[Sequence[float]], fallback: np.ndarray) -> np.ndarray:
+        if value is None or len(value) != self.dim:
+            return fallback.copy()
+        return np.asarray(value, dtype=np.float64)
+
+    def register(self, name: str, state: Dict[str, Any]) -> int:
+        """Adds (or re-syncs) a pilgrim from its state dict and returns its row."""
+        if name in self._rows:
+            self.sync(name, state)
+            return self._rows[name]
+        row = len(self.names)
+        self._ensure_capacity(row + 1)
+        self.names.append(name)
+        self._rows[name] = row
+        self._positions[row] = self._velocities[row] = self._personal_best[row] = 0.0
+        self._personal_best_value[row] = -np.inf
+        self._params[row] = [PARAM_DEFAULTS[key] for key in PARAM_KEYS]
+        self.sync(name, state)
+        return row
+
+    def unregister(self, name: str) -> None:
+        """Removes a pilgrim, moving the last row into its slot."""
+        row = self._rows.pop(name, None)
+        if row is None:
+            return
+        last = len(self.names) - 1
+        if row != last:
+            moved = self.names[last]
+            self.names[row] = moved
+            self._rows[moved] = row
+            for arr in (self._positions, self._velocities, self._personal_best, self._personal_best_value, self._params):
+                arr[row] = arr[last]
+        self.names.pop()
+
+    def sync(self, name: str, state: Dict[str, Any]) -> None:
+        """Copies whichever swarm fields are present in `state` into the pilgrim's row."""
+        row = self._rows[name]
+        if 'position' in state:
+            self.positions[row] = self._vector(state['position'], self.positions[row])
+        if 'velocity' in state:
+            self.velocities[row] = self._vector(state['velocity'], np.zeros(self.dim))
+        if 'personal_best_position' in state:
+            self.personal_best[row] = self._vector(state['personal_best_position'], self.positions[row])
+        elif 'position' in state and self.personal_best_value[row] == -np.inf:
+            self.personal_best[row] = self.positions[row]
+        if state.get('personal_best_value') is not None:
+            self.personal_best_value[row] = state['personal_best_value']
+        swarm_params = state.get('swarm_params')
+        if isinstance(swarm_params, dict):
+            for col, key in enumerate(PARAM_KEYS):
+                if swarm_params.get(key) is not None:
+                    self.params[row, col] = swarm_params[key]
+
+    # --- Update ---
+    def stigmergic_vectors(self, positions: np.ndarray, owners: np.ndarray, trail_positions: np.ndarray, trail_weights: np.ndarray) -> np.ndarray:
+        """Weighted mean direction from each position to the trails it owns (zero where none weigh in)."""
+        n = len(positions)
+        if len(owners) == 0:
+            return np.zeros_like(positions)
+        directions = trail_positions - positions[owners]
+        weights = trail_weights / (np.einsum('ij,ij->i', directions, directions) + TRAIL_EPSILON)
+        total = np.bincount(owners, weights, minlength=n)
+        summed = np.stack([np.bincount(owners, directions[:, d] * weights, minlength=n) for d in range(self.dim)], axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where((total > TRAIL_EPSILON)[:, None], summed / total[:, None], 0.0)
+
+    def step(
+        self,
+        rows: Optional[np.ndarray] = None,
+        global_best: Optional[Sequence[float]] = None,
+        trail_owners: Optional[np.ndarray] = None,
+        trail_positions: Optional[np.ndarray] = None,
+        trail_weights: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Advances `rows` (default: all pilgrims) one PSO step in place and returns
+        their new (velocities, positions). `trail_owners` indexes into `rows`.
+        Without a global best each pilgrim's personal best stands in for it.
+        """
+        rows = np.arange(len(self.names)) if rows is None else np.asarray(rows, dtype=np.intp)
+        x, v, pbest = self.positions[rows], self.velocities[rows], self.personal_best[rows]
+        w, c1, c2, c3, max_speed = (self.params[rows, col][:, None] for col in range(len(PARAM_KEYS)))
+        r1, r2, r3 = self.rng.random((3, len(rows), 1))
+
+        gbest = pbest if global_best is None else np.asarray(global_best, dtype=np.float64)[None, :]
+        if trail_owners is not None and len(trail_owners):
+            stigmergic = self.stigmergic_vectors(x, np.asarray(trail_owners, dtype=np.intp), trail_positions, trail_weights)
+        else:
+            stigmergic = 0.0
+
+        new_v = w * v + c1 * r1 * (pbest - x) + c2 * r2 * (gbest - x) + c3 * r3 * stigmergic
+        new_v = np.clip(new_v, -max_speed, max_speed)
+        new_x = x + new_v
+        self.velocities[rows] = new_v
+        self.positions[rows] = new_x
+        return new_v, new_x
+
+    def update_personal_bests(self, fitness: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Records the current position as personal best wherever fitness improved. Returns the improved mask."""
+        rows = np.arange(len(self.names)) if rows is None else np.asarray(rows, dtype=np.intp)
+        improved = fitness > self.personal_best_value[rows]
+        target = rows[improved]
+        self.personal_best[target] = self.positions[target]
+        self.personal_best_value[target] = fitness[improved]
+        return improved
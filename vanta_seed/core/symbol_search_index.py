@@ -0,0 +1,142 @@
+# symbol_search_index.py
+# Inverted + trigram index over myth entry symbols for /v1/symbol/search
+
+import bisect
+import heapq
+import itertools
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+GRAM = 3
+UNPARSABLE_TIMESTAMP = float("inf") # The endpoint stamps these with now(), so they rank newest
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _timestamp_key(value: Any) -> float:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return UNPARSABLE_TIMESTAMP
+
+
+class SymbolSearchIndex:
+    """
+    Substring search over entry symbols without scanning every entry.
+
+    - postings: lowercase symbol -> entry ids carrying it
+    - trigrams: trigram -> lowercase symbols containing it; a query of three or
+      more characters intersects the posting sets of its trigrams and only
+      verifies `query in symbol` on the survivors (shorter queries scan the
+      symbol vocabulary, which is far smaller than the entry list)
+    - an ascending (timestamp, seq, entry_id) list, so the newest k matches are
+      either read off its tail or picked with a k-sized heap, never a full sort
+
+    Matching mirrors the original endpoint: case-insensitive substring by
+    default; case-sensitive queries are verified against the original symbols.
+    """
+
+    def __init__(self, entries: Optional[Iterable[Dict[str, Any]]] = None):
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._entry_symbols: Dict[str, List[str]] = {}
+        self._entry_keys: Dict[str, Tuple[float, int]] = {}
+        self._order: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        if entries:
+            self.rebuild(entries)
+
+    def __len__(self) -> int:
+        return len(self._entry_symbols)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._entry_symbols
+
+    # --- Maintenance ---
+    def rebuild(self, entries: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for entry in entries:
+            self.add(entry, _keep_order=False)
+        self._order.sort() # One sort instead of an insort per entry
+
+    def add(self, entry: Dict[str, Any], _keep_order: bool = True) -> None:
+        """Indexes (or re-indexes) one entry."""
+        entry_id = entry.get("entry_id")
+        if not entry_id:
+            return
+        if entry_id in self._entry_symbols:
+            self.remove(entry_id)
+        symbols = entry.get("symbols", [])
+        symbols = [s for s in symbols if isinstance(s, str)] if isinstance(symbols, list) else []
+        self._entry_symbols[entry_id] = symbols
+        for symbol in {s.lower() for s in symbols}:
+            if symbol not in self._postings:
+                for gram in _grams(symbol):
+                    self._trigrams[gram].add(symbol)
+            self._postings[symbol].add(entry_id)
+        key = (_timestamp_key(entry.get("timestamp")), next(self._seq))
+        self._entry_keys[entry_id] = key
+        if _keep_order:
+            bisect.insort(self._order, key + (entry_id,))
+        else:
+            self._order.append(key + (entry_id,))
+
+    def remove(self, entry_id: str) -> None:
+        symbols = self._entry_symbols.pop(entry_id, None)
+        if symbols is None:
+            return
+        for symbol in {s.lower() for s in symbols}:
+            ids = self._postings.get(symbol)
+            if ids is None:
+                continue
+            ids.discard(entry_id)
+            if not ids:
+                del self._postings[symbol]
+                for gram in _grams(symbol):
+                    self._trigrams[gram].discard(symbol)
+                    if not self._trigrams[gram]:
+                        del self._trigrams[gram]
+        key = self._entry_keys.pop(entry_id) + (entry_id,)
+        del self._order[bisect.bisect_left(self._order, key)]
+
+    # --- Queries ---
+    def matching_symbols(self, query: str) -> Set[str]:
+        """Lowercase symbols that contain `query` (case-insensitively)."""
+        query = query.lower()
+        if len(query) < GRAM:
+            return {symbol for symbol in self._postings if query in symbol}
+        gram_sets = [self._trigrams.get(gram) for gram in _grams(query)]
+        if not all(gram_sets):
+            return set()
+        gram_sets.sort(key=len)
+        candidates = set(gram_sets[0]).intersection(*gram_sets[1:])
+        return {symbol for symbol in candidates if query in symbol}
+
+    def matching_entries(self, query: str, case_sensitive: bool = False) -> Set[str]:
+        entry_ids: Set[str] = set()
+        for symbol in self.matching_symbols(query):
+            entry_ids |= self._postings[symbol]
+        if case_sensitive:
+            entry_ids = {eid for eid in entry_ids if any(query in s for s in self._entry_symbols[eid])}
+        return entry_ids
+
+    def search(self, query: str, max_results: int, case_sensitive: bool = False) -> Tuple[List[str], int]:
+        """Returns (up to max_results matching entry ids, newest first; total number of matches)."""
+        matches = self.matching_entries(query, case_sensitive)
+        if not matches or max_results <= 0:
+            return [], len(matches)
+        if len(matches) * 4 >= len(self._order):
+            # Dense match set: walk the timestamp order from the newest end
+            top = []
+            for _, _, entry_id in reversed(self._order):
+                if entry_id in matches:
+                    top.append(entry_id)
+                    if len(top) == max_results:
+                        break
+            return top, len(matches)
+        keys = self._entry_keys
+        top = heapq.nlargest(max_results, matches, key=lambda eid: keys[eid])
+        return top, len(matches)
@@ -0,0 +1,116 @@
+# vanta_seed/core/symbolic_clustering.py
+# Hashed feature vectors for archetype metadata and an online mini-batch k-means
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+# --- Defaults ---
+DEFAULT_FEATURE_DIM = 64
+DEFAULT_MAX_CLUSTERS = 64
+DEFAULT_SPAWN_SIMILARITY = 0.8 # Cosine similarity below which a vector opens a new cluster
+DEFAULT_BATCH_SIZE = 256
+
+# Metadata fields hashed into an archetype's feature vector
+FEATURE_FIELDS = ('decision_type', 'hint', 'decision', 'source_agent', 'branch_type')
+
+
+def symbolic_features(token: str, metadata: dict) -> List[str]:
+    """Categorical features of an archetype: selected metadata fields plus the leading token segments."""
+    features = [f"{field}={metadata[field]}" for field in FEATURE_FIELDS if isinstance(metadata.get(field), (str, int))]
+    parts = token.split("::")
+    features.extend(f"token{i}={part}" for i, part in enumerate(parts[:2]))
+    return features
+
+
+def hashed_vector(features: Iterable[str], dim: int = DEFAULT_FEATURE_DIM) -> np.ndarray:
+    """Signed feature hashing into `dim` buckets, L2-normalised (all zeros if there are no features)."""
+    vector = np.zeros(dim)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class OnlineKMeans:
+    """
+    Mini-batch k-means over unit vectors that grows its own k.
+
+    Each batch is assigned to the most similar centroid in one matrix product;
+    vectors whose best cosine similarity is below `spawn_similarity` open a new
+    cluster instead (while fewer than `max_clusters` exist). Centroids are then
+    moved to the running mean of everything assigned to them, i.e. a per-centre
+    learning rate of batch_count / total_count, so previously seen vectors never
+    need to be revisited.
+    """
+
+    def __init__(
+        self,
+        dim: int = DEFAULT_FEATURE_DIM,
+        max_clusters: int = DEFAULT_MAX_CLUSTERS,
+        spawn_similarity: float = DEFAULT_SPAWN_SIMILARITY,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        self.dim = dim
+        self.max_clusters = max(1, max_clusters)
+        self.spawn_similarity = spawn_similarity
+        self.batch_size = max(1, batch_size)
+        self.centroids = np.zeros((0, dim))
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.counts)
+
+    def partial_fit(self, vectors: np.ndarray) -> np.ndarray:
+        """Assigns and absorbs `vectors` (n, dim); returns their cluster labels."""
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, self.dim)
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), self.batch_size):
+            batch = vectors[start:start + self.batch_size]
+            labels[start:start + len(batch)] = self._fit_batch(batch)
+        return labels
+
+    def _unit_centroids(self) -> np.ndarray:
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        return self.centroids / np.where(norms > 0, norms, 1.0)
+
+    def _fit_batch(self, batch: np.ndarray) -> np.ndarray:
+        if self.n_clusters:
+            sims = batch @ self._unit_centroids().T
+            labels = sims.argmax(axis=1)
+            best = sims[np.arange(len(batch)), labels]
+        else:
+            labels = np.zeros(len(batch), dtype=np.int64)
+            best = np.full(len(batch), -np.inf)
+        for i in np.flatnonzero(best < self.spawn_similarity):
+            # Sequential, so later outliers in the batch can join a cluster spawned earlier in it
+            if self.n_clusters:
+                sims_i = self._unit_centroids() @ batch[i]
+                labels[i] = int(sims_i.argmax())
+                if sims_i[labels[i]] >= self.spawn_similarity or self.n_clusters >= self.max_clusters:
+                    continue
+            labels[i] = self._spawn(batch[i])
+
+        batch_counts = np.bincount(labels, minlength=self.n_clusters)
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, labels, batch)
+        touched = batch_counts > 0
+        new_counts = self.counts + batch_counts
+        # Running mean: c <- c + (sum_b - n_b * c) / (n + n_b); spawned centroids start at count 0
+        self.centroids[touched] += (sums[touched] - batch_counts[touched, None] * self.centroids[touched]) / new_counts[touched, None]
+        self.counts = new_counts
+        return labels
+
+    def _spawn(self, vector: np.ndarray) -> int:
+        self.centroids = np.vstack([self.centroids, vector[None, :]])
+        self.counts = np.append(self.counts, 0)
+        return self.n_clusters - 1
+
+    def predict(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, self.dim)
+        if not self.n_clusters:
+            return np.full(len(vectors), -1, dtype=np.int64)
+        return (vectors @ self._unit_centroids().T).argmax(axis=1)
+
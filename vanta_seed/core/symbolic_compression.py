@@ -1,9 +1,38 @@
 # vanta_seed/core/symbolic_compression.py
 import logging
+import numpy as np
 from .memory_weave import MemoryWeave
+from .symbolic_clustering import (
+    DEFAULT_FEATURE_DIM, DEFAULT_MAX_CLUSTERS, DEFAULT_SPAWN_SIMILARITY,
+    OnlineKMeans, hashed_vector, symbolic_features
+)
+
+# --- Defaults ---
+DEFAULT_MAX_PENDING_TOKENS = 10000 # Unregistered tokens kept for retry; the oldest are dropped beyond this
 
 class SymbolicCompressor:
-    """Handles archetypal compression of branch histories into condensed symbols."""
+    """Handles archetypal compression of branch histories into condensed symbols.
+
+    Compression is incremental: a watermark into the MemoryWeave drift history
+    records how far it has read, so each call only clusters snapshots added
+    since the previous one. Cluster statistics are kept as counters and can be
+    read in O(1) via `cluster_stats()`.
+
+    Clusters describe the retained drift history, as a full rebuild from it
+    would: once every snapshot carrying a token has been evicted from the
+    bounded history, the token leaves its cluster (and empty clusters are
+    removed) on the next call, so memory use follows the history's capacity.
+    In vector mode the k-means centroids themselves are kept.
+
+    Tokens seen before their metadata is registered are retried on later calls
+    while they remain in the drift history, up to 'max_pending_tokens' of them
+    (oldest dropped first).
+
+    Modes (config 'clustering_mode'):
+      - "key" (default): group tokens by `decision_type::hint` of their metadata
+      - "vector": hash archetype metadata into feature vectors and group them
+        with an online mini-batch k-means (see symbolic_clustering)
+    """
 
     def __init__(self, memory_weave: MemoryWeave, config: dict = None):
         self.logger = logging.getLogger("Core.SymbolicCompressor")
@@ -11,65 +40,130 @@ class SymbolicCompressor:
         if not isinstance(memory_weave, MemoryWeave):
             raise TypeError("SymbolicCompressor requires a valid MemoryWeave instance.")
         self.memory_weave = memory_weave
-        self.logger.info("SymbolicCompressor initialized.")
+        self.clustering_mode = self.config.get('clustering_mode', 'key')
+        if self.clustering_mode not in ('key', 'vector'):
+            raise ValueError(f"Unknown clustering_mode: {self.clustering_mode}")
+        self.feature_dim = self.config.get('feature_dim', DEFAULT_FEATURE_DIM)
+        self.kmeans = OnlineKMeans(
+            dim=self.feature_dim,
+            max_clusters=self.config.get('max_clusters', DEFAULT_MAX_CLUSTERS),
+            spawn_similarity=self.config.get('spawn_similarity', DEFAULT_SPAWN_SIMILARITY)
+        )
+
+        # --- Incremental state ---
+        self.watermark = 0 # Next drift history position to read
+        self.clusters: dict[str, list[str]] = {}
+        self._token_cluster: dict[str, str] = {} # Clustered token -> its cluster key
+        self._last_seen: dict[str, int] = {} # Token -> seq of its latest snapshot, ordered oldest first
+        self._pending_tokens: dict[str, None] = {} # Seen before their metadata was registered; retried each call
+        self.max_pending_tokens = max(0, self.config.get('max_pending_tokens', DEFAULT_MAX_PENDING_TOKENS))
+        self.logger.info(f"SymbolicCompressor initialized (clustering mode: {self.clustering_mode}).")
 
     def compress_drift_history(self) -> dict:
-        """Analyze drift snapshots, cluster related archetypes, and generate condensed symbols.
+        """Cluster archetypes from drift snapshots added since the last call and return all clusters.
 
-        Current basic strategy: Group archetype tokens by BranchType and Hint.
         Returns:
-            A dictionary where keys are cluster identifiers (e.g., "FORK::Explore")
-            and values are lists of archetype tokens belonging to that cluster.
+            The live cluster map (treat as read-only): keys are cluster identifiers
+            (e.g., "FORK::Explore", or "VEC::<n>" in vector mode) and values are
+            lists of archetype tokens belonging to that cluster.
         """
         self.logger.debug("Compressing drift history into symbolic clusters...")
-        compressed_symbols = {}
-        history = self.memory_weave.retrieve_history()
-        archetype_registry = self.memory_weave.archetype_registry # Access registry directly for efficiency
-
-        if not history:
-            self.logger.info("No drift history found to compress.")
-            return compressed_symbols
+        history = self.memory_weave.drift_history
+        oldest = history.total_recorded - len(history) # seq of the oldest retained snapshot
+        first_seq = max(self.watermark, oldest)
+        new_snapshots = history.since(self.watermark)
+        self.watermark = history.total_recorded
+        for seq, snapshot in enumerate(new_snapshots, start=first_seq):
+            token = snapshot.get("archetype_token")
+            if token:
+                self._last_seen.pop(token, None) # Re-insert so the order stays by latest sighting
+                self._last_seen[token] = seq
+        self._expire_tokens(oldest)
 
-        processed_tokens = set() # Avoid processing the same token multiple times if snapshotted repeatedly
+        if not new_snapshots and not self._pending_tokens:
+            if not self.clusters:
+                self.logger.info("No drift history found to compress.")
+            return self.clusters
 
-        for snapshot in history:
-            # Use the archetype token directly from the snapshot
-            token = snapshot.get("archetype_token")
-            if not token or token in processed_tokens:
+        archetype_registry = self.memory_weave.archetype_registry # Access registry directly for efficiency
+        batch = [] # (token, metadata) not yet clustered
+        # Pending tokens whose snapshots were all evicted can no longer be clustered from history
+        retry = [token for token in self._pending_tokens if token in self._last_seen]
+        expired = len(self._pending_tokens) - len(retry)
+        self._pending_tokens = {}
+        for token in retry + [s.get("archetype_token") for s in new_snapshots]:
+            if not token or token in self._token_cluster:
                 continue
-
-            # Retrieve metadata efficiently from the registry
             archetype_info = archetype_registry.get(token)
             if not archetype_info or 'metadata' not in archetype_info:
-                self.logger.warning(f"Metadata not found for archetype token '{token}' in registry. Skipping.")
+                self._pending_tokens.pop(token, None) # Re-insert so the most recently seen sort last
+                self._pending_tokens[token] = None
                 continue
+            self._token_cluster[token] = "" # Claimed; the cluster key is set when the batch is clustered
+            batch.append((token, archetype_info['metadata']))
+        overflow = len(self._pending_tokens) - self.max_pending_tokens
+        if overflow > 0:
+            for token in list(self._pending_tokens)[:overflow]:
+                del self._pending_tokens[token]
+        if expired or overflow > 0:
+            self.logger.warning(f"Dropped {expired + max(0, overflow)} archetype token(s) still missing metadata (evicted from history or over the pending cap).")
+        if self._pending_tokens:
+            self.logger.warning(f"Metadata not found for {len(self._pending_tokens)} archetype token(s) in registry. Will retry.")
+
+        if self.clustering_mode == 'vector':
+            self._cluster_by_vector(batch)
+        else:
+            self._cluster_by_key(batch)
+
+        self.logger.info(f"Compression complete. Clustered {len(batch)} new archetypes; {len(self.clusters)} symbolic clusters.")
+        return self.clusters
+
+    def _expire_tokens(self, oldest: int) -> int:
+        """Drops tokens whose latest snapshot is older than `oldest` (evicted) from their clusters. Returns the count."""
+        expired = 0
+        while self._last_seen:
+            token, seq = next(iter(self._last_seen.items()))
+            if seq >= oldest:
+                break
+            del self._last_seen[token]
+            key = self._token_cluster.pop(token, None)
+            if key:
+                members = self.clusters[key]
+                members.remove(token) # Eviction is oldest first, so this is usually near the front
+                if not members:
+                    del self.clusters[key]
+            expired += 1
+        if expired:
+            self.logger.debug(f"Aged {expired} evicted archetype token(s) out of the symbolic clusters.")
+        return expired
+
+    def _add_to_cluster(self, key: str, token: str):
+        self.clusters.setdefault(key, []).append(token)
+        self._token_cluster[token] = key
+
+    def _cluster_by_key(self, batch: list[tuple[str, dict]]):
+        for token, metadata in batch:
+            # Branch type corresponds to the decision that created the archetype; hint may be missing
+            branch_type = metadata.get('decision_type', 'UnknownType')
+            hint = metadata.get('hint', 'NoHint')
+            self._add_to_cluster(f"{branch_type}::{hint}", token)
+
+    def _cluster_by_vector(self, batch: list[tuple[str, dict]]):
+        if not batch:
+            return
+        vectors = np.stack([hashed_vector(symbolic_features(token, metadata), self.feature_dim) for token, metadata in batch])
+        labels = self.kmeans.partial_fit(vectors)
+        for (token, _), label in zip(batch, labels):
+            self._add_to_cluster(f"VEC::{label}", token)
+
+    def cluster_stats(self) -> dict:
+        """O(1) summary of the clusters as of the last compression."""
+        return {
+            "clusters": len(self.clusters),
+            "archetypes": len(self._token_cluster),
+            "pending": len(self._pending_tokens),
+            "watermark": self.watermark,
+            "behind": self.memory_weave.drift_history.total_recorded - self.watermark,
+        }
 
-            metadata = archetype_info['metadata']
-            # --- Basic Clustering Logic --- 
-            # Extract branch type and hint if they exist in metadata
-            # Handle cases where these keys might be missing
-            branch_type = metadata.get('decision_type', 'UnknownType') # Corresponds to decision that created it
-            # Hint might be less consistently available, fallback needed
-            # Let's refine the cluster key based on available info
-            hint = metadata.get('hint', 'NoHint') # Assuming hint might be added to metadata
-
-            # Create a robust cluster key
-            cluster_key = f"{branch_type}::{hint}" 
-            # -----------------------------
-
-            # Add token to the corresponding cluster
-            if cluster_key not in compressed_symbols:
-                compressed_symbols[cluster_key] = []
-            compressed_symbols[cluster_key].append(token)
-            processed_tokens.add(token) # Mark as processed
-
-        self.logger.info(f"Compression complete. Found {len(compressed_symbols)} symbolic clusters.")
-        # Log the generated clusters at debug level for inspection
-        import json
-        self.logger.debug(f"Compressed Symbol Map: {json.dumps(compressed_symbols, indent=2)}")
-
-        return compressed_symbols
-
-    # TODO: Add methods for more advanced clustering (e.g., using vector embeddings
-    #       of archetype metadata or drift vectors).
-    # TODO: Add methods to generate meta-symbols representing clusters. 
\ No newline at end of file
+    # TODO: Add methods to generate meta-symbols representing clusters.
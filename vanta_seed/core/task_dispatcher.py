@@ -0,0 +1,269 @@
+# task_dispatcher.py
+# Priority task queue with a bounded worker pool and per-pilgrim concurrency limits
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+# --- Defaults ---
+DEFAULT_WORKERS = 8
+DEFAULT_PER_PILGRIM_CONCURRENCY = 2
+DEFAULT_MAX_QUEUE_DEPTH = 1000     # Across all pilgrims
+DEFAULT_MAX_PILGRIM_QUEUE_DEPTH = 200
+WAIT_SAMPLE_SIZE = 1000            # Recent wait times kept for percentile metrics
+
+ExecuteFunction = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class QueueFullError(RuntimeError):
+    """Raised by submit when the global or per-pilgrim queue is at capacity (the task is shed)."""
+
+
+class TaskHandle:
+    """
+    Handle for a queued task. Await it for the result, or inspect `status`
+    ("queued", "running", "done", "failed", "cancelled") and timing fields.
+    """
+
+    def __init__(self, task_data: Dict[str, Any], pilgrim_name: Optional[str], priority: int, loop: asyncio.AbstractEventLoop):
+        self.task_id: str = task_data.get("task_id") or str(uuid.uuid4())
+        self.task_data = task_data
+        self.pilgrim_name = pilgrim_name
+        self.priority = priority
+        self.future: asyncio.Future = loop.create_future()
+        self.future.add_done_callback(self._on_future_done)
+        self.status = "queued"
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @classmethod
+    def resolved(cls, task_data: Dict[str, Any], result: Any) -> "TaskHandle":
+        """A handle that is already finished with `result` (e.g. a routing error)."""
+        handle = cls(task_data, None, 0, asyncio.get_running_loop())
+        handle.status = "done"
+        handle.started_at = handle.finished_at = handle.enqueued_at
+        handle.future.set_result(result)
+        return handle
+
+    def _on_future_done(self, future: asyncio.Future) -> None:
+        if future.cancelled() and self.status == "queued": # The awaiting caller was cancelled or timed out
+            self.status = "cancelled"
+
+    @property
+    def abandoned(self) -> bool:
+        """True once nobody can receive the result (cancelled via the handle or its future) before it ran."""
+        return self.status == "cancelled" or (self.status == "queued" and self.future.cancelled())
+
+    def __await__(self):
+        return self.future.__await__()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self) -> Any:
+        return self.future.result()
+
+    def cancel(self) -> bool:
+        """Cancels the task if it has not started running yet."""
+        if self.status != "queued":
+            return False
+        self.status = "cancelled"
+        return self.future.cancel()
+
+    @property
+    def wait_time(self) -> Optional[float]:
+        return None if self.started_at is None else self.started_at - self.enqueued_at
+
+    def __repr__(self) -> str:
+        return f"TaskHandle(task_id={self.task_id!r}, pilgrim={self.pilgrim_name!r}, priority={self.priority}, status={self.status!r})"
+
+
+class TaskDispatcher:
+    """
+    Dispatches tasks to pilgrims through a fixed pool of worker coroutines.
+
+    Ready tasks sit in one priority queue ordered by (-priority, arrival). A
+    worker that pops a task whose pilgrim is already running
+    `per_pilgrim_concurrency` tasks parks it in that pilgrim's deferred heap;
+    the pilgrim's best deferred task is re-queued as soon as one of its running
+    tasks finishes, so a busy pilgrim never blocks work for idle ones. Submits
+    beyond `max_queue_depth` overall, or `max_pilgrim_queue_depth` for one
+    pilgrim, are shed with QueueFullError instead of piling up.
+    """
+
+    def __init__(
+        self,
+        execute: ExecuteFunction,
+        workers: int = DEFAULT_WORKERS,
+        per_pilgrim_concurrency: int = DEFAULT_PER_PILGRIM_CONCURRENCY,
+        max_queue_depth: int = DEFAULT_MAX_QUEUE_DEPTH,
+        max_pilgrim_queue_depth: int = DEFAULT_MAX_PILGRIM_QUEUE_DEPTH
+    ):
+        self.execute = execute
+        self.workers = max(1, workers)
+        self.per_pilgrim_concurrency = max(1, per_pilgrim_concurrency)
+        self.max_queue_depth = max_queue_depth
+        self.max_pilgrim_queue_depth = max_pilgrim_queue_depth
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._ready: Optional[asyncio.PriorityQueue] = None
+        self._deferred: Dict[str, List[Tuple[int, int, TaskHandle]]] = defaultdict(list)
+        self._running: Dict[str, int] = defaultdict(int)
+        self._queued: Dict[str, int] = defaultdict(int) # Ready + deferred, per pilgrim
+        self._seq = itertools.count()
+        self._worker_tasks: List[asyncio.Task] = []
+
+        # --- Metrics ---
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0 # Queued tasks skipped because they were cancelled before running
+        self.shed = 0
+        self._wait_samples: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self._max_wait = 0.0
+
+    # --- Lifecycle ---
+    @property
+    def is_running(self) -> bool:
+        return bool(self._worker_tasks)
+
+    def start(self) -> None:
+        """Starts the worker pool on the running event loop (idempotent)."""
+        if self._worker_tasks:
+            return
+        self._ready = asyncio.PriorityQueue()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker_loop(i), name=f"task-dispatch-worker-{i}") for i in range(self.workers)
+        ]
+        self.logger.info(f"TaskDispatcher started with {self.workers} workers (per-pilgrim limit {self.per_pilgrim_concurrency}).")
+
+    async def stop(self) -> None:
+        """Cancels the workers and every task still waiting in the queues."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        pending = []
+        while self._ready is not None and not self._ready.empty():
+            pending.append(self._ready.get_nowait()[2])
+        for heap in self._deferred.values():
+            pending.extend(handle for _, _, handle in heap)
+        for handle in pending:
+            handle.cancel()
+        self._deferred.clear()
+        self._queued.clear()
+        self.logger.info(f"TaskDispatcher stopped; cancelled {len(pending)} queued tasks.")
+
+    # --- Submission ---
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queued.values())
+
+    def submit(self, pilgrim_name: str, task_data: Dict[str, Any]) -> TaskHandle:
+        """Queues task_data for pilgrim_name and returns its handle. Raises QueueFullError when shedding."""
+        if not self._worker_tasks:
+            self.start()
+        if self.queue_depth >= self.max_queue_depth:
+            self.shed += 1
+            raise QueueFullError(f"Task queue full ({self.max_queue_depth} pending)")
+        if self._queued[pilgrim_name] >= self.max_pilgrim_queue_depth:
+            self.shed += 1
+            raise QueueFullError(f"Pilgrim '{pilgrim_name}' is overloaded ({self._queued[pilgrim_name]} pending)")
+        try:
+            priority = int(task_data.get("priority", 0) or 0)
+        except (TypeError, ValueError):
+            priority = 0
+        handle = TaskHandle(task_data, pilgrim_name, priority, asyncio.get_running_loop())
+        self._queued[pilgrim_name] += 1
+        self.submitted += 1
+        self._ready.put_nowait((-priority, next(self._seq), handle))
+        return handle
+
+    # --- Workers ---
+    async def _worker_loop(self, worker_id: int):
+        while True:
+            entry = await self._ready.get()
+            handle = entry[2]
+            if handle.abandoned:
+                self._skip(handle)
+                continue
+            if self._running[handle.pilgrim_name] >= self.per_pilgrim_concurrency:
+                heapq.heappush(self._deferred[handle.pilgrim_name], entry)
+                continue
+            await self._run(handle)
+
+    async def _run(self, handle: TaskHandle):
+        name = handle.pilgrim_name
+        self._queued[name] -= 1
+        self._running[name] += 1
+        handle.status = "running"
+        handle.started_at = time.monotonic()
+        self._wait_samples.append(handle.wait_time)
+        self._max_wait = max(self._max_wait, handle.wait_time)
+        try:
+            result = await self.execute(name, handle.task_data)
+            handle.status = "done"
+            self.completed += 1
+            if not handle.future.done():
+                handle.future.set_result(result)
+        except asyncio.CancelledError:
+            handle.status = "cancelled"
+            handle.future.cancel()
+            if asyncio.current_task().cancelling():
+                raise # The worker itself is being stopped
+            # Raised by the task (e.g. it awaited a cancelled subtask): keep this worker in the pool
+            self.logger.warning(f"Task {handle.task_id} on Pilgrim '{name}' was cancelled while running.")
+        except Exception as e:
+            self.logger.error(f"Task {handle.task_id} failed on Pilgrim '{name}': {e}", exc_info=True)
+            handle.status = "failed"
+            self.failed += 1
+            if not handle.future.done():
+                handle.future.set_exception(e)
+        finally:
+            handle.finished_at = time.monotonic()
+            self._running[name] -= 1
+            self._release_deferred(name)
+
+    def _skip(self, handle: TaskHandle):
+        """Drops a queued task whose result nobody is waiting for any more."""
+        handle.status = "cancelled"
+        self._queued[handle.pilgrim_name] -= 1
+        self.cancelled += 1
+
+    def _release_deferred(self, pilgrim_name: str):
+        heap = self._deferred.get(pilgrim_name)
+        while heap:
+            entry = heapq.heappop(heap)
+            if entry[2].abandoned:
+                self._skip(entry[2])
+                continue
+            self._ready.put_nowait(entry)
+            break
+
+    # --- Metrics ---
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, concurrency and wait-time statistics (seconds)."""
+        waits = sorted(self._wait_samples)
+        percentile = lambda q: waits[min(len(waits) - 1, int(q * len(waits)))] if waits else 0.0
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_pilgrim": {name: n for name, n in self._queued.items() if n},
+            "running": sum(self._running.values()),
+            "running_by_pilgrim": {name: n for name, n in self._running.items() if n},
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "shed": self.shed,
+            "wait_time_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_time_p50": percentile(0.5),
+            "wait_time_p95": percentile(0.95),
+            "wait_time_max": self._max_wait,
+        }
@@ -6,6 +6,7 @@ import json # Added for printing maps
 import importlib # Needed for agent loading
 from pathlib import Path # Needed for potential path ops
 import os # <<< Added import os
+import time
 # --- Add typing imports --- 
 from typing import Optional, Dict, List, Tuple, Any, Type # Added Optional and others
 # --- Import Pydantic ValidationError --- 
@@ -33,7 +34,10 @@ from vanta_seed.core.automutator import Automutator
 from vanta_seed.core.autonomous_tasker import AutonomousTasker
 from vanta_seed.core.ritual_executor import RitualExecutor
 from vanta_seed.core.memory_store import MemoryStore 
-from vanta_seed.utils.vector_utils import round_position # Keep absolute import
+from vanta_seed.core.stigmergic_grid import StigmergicGrid
+from vanta_seed.core.swarm_engine import SwarmEngine, global_best_position, trail_arrays
+from vanta_seed.core.task_dispatcher import TaskDispatcher, TaskHandle, QueueFullError
+import numpy as np
 import yaml 
 from vanta_seed.agents.agent_utils import PurposePulse, MythicRole # Keep absolute import
 # ---------------------------------- #
@@ -126,8 +130,16 @@ class VantaMasterCore:
         self._global_trinity_best_node: Optional[GlobalBestNodeInfo] = None # Info about the most resonant Pilgrim
 
         # --- Add Stigmergic Field --- 
-        # Use Any for field value if types aren't guaranteed
-        self._stigmergic_field: Dict[Tuple[float, ...], Any] = {}
+        # Spatial hash grid of TrailSignatures; rebuilt with configured parameters in _load_core_config
+        self._stigmergic_field: StigmergicGrid = StigmergicGrid()
+        self._stigmergic_evaporation_interval: float = 30.0
+        self._stigmergic_evaporation_task: Optional[asyncio.Task] = None
+        self._swarm_tick_interval: float = 1.0
+        self._swarm_tick_task: Optional[asyncio.Task] = None
+        # Batched PSO state for all pilgrims; BaseAgent delegates to it once enough pilgrims are loaded
+        self.swarm_engine: SwarmEngine = SwarmEngine()
+        # Priority queue + worker pool for submitted tasks; configured from `task_dispatch` in _load_core_config
+        self.task_dispatcher: TaskDispatcher = TaskDispatcher(self._execute_dispatched_task)
         # Load resolution from settings or default
         # Need to access settings *after* core_config is loaded, moved logic to _load_core_config
         self._stigmergic_resolution: int = 1 # Default, will be updated after config load
@@ -185,8 +197,32 @@ class VantaMasterCore:
 
         self._stigmergic_resolution = swarm_cfg.get('stigmergic_resolution', 1) if isinstance(swarm_cfg, dict) else getattr(swarm_cfg, 'stigmergic_resolution', 1)
         self._blessing_threshold = crown_iface.get('blessing_threshold', 0.85) if isinstance(crown_iface, dict) else getattr(crown_iface, 'blessing_threshold', 0.85)
+        swarm_get = (lambda key, default: swarm_cfg.get(key, default)) if isinstance(swarm_cfg, dict) else (lambda key, default: getattr(swarm_cfg, key, default))
+        # Field points stay rounded to stigmergic_resolution decimals, each keeping its own
+        # trail buffer and pheromone; the grid cell size only controls the spatial index.
+        max_trails = swarm_get('stigmergic_max_trails_per_bucket', None)
+        if max_trails is None and swarm_get('stigmergic_max_trails_per_cell', None) is not None:
+            max_trails = swarm_get('stigmergic_max_trails_per_cell', None)
+            self.logger.warning("Crown: 'stigmergic_max_trails_per_cell' is deprecated; the cap applies per resolution bucket, use 'stigmergic_max_trails_per_bucket'.")
+        self._stigmergic_field = StigmergicGrid(
+            cell_size=swarm_get('stigmergic_cell_size', 5.0),
+            resolution=self._stigmergic_resolution,
+            max_trails_per_bucket=50 if max_trails is None else max_trails,
+            evaporation_rate=swarm_get('stigmergic_evaporation_rate', 0.0)
+        )
+        self._stigmergic_evaporation_interval = swarm_get('stigmergic_evaporation_interval', 30.0)
+        self.swarm_engine = SwarmEngine(min_pilgrims=swarm_get('vectorized_swarm_min_pilgrims', 32))
+        self._swarm_tick_interval = swarm_get('swarm_tick_interval', 1.0)
+        dispatch_cfg = getattr(self.core_config, 'task_dispatch', None) or {}
+        self.task_dispatcher = TaskDispatcher(
+            self._execute_dispatched_task,
+            workers=dispatch_cfg.get('workers', 8),
+            per_pilgrim_concurrency=dispatch_cfg.get('per_pilgrim_concurrency', 2),
+            max_queue_depth=dispatch_cfg.get('max_queue_depth', 1000),
+            max_pilgrim_queue_depth=dispatch_cfg.get('max_pilgrim_queue_depth', 200)
+        )
         # -------------------------------------------------
-        self.logger.info(f"Crown: Stigmergic Res: {self._stigmergic_resolution}, Blessing Threshold: {self._blessing_threshold}")
+        self.logger.info(f"Crown: Stigmergic Res: {self._stigmergic_resolution}, Cell Size: {self._stigmergic_field.cell_size}, Evaporation: {self._stigmergic_field.evaporation_rate}/s, Blessing Threshold: {self._blessing_threshold}")
         # --- Link to Spec ---
         # self.core_config now holds parameters defined in
         # Trinity Swarm YAML Spec v0.1 -> swarm_config & vanta_crown_interface sections.
@@ -384,6 +420,7 @@ class VantaMasterCore:
 
             # Store the fully constructed initial state
             self._pilgrim_states[agent_name] = initial_state_dict
+            self.swarm_engine.register(agent_name, initial_state_dict)
             self.logger.info(f"Initialized state for Pilgrim '{agent_name}' at position {initial_state_dict['position']}")
 
         except Exception as e:
@@ -421,13 +458,90 @@ class VantaMasterCore:
             return
 
         self._pilgrim_states[agent_name].update(new_state_data)
+        if agent_name in self.swarm_engine:
+            self.swarm_engine.sync(agent_name, new_state_data)
         self.logger.info(f"Crown: Updated state for Pilgrim '{agent_name}'.")
 
+    def owns_swarm_movement(self, agent_name: str) -> bool:
+        """True while the Crown's tick loop moves this Pilgrim (so BaseAgent must not step it again)."""
+        return self._swarm_tick_task is not None and self.swarm_engine.is_active and agent_name in self.swarm_engine
+
+    def swarm_tick(self) -> int:
+        """
+        Advances every registered Pilgrim one StigmergicPSO step in a single
+        vectorised call, then writes position, velocity, energy, role and personal
+        best back to the Crown's and each Pilgrim's state. Returns the number moved.
+        """
+        engine = self.swarm_engine
+        if len(engine) == 0:
+            return 0
+        # Gather each pilgrim's nearby trails into one CSR batch (owner row per trail)
+        nearby, owners, trail_positions, trail_weights = [], [], [], []
+        for row, name in enumerate(engine.names):
+            state = self._pilgrim_states.get(name, {})
+            sensor_radius = state.get('swarm_params', {}).get('sensor_radius', 5.0)
+            trails = self._stigmergic_field.query_radius(engine.positions[row], sensor_radius)
+            nearby.append(trails)
+            positions, weights = trail_arrays(trails, engine.dim)
+            if len(weights):
+                owners.append(np.full(len(weights), row, dtype=np.intp))
+                trail_positions.append(positions)
+                trail_weights.append(weights)
+
+        old_positions = engine.positions.copy()
+        new_v, new_x = engine.step(
+            global_best=global_best_position(self._global_trinity_best_node, engine.dim),
+            trail_owners=np.concatenate(owners) if owners else None,
+            trail_positions=np.concatenate(trail_positions) if owners else None,
+            trail_weights=np.concatenate(trail_weights) if owners else None
+        )
+
+        # Energy cost and personal best follow BaseAgent._calculate_state_updates (energy as the fitness proxy)
+        states = [self._pilgrim_states.get(name, {}) for name in engine.names]
+        cost_per_unit = np.array([s.get('swarm_params', {}).get('energy_cost_per_unit', 0.1) for s in states])
+        energy = np.array([s.get('energy_level', 1.0) for s in states])
+        energy = np.maximum(0.0, energy - np.linalg.norm(new_x - old_positions, axis=1) * cost_per_unit)
+        improved = engine.update_personal_bests(energy)
+
+        now = time.time()
+        for row, name in enumerate(engine.names):
+            updates = {
+                "position": new_x[row].tolist(),
+                "velocity": new_v[row].tolist(),
+                "energy_level": float(energy[row]),
+                "last_updated_timestamp": now
+            }
+            if improved[row]:
+                updates["personal_best_position"] = updates["position"][:]
+                updates["personal_best_value"] = float(energy[row])
+            pilgrim = self.pilgrims.get(name)
+            if pilgrim is not None and hasattr(pilgrim, '_determine_next_role'):
+                # As in BaseAgent: role is decided at the new position, before the energy update lands
+                try:
+                    updates["current_role"] = pilgrim._determine_next_role(updates["position"], nearby[row], self._current_purpose_vector)
+                except Exception as e:
+                    self.logger.warning(f"Crown: Role update failed for Pilgrim '{name}' during swarm tick: {e}")
+            if name in self._pilgrim_states:
+                self._pilgrim_states[name].update(updates)
+            if pilgrim is not None and hasattr(pilgrim, '_update_internal_state'):
+                pilgrim._update_internal_state(updates)
+        return len(engine)
+
+    async def _run_swarm_ticks(self):
+        """Calls swarm_tick every swarm_tick_interval seconds while the vectorised engine is active."""
+        while True:
+            await asyncio.sleep(self._swarm_tick_interval)
+            if not self.swarm_engine.is_active:
+                continue # Small swarms move per Pilgrim in BaseAgent.execute
+            try:
+                moved = self.swarm_tick()
+                self.logger.debug(f"Crown: Swarm tick moved {moved} Pilgrims.")
+            except Exception as e:
+                self.logger.error(f"Crown: Error during swarm tick: {e}", exc_info=True)
+
     async def _route_task(self, task_data: Dict[str, Any]) -> Any:
         """
-        Routes a task to the appropriate Pilgrim based on intent, payload,
-        or explicit target. This now incorporates routing based on 'requested_model'
-        for 'chat_completion' intents.
+        Routes a task to the appropriate Pilgrim (see _select_pilgrim) and runs it inline.
 
         Args:
             task_data (Dict[str, Any]): The task dictionary, including intent, payload, context.
@@ -435,6 +549,17 @@ class VantaMasterCore:
         Returns:
             Any: The result from the executed Pilgrim.
         """
+        pilgrim_to_run = self._select_pilgrim(task_data)
+        if not pilgrim_to_run:
+            return {"error": "No agents available to handle the task."}
+        return await self._run_task_on_pilgrim(pilgrim_to_run, task_data)
+
+    def _select_pilgrim(self, task_data: Dict[str, Any]) -> Optional[BaseAgent]:
+        """
+        Selects the Pilgrim for a task based on intent, payload, or explicit
+        target. This now incorporates routing based on 'requested_model' for
+        'chat_completion' intents. Returns None if no Pilgrim is available.
+        """
         intent = task_data.get("intent")
         payload = task_data.get("payload", {})
         context = task_data.get("context", {})
@@ -487,15 +612,15 @@ class VantaMasterCore:
                 self.logger.info(f"Crown: No specific route found. Falling back to default Pilgrim: {default_agent_name}")
             else:
                  self.logger.error("Crown: Routing failed. No Pilgrims available.")
-                 return {"error": "No agents available to handle the task."}
 
-        # --- Execute Task on Selected Pilgrim --- 
-        if pilgrim_to_run:
-            return await self._run_task_on_pilgrim(pilgrim_to_run, task_data)
-        else:
-            # This case should ideally be handled above, but as a safeguard:
-            self.logger.error("Crown: Routing logic failed to select a Pilgrim.")
-            return {"error": "Task routing failed internally."}
+        return pilgrim_to_run
+
+    async def _execute_dispatched_task(self, pilgrim_name: str, task_data: Dict[str, Any]) -> Any:
+        """TaskDispatcher callback: runs a queued task on the Pilgrim chosen at submit time."""
+        pilgrim = self._get_pilgrim(pilgrim_name)
+        if not pilgrim:
+            return {"error": f"Pilgrim '{pilgrim_name}' is no longer available."}
+        return await self._run_task_on_pilgrim(pilgrim, task_data)
 
     async def _run_task_on_pilgrim(self, pilgrim: BaseAgent, task_data: Dict[str, Any]) -> Any:
         """Executes a task using the specified Pilgrim agent, handling state updates including Pulse/Role."""
@@ -725,6 +850,13 @@ class VantaMasterCore:
         self.logger.info("VantaMasterCore Crown awakening...")
         # Start background tasks like swarm monitoring if needed
         # self._swarm_monitor_task = asyncio.create_task(self._run_swarm_monitoring())
+        self.task_dispatcher.start()
+        if self._swarm_tick_interval > 0 and self._swarm_tick_task is None:
+            self._swarm_tick_task = asyncio.create_task(self._run_swarm_ticks())
+        if self._stigmergic_field.evaporation_rate > 0 and self._stigmergic_evaporation_task is None:
+            self._stigmergic_evaporation_task = asyncio.create_task(
+                self._stigmergic_field.run_evaporation(self._stigmergic_evaporation_interval)
+            )
 
         # --- Start Core Engines --- 
         core_engine_start_tasks = []
@@ -780,6 +912,21 @@ class VantaMasterCore:
         #         await self._swarm_monitor_task
         #     except asyncio.CancelledError:
         #         self.logger.info("Swarm monitor task cancelled.")
+        if self._swarm_tick_task:
+            self._swarm_tick_task.cancel()
+            try:
+                await self._swarm_tick_task
+            except asyncio.CancelledError:
+                self.logger.debug("Swarm tick task cancelled.")
+            self._swarm_tick_task = None
+        if self._stigmergic_evaporation_task:
+            self._stigmergic_evaporation_task.cancel()
+            try:
+                await self._stigmergic_evaporation_task
+            except asyncio.CancelledError:
+                self.logger.debug("Stigmergic evaporation task cancelled.")
+            self._stigmergic_evaporation_task = None
+        await self.task_dispatcher.stop()
 
         # --- Shutdown Core Engines FIRST --- 
         core_engine_shutdown_tasks = []
@@ -851,54 +998,9 @@ class VantaMasterCore:
         try:
             signature = TrailSignature(**trail_signature_data)
             # --- Stigmergic Field Logic ---
-            # Use rounded position as the key for the field dictionary
-            pos_key = round_position(signature.position_at_emission, self._stigmergic_resolution)
-
-            if pos_key not in self._stigmergic_field:
-                # Initialize using the Pydantic model if possible
-                self._stigmergic_field[pos_key] = StigmergicFieldPoint(
-                    coordinates=list(pos_key),
-                    recent_trail_signatures=[] # pheromone defaults to 0.0
-                )
-
-            field_point: StigmergicFieldPoint = self._stigmergic_field[pos_key]
-
-            # Add signature and manage buffer size
-            field_point.recent_trail_signatures.append(signature)
-
-            # --- MODIFIED START: Hardcode max_items --- 
-            max_items = 50 # Hardcoded buffer size for simplicity
-            # --- END MODIFIED ---
-
-            # Access max_items using modern Pydantic approach (model_fields)
-            # try:
-            #     # Pydantic v2+ approach
-            #     max_items = StigmergicFieldPoint.model_fields['recent_trail_signatures'].metadata.get('max_length', 50) # Check metadata first
-            #     if not max_items:
-            #          # Fallback check constraints if metadata missing max_length
-            #          if hasattr(StigmergicFieldPoint.model_fields['recent_trail_signatures'], 'max_length'):
-            #               max_items = StigmergicFieldPoint.model_fields['recent_trail_signatures'].max_length
-            #          else:
-            #               max_items = 50 # Default if not found
-            # except (AttributeError, KeyError):
-            #      # Fallback for older Pydantic or unexpected structure
-            #      try:
-            #           # Pydantic v1 approach
-            #           field_info = StigmergicFieldPoint.__fields__['recent_trail_signatures'].field_info
-            #           max_items = getattr(field_info, 'max_items', 50) # Check field_info directly
-            #      except (AttributeError, KeyError):
-            #          # Absolute fallback
-            #          max_items = 50
-            #          self.logger.warning("Could not determine max_items for trail signatures. Falling back to default.")
-
-            # Trim the buffer if it exceeds the limit
-            if len(field_point.recent_trail_signatures) > max_items:
-                field_point.recent_trail_signatures = field_point.recent_trail_signatures[-max_items:]
-
-            # Update pheromone level (example: simple increment capped at 1)
-            field_point.pheromone_level = min(1.0, field_point.pheromone_level + 0.1) # Basic update logic
-
-            self.logger.debug(f"Crown: Recorded Trail Signature from {signature.emitting_node_id} at rounded pos {pos_key}. Field point count: {len(field_point.recent_trail_signatures)}")
+            # Bucketed by the rounded position (as before); the grid also keeps the exact emission position
+            pheromone = self._stigmergic_field.deposit(signature.position_at_emission, signature)
+            self.logger.debug(f"Crown: Recorded Trail Signature from {signature.emitting_node_id} at {signature.position_at_emission}. Field point pheromone: {pheromone:.2f}")
 
         except ValidationError as e:
              self.logger.error(f"Crown: Invalid Trail Signature data: {e}. Data: {trail_signature_data}", exc_info=True)
@@ -906,34 +1008,69 @@ class VantaMasterCore:
             self.logger.error(f"Crown: Error recording Trail Signature: {e}. Data: {trail_signature_data}", exc_info=True)
 
     def get_stigmergic_data_near(self, position: Position, radius: float) -> List[TrailSignature]:
-        """Retrieves recent TrailSignatures within a radius of a position (basic implementation)."""
+        """Retrieves recent TrailSignatures within a radius of a position, nearest first."""
         if not SWARM_TYPES_AVAILABLE:
              self.logger.warning("Cannot get stigmergic data, swarm types unavailable.")
              return []
-             
-        # --- Basic Neighborhood Search --- 
-        # TODO: Implement proper spatial querying for scalability.
-        nearby_signatures = []
-        search_center_key = round_position(position, self._stigmergic_resolution)
-
-        # Simple check of the exact rounded cell - Needs improvement for actual radius search
-        if search_center_key in self._stigmergic_field:
-            field_point = self._stigmergic_field[search_center_key]
-            # Currently returns all in cell, could add distance check here
-            nearby_signatures.extend(field_point.recent_trail_signatures)
 
-        # Add logic to check adjacent cells based on radius if needed
-        # ... (placeholder for checking neighbors) ...
-
-        self.logger.debug(f"Crown: Found {len(nearby_signatures)} trail signatures near {position} (key {search_center_key}, basic search).")
+        nearby_signatures = self._stigmergic_field.query_radius(position, radius)
+        self.logger.debug(f"Crown: Found {len(nearby_signatures)} trail signatures within {radius} of {position}.")
         return nearby_signatures
 
+    def get_nearest_stigmergic_data(self, position: Position, k: int) -> List[TrailSignature]:
+        """Retrieves the k TrailSignatures emitted closest to a position, nearest first."""
+        if not SWARM_TYPES_AVAILABLE:
+             self.logger.warning("Cannot get stigmergic data, swarm types unavailable.")
+             return []
+        return [signature for _, signature in self._stigmergic_field.query_knn(position, k)]
+
+    def get_stigmergic_field_point(self, position: Position) -> Optional[StigmergicFieldPoint]:
+        """Snapshot of the field point (rounded position) containing a position, or None if empty."""
+        bucket = self._stigmergic_field.get_bucket(position)
+        if bucket is None:
+            return None
+        return StigmergicFieldPoint(
+            coordinates=list(bucket.key),
+            pheromone_level=bucket.pheromone,
+            recent_trail_signatures=[signature for _, signature in bucket.trails]
+        )
+
     # --- Public Task Submission Method ---
     async def submit_task(self, task_data: Dict[str, Any]) -> Any:
-        """Public method to submit a task for routing and execution."""
+        """Public method to submit a task for routing and execution; waits for the result."""
         self.logger.info(f"Crown: Received task submission: {task_data.get('type', 'Unknown Type')}")
-        # Directly call the internal routing method
-        return await self._route_task(task_data)
+        try:
+            handle = self.submit_task_nowait(task_data)
+        except QueueFullError as e:
+            self.logger.warning(f"Crown: Shedding task '{task_data.get('intent')}': {e}")
+            return {"error": f"Task rejected: {e}", "status": "rejected"}
+        return await handle
+
+    def submit_task_nowait(self, task_data: Dict[str, Any]) -> TaskHandle:
+        """
+        Routes a task and queues it on the dispatcher without waiting. Returns a
+        TaskHandle that can be awaited for the result. Tasks with a higher
+        `priority` (see utils.create_task_data) run first. Raises QueueFullError
+        when the queue or the chosen Pilgrim is overloaded.
+        """
+        pilgrim = self._select_pilgrim(task_data)
+        if not pilgrim:
+            return TaskHandle.resolved(task_data, {"error": "No agents available to handle the task."})
+        handle = self.task_dispatcher.submit(pilgrim.name, task_data)
+        self.logger.debug(f"Crown: Queued task {handle.task_id} for Pilgrim '{pilgrim.name}' (priority {handle.priority}, depth {self.task_dispatcher.queue_depth}).")
+        return handle
+
+    def add_task(self, task_data: Dict[str, Any]) -> Optional[TaskHandle]:
+        """Fire-and-forget submission used by agents delegating work; returns None if the task was shed."""
+        try:
+            return self.submit_task_nowait(task_data)
+        except QueueFullError as e:
+            self.logger.warning(f"Crown: Dropped delegated task '{task_data.get('intent')}': {e}")
+            return None
+
+    def get_task_metrics(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and wait-time metrics from the task dispatcher."""
+        return self.task_dispatcher.metrics()
 
     # --- NEW: Initialize Core Engines Method --- 
     def _initialize_core_engines(self):
@@ -954,7 +1091,8 @@ class VantaMasterCore:
             
             # Pass config dict, let MemoryStore handle internal keys
             max_items_config = storage_config.get('max_items', 10000) # Get max_items from blueprint if set
-            self.memory_store = MemoryStore(max_items=max_items_config, persist_path=persist_path_config)
+            persistence_config = storage_config.get('persistence', 'log') # 'log' (append-only segments) or 'yaml'
+            self.memory_store = MemoryStore(max_items=max_items_config, persist_path=persist_path_config, persistence=persistence_config)
             
             self.governance_engine = GovernanceEngine(config=getattr(self.core_config, 'governance', {}))
             self.procedural_engine = ProceduralEngine(config=getattr(self.core_config, 'procedural', {}))
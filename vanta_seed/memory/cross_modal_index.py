@@ -0,0 +1,385 @@
+# cross_modal_index.py
+# SQLite index over CrossModalMemory's memory_metadata.jsonl
+
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+SCHEMA = """
+  CREATE TABLE IF NOT EXISTS entries (
+      seq INTEGER PRIMARY KEY AUTOINCREMENT, -- Journal order
+      id TEXT NOT NULL UNIQUE,
+      type TEXT,
+      agent TEXT,
+      ts TEXT,                               -- Normalised UTC timestamp, sortable as text
+      ts_invalid INTEGER NOT NULL DEFAULT 0, -- Unparseable timestamps pass the 'since' filter, as before
+      sha256 TEXT,                           -- Media content hash (shared by deduplicated entries)
+      body TEXT NOT NULL                     -- The entry as JSON
+  );
+  CREATE INDEX IF NOT EXISTS entries_type ON entries(type);
+  CREATE INDEX IF NOT EXISTS entries_sha256 ON entries(sha256);
+  CREATE INDEX IF NOT EXISTS entries_agent ON entries(agent);
+  CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+  CREATE TABLE IF NOT EXISTS entry_tags (
+      tag TEXT NOT NULL,
+      id TEXT NOT NULL,
+      PRIMARY KEY (tag, id)
+  ) WITHOUT ROWID;
+  CREATE INDEX IF NOT EXISTS entry_tags_id ON entry_tags(id);
+"""
+META_SCHEMA = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+SCHEMA_VERSION = "3" # Bump when SCHEMA (or the meta keys) change; older databases are rebuilt from the journal
+
+# --- Compaction defaults ---
+DEFAULT_COMPACT_RATIO = 0.5         # Compact once this fraction of journal records is dead (tags, deletes, superseded adds)
+DEFAULT_COMPACT_MIN_RECORDS = 1000  # ...and the journal holds at least this many records
+
+# Lowercased searchable text (data, filename, tags); trigram tokens make LIKE '%q%' an index lookup
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS entries_text USING fts5(id UNINDEXED, text, tokenize='trigram')"
+FALLBACK_TEXT_SCHEMA = "CREATE TABLE IF NOT EXISTS entries_text (id TEXT PRIMARY KEY, text TEXT)"
+
+FIELD_SEP = "\n" # Keeps single-line queries from matching across two fields (SQLite text stops at NUL)
+
+# Structured filter fields -> SQL column
+FILTER_COLUMNS = {"id": "e.id", "type": "e.type", "agent": "e.agent", "timestamp": "e.ts"}
+COMPARISON_OPS = {"==": "=", "=": "=", "!=": "!=", ">": ">", ">=": ">=", "<": "<", "<=": "<="}
+
+
+def normalize_timestamp(value: Any) -> Optional[str]:
+    """ISO timestamp -> naive UTC 'YYYY-MM-DDTHH:MM:SS.ffffff' (naive inputs are taken as UTC). None if unparseable."""
+    if not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def searchable_text(entry: Dict[str, Any]) -> str:
+    """The fields the 'q' filter matches: text data, media filename, tags."""
+    fields = []
+    if entry.get('type') == 'text' and isinstance(entry.get('data'), str):
+        fields.append(entry['data'])
+    elif entry.get('type') in ('image', 'audio') and isinstance(entry.get('filename'), str):
+        fields.append(entry['filename'])
+    fields.extend(tag for tag in entry.get('tags') or [] if isinstance(tag, str))
+    return FIELD_SEP.join(f.lower() for f in fields)
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class CrossModalIndex:
+    """
+    Indexed view of a CrossModalMemory metadata journal.
+
+    The JSONL file stays the append-only source of truth. Plain entry lines are
+    adds; tag and delete operations are appended as {"op": "tag"|"delete", ...}
+    records instead of rewriting the file. The SQLite database beside it holds
+    the live entries with an id key, type/agent/tag and media-hash indexes, a
+    normalised timestamp index for 'since' range scans and a trigram FTS table
+    over the searchable text, plus the journal offset it has applied up to.
+
+    `sync()` applies whatever the journal gained since that offset (lines from
+    other processes, or a crash between append and index update), so every
+    instance sharing the file stays consistent; a journal that shrank is
+    re-imported from scratch. The index also counts journal records, so
+    `maybe_compact()` can fold tag/delete records away once they make up a
+    large enough share of the file.
+    """
+
+    def __init__(self, db_path: Path, journal_path: Path, lock=None, logger_instance: Optional[logging.Logger] = None):
+        self.db_path = Path(db_path)
+        self.journal_path = Path(journal_path)
+        self.lock = lock if lock is not None else nullcontext() # Cross-process lock guarding the journal
+        self.logger = logger_instance or logging.getLogger(self.__class__.__name__)
+        self._conn_lock = threading.RLock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;") # The journal is the durable copy
+        self._conn.execute(META_SCHEMA)
+        self._migrate()
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.execute(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e: # SQLite built without FTS5 / trigram
+            self.logger.warning(f"FTS5 trigram tokenizer unavailable ({e}); text search will scan.")
+            self._conn.execute(FALLBACK_TEXT_SCHEMA)
+            self.fts = False
+        self.sync()
+
+    def _migrate(self) -> None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row and row[0] == SCHEMA_VERSION:
+            return
+        if row or self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries'").fetchone():
+            self.logger.info(f"Rebuilding {self.db_path} for index schema v{SCHEMA_VERSION}.")
+        for table in ("entries", "entry_tags", "entries_text"):
+            self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self._conn.execute("DELETE FROM meta")
+        self._conn.execute("INSERT INTO meta (key, value) VALUES ('schema_version', ?)", (SCHEMA_VERSION,))
+
+    # --- Journal replay ---
+    def _offset(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'journal_offset'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _journal_records(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'journal_records'").fetchone()
+        return int(row[0]) if row else 0
+
+    def is_behind(self) -> bool:
+        try:
+            size = self.journal_path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        with self._conn_lock:
+            return size != self._offset()
+
+    def sync(self) -> int:
+        """Applies journal records past the stored offset. Returns the number applied."""
+        if not self.is_behind():
+            return 0
+        with self.lock, self._conn_lock:
+            applied = 0
+            try:
+                self._conn.execute("BEGIN IMMEDIATE;")
+                offset = self._offset() # Read inside the write transaction, so concurrent syncers never apply a line twice
+                records = self._journal_records()
+                size = self.journal_path.stat().st_size if self.journal_path.exists() else 0
+                if size < offset:
+                    self.logger.warning(f"{self.journal_path} shrank below the indexed offset; re-importing it.")
+                    for table in ("entries", "entry_tags", "entries_text"):
+                        self._conn.execute(f"DELETE FROM {table}")
+                    offset = records = 0
+                for raw in self._read_from(offset, size):
+                    offset += len(raw)
+                    records += 1
+                    try:
+                        record = json.loads(raw)
+                    except json.JSONDecodeError:
+                        self.logger.warning(f"Skipping malformed line in metadata file: {raw.strip()[:200]!r}")
+                        continue
+                    if isinstance(record, dict):
+                        self._apply(record)
+                        applied += 1
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('journal_offset', ?)", (str(offset),))
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('journal_records', ?)", (str(records),))
+                self._conn.execute("COMMIT;")
+            except Exception:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK;")
+                raise
+            if applied:
+                self.logger.debug(f"Applied {applied} metadata records from {self.journal_path}")
+            return applied
+
+    def _read_from(self, offset: int, size: int) -> Iterable[bytes]:
+        """Complete journal lines from `offset`; a partial last line (still being written) is left for later."""
+        if offset >= size:
+            return
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                yield raw
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op, entry_id = record.get('op'), record.get('id')
+        if not entry_id:
+            return
+        if op == 'delete':
+            self._delete(entry_id)
+        elif op == 'tag':
+            row = self._conn.execute("SELECT body FROM entries WHERE id = ?", (entry_id,)).fetchone()
+            if row:
+                entry = json.loads(row[0])
+                entry['tags'] = record.get('tags', [])
+                self._upsert(entry)
+        elif op is None:
+            self._upsert(record)
+
+    def _delete(self, entry_id: str) -> None:
+        for table in ("entries", "entry_tags", "entries_text"):
+            self._conn.execute(f"DELETE FROM {table} WHERE id = ?", (entry_id,))
+
+    def _upsert(self, entry: Dict[str, Any]) -> None:
+        entry_id = entry['id']
+        ts = normalize_timestamp(entry.get('timestamp'))
+        ts_invalid = int(ts is None and bool(entry.get('timestamp')))
+        row = self._conn.execute("SELECT seq FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        body = json.dumps(entry)
+        sha256 = entry.get('sha256') if isinstance(entry.get('sha256'), str) else None
+        if row:
+            self._conn.execute(
+                "UPDATE entries SET type = ?, agent = ?, ts = ?, ts_invalid = ?, sha256 = ?, body = ? WHERE seq = ?",
+                (entry.get('type'), entry.get('agent'), ts, ts_invalid, sha256, body, row[0])
+            )
+            self._conn.execute("DELETE FROM entry_tags WHERE id = ?", (entry_id,))
+            self._conn.execute("DELETE FROM entries_text WHERE id = ?", (entry_id,))
+        else:
+            self._conn.execute(
+                "INSERT INTO entries (id, type, agent, ts, ts_invalid, sha256, body) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry_id, entry.get('type'), entry.get('agent'), ts, ts_invalid, sha256, body)
+            )
+        tags = {tag for tag in entry.get('tags') or [] if isinstance(tag, str)}
+        self._conn.executemany("INSERT OR IGNORE INTO entry_tags (tag, id) VALUES (?, ?)", [(tag, entry_id) for tag in tags])
+        self._conn.execute("INSERT INTO entries_text (id, text) VALUES (?, ?)", (entry_id, searchable_text(entry)))
+
+    # --- Queries ---
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        self.sync()
+        with self._conn_lock:
+            row = self._conn.execute("SELECT body FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_hash(self, sha256: str) -> List[Dict[str, Any]]:
+        """Live entries whose media content has this sha256, in journal order."""
+        self.sync()
+        with self._conn_lock:
+            rows = self._conn.execute("SELECT body FROM entries WHERE sha256 = ? ORDER BY seq", (sha256,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def __len__(self) -> int:
+        self.sync()
+        with self._conn_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        entry_type: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        since: Optional[str] = None,
+        agent: Optional[str] = None,
+        filters: Optional[Sequence[Dict[str, Any]]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Entries matching every given condition, in journal order.
+
+        `filters` is a list of {"field", "op", "value"} conditions over id, type,
+        agent, timestamp ("==", "!=", "<", "<=", ">", ">=", "in", "not_in"),
+        tags ("contains", "in") and text ("contains"). Raises ValueError on an
+        unknown field or operator.
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        if entry_type:
+            where.append("e.type = ?")
+            params.append(entry_type)
+        if agent:
+            where.append("e.agent = ?")
+            params.append(agent)
+        if since:
+            since_ts = normalize_timestamp(since)
+            if since_ts is None:
+                self.logger.warning(f"Invalid ISO timestamp format for 'since': {since}. Ignoring time filter.")
+            else:
+                where.append("(e.ts >= ? OR e.ts_invalid = 1)")
+                params.append(since_ts)
+        for tag in set(tags or ()):
+            where.append("e.id IN (SELECT id FROM entry_tags WHERE tag = ?)")
+            params.append(tag)
+        if q:
+            where.append(self._text_condition())
+            params.append(_like_pattern(q))
+        for condition in filters or ():
+            clause, values = self._filter_clause(condition)
+            where.append(clause)
+            params.extend(values)
+
+        sql = "SELECT e.body FROM entries e"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        self.sync()
+        with self._conn_lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _text_condition(self) -> str:
+        return "e.id IN (SELECT id FROM entries_text WHERE text LIKE ? ESCAPE '\\')"
+
+    def _filter_clause(self, condition: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        field, op, value = condition.get('field'), condition.get('op', '=='), condition.get('value')
+        if field == 'tags':
+            values = [value] if isinstance(value, str) else list(value or ())
+            if op == 'contains': # Entry carries every given tag
+                return " AND ".join(["e.id IN (SELECT id FROM entry_tags WHERE tag = ?)"] * len(values)) or "1", values
+            if op == 'in': # Entry carries at least one given tag
+                return f"e.id IN (SELECT id FROM entry_tags WHERE tag IN ({','.join('?' * len(values)) or 'NULL'}))", values
+        elif field == 'text' and op == 'contains':
+            return self._text_condition(), [_like_pattern(str(value))]
+        elif field in FILTER_COLUMNS:
+            column = FILTER_COLUMNS[field]
+            convert = normalize_timestamp if field == 'timestamp' else (lambda v: v)
+            if op in ('in', 'not_in'):
+                values = [convert(v) for v in value or ()]
+                negate = "NOT " if op == 'not_in' else ""
+                return f"{column} {negate}IN ({','.join('?' * len(values)) or 'NULL'})", values
+            if op in COMPARISON_OPS:
+                converted = convert(value)
+                if field == 'timestamp' and converted is None:
+                    raise ValueError(f"Invalid timestamp in filter: {value!r}")
+                return f"{column} {COMPARISON_OPS[op]} ?", [converted]
+        raise ValueError(f"Unsupported filter: {condition!r}")
+
+    # --- Maintenance ---
+    def dead_records(self) -> Tuple[int, int]:
+        """(journal records that no longer describe a live entry, total journal records)."""
+        self.sync()
+        with self._conn_lock:
+            total = self._journal_records()
+            live = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return max(0, total - live), total
+
+    def maybe_compact(self, ratio: float = DEFAULT_COMPACT_RATIO, min_records: int = DEFAULT_COMPACT_MIN_RECORDS) -> bool:
+        """Compacts when at least `ratio` of a journal of `min_records`+ records is dead. Returns True if it did."""
+        dead, total = self.dead_records()
+        if total < min_records or not dead or dead < ratio * total:
+            return False
+        self.compact()
+        self.logger.info(f"Compacted {self.journal_path}: dropped {dead} of {total} journal records.")
+        return True
+
+    def compact(self) -> None:
+        """Rewrites the journal as one line per live entry, dropping tag/delete records."""
+        with self.lock, self._conn_lock:
+            self.sync()
+            tmp_path = self.journal_path.with_suffix('.jsonl.tmp')
+            records = 0
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for (body,) in self._conn.execute("SELECT body FROM entries ORDER BY seq"):
+                    f.write(body + "\n")
+                    records += 1
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('journal_offset', ?)",
+                (str(self.journal_path.stat().st_size),)
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('journal_records', ?)", (str(records),))
+
+    def close(self) -> None:
+        with self._conn_lock:
+            self._conn.close()
@@ -0,0 +1,178 @@
+# line_index.py
+# Sidecar byte-offset index for JSON Lines memory files
+
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+INDEX_SUFFIX = ".idx"
+_HEADER = struct.Struct("<Q")  # Number of bytes of the JSONL file covered by the index
+_SCAN_CHUNK = 1 << 20
+
+
+class JsonlLineIndex:
+    """
+    Byte offsets of every line start in one JSONL file, persisted next to it
+    as '<file>.jsonl.idx' (an 8-byte covered-length header followed by one
+    little-endian uint64 offset per line).
+
+    Line numbers are 1-based physical lines, matching the 'filename:line'
+    docids stored in memory_fts. If the JSONL file grew without the sidecar
+    being updated (another writer, a crash between the two writes), only the
+    unindexed tail is scanned; if it shrank, the index is rebuilt.
+    """
+
+    def __init__(self, jsonl_path: Path):
+        self.jsonl_path = Path(jsonl_path)
+        self.index_path = self.jsonl_path.with_name(self.jsonl_path.name + INDEX_SUFFIX)
+        self._offsets = array("Q")
+        self._covered = 0  # Bytes of the JSONL file reflected in _offsets
+        self._lock = threading.Lock()
+        self._load_sidecar()
+
+    # --- Sidecar persistence ---
+    def _load_sidecar(self):
+        if not self.index_path.exists():
+            return
+        try:
+            data = self.index_path.read_bytes()
+            if len(data) < _HEADER.size or (len(data) - _HEADER.size) % self._offsets.itemsize:
+                raise ValueError("truncated index file")
+            (covered,) = _HEADER.unpack_from(data, 0)
+            offsets = array("Q")
+            offsets.frombytes(data[_HEADER.size:])
+            self._offsets, self._covered = offsets, covered
+        except Exception as e:
+            logging.warning(f"[line_index] Ignoring unreadable index {self.index_path.name}: {e}")
+            self._offsets, self._covered = array("Q"), 0
+
+    def _write_sidecar(self):
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(self._covered))
+            self._offsets.tofile(f)
+        os.replace(tmp_path, self.index_path)
+
+    def _append_sidecar(self, new_offsets: array):
+        if not self.index_path.exists():
+            self._write_sidecar()
+            return
+        with open(self.index_path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            new_offsets.tofile(f)
+            f.seek(0)
+            f.write(_HEADER.pack(self._covered))
+
+    # --- Synchronisation with the JSONL file ---
+    def _sync_locked(self):
+        size = self.jsonl_path.stat().st_size if self.jsonl_path.exists() else 0
+        if size == self._covered:
+            return
+        if size < self._covered:
+            logging.info(f"[line_index] {self.jsonl_path.name} shrank; rebuilding offset index.")
+            self._offsets, self._covered = array("Q"), 0
+            rebuilt = True
+        else:
+            rebuilt = False
+
+        new_offsets = array("Q")
+        with open(self.jsonl_path, "rb") as f:
+            # A line starts at 0 and right after every newline that is not the last byte.
+            if self._covered == 0 and size > 0:
+                new_offsets.append(0)
+            pos = self._covered
+            if pos > 0:
+                f.seek(pos - 1)
+                prev_is_newline = f.read(1) == b"\n"
+                if prev_is_newline:
+                    new_offsets.append(pos)
+            f.seek(pos)
+            while pos < size:
+                chunk = f.read(min(_SCAN_CHUNK, size - pos))
+                if not chunk:
+                    break
+                idx = chunk.find(b"\n")
+                while idx != -1:
+                    if pos + idx + 1 < size:
+                        new_offsets.append(pos + idx + 1)
+                    idx = chunk.find(b"\n", idx + 1)
+                pos += len(chunk)
+
+        self._offsets.extend(new_offsets)
+        self._covered = size
+        if rebuilt or not self.index_path.exists():
+            self._write_sidecar()
+        else:
+            self._append_sidecar(new_offsets)
+
+    def refresh(self):
+        """Brings the index up to date with the JSONL file on disk."""
+        with self._lock:
+            self._sync_locked()
+
+    def line_count(self) -> int:
+        with self._lock:
+            self._sync_locked()
+            return len(self._offsets)
+
+    # --- Writing ---
+    def append_line(self, text: str) -> int:
+        """
+        Appends `text` as a new line (newline-prefixed unless the file is empty,
+        matching save_memory's format) and returns its 1-based line number.
+        """
+        with self._lock:
+            self._sync_locked()
+            data = text.encode("utf-8")
+            with open(self.jsonl_path, "ab") as f:
+                start = f.seek(0, os.SEEK_END)
+                prefix = b"\n" if start > 0 else b""
+                f.write(prefix + data)
+            # Index just the bytes written (O(len(text)), never the whole file)
+            self._sync_locked()
+            return len(self._offsets)
+
+    # --- Random access ---
+    def read_lines(self, line_numbers: Iterable[int]) -> Dict[int, Optional[str]]:
+        """
+        Returns {line_number: text} for the requested 1-based lines, reading only
+        those byte ranges through mmap. Out-of-range lines map to None.
+        """
+        wanted = sorted(set(line_numbers))
+        results: Dict[int, Optional[str]] = {}
+        with self._lock:
+            self._sync_locked()
+            offsets = self._offsets
+            size = self._covered
+        if size == 0:
+            return {n: None for n in wanted}
+        with open(self.jsonl_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for n in wanted:
+                if n < 1 or n > len(offsets):
+                    results[n] = None
+                    continue
+                start = offsets[n - 1]
+                end = offsets[n] if n < len(offsets) else size
+                results[n] = mm[start:end].decode("utf-8").rstrip("\r\n")
+        return results
+
+
+# --- Shared per-file indexes ---
+_indexes: Dict[Path, JsonlLineIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_line_index(jsonl_path: Path) -> JsonlLineIndex:
+    """Returns the process-wide JsonlLineIndex for `jsonl_path`, loading its sidecar on first use."""
+    key = Path(jsonl_path).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = JsonlLineIndex(key)
+            _indexes[key] = index
+        return index
@@ -0,0 +1,233 @@
+# media_store.py
+# Chunked, content-addressed media blobs with zero-copy read paths
+
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Union
+
+# --- Defaults ---
+DEFAULT_CHUNK_SIZE = 1 << 20 # 1 MiB per write / read slice
+HASH_ALGORITHM = "sha256"
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+@dataclass(frozen=True)
+class StoredMedia:
+    path: Path
+    sha256: str
+    size: int
+    deduplicated: bool # True if identical content was already stored and reused
+
+
+class _BlobWriter:
+    """Temp file + running hash; `finish` moves the bytes to their content-addressed name."""
+
+    def __init__(self, directory: Path, suffix: str):
+        self.directory = directory
+        self.suffix = suffix
+        self.tmp_path = directory / f".{uuid.uuid4().hex}.part"
+        self.hasher = hashlib.new(HASH_ALGORITHM)
+        self.size = 0
+        self._file = open(self.tmp_path, "wb")
+
+    def write(self, chunk: BytesLike) -> None:
+        self.hasher.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def finish(self, existing: Optional[Callable[[str], Optional[Path]]] = None) -> StoredMedia:
+        self._file.close()
+        digest = self.hasher.hexdigest()
+        reuse = existing(digest) if existing else None
+        if reuse is not None and Path(reuse).exists():
+            self.tmp_path.unlink()
+            return StoredMedia(Path(reuse), digest, self.size, True)
+        target = self.directory / f"{digest}{self.suffix}"
+        if target.exists():
+            self.tmp_path.unlink()
+            return StoredMedia(target, digest, self.size, True)
+        os.replace(self.tmp_path, target) # Same content under the same name, so racing writers are harmless
+        return StoredMedia(target, digest, self.size, False)
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            self.tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class MediaStore:
+    """
+    Writes media into `directory` as `<sha256><suffix>` files.
+
+    Sources are streamed in `chunk_size` pieces (bytes-like objects are sliced
+    as memoryviews, file-like objects are read with readinto into one reusable
+    buffer, iterators are coalesced), hashed while they are written, and then
+    renamed to their digest, so identical content is kept once. `existing`
+    lets the caller map a digest to an already stored copy (e.g. one written
+    under a different suffix) that should be reused instead.
+
+    The async variants run every disk write in a worker thread, so the event
+    loop only ever awaits; async iterators are consumed on the loop and handed
+    to the thread one full chunk at a time.
+    """
+
+    def __init__(self, directory: Path, chunk_size: int = DEFAULT_CHUNK_SIZE, logger_instance: Optional[logging.Logger] = None):
+        self.directory = Path(directory)
+        self.chunk_size = max(1, int(chunk_size))
+        self.logger = logger_instance or logging.getLogger(self.__class__.__name__)
+
+    def _writer(self, filename: str) -> _BlobWriter:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return _BlobWriter(self.directory, Path(filename).suffix.lower())
+
+    # --- Sync ingestion ---
+    def write(self, filename: str, source: Any, existing: Optional[Callable[[str], Optional[Path]]] = None) -> StoredMedia:
+        """Stores `source` (bytes-like, path, file-like with read/readinto, or iterable of bytes)."""
+        return self.stage(filename, source).finish(existing)
+
+    def stage(self, filename: str, source: Any) -> _BlobWriter:
+        """
+        Streams `source` into a temp file and returns the writer; its `finish`
+        picks the stored copy. Lets a caller make that choice and record it
+        under one lock.
+        """
+        writer = self._writer(filename)
+        try:
+            for chunk in self._chunks(source):
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer
+
+    def _chunks(self, source: Any) -> Iterator[BytesLike]:
+        size = self.chunk_size
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source).cast("B")
+            for start in range(0, len(view), size):
+                yield view[start:start + size]
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                yield from self._file_chunks(f)
+        elif hasattr(source, "readinto") or hasattr(source, "read"):
+            yield from self._file_chunks(source)
+        else:
+            yield from self._coalesce(source)
+
+    def _file_chunks(self, f) -> Iterator[BytesLike]:
+        if hasattr(f, "readinto"):
+            buffer = bytearray(self.chunk_size)
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    return
+                yield view[:n] # Consumed before the next readinto reuses the buffer
+        else:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _coalesce(self, chunks) -> Iterator[bytes]:
+        pending = bytearray()
+        for chunk in chunks:
+            pending += chunk
+            while len(pending) >= self.chunk_size:
+                yield bytes(pending[:self.chunk_size])
+                del pending[:self.chunk_size]
+        if pending:
+            yield bytes(pending)
+
+    # --- Async ingestion ---
+    async def awrite(self, filename: str, source: Any, existing: Optional[Callable[[str], Optional[Path]]] = None) -> StoredMedia:
+        """`write` for coroutines; also accepts async iterators of bytes."""
+        writer = await self.astage(filename, source)
+        return await asyncio.to_thread(writer.finish, existing)
+
+    async def astage(self, filename: str, source: Any) -> _BlobWriter:
+        """`stage` for coroutines; also accepts async iterators of bytes."""
+        if not hasattr(source, "__aiter__"):
+            return await asyncio.to_thread(self.stage, filename, source)
+        writer = await asyncio.to_thread(self._writer, filename)
+        try:
+            async for chunk in self._acoalesce(source):
+                await asyncio.to_thread(writer.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(writer.abort)
+            raise
+        return writer
+
+    async def _acoalesce(self, chunks: AsyncIterator[BytesLike]) -> AsyncIterator[bytes]:
+        pending = bytearray()
+        async for chunk in chunks:
+            pending += chunk
+            while len(pending) >= self.chunk_size:
+                yield bytes(pending[:self.chunk_size])
+                del pending[:self.chunk_size]
+        if pending:
+            yield bytes(pending)
+
+
+# --- Zero-copy reads ---
+def iter_media_chunks(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE, offset: int = 0, count: Optional[int] = None) -> Iterator[memoryview]:
+    """
+    Yields read-only memoryview slices of an mmap of `path` (pages come straight
+    from the page cache; nothing is copied into Python bytes).
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if count is None else min(size, offset + count)
+        if offset >= end:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    try:
+        for start in range(offset, end, chunk_size):
+            yield view[start:min(start + chunk_size, end)]
+    finally:
+        view.release()
+        try:
+            mm.close()
+        except BufferError:
+            pass # A consumer still holds the last slice; the map is released with it
+
+
+def send_media(path: Path, out_fd: int, offset: int = 0, count: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Copies `path` to the file descriptor / socket `out_fd` with os.sendfile
+    (kernel-side, no user-space copy) when available, else through an mmap.
+    Returns the number of bytes sent.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if count is None else min(size, offset + count)
+        sent = 0
+        if hasattr(os, "sendfile"):
+            try:
+                while offset + sent < end:
+                    n = os.sendfile(out_fd, f.fileno(), offset + sent, min(chunk_size, end - offset - sent))
+                    if n == 0:
+                        break
+                    sent += n
+                return sent
+            except OSError as e:
+                if sent: # Partial transfer: don't resend what the peer already has
+                    raise
+                logging.getLogger("MediaStore").debug(f"os.sendfile unavailable for fd {out_fd} ({e}); using mmap.")
+    for chunk in iter_media_chunks(path, chunk_size, offset, count):
+        view = chunk
+        while len(view):
+            view = view[os.write(out_fd, view):]
+        sent += len(chunk)
+    return sent
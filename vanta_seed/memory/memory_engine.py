@@ -10,6 +10,16 @@ from pathlib import Path
 from collections import defaultdict
 from typing import List, Dict, Any
 
+from .line_index import get_line_index
+from .memory_index_service import get_index_service
+
+try:
+    # Semantic recall needs NumPy; keyword memory keeps working without it
+    from .vector_index import get_vector_index
+except ImportError as e:
+    get_vector_index = None
+    logging.warning(f"Vector index unavailable ({e}). Memories will not be embedded for ANN recall.")
+
 # --- Configuration & Setup ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # vanta_seed directory
 MEMORY_DIR = os.path.join(BASE_DIR, "memory_storage") # Store JSONL files here
@@ -29,32 +39,24 @@ except OSError as e:
 DB_PATH = Path(__file__).parents[1] / 'memory_storage' / 'memory_index.db'
 JSONL_DIR = Path(__file__).parents[1] / 'memory_storage'
 
-def query_memory_fts(search_term: str, limit: int = 10) -> List[Dict[str, Any]]:
+# Group-commit settings for the FTS writer (see MemoryIndexService)
+FTS_FLUSH_INTERVAL = float(os.getenv("VANTA_FTS_FLUSH_INTERVAL", "0.5")) # Seconds
+FTS_BATCH_SIZE = int(os.getenv("VANTA_FTS_BATCH_SIZE", "256"))           # Rows
+
+def _fts_service():
+    return get_index_service(DB_PATH, flush_interval=FTS_FLUSH_INTERVAL, batch_size=FTS_BATCH_SIZE)
+
+def query_memory_fts_docids(search_term: str, limit: int = 10) -> List[str]:
     """
-    Perform FTS search on memory_index.db and return full original memory records.
+    Perform FTS search on memory_index.db and return ranked docids (filename:linenum).
     """
-    if not DB_PATH.exists():
+    if not DB_PATH.exists() and not _fts_service().pending_count():
         logging.warning(f"FTS index database not found at {DB_PATH}. Cannot perform FTS query.")
         return []
         
-    matched_docids = []
-    conn = None
     try:
-        # Use URI=True for potential future read-only connections if needed
-        conn = sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True) 
-        conn.row_factory = sqlite3.Row 
-
-        sql = '''
-        SELECT docid -- Only need docid to retrieve full record later
-        FROM memory_fts
-        WHERE content MATCH ? 
-        ORDER BY rank -- Default FTS5 ranking
-        LIMIT ?;
-        '''
-        
-        cursor = conn.execute(sql, (search_term, limit))
-        # Fetch all matching docids
-        matched_docids = [row['docid'] for row in cursor.fetchall()]
+        # Borrow a pooled read-only connection from the shared index service
+        return _fts_service().query_docids(search_term, limit)
 
     except sqlite3.Error as e:
         # Log specific SQLite errors
@@ -64,9 +66,12 @@ def query_memory_fts(search_term: str, limit: int = 10) -> List[Dict[str, Any]]:
         # Catch other potential errors
         logging.error(f"Unexpected error during FTS query: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
+
+def query_memory_fts(search_term: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Perform FTS search on memory_index.db and return full original memory records.
+    """
+    matched_docids = query_memory_fts_docids(search_term, limit)
 
     if not matched_docids:
         logging.info(f"FTS query for '{search_term}' returned no matches.")
@@ -80,7 +85,7 @@ def query_memory_fts(search_term: str, limit: int = 10) -> List[Dict[str, Any]]:
 def get_memories_by_docids(docids: List[str]) -> List[Dict[str, Any]]:
     """
     Retrieve full memory records from JSONL files using docid (filename:linenum).
-    Reads all lines of required files then accesses specific lines.
+    Uses each file's sidecar byte-offset index to read only the requested lines.
     """
     if not docids:
         return []
@@ -114,25 +119,22 @@ def get_memories_by_docids(docids: List[str]) -> List[Dict[str, Any]]:
                      results_map[missing_docid] = None # Indicate failure to retrieve
             continue
 
-        logging.debug(f"[get_memories] Reading file: {fname} to retrieve lines: {lines_to_read_set}")
+        logging.debug(f"[get_memories] Reading lines {lines_to_read_set} from {fname} via offset index")
         try:
-            # Read all lines into memory for this file
-            with open(path, 'r', encoding='utf-8') as f:
-                all_lines = f.readlines()
-            
-            file_line_count = len(all_lines)
+            # Seek straight to the requested lines using the file's sidecar offset index
+            line_index = get_line_index(path)
+            lines_by_number = line_index.read_lines(lines_to_read_set)
 
             # Access specific lines
-            for lineno in lines_to_read_set:
+            for lineno, line_content in lines_by_number.items():
                 current_docid = f"{fname}:{lineno}"
-                if lineno > file_line_count:
-                    logging.warning(f"[get_memories] Line number {lineno} exceeds file length ({file_line_count}) for {fname}. Docid: {current_docid}")
+                if line_content is None:
+                    logging.warning(f"[get_memories] Line number {lineno} exceeds file length for {fname}. Docid: {current_docid}")
                     results_map[current_docid] = None # Mark as failed
                     continue
                 
                 try:
-                    # Access line using 0-based index
-                    line_content = all_lines[lineno - 1].strip()
+                    line_content = line_content.strip()
                     logging.debug(f"[get_memories] Content for {current_docid}: '{line_content[:100]}...'")
                     if line_content:
                         parsed_record = json.loads(line_content)
@@ -204,58 +206,38 @@ def save_memory(event_type, details):
         # Ensure the directory exists (redundant if JSONL_DIR is always valid, but safe)
         JSONL_DIR.mkdir(parents=True, exist_ok=True)
 
-        with open(filepath, 'a', encoding='utf-8') as f:
-            # Get current position to check if file is empty/needs newline
-            f.seek(0, os.SEEK_END)
-            is_empty = f.tell() == 0
-            # Construct the prefix (newline or empty string)
-            prefix = '\n' if not is_empty else ''
-            # Write the prefix and the JSON string
-            f.write(f"{prefix}{json_line}")
-
-        # Estimate line number based on newlines - THIS IS NOT ROBUST
-        # A better way is needed if exact line number is critical
-        # For now, we re-read after writing. Consider passing line count if known.
-        logging.debug(f"Saved memory event '{event_type}' to {filepath}")
-
-        # --- NEW: Incremental FTS5 Index Update ---
-        # Determine line number accurately *after* writing
+        # Append through the file's offset index, which assigns the line number
+        # from the indexed line count instead of re-reading the file.
         try:
-            with open(filepath, 'r', encoding='utf-8') as f_check:
-                 # This counts lines accurately but reads the whole file
-                 line_no = sum(1 for line in f_check if line.strip())
-        except Exception as count_e:
-             logging.error(f"Could not count lines in {filepath} to determine docid: {count_e}")
-             raise count_e # Re-raise to indicate failure
+            line_no = get_line_index(filepath).append_line(json_line)
+        except Exception as append_e:
+             logging.error(f"Could not append memory to {filepath}: {append_e}")
+             raise append_e # Re-raise to indicate failure
+        logging.debug(f"Saved memory event '{event_type}' to {filepath} at line {line_no}")
 
+        # --- NEW: Incremental FTS5 Index Update ---
         docid = f"{filepath.name}:{line_no}" # Use filename:line_number
         ts = record["timestamp"]
         et = record["event_type"]
         # Use JSON for dict details, or str() otherwise
         content = json.dumps(details, sort_keys=True) if isinstance(details, dict) else str(details)
 
-        conn_fts = None # Use a different var name to avoid scope issues
         try:
-            # Insert into FTS table
-            conn_fts = sqlite3.connect(DB_PATH)
-            # Use INSERT OR IGNORE to handle potential duplicate docids if logic isn't perfect
-            conn_fts.execute(
-                "INSERT OR IGNORE INTO memory_fts (docid, timestamp, event_type, content) VALUES (?,?,?,?);",
-                (docid, ts, et, content)
-            )
-            conn_fts.commit()
-            logging.debug(f"Updated FTS index for docid {docid}")
-        except sqlite3.Error as fts_e:
-            logging.error(f"Failed to update FTS index for memory {docid}: {fts_e}")
-            # Don't halt execution, just log the FTS failure
+            # Queue for the next group commit on the long-lived WAL writer
+            _fts_service().add(docid, ts, et, content)
+            logging.debug(f"Queued FTS index update for docid {docid}")
         except Exception as e:
-            logging.error(f"Unexpected error updating FTS index for memory {docid}: {e}")
-        finally:
-            if conn_fts:
-                conn_fts.close()
+            logging.error(f"Unexpected error queueing FTS index update for memory {docid}: {e}")
+
+        if get_vector_index is not None:
+            try:
+                # Incremental ANN insert, embedded with the local embedding function
+                get_vector_index(JSONL_DIR / "vector_index").add(docid, f"{et} {content}")
+            except Exception as e:
+                logging.error(f"Failed to add memory {docid} to vector index: {e}")
                 
     except Exception as e:
-        # This catches errors during JSONL write or line counting
+        # This catches errors during the JSONL append
         logging.error(f"Failed to save memory or update FTS index: {e}", exc_info=True)
 
 # --- Retrieve Memory --- 
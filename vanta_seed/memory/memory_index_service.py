@@ -0,0 +1,287 @@
+# memory_index_service.py
+# Long-lived, batched writer and pooled readers for the memory_fts index
+
+import atexit
+import hashlib
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# --- Configuration ---
+DEFAULT_FLUSH_INTERVAL = 0.5 # Seconds between group commits
+DEFAULT_BATCH_SIZE = 256     # Pending rows that trigger an early commit
+DEFAULT_READER_POOL_SIZE = 4
+DEFAULT_BUSY_TIMEOUT = 5.0   # Seconds the writer waits on a locked database per attempt
+RETRY_BASE_DELAY = 0.5       # First backoff after a failed commit; doubles per failure
+RETRY_MAX_DELAY = 30.0
+FAILURE_ALERT_THRESHOLD = 5  # Consecutive failed commits before the service reports itself unhealthy
+
+FTS_SCHEMA = """
+  CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts
+  USING fts5(
+      docid UNINDEXED,          -- e.g. '20250426_memory.jsonl:123'
+      timestamp UNINDEXED,      -- ISO8601 string
+      event_type UNINDEXED,     -- categorical filter
+      content                   -- FTS-indexed JSON details or synthesized text
+  );
+"""
+
+# FTS5 has no unique constraints (and rejects OR IGNORE on rowid conflicts), so each
+# row's rowid is derived from its docid and a row is only inserted if that rowid is
+# absent. The rowid lookup is a b-tree probe, which keeps save_memory and incremental
+# rebuilds from indexing the same line twice without scanning the table.
+INSERT_SQL = """
+INSERT INTO memory_fts (rowid, docid, timestamp, event_type, content)
+SELECT ?1, ?2, ?3, ?4, ?5
+WHERE NOT EXISTS (SELECT 1 FROM memory_fts WHERE rowid = ?1);
+"""
+
+QUERY_SQL = '''
+SELECT docid -- Only need docid to retrieve full record later
+FROM memory_fts
+WHERE content MATCH ?
+ORDER BY rank -- Default FTS5 ranking
+LIMIT ?;
+'''
+
+FtsRow = Tuple[str, str, str, str]
+
+
+def docid_rowid(docid: str) -> int:
+    """Stable, non-negative 63-bit rowid for a docid."""
+    return int.from_bytes(hashlib.blake2b(docid.encode("utf-8"), digest_size=8).digest(), "big") >> 1
+
+
+def keyed_rows(rows: List[FtsRow]) -> List[Tuple[int, str, str, str, str]]:
+    """Prefixes each (docid, timestamp, event_type, content) row with its rowid for INSERT_SQL."""
+    return [(docid_rowid(row[0]), *row) for row in rows]
+
+
+class MemoryIndexService:
+    """
+    Owns the connections to memory_index.db.
+
+    Writes go through one long-lived connection in WAL mode. Rows queued with
+    add() are committed together by a background thread every flush_interval
+    seconds, or as soon as batch_size rows are pending, so a burst of
+    save_memory calls costs one transaction instead of one connect/commit/fsync
+    per memory. Queries borrow a connection from a small pool of read-only
+    connections and flush pending rows first, so a query always sees earlier
+    saves. The JSONL files stay the source of truth; rows still pending at a
+    crash are recovered by build_memory_index.
+
+    A commit that fails (e.g. "database is locked" while a rebuild holds the
+    write lock) puts its rows back at the head of the queue; the flusher
+    retries with exponential backoff, and after FAILURE_ALERT_THRESHOLD
+    consecutive failures `healthy` turns False and every further failure is
+    logged as an error together with the number of rows still waiting.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        reader_pool_size: int = DEFAULT_READER_POOL_SIZE,
+        busy_timeout: float = DEFAULT_BUSY_TIMEOUT
+    ):
+        self.db_path = Path(db_path)
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.reader_pool_size = max(1, reader_pool_size)
+        self.busy_timeout = busy_timeout
+
+        self._pending: List[FtsRow] = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._readers_created = 0
+        self._readers_lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self.last_error: Optional[sqlite3.Error] = None
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="memory-fts-flusher", daemon=True)
+        self._flusher.start()
+
+    # --- Writer ---
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path, timeout=self.busy_timeout, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;") # WAL keeps the DB consistent; fsync at checkpoints
+            conn.execute(FTS_SCHEMA)
+            self._writer = conn
+            logging.info(f"Opened FTS writer connection (WAL) on {self.db_path}")
+        return self._writer
+
+    def add(self, docid: str, timestamp: str, event_type: str, content: str) -> None:
+        """Queues one row for the next group commit."""
+        with self._pending_lock:
+            self._pending.append((docid, timestamp, event_type, content))
+            should_wake = len(self._pending) >= self.batch_size
+        if should_wake:
+            self._wake.set()
+
+    def pending_count(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+    @property
+    def healthy(self) -> bool:
+        """False once FAILURE_ALERT_THRESHOLD commits in a row have failed."""
+        return self._consecutive_failures < FAILURE_ALERT_THRESHOLD
+
+    def flush(self) -> int:
+        """
+        Commits every pending row in a single transaction. Returns the number written.
+        On failure the rows are requeued ahead of anything added meanwhile and 0 is returned.
+        """
+        with self._write_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            try:
+                conn = self._get_writer()
+                conn.execute("BEGIN IMMEDIATE;")
+                conn.executemany(INSERT_SQL, keyed_rows(rows))
+                conn.execute("COMMIT;")
+            except sqlite3.Error as e:
+                self._requeue(rows, e)
+                return 0
+            if self._consecutive_failures:
+                logging.info(f"FTS index commits recovered after {self._consecutive_failures} failed attempt(s)")
+            self._consecutive_failures = 0
+            self._retry_at = 0.0
+            self.last_error = None
+            logging.debug(f"Committed {len(rows)} rows to memory_fts")
+            return len(rows)
+
+    def _requeue(self, rows: List[FtsRow], error: sqlite3.Error) -> None:
+        """Rolls back, puts `rows` back at the head of the queue and schedules a retry."""
+        if self._writer is not None and self._writer.in_transaction:
+            try:
+                self._writer.execute("ROLLBACK;")
+            except sqlite3.Error:
+                pass
+        with self._pending_lock:
+            self._pending[:0] = rows
+            waiting = len(self._pending)
+        self._consecutive_failures += 1
+        self.last_error = error
+        delay = min(RETRY_BASE_DELAY * 2 ** (self._consecutive_failures - 1), RETRY_MAX_DELAY)
+        self._retry_at = time.monotonic() + delay
+        if self.healthy:
+            logging.warning(
+                f"Failed to commit {len(rows)} rows to FTS index ({error}); "
+                f"requeued, retrying in {delay:.1f}s"
+            )
+        else:
+            logging.error(
+                f"FTS index commits have failed {self._consecutive_failures} times in a row ({error}); "
+                f"{waiting} rows waiting, retrying in {delay:.1f}s"
+            )
+
+    def _flush_loop(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if time.monotonic() < self._retry_at:
+                continue # Backing off after a failed commit
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Unexpected error in FTS flush loop: {e}", exc_info=True)
+
+    # --- Readers ---
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if self._readers_created < self.reader_pool_size:
+                self._readers_created += 1
+                try:
+                    conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False)
+                except sqlite3.Error:
+                    self._readers_created -= 1
+                    raise
+                conn.row_factory = sqlite3.Row
+                return conn
+        return self._readers.get()
+
+    def query_docids(self, search_term: str, limit: int = 10) -> List[str]:
+        """Runs an FTS MATCH query on a pooled read-only connection and returns ranked docids."""
+        if self.pending_count():
+            self.flush()
+        conn = self._acquire_reader()
+        try:
+            cursor = conn.execute(QUERY_SQL, (search_term, limit))
+            return [row['docid'] for row in cursor.fetchall()]
+        finally:
+            self._readers.put(conn)
+
+    # --- Lifecycle ---
+    def close(self):
+        """Stops the flusher, commits pending rows and closes all connections."""
+        self._stopped.set()
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        unflushed = self.pending_count()
+        if unflushed:
+            logging.error(
+                f"Closing FTS index service with {unflushed} uncommitted rows ({self.last_error}); "
+                f"run build_memory_index to recover them from the JSONL files"
+            )
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._readers_lock:
+            self._readers_created = 0
+
+
+# --- Shared service ---
+_service: Optional[MemoryIndexService] = None
+_service_lock = threading.Lock()
+
+
+def get_index_service(db_path: Path, **kwargs) -> MemoryIndexService:
+    """Returns the process-wide MemoryIndexService for db_path, creating it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None or _service.db_path != Path(db_path):
+            if _service is not None:
+                _service.close()
+            _service = MemoryIndexService(db_path, **kwargs)
+        return _service
+
+
+def shutdown_index_service():
+    """Flushes and closes the shared service (registered with atexit)."""
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.close()
+            _service = None
+
+
+atexit.register(shutdown_index_service)
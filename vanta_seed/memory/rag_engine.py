@@ -1,35 +1,79 @@
 # vanta_seed/memory/rag_engine.py
 import logging
+from collections import defaultdict
 
 try:
     # Assuming FTS logic is in memory_engine
-    from vanta_seed.memory.memory_engine import query_memory_fts
+    from vanta_seed.memory.memory_engine import (
+        JSONL_DIR, get_memories_by_docids, query_memory_fts, query_memory_fts_docids
+    )
 except ImportError:
     logging.warning("RagEngine could not import FTS query function.")
+    JSONL_DIR = None
     def query_memory_fts(search_term, limit=10):
         print(f"[Dummy FTS] Cannot query: {search_term}")
         return []
+    def query_memory_fts_docids(search_term, limit=10):
+        return []
+    def get_memories_by_docids(docids):
+        return []
+
+try:
+    from vanta_seed.memory.vector_index import get_vector_index
+except ImportError:
+    logging.warning("RagEngine could not import the vector index (NumPy missing?). ANN recall disabled.")
+    get_vector_index = None
+
+RRF_K = 60 # Standard reciprocal rank fusion damping constant
+
+def query_ann_docids(query, k=10):
+    """Queries the local ANN index and returns ranked docids."""
+    if get_vector_index is None:
+        return []
+    index = get_vector_index(JSONL_DIR / "vector_index" if JSONL_DIR else None)
+    # Zero or negative similarity means no shared features with the query
+    return [docid for docid, score in index.search(query, k) if score > 0]
 
-# Placeholder for a generic vector/ANN index query function
-# In reality, this would connect to ChromaDB, Pinecone, FAISS etc.
 def query_ann_index(query, k=10):
-    """Placeholder for querying an Approximate Nearest Neighbor index."""
-    logging.warning("ANN index query is not implemented. Returning empty list.")
-    print(f"[Dummy ANN] Cannot query: {query}")
-    return []
+    """Queries the local Approximate Nearest Neighbor index and returns full memory records."""
+    docids = query_ann_docids(query, k)
+    if not docids:
+        logging.info(f"ANN query for '{query[:50]}' returned no matches.")
+        return []
+    return get_memories_by_docids(docids)
+
+def reciprocal_rank_fusion(ranked_lists, k=10, rrf_k=RRF_K):
+    """Fuses ranked docid lists: score(d) = sum over lists of 1 / (rrf_k + rank)."""
+    scores = defaultdict(float)
+    for ranked in ranked_lists:
+        for rank, docid in enumerate(ranked, start=1):
+            scores[docid] += 1.0 / (rrf_k + rank)
+    return sorted(scores, key=lambda d: scores[d], reverse=True)[:k]
 
 class RagEngine:
-    """Orchestrates hybrid retrieval using FTS and fallback ANN/Vector search."""
-    def __init__(self, fts_index=None, ann_index=None):
+    """
+    Orchestrates retrieval over FTS and the local ANN/vector index.
+
+    mode="fallback" (default) tries FTS first and falls back to ANN;
+    mode="hybrid" runs both and fuses the rankings with reciprocal rank fusion.
+    """
+    def __init__(self, fts_index=None, ann_index=None, mode="fallback", candidate_multiplier=2):
         # Allow passing specific index interfaces or use defaults
         self.fts_query = query_memory_fts
-        self.ann_query = query_ann_index # Use the placeholder
-        logging.info("RagEngine Initialized (using placeholders for ANN).")
+        self.ann_query = query_ann_index
+        self.fts_docid_query = fts_index or query_memory_fts_docids
+        self.ann_docid_query = ann_index or query_ann_docids
+        self.mode = mode
+        self.candidate_multiplier = candidate_multiplier
+        logging.info(f"RagEngine Initialized (mode={mode}).")
 
     def retrieve(self, query, k=10):
-        """Attempts FTS retrieval first, then falls back to semantic ANN search."""
+        """Retrieves memory records for query using the configured mode."""
+        if self.mode == "hybrid":
+            return self.retrieve_hybrid(query, k)
+
         logging.info(f"RagEngine retrieving for query: '{query[:50]}...' (k={k})")
-        
+
         # 1) Try FTS (keyword-based)
         try:
             fts_hits = self.fts_query(query, k)
@@ -50,6 +94,20 @@ class RagEngine:
             logging.error(f"Error during ANN query in RAG engine: {e}")
             return [] # Return empty list on ANN error
 
+    def retrieve_hybrid(self, query, k=10):
+        """Runs FTS and ANN retrieval and fuses both rankings with reciprocal rank fusion."""
+        logging.info(f"RagEngine hybrid retrieval for query: '{query[:50]}...' (k={k})")
+        candidates = max(k, k * self.candidate_multiplier)
+        ranked_lists = []
+        for name, fn in (("FTS", self.fts_docid_query), ("ANN", self.ann_docid_query)):
+            try:
+                ranked_lists.append(fn(query, candidates))
+            except Exception as e:
+                logging.error(f"Error during {name} query in hybrid RAG retrieval: {e}")
+        fused = reciprocal_rank_fusion(ranked_lists, k=k)
+        logging.info(f"Hybrid retrieval fused {sum(len(r) for r in ranked_lists)} candidates into {len(fused)} results.")
+        return get_memories_by_docids(fused) if fused else []
+
 # Example Usage
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -63,5 +121,9 @@ if __name__ == "__main__":
 
     query2 = "semantic meaning of breath"
     results2 = rag_engine.retrieve(query2)
-    print(f"Results for '{query2}': {len(results2)} hits (likely ANN placeholder -> 0)")
-    # print(results2) 
\ No newline at end of file
+    print(f"Results for '{query2}': {len(results2)} hits (ANN over locally embedded memories)")
+    # print(results2)
+
+    hybrid_engine = RagEngine(mode="hybrid")
+    results3 = hybrid_engine.retrieve(query2)
+    print(f"Hybrid results for '{query2}': {len(results3)} hits (FTS + ANN fused by RRF)")
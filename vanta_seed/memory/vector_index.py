@@ -0,0 +1,364 @@
+# vector_index.py
+# Local IVF-flat approximate nearest-neighbour index over memory embeddings
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# --- Configuration ---
+DEFAULT_DIM = 256
+TRAIN_MIN_VECTORS = 1024  # Below this the index is searched exactly (flat)
+RETRAIN_GROWTH = 4        # Re-cluster once the index is this many times larger than at training
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 12
+
+EmbeddingFunction = Callable[[str], np.ndarray]
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def hash_embedding(text: str, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """
+    Local, dependency-free embedding: signed feature hashing of word unigrams
+    and bigrams, L2-normalised. Stable across processes (blake2b, not hash()).
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    tokens = _TOKEN_RE.findall(str(text).lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dim
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vec[bucket] += sign
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file index with exact (flat) scoring inside each probed list.
+
+    On-disk layout in `index_dir`:
+      meta.json        dim, nlist, trained_count (written when the index is created)
+      vectors.f32      float32 rows, appended; memory-mapped on load
+      docids.txt       one docid per row, appended
+      centroids.npy    k-means centroids (once trained)
+      assign.i32       int32 list id per row, appended (once trained)
+
+    Vectors are L2-normalised, so the inner product is cosine similarity.
+    Until TRAIN_MIN_VECTORS rows exist every query is an exact scan.
+
+    Crossing a training threshold in add_vector starts k-means on a snapshot
+    in a background thread; queries keep using the current structure (exact
+    scan, or the previous lists) until the new centroids are installed.
+    train() runs the same fit synchronously, for explicit rebuilds.
+    """
+
+    def __init__(self, index_dir: Path, dim: int = DEFAULT_DIM, embed_fn: Optional[EmbeddingFunction] = None, nprobe: int = DEFAULT_NPROBE):
+        self.index_dir = Path(index_dir)
+        self.dim = dim
+        self.embed_fn: EmbeddingFunction = embed_fn or (lambda text: hash_embedding(text, dim))
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+
+        self._mapped: np.ndarray = np.zeros((0, dim), dtype=np.float32) # Rows persisted at load time
+        self._tail: List[np.ndarray] = []                              # Rows inserted since
+        self._tail_matrix: Optional[np.ndarray] = None
+        self.docids: List[str] = []
+        self._docid_set = set()
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments: List[int] = []
+        self.lists: List[List[int]] = []
+        self.trained_count = 0
+        self._training: Optional[threading.Thread] = None
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    # --- Paths ---
+    @property
+    def _vectors_path(self) -> Path:
+        return self.index_dir / "vectors.f32"
+
+    @property
+    def _docids_path(self) -> Path:
+        return self.index_dir / "docids.txt"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.index_dir / "meta.json"
+
+    @property
+    def _centroids_path(self) -> Path:
+        return self.index_dir / "centroids.npy"
+
+    @property
+    def _assign_path(self) -> Path:
+        return self.index_dir / "assign.i32"
+
+    def __len__(self) -> int:
+        return len(self.docids)
+
+    # --- Loading ---
+    def _load(self):
+        has_meta = self._meta_path.exists()
+        if has_meta:
+            meta = json.loads(self._meta_path.read_text())
+            if meta.get("dim") != self.dim:
+                raise ValueError(f"Vector index at {self.index_dir} has dim {meta.get('dim')}, expected {self.dim}")
+            self.trained_count = meta.get("trained_count", 0)
+        if self._docids_path.exists():
+            self.docids = self._docids_path.read_text(encoding="utf-8").splitlines()
+        row_bytes = self.dim * 4
+        size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        n_rows, torn = divmod(size, row_bytes)
+        # A crash can leave one file a row ahead (or, once the dim is on record, half a row written);
+        # anything else means the rows are not `dim` wide and truncating would destroy the index
+        if (torn and not has_meta) or abs(n_rows - len(self.docids)) > 1:
+            raise ValueError(
+                f"Vector index at {self.index_dir} does not match dim {self.dim}: "
+                f"{size} bytes of vectors for {len(self.docids)} docids"
+            )
+        n = min(n_rows, len(self.docids))
+        if size != n * row_bytes:
+            os.truncate(self._vectors_path, n * row_bytes)
+        if len(self.docids) > n:
+            self.docids = self.docids[:n]
+            self._docids_path.write_text("".join(d + "\n" for d in self.docids), encoding="utf-8")
+        if not has_meta: # Record the dim before the first row, so a later open with another dim is refused
+            self._write_meta(nlist=0)
+        self._docid_set = set(self.docids)
+        if n:
+            self._mapped = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        if self.trained_count and self._centroids_path.exists():
+            self.centroids = np.load(self._centroids_path)
+            assignments = np.fromfile(self._assign_path, dtype=np.int32) if self._assign_path.exists() else np.zeros(0, np.int32)
+            if len(assignments) > n:
+                os.truncate(self._assign_path, n * 4)
+            self.assignments = assignments[:n].tolist()
+            if len(self.assignments) < n: # Rows whose assignment was not persisted
+                missing = self._nearest_lists(np.asarray(self._mapped[len(self.assignments):n]))
+                with open(self._assign_path, "ab") as f:
+                    f.write(missing.tobytes())
+                self.assignments.extend(missing.tolist())
+            self._rebuild_lists()
+        logging.info(f"Vector index loaded from {self.index_dir}: {n} vectors, trained={self.centroids is not None}")
+
+    def _rebuild_lists(self):
+        self.lists = [[] for _ in range(len(self.centroids))]
+        for row, list_id in enumerate(self.assignments):
+            self.lists[list_id].append(row)
+
+    # --- Matrix access ---
+    def _tail_rows(self) -> np.ndarray:
+        if self._tail_matrix is None or len(self._tail_matrix) != len(self._tail):
+            self._tail_matrix = np.vstack(self._tail)
+        return self._tail_matrix
+
+    def _matrix(self) -> np.ndarray:
+        if not self._tail:
+            return self._mapped
+        if len(self._mapped) == 0:
+            return self._tail_rows()
+        return np.vstack([self._mapped, self._tail_rows()])
+
+    def _rows(self, ids: np.ndarray) -> np.ndarray:
+        """Gathers rows for sorted ids from the memory-mapped part and the in-RAM tail."""
+        n_mapped = len(self._mapped)
+        head, tail = ids[ids < n_mapped], ids[ids >= n_mapped] - n_mapped
+        parts = []
+        if len(head):
+            parts.append(np.asarray(self._mapped[head]))
+        if len(tail):
+            parts.append(self._tail_rows()[tail])
+        return np.vstack(parts)
+
+    # --- Inserts ---
+    def add(self, docid: str, text: str) -> bool:
+        """Embeds `text` and appends it under `docid`. Returns False if docid is already indexed."""
+        vector = np.asarray(self.embed_fn(text), dtype=np.float32).reshape(-1)
+        return self.add_vector(docid, vector)
+
+    def add_vector(self, docid: str, vector: np.ndarray) -> bool:
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Expected a vector of dim {self.dim}, got shape {vector.shape}")
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        with self._lock:
+            if docid in self._docid_set:
+                return False
+            with open(self._vectors_path, "ab") as f:
+                f.write(vector.astype(np.float32).tobytes())
+            with open(self._docids_path, "a", encoding="utf-8") as f:
+                f.write(docid + "\n")
+            row = len(self.docids)
+            self.docids.append(docid)
+            self._docid_set.add(docid)
+            self._tail.append(vector.astype(np.float32))
+
+            if self.centroids is not None:
+                list_id = int(self._nearest_lists(vector[None, :])[0])
+                self.assignments.append(list_id)
+                self.lists[list_id].append(row)
+                with open(self._assign_path, "ab") as f:
+                    f.write(np.int32(list_id).tobytes())
+
+            n = len(self.docids)
+            if (self.centroids is None and n >= TRAIN_MIN_VECTORS) or (self.trained_count and n >= self.trained_count * RETRAIN_GROWTH):
+                self._start_background_training()
+            return True
+
+    # --- Training ---
+    def _nearest_lists(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _snapshot(self) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Rows to train on, captured under the lock without copying the memory-mapped part."""
+        with self._lock:
+            return self._mapped, list(self._tail)
+
+    @staticmethod
+    def _fit(mapped: np.ndarray, tail: List[np.ndarray], seed: int) -> Optional[np.ndarray]:
+        """Spherical k-means (nlist ~ sqrt(n)) over the snapshot. Runs without the index lock."""
+        parts = ([np.asarray(mapped)] if len(mapped) else []) + tail
+        if not parts:
+            return None
+        data = parts[0] if len(parts) == 1 else np.vstack(parts)
+        n = len(data)
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(n, size=nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            sums[empty] = data[rng.choice(n, size=int(empty.sum()))] # Re-seed empty clusters
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms > 0, norms, 1.0)
+        return centroids.astype(np.float32)
+
+    def _install(self, centroids: np.ndarray, trained_count: int):
+        """Swaps in new centroids, assigning every row (including ones added during training)."""
+        with self._lock:
+            self.centroids = centroids
+            n = len(self.docids)
+            self.assignments = []
+            for start in range(0, n, 65536):
+                ids = np.arange(start, min(n, start + 65536))
+                self.assignments.extend(self._nearest_lists(self._rows(ids)).tolist())
+            self._rebuild_lists()
+            self.trained_count = trained_count
+
+            np.save(self._centroids_path, self.centroids)
+            np.asarray(self.assignments, dtype=np.int32).tofile(self._assign_path)
+            self._write_meta(nlist=len(centroids))
+            logging.info(f"Vector index trained: {trained_count} vectors into {len(centroids)} lists")
+
+    def _write_meta(self, nlist: int):
+        self._meta_path.write_text(json.dumps({"dim": self.dim, "nlist": nlist, "trained_count": self.trained_count}))
+
+    def train(self, seed: int = 0):
+        """Clusters all current vectors and installs the result, blocking until done."""
+        self._train_snapshot(*self._snapshot(), seed)
+
+    def _train_snapshot(self, mapped: np.ndarray, tail: List[np.ndarray], seed: int = 0):
+        centroids = self._fit(mapped, tail, seed)
+        if centroids is not None:
+            self._install(centroids, len(mapped) + len(tail))
+
+    def _start_background_training(self):
+        """Snapshots the rows and trains on them in a daemon thread, unless a run is already in flight. Caller holds the lock."""
+        if self._training is not None and self._training.is_alive():
+            return
+        self._training = threading.Thread(
+            target=self._train_in_background, args=self._snapshot(), name="vector-index-train", daemon=True
+        )
+        self._training.start()
+
+    def _train_in_background(self, mapped: np.ndarray, tail: List[np.ndarray]):
+        try:
+            self._train_snapshot(mapped, tail)
+        except Exception as e:
+            logging.error(f"Background vector index training failed: {e}", exc_info=True)
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until any background training run finishes. Returns False on timeout."""
+        thread = self._training
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    # --- Queries ---
+    def search(self, text: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Returns up to k (docid, cosine similarity) pairs, best first."""
+        query = np.asarray(self.embed_fn(text), dtype=np.float32).reshape(-1)
+        return self.search_vector(query, k)
+
+    def search_vector(self, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        norm = np.linalg.norm(query)
+        if norm == 0 or k <= 0:
+            return []
+        query = query / norm
+        with self._lock:
+            n = len(self.docids)
+            if n == 0:
+                return []
+            if self.centroids is None:
+                candidate_ids = np.arange(n)
+                scores = np.asarray(self._matrix()) @ query
+            else:
+                probe = min(self.nprobe, len(self.centroids))
+                centroid_scores = self.centroids @ query
+                best_lists = np.argpartition(-centroid_scores, probe - 1)[:probe]
+                candidate_ids = np.fromiter(
+                    (row for list_id in best_lists for row in self.lists[list_id]), dtype=np.int64
+                )
+                if len(candidate_ids) == 0:
+                    return []
+                candidate_ids.sort()
+                scores = self._rows(candidate_ids) @ query
+            top = min(k, len(scores))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            return [(self.docids[int(candidate_ids[i])], float(scores[i])) for i in best]
+
+
+# --- Shared index ---
+DEFAULT_INDEX_DIR = Path(__file__).parents[1] / 'memory_storage' / 'vector_index'
+
+_index: Optional[IVFFlatIndex] = None
+_index_lock = threading.Lock()
+_embed_fn: Optional[EmbeddingFunction] = None
+_embed_dim = DEFAULT_DIM
+
+
+def set_embedding_function(fn: EmbeddingFunction, dim: int):
+    """
+    Plugs in a local embedding function (e.g. a sentence-transformers model).
+    Must be called before the shared index is first used; switching dims needs
+    a fresh index directory.
+    """
+    global _embed_fn, _embed_dim, _index
+    with _index_lock:
+        _embed_fn, _embed_dim, _index = fn, dim, None
+
+
+def get_vector_index(index_dir: Optional[Path] = None) -> IVFFlatIndex:
+    """Returns the process-wide vector index, loading it from disk on first use."""
+    global _index
+    with _index_lock:
+        target = Path(index_dir) if index_dir else DEFAULT_INDEX_DIR
+        if _index is None or _index.index_dir != target:
+            _index = IVFFlatIndex(target, dim=_embed_dim, embed_fn=_embed_fn)
+        return _index
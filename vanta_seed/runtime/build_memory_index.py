@@ -2,13 +2,32 @@
 """
 Script to build (or rebuild) the SQLite FTS5 index for VANTA-SEED memories.
 Reads from JSONL files and populates the memory_index.db.
+
+Two modes:
+  - full (default): builds a shadow table and atomically swaps it in for
+    memory_fts, so queries keep working while the rebuild runs, then runs an
+    incremental pass for lines saved live while it was building (those went
+    into the old table, which the swap drops).
+  - incremental (--incremental): uses the memory_index_manifest table to index
+    only bytes appended since the last run, re-indexing a file from scratch
+    only if it shrank or was rewritten (different inode, or the bytes indexed
+    last time no longer match their fingerprint). Rows are keyed by a rowid
+    derived from their docid, so lines already indexed live by save_memory are
+    skipped with a rowid probe instead of a scan of the table.
+Large inputs are parsed across a process pool and loaded with executemany.
 """
 
 import os
 import json
+import hashlib
 import sqlite3
 import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from vanta_seed.memory.memory_index_service import docid_rowid, keyed_rows
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,93 +39,288 @@ VANTA_SEED_DIR = SCRIPT_DIR.parent
 MEMORY_STORAGE_DIR = VANTA_SEED_DIR / 'memory_storage'
 DB_PATH = MEMORY_STORAGE_DIR / 'memory_index.db'
 
-def build_index():
-    """Builds the FTS5 index from JSONL files."""
-    logger.info(f"Starting FTS index build. Database path: {DB_PATH}")
-    
+FTS_TABLE = 'memory_fts'
+SHADOW_TABLE = 'memory_fts_shadow'
+MANIFEST_TABLE = 'memory_index_manifest'
+
+PARSE_BATCH_LINES = 5000   # Lines per worker task
+PARALLEL_MIN_LINES = 20000 # Below this, parsing in-process beats pool start-up
+INSERT_BATCH_ROWS = 50000  # Rows per executemany / transaction
+FINGERPRINT_WINDOW = 4096  # Bytes hashed at each end of the indexed prefix
+
+def _create_fts_table(cursor, table: str):
+    # Using the schema from the sketch
+    cursor.execute(f"""
+      CREATE VIRTUAL TABLE {table}
+      USING fts5(
+          docid UNINDEXED,          -- e.g. '20250426_memory.jsonl:123'
+          timestamp UNINDEXED,      -- ISO8601 string
+          event_type UNINDEXED,     -- categorical filter
+          content                   -- FTS-indexed JSON details or synthesized text
+      );
+    """)
+
+def _ensure_manifest(cursor):
+    cursor.execute(f"""
+      CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+          filename TEXT PRIMARY KEY,
+          byte_offset INTEGER NOT NULL, -- bytes of the file already indexed
+          line_no INTEGER NOT NULL,     -- 1-based line containing byte_offset
+          mtime REAL NOT NULL,
+          size INTEGER NOT NULL,
+          inode INTEGER,
+          fingerprint TEXT              -- see _fingerprint
+      );
+    """)
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({MANIFEST_TABLE})")}
+    for column, decl in (("inode", "INTEGER"), ("fingerprint", "TEXT")):
+        if column not in columns: # Manifests written before these columns existed
+            cursor.execute(f"ALTER TABLE {MANIFEST_TABLE} ADD COLUMN {column} {decl}")
+
+def _fingerprint(filepath: Path, length: int) -> str:
+    """Hash of the first and last FINGERPRINT_WINDOW bytes of the file's first `length` bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        digest.update(f.read(min(length, FINGERPRINT_WINDOW)))
+        tail_start = max(0, length - FINGERPRINT_WINDOW)
+        f.seek(tail_start)
+        digest.update(f.read(length - tail_start))
+    return digest.hexdigest()
+
+def _uses_docid_rowids(cursor) -> bool:
+    """True if memory_fts rows are keyed by docid_rowid (indexes built before that need a full rebuild)."""
+    row = cursor.execute(f"SELECT rowid, docid FROM {FTS_TABLE} ORDER BY rowid LIMIT 1").fetchone()
+    return row is None or row[0] == docid_rowid(row[1])
+
+def _table_exists(cursor, table: str) -> bool:
+    row = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (table,)).fetchone()
+    return row is not None
+
+# --- Parsing (runs in worker processes) ---
+
+def parse_lines(filename: str, numbered_lines: List[Tuple[int, str]]) -> Tuple[List[Tuple[str, str, str, str]], int]:
+    """Turns (line_no, text) pairs into memory_fts rows. Returns (rows, skipped_count)."""
+    rows = []
+    skipped = 0
+    for i, line in numbered_lines:
+        try:
+            if not line.strip(): continue # Skip empty lines
+            rec = json.loads(line)
+
+            # --- Data Extraction and Preparation ---
+            docid = f"{filename}:{i}"
+            ts = rec.get('timestamp','')
+            et = rec.get('event_type','')
+
+            # Prioritize 'details' for content, fallback to 'content'
+            details_content = rec.get('details')
+            if details_content is None:
+                details_content = rec.get('content', '') # Fallback
+
+            # Serialize if dict, otherwise use string representation
+            if isinstance(details_content, dict):
+                content_for_fts = json.dumps(details_content, sort_keys=True)
+            else:
+                content_for_fts = str(details_content)
+            # --- End Data Extraction ---
+
+            # Basic validation
+            if not ts or not et:
+                logger.warning(f"Skipping line {i} in {filename}: Missing timestamp or event_type.")
+                skipped += 1
+                continue
+
+            rows.append((docid, ts, et, content_for_fts))
+
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping line {i} in {filename}: Invalid JSON.")
+            skipped += 1
+        except Exception as e:
+            logger.error(f"Error processing line {i} in {filename}: {e}")
+            skipped += 1
+    return rows, skipped
+
+# --- Reading new data from a file ---
+
+def read_new_lines(filepath: Path, byte_offset: int, line_no: int) -> Tuple[List[Tuple[int, str]], int, int]:
+    """
+    Reads the file from byte_offset and returns (numbered_lines, new_offset, new_line_no).
+    Line numbers are physical lines, matching save_memory's docids. A final line
+    that is not valid JSON yet (a write in progress) is left for the next run.
+    """
+    with open(filepath, 'rb') as f:
+        at_line_start = byte_offset == 0
+        if byte_offset > 0:
+            f.seek(byte_offset - 1)
+            at_line_start = f.read(1) == b'\n'
+        f.seek(byte_offset)
+        data = f.read()
+
+    if not data:
+        return [], byte_offset, line_no
+
+    parts = data.split(b'\n')
+    numbered: List[Tuple[int, str]] = []
+    consumed = len(data)
+    for j, part in enumerate(parts):
+        if j == 0 and not at_line_start:
+            continue # Tail of a line indexed by the previous run
+        if j == len(parts) - 1 and part.strip():
+            try:
+                json.loads(part)
+            except ValueError:
+                consumed = len(data) - len(part) # Stop at the start of the partial line
+                break
+        numbered.append((line_no + j, part.decode('utf-8', errors='replace')))
+
+    new_offset = byte_offset + consumed
+    new_line_no = line_no + data[:consumed].count(b'\n')
+    return numbered, new_offset, new_line_no
+
+# --- Loading ---
+
+def _parse_all(work: List[Tuple[str, List[Tuple[int, str]]]], workers: Optional[int]) -> Tuple[List[tuple], int]:
+    """Parses every (filename, numbered_lines) batch, across a process pool for large inputs."""
+    batches = []
+    for filename, numbered in work:
+        for start in range(0, len(numbered), PARSE_BATCH_LINES):
+            batches.append((filename, numbered[start:start + PARSE_BATCH_LINES]))
+    total_lines = sum(len(b[1]) for b in batches)
+
+    rows: List[tuple] = []
+    skipped = 0
+    if total_lines >= PARALLEL_MIN_LINES and workers != 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for batch_rows, batch_skipped in pool.map(parse_lines, *zip(*batches)):
+                rows.extend(batch_rows)
+                skipped += batch_skipped
+    else:
+        for filename, numbered in batches:
+            batch_rows, batch_skipped = parse_lines(filename, numbered)
+            rows.extend(batch_rows)
+            skipped += batch_skipped
+    return rows, skipped
+
+def _insert_rows(conn, table: str, rows: List[tuple], skip_existing: bool = False):
+    """Inserts rows keyed by docid_rowid; skip_existing leaves docids already in `table` alone."""
+    if skip_existing:
+        sql = (f"INSERT INTO {table} (rowid, docid, timestamp, event_type, content) SELECT ?1, ?2, ?3, ?4, ?5 "
+               f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE rowid = ?1)")
+    else:
+        sql = f"INSERT INTO {table} (rowid, docid, timestamp, event_type, content) VALUES (?, ?, ?, ?, ?)"
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        with conn: # One transaction per large batch
+            conn.executemany(sql, keyed_rows(rows[start:start + INSERT_BATCH_ROWS]))
+
+def _connect() -> sqlite3.Connection:
+    MEMORY_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL;") # Readers keep working during long writes
+    return conn
+
+def build_index(incremental: bool = False, workers: Optional[int] = None):
+    """Builds the FTS5 index from JSONL files (full shadow-table rebuild unless incremental)."""
+    mode = "incremental" if incremental else "full"
+    logger.info(f"Starting {mode} FTS index build. Database path: {DB_PATH}")
+
     conn = None
+    catch_up = False
     try:
-        # Ensure storage directory exists
-        MEMORY_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-        
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
-        
-        logger.info("Dropping existing FTS table (if any)...")
-        cursor.execute('''DROP TABLE IF EXISTS memory_fts;''')
-        
-        logger.info("Creating new FTS5 table 'memory_fts'...")
-        # Using the schema from the sketch
-        cursor.execute("""
-          CREATE VIRTUAL TABLE memory_fts
-          USING fts5(
-              docid UNINDEXED,          -- e.g. '20250426_memory.jsonl:123'
-              timestamp UNINDEXED,      -- ISO8601 string
-              event_type UNINDEXED,     -- categorical filter
-              content                   -- FTS-indexed JSON details or synthesized text
-          );
-        """)
-        
-        jsonl_files = list(MEMORY_STORAGE_DIR.glob('*.jsonl'))
+        _ensure_manifest(cursor)
+        conn.commit()
+
+        jsonl_files = sorted(MEMORY_STORAGE_DIR.glob('*.jsonl'))
         if not jsonl_files:
             logger.warning(f"No *.jsonl memory files found in {MEMORY_STORAGE_DIR}. Index will be empty.")
-            return
 
-        logger.info(f"Found {len(jsonl_files)} JSONL file(s) to process.")
-        total_records_processed = 0
-        total_records_inserted = 0
+        if incremental and not _table_exists(cursor, FTS_TABLE):
+            logger.info(f"No '{FTS_TABLE}' table yet; falling back to a full build.")
+            incremental = False
+        elif incremental and not _uses_docid_rowids(cursor):
+            logger.info(f"'{FTS_TABLE}' predates docid-keyed rowids; falling back to a full build.")
+            incremental = False
 
+        manifest: Dict[str, tuple] = {}
+        if incremental:
+            for fname, offset, line_no, mtime, size, inode, fingerprint in cursor.execute(
+                f"SELECT filename, byte_offset, line_no, mtime, size, inode, fingerprint FROM {MANIFEST_TABLE}"
+            ):
+                manifest[fname] = (offset, line_no, mtime, size, inode, fingerprint)
+
+        # --- Work out what needs reading ---
+        work = []            # (filename, numbered_lines)
+        new_manifest = {}    # filename -> (offset, line_no, mtime, size, inode, fingerprint)
+        reset_files = []     # files whose existing rows must be dropped (incremental only)
         for filepath in jsonl_files:
-            logger.info(f"Processing file: {filepath.name}...")
-            records_in_file = 0
+            stat = filepath.stat()
+            offset, line_no = 0, 1
+            if incremental and filepath.name in manifest:
+                prev_offset, prev_line_no, prev_mtime, _, prev_inode, prev_fingerprint = manifest[filepath.name]
+                rewritten = (
+                    stat.st_size < prev_offset
+                    or stat.st_ino != prev_inode
+                    or prev_fingerprint is None
+                    or (stat.st_mtime != prev_mtime and _fingerprint(filepath, prev_offset) != prev_fingerprint)
+                )
+                if rewritten:
+                    logger.info(f"{filepath.name} shrank or was rewritten; re-indexing it from scratch.")
+                    reset_files.append(filepath.name)
+                elif stat.st_size == prev_offset:
+                    continue # Unchanged
+                else:
+                    offset, line_no = prev_offset, prev_line_no
+
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    for i, line in enumerate(f, start=1):
-                        total_records_processed += 1
-                        records_in_file += 1
-                        try:
-                            if not line.strip(): continue # Skip empty lines
-                            rec = json.loads(line)
-                            
-                            # --- Data Extraction and Preparation ---
-                            docid = f"{filepath.name}:{i}"
-                            ts = rec.get('timestamp','')
-                            et = rec.get('event_type','')
-                            
-                            # Prioritize 'details' for content, fallback to 'content'
-                            details_content = rec.get('details')
-                            if details_content is None:
-                                details_content = rec.get('content', '') # Fallback
-                                
-                            # Serialize if dict, otherwise use string representation
-                            if isinstance(details_content, dict):
-                                content_for_fts = json.dumps(details_content, sort_keys=True)
-                            else:
-                                content_for_fts = str(details_content)
-                            # --- End Data Extraction ---
-
-                            # Basic validation
-                            if not ts or not et:
-                                logger.warning(f"Skipping line {i} in {filepath.name}: Missing timestamp or event_type.")
-                                continue
-                                
-                            cursor.execute("INSERT INTO memory_fts (docid, timestamp, event_type, content) VALUES (?, ?, ?, ?)", 
-                                           (docid, ts, et, content_for_fts))
-                            total_records_inserted += 1
-                            
-                        except json.JSONDecodeError:
-                            logger.warning(f"Skipping line {i} in {filepath.name}: Invalid JSON.")
-                        except Exception as e:
-                            logger.error(f"Error processing line {i} in {filepath.name}: {e}")
-                            
+                numbered, new_offset, new_line_no = read_new_lines(filepath, offset, line_no)
             except Exception as e:
                 logger.error(f"Error reading file {filepath.name}: {e}")
-                
-            logger.info(f"Finished processing {filepath.name} ({records_in_file} lines).")
+                continue
+            logger.info(f"Processing file: {filepath.name} ({len(numbered)} new lines from byte {offset})...")
+            work.append((filepath.name, numbered))
+            new_manifest[filepath.name] = (
+                new_offset, new_line_no, stat.st_mtime, stat.st_size, stat.st_ino, _fingerprint(filepath, new_offset)
+            )
 
-        logger.info("Committing changes to the database...")
-        conn.commit()
-        logger.info(f"Index build complete. Total records processed: {total_records_processed}, Total records inserted: {total_records_inserted}")
+        rows, skipped = _parse_all(work, workers)
+
+        if incremental:
+            # Files that disappeared since the last run lose their rows and manifest entries
+            removed_files = set(manifest) - {p.name for p in jsonl_files}
+            with conn:
+                for fname in [*reset_files, *removed_files]:
+                    conn.execute(f"DELETE FROM {FTS_TABLE} WHERE docid LIKE ?", (f"{fname}:%",))
+                for fname in removed_files:
+                    conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE filename = ?", (fname,))
+            # save_memory indexes live through MemoryIndexService, so skip docids already present.
+            _insert_rows(conn, FTS_TABLE, rows, skip_existing=True)
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {MANIFEST_TABLE} (filename, byte_offset, line_no, mtime, size, inode, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(fname, *state) for fname, state in new_manifest.items()]
+                )
+        else:
+            logger.info(f"Building shadow table '{SHADOW_TABLE}'...")
+            with conn:
+                conn.execute(f"DROP TABLE IF EXISTS {SHADOW_TABLE};")
+                _create_fts_table(conn.cursor(), SHADOW_TABLE)
+            _insert_rows(conn, SHADOW_TABLE, rows)
+
+            logger.info(f"Swapping '{SHADOW_TABLE}' in as '{FTS_TABLE}'...")
+            with conn: # Atomic: readers see either the old or the new table
+                conn.execute("BEGIN IMMEDIATE;") # DDL does not open a transaction implicitly
+                conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE};")
+                conn.execute(f"ALTER TABLE {SHADOW_TABLE} RENAME TO {FTS_TABLE};")
+                conn.execute(f"DELETE FROM {MANIFEST_TABLE};")
+                conn.executemany(
+                    f"INSERT INTO {MANIFEST_TABLE} (filename, byte_offset, line_no, mtime, size, inode, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(fname, *state) for fname, state in new_manifest.items()]
+                )
+            catch_up = True
+
+        total_lines = sum(len(numbered) for _, numbered in work)
+        logger.info(f"Index build complete ({mode}). Lines processed: {total_lines}, rows loaded: {len(rows)}, skipped: {skipped}")
 
     except sqlite3.Error as e:
         logger.error(f"SQLite error during index build: {e}")
@@ -116,6 +330,14 @@ def build_index():
         if conn:
             logger.info("Closing database connection.")
             conn.close()
+    if catch_up:
+        # save_memory appends to the JSONL files before indexing, so lines saved since they were read are past the manifest offsets
+        logger.info("Catching up on memories saved while the full build ran...")
+        build_index(incremental=True, workers=workers)
 
 if __name__=='__main__':
-    build_index() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the VANTA-SEED memory FTS index.")
+    parser.add_argument("--incremental", action="store_true", help="Index only data added since the last build")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    args = parser.parse_args()
+    build_index(incremental=args.incremental, workers=args.workers)